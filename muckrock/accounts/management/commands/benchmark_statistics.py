@@ -0,0 +1,79 @@
+"""
+Benchmark the queries and time used to compute the nightly statistics
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Standard Library
+import random
+from datetime import date
+
+# MuckRock
+from muckrock.accounts.statistics import StatisticsContext, engine
+from muckrock.core.benchmark import measure
+
+STATUSES = ['submitted', 'ack', 'processed', 'fix', 'payment', 'done']
+
+
+class Command(BaseCommand):
+    """Compute the statistics one metric group at a time, reporting the
+    number of queries and wall time spent on each"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Create this many requests, with tasks and crowdfunds, '
+            'before benchmarking.  All seeded data is rolled back afterwards.',
+        )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            if kwargs['seed']:
+                with measure('seed') as seeding:
+                    self.seed(kwargs['seed'])
+                self.stdout.write(unicode(seeding))
+            self.benchmark()
+            transaction.set_rollback(True)
+
+    def seed(self, num):
+        """Seed the database with test data"""
+        # factories are a development dependency, only import them if needed
+        from muckrock.core.factories import CrowdfundFactory
+        from muckrock.foia.factories import FOIARequestFactory
+        from muckrock.task.factories import (
+            FlaggedTaskFactory,
+            ResponseTaskFactory,
+        )
+        for _ in xrange(num):
+            foia = FOIARequestFactory(status=random.choice(STATUSES))
+            FlaggedTaskFactory(foia=foia)
+            ResponseTaskFactory(communication__foia=foia)
+            if random.random() < 0.1:
+                foia.crowdfund = CrowdfundFactory()
+                foia.save()
+
+    def benchmark(self):
+        """Time each metric group"""
+        context = StatisticsContext(date.today())
+        measurements = []
+        for group in engine.groups:
+            with measure(', '.join(sorted(group.names))[:60]) as measurement:
+                group.compute(context)
+            measurements.append(measurement)
+        for measurement in sorted(
+            measurements, key=lambda m: m.seconds, reverse=True
+        ):
+            self.stdout.write(unicode(measurement))
+        self.stdout.write(
+            'Total: %d metrics, %d queries, %.3fs' % (
+                len(engine.names),
+                sum(m.queries for m in measurements),
+                sum(m.seconds for m in measurements),
+            )
+        )
@@ -0,0 +1,595 @@
+"""
+Engine for computing the nightly site statistics
+
+Each metric is declared once, as part of a group of metrics which can be
+computed together by a single query.  This keeps the number of queries needed
+to build a Statistics row small and independent of the number of metrics.
+"""
+
+# Django
+from django.contrib.auth.models import User
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When
+from django.utils import timezone
+
+# Standard Library
+from datetime import date, datetime, time, timedelta
+
+# MuckRock
+from muckrock.accounts.models import Profile
+from muckrock.agency.models import Agency
+from muckrock.crowdfund.models import Crowdfund, CrowdfundPayment
+from muckrock.crowdsource.models import Crowdsource, CrowdsourceResponse
+from muckrock.foia.models import (
+    FOIACommunication,
+    FOIAComposer,
+    FOIAFile,
+    FOIARequest,
+)
+from muckrock.foiamachine.models import FoiaMachineRequest
+from muckrock.jurisdiction.models import (
+    ExampleAppeal,
+    Exemption,
+    InvokedExemption,
+)
+from muckrock.news.models import Article
+from muckrock.organization.models import Organization
+from muckrock.project.models import Project
+from muckrock.task.models import (
+    CrowdfundTask,
+    FailedFaxTask,
+    FlaggedTask,
+    NewAgencyTask,
+    OrphanTask,
+    PortalTask,
+    RejectedEmailTask,
+    ResponseTask,
+    ReviewAgencyTask,
+    SnailMailTask,
+    Task,
+)
+
+# account types which are broken out in the statistics
+ACCT_TYPES = ('pro', 'basic', 'beta', 'proxy', 'admin')
+
+
+class StatisticsContext(object):
+    """The dates the statistics are being computed for"""
+
+    def __init__(self, today):
+        midnight = time(tzinfo=timezone.get_current_timezone())
+        self.today = today
+        self.end = datetime.combine(today, midnight)
+        self.start = self.end - timedelta(1)
+
+    @property
+    def range(self):
+        """The range of datetimes covered by these statistics"""
+        return (self.start, self.end)
+
+
+def count_if(condition, distinct=False):
+    """Count the rows matching a condition"""
+    return Count(Case(When(condition, then=F('pk'))), distinct=distinct)
+
+
+def undeferred(context):
+    """Condition for a task not being deferred"""
+    return Q(date_deferred__lte=context.today) | Q(date_deferred=None)
+
+
+def unpack(value, context):
+    """Metrics and querysets may depend on the context they are computed in"""
+    if callable(value):
+        return value(context)
+    return value
+
+
+class MetricGroup(object):
+    """Base class for a set of metrics computed together"""
+
+    def __init__(self, queryset=None):
+        self.queryset = queryset
+
+    def get_queryset(self, context):
+        """Get the queryset to compute the metrics over"""
+        return unpack(self.queryset, context).all()
+
+    @property
+    def names(self):
+        """The names of the metrics in this group"""
+        raise NotImplementedError
+
+    def compute(self, context):
+        """Compute the metrics, returns a dictionary of metric values"""
+        raise NotImplementedError
+
+
+class AggregateGroup(MetricGroup):
+    """Metrics computed with a single aggregate query over a queryset"""
+
+    def __init__(self, queryset, **metrics):
+        super(AggregateGroup, self).__init__(queryset)
+        self.metrics = metrics
+
+    @property
+    def names(self):
+        return self.metrics.keys()
+
+    def compute(self, context):
+        return self.get_queryset(context).aggregate(
+            **{
+                name: unpack(metric, context)
+                for name, metric in self.metrics.iteritems()
+            }
+        )
+
+
+class GroupedCount(MetricGroup):
+    """Count the rows for each value of a field with a single GROUP BY query"""
+
+    def __init__(self, queryset, field, metrics, total=None):
+        super(GroupedCount, self).__init__(queryset)
+        self.field = field
+        # maps values of the field to the name of the metric counting them
+        self.metrics = metrics
+        self.total = total
+
+    @property
+    def names(self):
+        names = list(self.metrics.values())
+        if self.total is not None:
+            names.append(self.total)
+        return names
+
+    def compute(self, context):
+        counts = dict(
+            self.get_queryset(context).order_by()
+            .values_list(self.field).annotate(Count('pk'))
+        )
+        values = {
+            name: counts.get(value, 0)
+            for value, name in self.metrics.iteritems()
+        }
+        if self.total is not None:
+            values[self.total] = sum(counts.itervalues())
+        return values
+
+
+class QueryMetric(MetricGroup):
+    """A single metric which needs its own query"""
+
+    def __init__(self, name, func):
+        super(QueryMetric, self).__init__()
+        self.name = name
+        self.func = func
+
+    @property
+    def names(self):
+        return [self.name]
+
+    def compute(self, context):
+        return {self.name: self.func(context)}
+
+
+class Constants(MetricGroup):
+    """Metrics which are no longer tracked but are kept for historical data"""
+
+    def __init__(self, **metrics):
+        super(Constants, self).__init__()
+        self.metrics = metrics
+
+    @property
+    def names(self):
+        return self.metrics.keys()
+
+    def compute(self, context):
+        return dict(self.metrics)
+
+
+class StatisticsEngine(object):
+    """A registry of metric groups which together build a Statistics row"""
+
+    def __init__(self):
+        self.groups = []
+
+    def register(self, group):
+        """Register a metric group"""
+        duplicates = set(group.names).intersection(self.names)
+        if duplicates:
+            raise ValueError(
+                'Metrics already registered: %s' %
+                ', '.join(sorted(duplicates))
+            )
+        self.groups.append(group)
+        return group
+
+    @property
+    def names(self):
+        """The names of all registered metrics"""
+        return [name for group in self.groups for name in group.names]
+
+    def compute(self, today=None):
+        """Compute all registered metrics for the day before `today`"""
+        context = StatisticsContext(today or date.today())
+        values = {}
+        for group in self.groups:
+            values.update(group.compute(context))
+        return values
+
+
+engine = StatisticsEngine()
+register = engine.register
+
+
+def status_metrics(prefix, statuses):
+    """Map statuses to metric names"""
+    return {status: '%s_%s' % (prefix, name) for status, name in statuses}
+
+
+def task_metrics(kind, **extra):
+    """Total, unresolved and deferred counts for a task model"""
+    kind = '%s_' % kind if kind else ''
+    extra.update({
+        'total_%stasks' % kind:
+            Count('pk'),
+        'total_unresolved_%stasks' % kind:
+            lambda c: count_if(Q(resolved=False) & undeferred(c)),
+        'total_deferred_%stasks' % kind:
+            lambda c: count_if(Q(date_deferred__gt=c.today)),
+    })
+    return extra
+
+
+def crowdfund_owner_metrics():
+    """Total and open crowdfund counts by the account type of their owner"""
+    metrics = {}
+    for acct_type in ACCT_TYPES:
+        owner = (
+            Q(foia__composer__user__profile__acct_type=acct_type)
+            | Q(projects__contributors__profile__acct_type=acct_type)
+        )
+        # a crowdfund may be reached through multiple project contributors
+        metrics['total_crowdfunds_%s' % acct_type] = count_if(
+            owner, distinct=True
+        )
+        metrics['open_crowdfunds_%s' % acct_type] = count_if(
+            owner & Q(closed=False), distinct=True
+        )
+    return metrics
+
+
+# the range of percentages funded closed crowdfunds are bucketed into
+CROWDFUND_BUCKETS = [(low, low + 25) for low in xrange(0, 200, 25)]
+
+ORG_USER = Q(
+    composer__user__profile__organization__active=True,
+    composer__user__profile__organization__monthly_cost__gt=0,
+)
+
+REQUEST_STATUSES = [
+    ('done', 'success'),
+    ('rejected', 'denied'),
+    ('submitted', 'submitted'),
+    ('ack', 'awaiting_ack'),
+    ('processed', 'awaiting_response'),
+    ('appealing', 'awaiting_appeal'),
+    ('fix', 'fix_required'),
+    ('payment', 'payment_required'),
+    ('no_docs', 'no_docs'),
+    ('partial', 'partial'),
+    ('abandoned', 'abandoned'),
+    ('lawsuit', 'lawsuit'),
+]
+
+# Requests
+register(
+    GroupedCount(
+        FOIARequest.objects.all(),
+        'status',
+        status_metrics('total_requests', REQUEST_STATUSES),
+        total='total_requests',
+    )
+)
+register(AggregateGroup(FOIARequest.objects.all(), total_fees=Sum('price')))
+register(
+    QueryMetric(
+        'requests_processing_days',
+        lambda c: FOIARequest.objects.get_processing_days(),
+    )
+)
+register(
+    AggregateGroup(
+        lambda c: FOIARequest.objects.get_submitted_range(c.start, c.end),
+        daily_requests_org=count_if(ORG_USER),
+        **{
+            'daily_requests_%s' % acct_type: count_if(
+                Q(composer__user__profile__acct_type=acct_type) & ~ORG_USER
+            )
+            for acct_type in ACCT_TYPES
+        }
+    )
+)
+register(
+    GroupedCount(
+        FOIAComposer.objects.all(),
+        'status',
+        {
+            'started': 'total_composers_draft',
+            'submitted': 'total_composers_submitted',
+            'filed': 'total_composers_filed',
+        },
+        total='total_composers',
+    )
+)
+
+# Communications
+register(
+    AggregateGroup(
+        lambda c: FOIACommunication.objects.
+        filter(datetime__range=c.range, response=False),
+        sent_communications_portal=Count('portals', distinct=True),
+        sent_communications_email=Count('emails', distinct=True),
+        sent_communications_fax=Count('faxes', distinct=True),
+        sent_communications_mail=Count('mails', distinct=True),
+    )
+)
+register(
+    AggregateGroup(
+        FOIACommunication.objects.filter(foia=None),
+        orphaned_communications=Count('pk'),
+    )
+)
+register(AggregateGroup(FOIAFile.objects.all(), total_pages=Sum('pages')))
+
+# FOIA Machine
+register(
+    GroupedCount(
+        FoiaMachineRequest.objects.all(),
+        'status',
+        status_metrics(
+            'machine_requests',
+            REQUEST_STATUSES + [('started', 'draft')],
+        ),
+        total='machine_requests',
+    )
+)
+
+# Users
+register(
+    AggregateGroup(
+        User.objects.all(),
+        total_users=Count('pk'),
+        total_users_excluding_agencies=count_if(
+            ~Q(profile__acct_type='agency')
+        ),
+    )
+)
+register(
+    AggregateGroup(
+        User.objects.filter(composers__isnull=False),
+        total_users_filed=Count('pk', distinct=True),
+    )
+)
+register(
+    AggregateGroup(
+        User.objects.filter(projects__isnull=False),
+        project_users=Count('pk', distinct=True),
+        **{
+            'project_users_%s' % acct_type:
+            count_if(Q(profile__acct_type=acct_type), distinct=True)
+            for acct_type in ACCT_TYPES
+        }
+    )
+)
+register(
+    AggregateGroup(
+        Profile.objects.all(),
+        pro_users=count_if(Q(acct_type='pro')),
+        total_active_org_members=count_if(
+            Q(organization__active=True, organization__monthly_cost__gt=0)
+        ),
+    )
+)
+register(
+    QueryMetric(
+        'pro_user_names',
+        lambda c: ';'.join(
+            Profile.objects.filter(acct_type='pro')
+            .values_list('user__username', flat=True)
+        ),
+    )
+)
+register(
+    AggregateGroup(
+        Organization.objects.filter(active=True, monthly_cost__gt=0),
+        total_active_orgs=Count('pk'),
+    )
+)
+
+# Agencies
+register(
+    AggregateGroup(
+        Agency.objects.all(),
+        total_agencies=Count('pk'),
+        unapproved_agencies=count_if(Q(status='pending')),
+        portal_agencies=count_if(Q(portal__isnull=False)),
+    )
+)
+
+# News
+register(
+    AggregateGroup(
+        lambda c: Article.objects.filter(pub_date__range=c.range),
+        daily_articles=Count('pk'),
+    )
+)
+
+# Tasks
+register(AggregateGroup(Task.objects.all(), **task_metrics('')))
+register(AggregateGroup(OrphanTask.objects.all(), **task_metrics('orphan')))
+register(
+    AggregateGroup(
+        SnailMailTask.objects.all(),
+        unresolved_snailmail_appeals=lambda c:
+        count_if(Q(resolved=False, category='a') & undeferred(c)),
+        **task_metrics('snailmail')
+    )
+)
+register(
+    AggregateGroup(RejectedEmailTask.objects.all(), **task_metrics('rejected'))
+)
+register(AggregateGroup(FlaggedTask.objects.all(), **task_metrics('flagged')))
+register(
+    QueryMetric(
+        'flag_processing_days',
+        lambda c: FlaggedTask.objects.get_processing_days(),
+    )
+)
+register(
+    AggregateGroup(NewAgencyTask.objects.all(), **task_metrics('newagency'))
+)
+register(
+    AggregateGroup(
+        ResponseTask.objects.all(),
+        daily_robot_response_tasks=lambda c: count_if(
+            Q(
+                date_done__gte=c.start,
+                date_done__lt=c.end,
+                resolved_by__profile__acct_type='robot',
+            )
+        ),
+        **task_metrics('response')
+    )
+)
+register(AggregateGroup(FailedFaxTask.objects.all(), **task_metrics('faxfail')))
+register(
+    AggregateGroup(
+        CrowdfundTask.objects.all(), **task_metrics('crowdfundpayment')
+    )
+)
+register(
+    AggregateGroup(
+        ReviewAgencyTask.objects.all(), **task_metrics('reviewagency')
+    )
+)
+register(AggregateGroup(PortalTask.objects.all(), **task_metrics('portal')))
+
+# Crowdfunds
+register(
+    AggregateGroup(
+        Crowdfund.objects.all(),
+        total_crowdfunds=Count('pk'),
+        open_crowdfunds=count_if(Q(closed=False)),
+    )
+)
+register(AggregateGroup(Crowdfund.objects.all(), **crowdfund_owner_metrics()))
+register(
+    GroupedCount(
+        Crowdfund.objects.filter(closed=True).annotate(
+            percent=F('payment_received') / F('payment_required')
+        ).annotate(
+            bucket=Case(
+                When(percent=0, then=Value('closed_crowdfunds_0')),
+                When(
+                    percent__gt=2,
+                    then=Value('closed_crowdfunds_200'),
+                ),
+                *[
+                    When(
+                        percent__gt=low / 100.0,
+                        percent__lte=high / 100.0,
+                        then=Value('closed_crowdfunds_%d_%d' % (low, high)),
+                    ) for low, high in CROWDFUND_BUCKETS
+                ],
+                output_field=CharField()
+            )
+        ),
+        'bucket',
+        {
+            name: name
+            for name in ['closed_crowdfunds_0', 'closed_crowdfunds_200'] + [
+                'closed_crowdfunds_%d_%d' % bucket
+                for bucket in CROWDFUND_BUCKETS
+            ]
+        },
+    )
+)
+register(
+    AggregateGroup(
+        CrowdfundPayment.objects.all(),
+        total_crowdfund_payments=Count('pk'),
+        total_crowdfund_payments_loggedin=count_if(Q(user__isnull=False)),
+        total_crowdfund_payments_loggedout=count_if(Q(user=None)),
+    )
+)
+
+# Projects
+register(
+    AggregateGroup(
+        Project.objects.all(),
+        public_projects=count_if(Q(private=False, approved=True)),
+        private_projects=count_if(Q(private=True, approved=True)),
+        unapproved_projects=count_if(Q(approved=False)),
+    )
+)
+register(
+    AggregateGroup(
+        Project.objects.filter(crowdfunds__isnull=False),
+        crowdfund_projects=Count('pk', distinct=True),
+    )
+)
+
+# Exemptions
+register(AggregateGroup(Exemption.objects.all(), total_exemptions=Count('pk')))
+register(
+    AggregateGroup(
+        InvokedExemption.objects.all(),
+        total_invoked_exemptions=Count('pk'),
+    )
+)
+register(
+    AggregateGroup(
+        ExampleAppeal.objects.all(),
+        total_example_appeals=Count('pk'),
+    )
+)
+
+# Crowdsources
+register(
+    GroupedCount(
+        Crowdsource.objects.all(),
+        'status',
+        {
+            'draft': 'total_draft_crowdsources',
+            'open': 'total_open_crowdsources',
+            'close': 'total_close_crowdsources',
+        },
+        total='total_crowdsources',
+    )
+)
+register(
+    AggregateGroup(
+        CrowdsourceResponse.objects.all(),
+        num_crowdsource_responded_users=Count('user', distinct=True),
+        total_crowdsource_responses=Count('pk'),
+        **{
+            'crowdsource_responses_%s' % acct_type:
+            count_if(Q(user__profile__acct_type=acct_type))
+            for acct_type in ACCT_TYPES
+        }
+    )
+)
+
+# Metrics which are no longer tracked
+register(
+    Constants(
+        total_requests_draft=0,
+        stale_agencies=0,
+        total_generic_tasks=0,
+        total_unresolved_generic_tasks=0,
+        total_deferred_generic_tasks=0,
+        total_staleagency_tasks=0,
+        total_unresolved_staleagency_tasks=0,
+        total_deferred_staleagency_tasks=0,
+    )
+)
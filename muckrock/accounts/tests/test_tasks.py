@@ -3,13 +3,17 @@ Tests tasks for the Accounts application
 """
 
 # Django
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 # Third Party
-from nose.tools import eq_
+from nose.tools import assert_raises, eq_, ok_
 
 # MuckRock
-from muckrock.accounts import models, tasks
+from muckrock.accounts import models, statistics, tasks
+from muckrock.foia.factories import FOIARequestFactory
+from muckrock.task.factories import FlaggedTaskFactory
 
 
 class TestStatisticsTask(TestCase):
@@ -24,3 +28,41 @@ class TestStatisticsTask(TestCase):
             new_stat_count, stat_count + 1,
             'A new Statistics object should be created.'
         )
+
+    def test_stats_values(self):
+        """Metrics computed by grouped queries should match the data"""
+        foia = FOIARequestFactory(status='done')
+        FOIARequestFactory(status='done')
+        FOIARequestFactory(status='rejected')
+        FlaggedTaskFactory(foia=foia)
+        tasks.store_statistics()
+        stats = models.Statistics.objects.last()
+        eq_(stats.total_requests, 3)
+        eq_(stats.total_requests_success, 2)
+        eq_(stats.total_requests_denied, 1)
+        eq_(stats.total_requests_lawsuit, 0)
+        eq_(stats.total_flagged_tasks, 1)
+        eq_(stats.total_unresolved_flagged_tasks, 1)
+        eq_(stats.total_deferred_flagged_tasks, 0)
+        eq_(stats.total_requests_draft, 0)
+
+    def test_stats_queries(self):
+        """The number of queries should not grow with the number of metrics"""
+        with CaptureQueriesContext(connection) as queries:
+            tasks.store_statistics()
+        ok_(
+            len(queries) < len(statistics.engine.groups) + 5,
+            'Statistics took %d queries' % len(queries),
+        )
+        ok_(len(statistics.engine.names) > 3 * len(statistics.engine.groups))
+
+
+class TestStatisticsEngine(TestCase):
+    """Test registering metrics with the statistics engine"""
+
+    def test_duplicate_metric(self):
+        """Metrics may only be registered once"""
+        engine = statistics.StatisticsEngine()
+        engine.register(statistics.Constants(foo=0))
+        with assert_raises(ValueError):
+            engine.register(statistics.Constants(foo=1, bar=2))
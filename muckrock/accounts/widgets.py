@@ -23,8 +23,8 @@ from smart_open import smart_open
 
 # MuckRock
 from muckrock.accounts.models import Profile, Statistics
+from muckrock.core.caching import shared_cache
 from muckrock.core.models import ExtractDay
-from muckrock.core.utils import cache_get_or_set
 from muckrock.crowdsource.models import CrowdsourceResponse
 from muckrock.foia.models import FOIAFile, FOIARequest
 from muckrock.project.models import Project
@@ -493,7 +493,7 @@ class PageViewsWidget(NumberWidget):
             except KeyError:
                 return 'Error'
 
-        return cache_get_or_set('dashboard:pageviews', inner, 60 * 5)
+        return shared_cache.get_or_set('dashboard:pageviews', inner, 60 * 5)
 
 
 class ProjectCountWidget(NumberWidget):
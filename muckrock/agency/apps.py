@@ -15,6 +15,11 @@ class AgencyConfig(AppConfig):
         # pylint: disable=invalid-name
         from actstream import registry as action
         from watson import search
+        from muckrock.core.search import register
         Agency = self.get_model('Agency')
         action.register(Agency)
         search.register(Agency.objects.get_approved())
+        register(
+            Agency,
+            [('name', 'A'), ('aliases', 'B'), ('public_notes', 'C')],
+        )
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-06 11:02
+from __future__ import unicode_literals
+
+import datetime
+from decimal import Decimal
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agency', '0019_auto_20180515_1508'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgencyStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('status_counts', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('done', models.PositiveIntegerField(default=0)),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('response_time_total', models.DurationField(default=datetime.timedelta)),
+                ('response_time_count', models.PositiveIntegerField(default=0)),
+                ('fees_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('fees_count', models.PositiveIntegerField(default=0)),
+                ('pages', models.PositiveIntegerField(default=0)),
+                ('datetime_updated', models.DateTimeField(auto_now=True)),
+                ('agency', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='agency.Agency')),
+            ],
+            options={
+                'verbose_name_plural': 'agency stats',
+            },
+        ),
+    ]
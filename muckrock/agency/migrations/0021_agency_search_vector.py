@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-28 14:05
+from __future__ import unicode_literals
+
+# Django
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agency', '0020_agencystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agency',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='agency',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector'], name='agency_agen_search__25ee7f_gin'
+            ),
+        ),
+    ]
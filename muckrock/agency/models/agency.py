@@ -4,6 +4,8 @@ Agency Model
 
 # Django
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.urlresolvers import reverse
 from django.db import models
 from django.db.models import Q
@@ -21,7 +23,11 @@ from easy_thumbnails.fields import ThumbnailerImageField
 # MuckRock
 from muckrock.accounts.models import Profile
 from muckrock.accounts.utils import unique_username
-from muckrock.jurisdiction.models import Jurisdiction, RequestHelper
+from muckrock.jurisdiction.models import (
+    Jurisdiction,
+    RequestHelper,
+    RequestStats,
+)
 from muckrock.task.models import NewAgencyTask
 
 logger = logging.getLogger(__name__)
@@ -192,6 +198,7 @@ class Agency(models.Model, RequestHelper):
     exempt = models.BooleanField(default=False)
     exempt_note = models.CharField(max_length=255, blank=True)
     requires_proxy = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = AgencyQuerySet.as_manager()
 
@@ -236,6 +243,11 @@ class Agency(models.Model, RequestHelper):
         """Just returns the foiareqest_set value. Used for compatability with RequestHeper mixin"""
         return self.foiarequest_set
 
+    def compute_stats(self):
+        """Compute the stats for this agency's requests"""
+        from muckrock.jurisdiction.stats import compute_stats
+        return AgencyStats(agency=self, **compute_stats(self.get_requests()))
+
     def get_user(self):
         """Get the agency user for this agency"""
         try:
@@ -331,4 +343,20 @@ class Agency(models.Model, RequestHelper):
 
     class Meta:
         verbose_name_plural = 'agencies'
+        indexes = [GinIndex(fields=['search_vector'])]
         permissions = (('view_emails', 'Can view private contact information'),)
+
+
+class AgencyStats(RequestStats):
+    """Statistics for the requests filed with an agency"""
+    agency = models.OneToOneField(
+        Agency,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+
+    def __unicode__(self):
+        return u'Stats for %s' % self.agency
+
+    class Meta:
+        verbose_name_plural = 'agency stats'
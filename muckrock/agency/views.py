@@ -152,7 +152,7 @@ class AgencyViewSet(viewsets.ModelViewSet):
     # pylint: disable=too-many-public-methods
     queryset = (
         Agency.objects.order_by('id').select_related(
-            'jurisdiction', 'parent', 'appeal_agency'
+            'jurisdiction', 'parent', 'appeal_agency', 'stats'
         ).prefetch_related('types')
     )
     serializer_class = AgencySerializer
@@ -0,0 +1 @@
+default_app_config = 'muckrock.business_days.apps.BusinessDaysConfig'
@@ -0,0 +1,15 @@
+"""
+App config for business days
+"""
+
+# Django
+from django.apps import AppConfig
+
+
+class BusinessDaysConfig(AppConfig):
+    """Configures the business days application"""
+    name = 'muckrock.business_days'
+
+    def ready(self):
+        """Connect the signal handlers"""
+        import muckrock.business_days.signals  # pylint: disable=unused-import,unused-variable
@@ -2,11 +2,14 @@
 Models for the Business Days application
 """
 # Django
+from django.core.cache import cache
 from django.db import models
 
 # Standard Library
+import time
+from bisect import bisect_left, bisect_right
 from calendar import monthrange
-from datetime import timedelta
+from datetime import date, timedelta
 
 # Third Party
 from pascha import computus, traditions
@@ -14,6 +17,16 @@ from pascha import computus, traditions
 JAN, FEB, MAR, APR, MAY, JUN, JUL, AUG, SEP, OCT, NOV, DEC = range(1, 13)
 MON, TUES, WEDS, THURS, FRI, SAT, SUN = range(0, 7)
 
+# easter dates by year, these never change so are safe to cache forever
+_easter_dates = {}
+
+
+def western_easter(year):
+    """The date of western easter for the given year"""
+    if year not in _easter_dates:
+        _easter_dates[year] = computus.western(None, year=year).date()
+    return _easter_dates[year]
+
 
 class Holiday(models.Model):
     """A holiday"""
@@ -87,8 +100,7 @@ class Holiday(models.Model):
 
     def match(self, date_, observe_sat):
         """Is the given date an instance of this Holiday?"""
-        table = dict((k, getattr(self, '_match_%s' % k)) for k, _ in self.kinds)
-        return table[self.kind](date_, observe_sat)
+        return getattr(self, '_match_%s' % self.kind)(date_, observe_sat)
 
     def _match_date(self, date_, observe_sat):
         """match for date type holidays"""
@@ -122,7 +134,7 @@ class Holiday(models.Model):
     def _match_easter(self, date_, _):
         """match for easter based dates"""
         return date_ == traditions.Western.offset[self.name] + \
-            computus.western(None, year=date_.year).date()
+            western_easter(date_.year)
 
     def _match_election(self, date_, _):
         """match for election day"""
@@ -130,12 +142,71 @@ class Holiday(models.Model):
                date_.day >= 2 and date_.day <= 8
 
 
+class BusinessDayIndexCache(object):
+    """Cache the sorted ordinals of the business days in a year for each
+    calendar, both in process and in the shared cache
+
+    All indexes share a version number stored in the shared cache, which is
+    incremented whenever holidays change, so that every process stops using
+    its stale indexes
+    """
+    version_key = 'business_days:version'
+    timeout = 60 * 60 * 24
+
+    def __init__(self):
+        self.version = None
+        self.indexes = {}
+
+    def get_version(self):
+        """Get the current version of the indexes"""
+        version = cache.get(self.version_key)
+        if version is None:
+            # start from the current time so that indexes cached under an
+            # evicted version number are never reused
+            version = int(time.time())
+            cache.add(self.version_key, version, None)
+            version = cache.get(self.version_key, version)
+        return version
+
+    def get(self, calendar_key, year, compute):
+        """Get the index for a calendar and year, computing it if needed"""
+        version = self.get_version()
+        if version != self.version:
+            self.indexes = {}
+            self.version = version
+        key = (calendar_key, year)
+        if key not in self.indexes:
+            cache_key = 'business_days:%s:%s:%d' % (version, calendar_key, year)
+            index = cache.get(cache_key)
+            if index is None:
+                index = compute(year)
+                cache.set(cache_key, index, self.timeout)
+            self.indexes[key] = index
+        return self.indexes[key]
+
+    def invalidate(self):
+        """Holidays have changed, invalidate all indexes"""
+        self.indexes = {}
+        self.version = None
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, int(time.time()), None)
+
+
+index_cache = BusinessDayIndexCache()
+
+
 class HolidayCalendar(object):
     """A set of holidays"""
 
-    def __init__(self, holidays, observe_sat):
+    def __init__(self, holidays, observe_sat, cache_key=None):
         self.holidays = holidays
         self.observe_sat = observe_sat
+        # calendars with a cache key share their business day indexes
+        # across calendar instances and processes
+        self.cache_key = cache_key
+        self._indexes = {}
 
     def is_holiday(self, date_):
         """Is given date a holiday?"""
@@ -148,41 +219,77 @@ class HolidayCalendar(object):
     def is_business_day(self, date_):
         """Is the given date a business day?"""
 
-        weekday = date_.weekday()
-        if weekday == SAT or weekday == SUN:
-            return False
-
-        return not self.is_holiday(date_)
+        index = self._get_index(date_.year)
+        i = bisect_left(index, date_.toordinal())
+        return i < len(index) and index[i] == date_.toordinal()
 
     def business_days_from(self, date_, num):
         """Returns the date n business days from the given date"""
 
-        # could be optimized
-        delta = timedelta(1 if num >= 0 else -1)
-        num = abs(num)
-
-        while num:
-            date_ += delta
-            if self.is_business_day(date_):
-                num -= 1
-        return date_
+        year = date_.year
+        index = self._get_index(year)
+        if num >= 0:
+            # i is the position of the first business day after date_
+            i = bisect_right(index, date_.toordinal())
+            while num and i + num > len(index):
+                num -= len(index) - i
+                year += 1
+                index = self._get_index(year)
+                i = 0
+            return date.fromordinal(index[i + num - 1]) if num else date_
+        else:
+            num = -num
+            # i is the number of business days before date_ in its year
+            i = bisect_left(index, date_.toordinal())
+            while i < num:
+                num -= i
+                year -= 1
+                index = self._get_index(year)
+                i = len(index)
+            return date.fromordinal(index[i - num])
 
     def business_days_between(self, date_a, date_b):
         """How many business days are between the given dates?"""
 
-        # could be optimized
         sign = 1
         if date_a > date_b:
             date_a, date_b = date_b, date_a
             sign = -1
 
+        # count business days after date_a, up to and including date_b
         num = 0
-        while date_a < date_b:
-            date_a += timedelta(1)
-            if self.is_business_day(date_a):
-                num += 1
+        for year in xrange(date_a.year, date_b.year + 1):
+            index = self._get_index(year)
+            num += (
+                bisect_right(index, date_b.toordinal()) -
+                bisect_right(index, date_a.toordinal())
+            )
         return num * sign
 
+    def _get_index(self, year):
+        """Get the sorted ordinals of all business days in the given year"""
+        if year not in self._indexes:
+            if self.cache_key is None:
+                self._indexes[year] = self._compute_index(year)
+            else:
+                self._indexes[year] = index_cache.get(
+                    self.cache_key, year, self._compute_index
+                )
+        return self._indexes[year]
+
+    def _compute_index(self, year):
+        """Compute the sorted ordinals of all business days in a year"""
+        holidays = list(self.holidays)
+        date_ = date(year, 1, 1)
+        index = []
+        while date_.year == year:
+            if date_.weekday() not in (SAT, SUN) and not any(
+                holiday.match(date_, self.observe_sat) for holiday in holidays
+            ):
+                index.append(date_.toordinal())
+            date_ += timedelta(1)
+        return index
+
 
 class Calendar(object):
     """A set of holidays"""
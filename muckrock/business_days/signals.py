@@ -0,0 +1,28 @@
+"""Model signal handlers for the Business Days application"""
+
+# Django
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.business_days.models import Holiday, index_cache
+
+# pylint: disable=unused-argument
+
+
+def holiday_changed(sender, **kwargs):
+    """Invalidate business day indexes when a holiday is changed"""
+    transaction.on_commit(index_cache.invalidate)
+
+
+post_save.connect(
+    holiday_changed,
+    sender=Holiday,
+    dispatch_uid='muckrock.business_days.signals.holiday_save',
+)
+
+post_delete.connect(
+    holiday_changed,
+    sender=Holiday,
+    dispatch_uid='muckrock.business_days.signals.holiday_delete',
+)
@@ -10,9 +10,11 @@ from datetime import date
 
 # Third Party
 import nose.tools
+from mock import patch
 
 # MuckRock
 from muckrock.business_days.models import Calendar, Holiday
+from muckrock.core.test_utils import run_on_commit
 from muckrock.jurisdiction.factories import FederalJurisdictionFactory
 
 
@@ -61,6 +63,7 @@ class TestBusinessDayUnit(TestCase):
             weekday=3,
         )
         usa = FederalJurisdictionFactory()
+        self.usa = usa
         usa.holidays.set([
             self.new_years,
             self.mlk_day,
@@ -139,3 +142,53 @@ class TestBusinessDayUnit(TestCase):
                 date(2010, 11, 1), date(2010, 12, 1)
             ), 30
         )
+
+    def test_business_days_from_across_years(self):
+        """Test business_days_from across the end of the year"""
+
+        nose.tools.eq_(
+            self.usa_cal.business_days_from(date(2010, 12, 30), 2),
+            date(2011, 1, 4)
+        )
+        nose.tools.eq_(
+            self.usa_cal.business_days_from(date(2011, 1, 4), -2),
+            date(2010, 12, 30)
+        )
+        nose.tools.eq_(
+            self.usa_cal.business_days_from(date(2010, 12, 15), -30),
+            date(2010, 11, 1)
+        )
+
+    def test_business_days_between_across_years(self):
+        """Test business_days_between across the end of the year"""
+
+        nose.tools.eq_(
+            self.usa_cal.business_days_between(
+                date(2010, 12, 30), date(2011, 1, 4)
+            ), 2
+        )
+        nose.tools.eq_(
+            self.usa_cal.business_days_between(
+                date(2011, 1, 4), date(2010, 12, 30)
+            ), -2
+        )
+
+    @patch('django.db.transaction.on_commit', run_on_commit)
+    def test_holiday_change_invalidates(self):
+        """Adding a holiday should be reflected in new calendars"""
+
+        usa = self.usa
+        nose.tools.assert_true(
+            usa.get_calendar().is_business_day(date(2011, 7, 5))
+        )
+        usa.holidays.add(
+            Holiday.objects.create(
+                name='Day After Independence Day',
+                kind='date',
+                month=7,
+                day=5,
+            )
+        )
+        nose.tools.assert_false(
+            usa.get_calendar().is_business_day(date(2011, 7, 5))
+        )
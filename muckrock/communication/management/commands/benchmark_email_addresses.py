@@ -0,0 +1,99 @@
+"""
+Benchmark the queries and time used to resolve the addresses of inbound email
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# MuckRock
+from muckrock.communication.models import EmailAddress, email_cache
+from muckrock.core.benchmark import measure
+
+
+def fetch_each(*addresses):
+    """Fetch the addresses one at a time, as they were before being fetched
+    in bulk"""
+    return [EmailAddress.objects.fetch(a) for a in addresses]
+
+
+class Command(BaseCommand):
+    """Resolve the addresses of simulated inbound emails one at a time and in
+    bulk, reporting the number of queries and wall time spent per email"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--addresses',
+            type=int,
+            default=10,
+            help='The number of To, Cc and From addresses on each email',
+        )
+        parser.add_argument(
+            '--emails',
+            type=int,
+            default=100,
+            help='The number of emails to resolve.  All created addresses are '
+            'rolled back afterwards.',
+        )
+
+    def handle(self, *args, **kwargs):
+        # pylint: disable=attribute-defined-outside-init
+        self.num_addresses = kwargs['addresses']
+        self.num_emails = kwargs['emails']
+        with transaction.atomic():
+            for label, fetch in (
+                ('one at a time', fetch_each),
+                ('bulk', EmailAddress.objects.fetch_many),
+            ):
+                email_cache.clear()
+                self.benchmark(label, fetch, cache=False)
+            self.benchmark('bulk', EmailAddress.objects.fetch_many, cache=True)
+            email_cache.clear()
+            transaction.set_rollback(True)
+
+    def headers(self, prefix):
+        """The address headers for an email"""
+        return [
+            'Name {1} <{0}-{1}@example.com>'.format(prefix, i)
+            for i in xrange(self.num_addresses)
+        ]
+
+    def benchmark(self, label, fetch, cache):
+        """Time fetching the addresses of new senders and of senders who have
+        been seen before"""
+        if not cache:
+            with measure('%s, new addresses' % label) as measurement:
+                for i in xrange(self.num_emails):
+                    fetch(*self.headers('%s-%d' % (label, i)))
+            self.report(measurement)
+        headers = self.headers('%s-seen' % label)
+        addresses = fetch(*headers)
+        if cache:
+            # the cache is only filled once the addresses are committed, so
+            # fill it directly within the benchmark's transaction
+            for email_address in addresses:
+                email_cache.set(
+                    email_address.email,
+                    (
+                        email_address.pk, email_address.name,
+                        email_address.status
+                    ),
+                )
+        with measure(
+            '%s, seen addresses%s' % (label, ', cached' if cache else '')
+        ) as measurement:
+            for _ in xrange(self.num_emails):
+                fetch(*headers)
+        self.report(measurement)
+
+    def report(self, measurement):
+        """Report the measurement per email"""
+        self.stdout.write(
+            '%s: %.1f queries, %.2fms per email' % (
+                measurement.label,
+                float(measurement.queries) / self.num_emails,
+                1000 * measurement.seconds / self.num_emails,
+            )
+        )
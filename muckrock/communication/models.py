@@ -4,12 +4,15 @@ Models for keeping track of how we send and receive communications
 """
 
 # Django
+from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.core.validators import validate_email
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Exists, OuterRef
 from django.forms import ValidationError
 
 # Standard Library
+from collections import OrderedDict
 from email.utils import getaddresses, parseaddr
 
 # Third Party
@@ -19,6 +22,7 @@ from localflavor.us.us_states import STATE_CHOICES
 from phonenumber_field.modelfields import PhoneNumberField
 
 # MuckRock
+from muckrock.core.utils import LRUCache
 from muckrock.mailgun.models import WhitelistDomain
 
 PHONE_TYPES = (
@@ -26,6 +30,33 @@ PHONE_TYPES = (
     ('phone', 'Phone'),
 )
 
+# government domains are always allowed to post to requests
+GOVERNMENT_SUFFIXES = frozenset([
+    '.%s.us' % a.lower()
+    for (a, _) in STATE_CHOICES
+    if a not in ('AS', 'DC', 'GU', 'MP', 'PR', 'VI')
+] + ['.gov', '.mil'])
+
+# hot email address -> (pk, name, status) mappings, per worker process.
+# They expire quickly, as other processes may change the name or status.
+email_cache = LRUCache(
+    settings.EMAIL_ADDRESS_CACHE_SIZE,
+    settings.EMAIL_ADDRESS_CACHE_SECONDS,
+)
+
+
+def is_government_domain(domain):
+    """Is the domain under any known government TLD?"""
+    labels = domain.lower().split('.')
+    # the suffixes are one or two labels long, and must be preceded by
+    # at least one more label
+    return any(
+        '.' + '.'.join(labels[-length:]) in GOVERNMENT_SUFFIXES
+        for length in (1, 2)
+        if len(labels) > length
+    )
+
+
 # Address models
 
 
@@ -39,17 +70,12 @@ class EmailAddressQuerySet(models.QuerySet):
             email = self._normalize_email(email)
         except ValidationError:
             return None
-        email_address, _ = self.update_or_create(
-            email=email,
-            defaults={'name': name},
-        )
-        return email_address
+        return self.resolve([(name, email)])[0]
 
     def fetch_many(self, *addresses, **kwargs):
         """Fetch multiple email address objects based on an email header"""
-        name_emails = getaddresses(addresses)
-        addresses = []
-        for name, email in name_emails:
+        name_emails = []
+        for name, email in getaddresses(addresses):
             try:
                 email = self._normalize_email(email)
             except ValidationError:
@@ -57,12 +83,90 @@ class EmailAddressQuerySet(models.QuerySet):
                     continue
                 else:
                     raise
-            email_address, _ = self.update_or_create(
-                email=email,
-                defaults={'name': name},
+            name_emails.append((name, email))
+        return self.resolve(name_emails)
+
+    def resolve(self, name_emails):
+        """Get or create the email address objects for a list of
+        (name, normalized email) pairs, updating their names if they have
+        changed.  The objects are returned in the same order.
+
+        Addresses are looked up in the per process cache first, then the
+        rest are selected in a single query, and any which are missing are
+        inserted in a single upsert.
+        """
+        # if an address appears more than once, the last name given wins,
+        # as it would if they were saved one at a time
+        names = OrderedDict()
+        for name, email in name_emails:
+            names[email] = name
+        if not names:
+            return []
+
+        found = {}
+        for email in names:
+            cached = email_cache.get(email)
+            if cached is not None:
+                found[email] = self._build(email, *cached)
+        missing = [e for e in names if e not in found]
+        if missing:
+            for email_address in self.filter(email__in=missing):
+                found[email_address.email] = email_address
+        for email, email_address in found.iteritems():
+            if email_address.name != names[email]:
+                email_address.name = names[email]
+                self.filter(pk=email_address.pk).update(name=names[email])
+        missing = [(e, names[e]) for e in names if e not in found]
+        if missing:
+            found.update(self._upsert(missing))
+
+        addresses = [found[e] for e in names]
+        transaction.on_commit(lambda: self._cache(addresses), using=self.db)
+        return [found[email] for _, email in name_emails]
+
+    def _upsert(self, name_emails):
+        """Insert the missing addresses in a single query.  If another process
+        inserted any of them in the meantime, update their names instead."""
+        # pylint: disable=protected-access
+        table = self.model._meta.db_table
+        sql = (
+            'INSERT INTO {table} (email, name, status) VALUES {values} '
+            'ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name '
+            'RETURNING id, email, name, status'.format(
+                table=table,
+                values=', '.join(['(%s, %s, %s)'] * len(name_emails)),
+            )
+        )
+        params = []
+        for email, name in name_emails:
+            params.extend([email, name, 'good'])
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return {
+            email: self._build(email, pk, name, status)
+            for pk, email, name, status in rows
+        }
+
+    def _build(self, email, pk, name, status):
+        """Build an email address object without querying the database"""
+        return self.model.from_db(
+            self.db,
+            ['id', 'email', 'name', 'status'],
+            [pk, email, name, status],
+        )
+
+    @staticmethod
+    def _cache(addresses):
+        """Remember the addresses once they have been committed"""
+        for email_address in addresses:
+            email_cache.set(
+                email_address.email, (
+                    email_address.pk,
+                    email_address.name,
+                    email_address.status,
+                )
             )
-            addresses.append(email_address)
-        return addresses
 
     @staticmethod
     def _normalize_email(email):
@@ -97,6 +201,18 @@ class EmailAddress(models.Model):
         """The url for this email address"""
         return reverse('email-detail', kwargs={'idx': self.pk})
 
+    def save(self, *args, **kwargs):
+        """Drop the cached copy of this address when it changes"""
+        # pylint: disable=arguments-differ
+        super(EmailAddress, self).save(*args, **kwargs)
+        email_cache.delete(self.email)
+
+    def delete(self, *args, **kwargs):
+        """Drop the cached copy of this address when it is deleted"""
+        # pylint: disable=arguments-differ
+        email_cache.delete(self.email)
+        return super(EmailAddress, self).delete(*args, **kwargs)
+
     @property
     def domain(self):
         """The domain part of the email address"""
@@ -104,44 +220,60 @@ class EmailAddress(models.Model):
             return ''
         return self.email.rsplit('@', 1)[1]
 
-    def allowed(self, foia=None):
-        """Is this email address allowed to post to this FOIA request?"""
+    def allowed_reason(self, foia=None):
+        """Why is this email address allowed to post to this FOIA request?
+        Returns one of 'foia domain', 'government', 'whitelist', 'agency' or
+        'cc', or None if it is not allowed."""
         # pylint: disable=too-many-return-statements
         from muckrock.agency.models import AgencyEmail
 
-        allowed_tlds = [
-            '.%s.us' % a.lower()
-            for (a, _) in STATE_CHOICES
-            if a not in ('AS', 'DC', 'GU', 'MP', 'PR', 'VI')
-        ]
-        allowed_tlds.extend(['.gov', '.mil'])
-
         # from the same domain as the FOIA email
         if foia and foia.email and self.domain == foia.email.domain:
-            return True
-
-        # the email is a known email for this FOIA's agency
-        if foia and self.agencies.filter(pk=foia.agency_id).exists():
-            return True
-
-        # the email is a known email for this FOIA
-        if foia and foia.cc_emails.filter(email=self).exists():
-            return True
+            return 'foia domain'
 
         # it is from any known government TLD
-        if any(self.email.endswith(tld) for tld in allowed_tlds):
-            return True
+        if is_government_domain(self.domain):
+            return 'government'
+
+        # check the email domain against the whitelist
+        if self.domain.lower() in WhitelistDomain.objects.domains():
+            return 'whitelist'
 
         # if not associated with any FOIA,
         # checked if the email is known for any agency
-        if not foia and AgencyEmail.objects.filter(email=self).exists():
-            return True
+        if not foia:
+            if AgencyEmail.objects.filter(email=self).exists():
+                return 'agency'
+            return None
 
-        # check the email domain against the whitelist
-        if WhitelistDomain.objects.filter(domain__iexact=self.domain).exists():
-            return True
+        # check if the email is a known email for this FOIA's agency,
+        # or for this FOIA, in a single query
+        agency_email, cc_email = (
+            EmailAddress.objects.filter(pk=self.pk).annotate(
+                agency_email=Exists(
+                    AgencyEmail.objects.filter(
+                        email=OuterRef('pk'),
+                        agency=foia.agency_id,
+                    )
+                ),
+                cc_email=Exists(
+                    foia.cc_emails.through.objects.filter(
+                        emailaddress=OuterRef('pk'),
+                        foiarequest=foia.pk,
+                    )
+                ),
+            ).values_list('agency_email', 'cc_email').get()
+        )
+        if agency_email:
+            return 'agency'
+        if cc_email:
+            return 'cc'
 
-        return False
+        return None
+
+    def allowed(self, foia=None):
+        """Is this email address allowed to post to this FOIA request?"""
+        return self.allowed_reason(foia) is not None
 
     class Meta:
         verbose_name_plural = 'email addresses'
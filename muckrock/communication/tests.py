@@ -8,10 +8,12 @@ from django.forms import ValidationError
 from django.test import TestCase
 
 # Third Party
+from mock import patch
 from nose.tools import assert_false, assert_raises, eq_, ok_
 
 # MuckRock
 from muckrock.communication.models import EmailAddress
+from muckrock.core.utils import LRUCache
 from muckrock.foia.factories import FOIARequestFactory
 from muckrock.mailgun.models import WhitelistDomain
 
@@ -40,6 +42,67 @@ class TestEmailAddress(TestCase):
                 'a@a.comn, foobar', ignore_errors=False
             )
 
+    def test_fetch_many_bulk(self):
+        """Addresses should be resolved in bulk"""
+        EmailAddress.objects.create(email='a@a.com', name='A')
+        EmailAddress.objects.create(email='b@b.com', name='B')
+        with self.assertNumQueries(2):
+            # select the existing addresses, insert the new ones
+            addresses = EmailAddress.objects.fetch_many(
+                'A <a@a.com>, B <b@b.com>, C <c@c.com>, D <d@D.COM>'
+            )
+        eq_(
+            [(a.email, a.name) for a in addresses],
+            [
+                ('a@a.com', 'A'),
+                ('b@b.com', 'B'),
+                ('c@c.com', 'C'),
+                ('d@d.com', 'D'),
+            ],
+        )
+        ok_(all(a.pk for a in addresses))
+        eq_(EmailAddress.objects.count(), 4)
+
+    def test_fetch_many_rename(self):
+        """Only the names which have changed should be updated, and the last
+        name given for an address wins"""
+        EmailAddress.objects.create(email='a@a.com', name='A')
+        EmailAddress.objects.create(email='b@b.com', name='B')
+        with self.assertNumQueries(3):
+            # select the existing addresses, update the changed name, insert
+            # the new address
+            addresses = EmailAddress.objects.fetch_many(
+                'A <a@a.com>, B <b@b.com>, C <c@c.com>, Other A <a@a.com>'
+            )
+        eq_(
+            [(a.email, a.name) for a in addresses],
+            [
+                ('a@a.com', 'Other A'),
+                ('b@b.com', 'B'),
+                ('c@c.com', 'C'),
+                ('a@a.com', 'Other A'),
+            ],
+        )
+        eq_(EmailAddress.objects.get(email='a@a.com').name, 'Other A')
+        with self.assertNumQueries(3):
+            # select the addresses, update the two changed names
+            EmailAddress.objects.fetch_many('a@a.com, B <b@b.com>, c@c.com')
+        eq_(EmailAddress.objects.get(email='a@a.com').name, '')
+        eq_(EmailAddress.objects.get(email='b@b.com').name, 'B')
+        eq_(EmailAddress.objects.get(email='c@c.com').name, '')
+
+    def test_fetch_cached(self):
+        """Cached addresses should not need to be queried"""
+        email_address = EmailAddress.objects.create(email='a@a.com', name='A')
+        cache = LRUCache(10)
+        cache.set('a@a.com', (email_address.pk, 'A', 'good'))
+        with patch('muckrock.communication.models.email_cache', cache):
+            with self.assertNumQueries(0):
+                eq_(EmailAddress.objects.fetch('A <a@a.com>'), email_address)
+            # saving the address drops it from the cache
+            email_address.save()
+            ok_(cache.get('a@a.com') is None)
+
     def test_allowed(self):
         """Test allowed email function"""
         foia = FOIARequestFactory(
@@ -78,6 +141,37 @@ class TestEmailAddress(TestCase):
         # non foia test - any agency email
         ok_(EmailAddress.objects.fetch('main@agency.com').allowed())
 
+    def test_allowed_reason(self):
+        """Test the reason an email is allowed"""
+        foia = FOIARequestFactory(
+            email__email='foo@bar.com',
+            cc_emails='foo@baz.com',
+            agency__other_emails='foo@agency.com',
+        )
+        WhitelistDomain.objects.create(domain='WhiteHat.edu')
+        reasons = [
+            ('bar@bar.com', 'foia domain'),
+            ('foo@baz.com', 'cc'),
+            ('foo@agency.com', 'agency'),
+            ('any@usa.gov', 'government'),
+            ('any@domain.ma.us', 'government'),
+            ('foo@whitehat.edu', 'whitelist'),
+            ('other@agency.com', None),
+            ('any@ma.us', None),
+            ('any@us', None),
+        ]
+        for email, reason in reasons:
+            eq_(
+                EmailAddress.objects.fetch(email).allowed_reason(foia),
+                reason,
+                'Wrong reason for address %s' % email,
+            )
+        email_address = EmailAddress.objects.fetch('other@random.edu')
+        # one query for the whitelisted domains, which are not cached during
+        # testing, and one for the agency and cc emails
+        with self.assertNumQueries(2):
+            eq_(email_address.allowed_reason(foia), None)
+
     def test_domain(self):
         """Test the domain method"""
         eq_(EmailAddress.objects.fetch('a@a.com').domain, 'a.com')
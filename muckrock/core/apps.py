@@ -10,4 +10,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     """App config for core app"""
-    name = 'core'
+    name = 'muckrock.core'
+
+    def ready(self):
+        """Connects the signal handlers"""
+        import muckrock.core.signals  # pylint: disable=unused-import,unused-variable
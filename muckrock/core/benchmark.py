@@ -0,0 +1,43 @@
+"""
+Utilities for benchmarking database heavy code paths
+"""
+
+# Django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Standard Library
+import time
+from contextlib import contextmanager
+
+
+class Measurement(object):
+    """The queries and wall time used by a block of code"""
+
+    def __init__(self, label=''):
+        self.label = label
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __unicode__(self):
+        return u'%s: %d queries, %.3fs' % (
+            self.label,
+            self.queries,
+            self.seconds,
+        )
+
+    def __str__(self):
+        return unicode(self).encode('utf8')
+
+
+@contextmanager
+def measure(label=''):
+    """Count the queries and time the wall clock for the enclosed block"""
+    measurement = Measurement(label)
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        try:
+            yield measurement
+        finally:
+            measurement.seconds = time.time() - start
+            measurement.queries = len(queries)
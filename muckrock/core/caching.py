@@ -0,0 +1,176 @@
+"""
+A shared cache layer over django's cache backends
+
+Values are computed and stored with `get_or_set`, which adds to the backend:
+
+* Tags: a value may be cached with tags, and every value with a tag
+  invalidated at once with `invalidate_tags`.  Each tag has a version number
+  in the cache which is made part of the keys of the values tagged with it,
+  so incrementing the version orphans them to be evicted, without having to
+  find each of them.
+* Locks: when a value is missing, only one process computes it, holding a
+  lock in the cache, while the others wait for it to be stored, so that an
+  expensive value expiring does not set every request computing it at once.
+* Metrics: hits and misses are counted in each process by the name of the
+  key, with any numbers in it replaced.  Every so often each process adds
+  its counts to totals kept in the cache, so that `get_metrics`, and the
+  staff view showing it, report them across every process.
+
+The backend must be shared by every process, such as the Redis cache in the
+base settings, for the locks and invalidation to hold between them.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+# Standard Library
+import re
+import threading
+import time
+from collections import Counter
+
+TAG_KEY = 'tag:%s:version'
+METRICS_KEY = 'cache:metrics'
+METRICS_LOCK_KEY = 'cache:metrics:lock'
+
+_metrics_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+_flushed_at = time.time()
+
+
+def _record(name, hit):
+    """Count a hit or miss for a name, adding the counts to the totals in
+    the cache every so often"""
+    # pylint: disable=global-statement
+    global _flushed_at
+    name = re.sub(r'\d+', '#', name)
+    with _metrics_lock:
+        if hit:
+            _hits[name] += 1
+        else:
+            _misses[name] += 1
+        flush = time.time() - _flushed_at >= settings.CACHE_METRICS_SECONDS
+        if flush:
+            _flushed_at = time.time()
+    if flush:
+        flush_metrics()
+
+
+def flush_metrics():
+    """Add the hits and misses counted in this process to the totals in the
+    cache.  If another process is adding its counts, these are kept until the
+    next flush."""
+    if not cache.add(METRICS_LOCK_KEY, True, settings.CACHE_LOCK_SECONDS):
+        return
+    try:
+        with _metrics_lock:
+            counts = {'hits': _hits.copy(), 'misses': _misses.copy()}
+            _hits.clear()
+            _misses.clear()
+        totals = cache.get(METRICS_KEY) or {}
+        for kind, counter in counts.iteritems():
+            for name, count in counter.iteritems():
+                metrics = totals.setdefault(name, {'hits': 0, 'misses': 0})
+                metrics[kind] += count
+        cache.set(METRICS_KEY, totals, None)
+    finally:
+        cache.delete(METRICS_LOCK_KEY)
+
+
+def get_metrics():
+    """Get the number of hits and misses for each name across every process,
+    as of when each last added its counts"""
+    flush_metrics()
+    return cache.get(METRICS_KEY) or {}
+
+
+def reset_metrics():
+    """Start counting hits and misses again"""
+    with _metrics_lock:
+        _hits.clear()
+        _misses.clear()
+    cache.delete(METRICS_KEY)
+
+
+class SharedCache(object):
+    """Tagged and locked access to a cache backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_tag_versions(self, tags):
+        """Get the current version of each tag"""
+        keys = {TAG_KEY % tag: tag for tag in tags}
+        versions = self.backend.get_many(keys.keys())
+        for key in keys:
+            if key not in versions:
+                # start from the current time so that values cached under an
+                # evicted version number are never reused
+                version = int(time.time())
+                self.backend.add(key, version, None)
+                versions[key] = self.backend.get(key, version)
+        return {keys[key]: version for key, version in versions.iteritems()}
+
+    def make_key(self, key, tags=()):
+        """Add the versions of its tags to a key"""
+        if not tags:
+            return key
+        versions = self.get_tag_versions(tags)
+        return '%s:%s' % (
+            key,
+            ':'.join(str(versions[tag]) for tag in sorted(tags)),
+        )
+
+    def invalidate_tags(self, tags):
+        """Invalidate every value cached with any of the tags"""
+        for tag in set(tags):
+            try:
+                self.backend.incr(TAG_KEY % tag)
+            except ValueError:
+                # there is no version, so nothing is cached under it
+                pass
+
+    def get_or_set(self, key, update, timeout, tags=(), name=None):
+        """Get the value from the cache if present, otherwise update it
+
+        Only one process updates a missing value at a time.  If the process
+        holding the lock does not store the value in time, the value is
+        updated without being stored.  Hits and misses are counted under
+        `name`, or the key if it is not given.
+        """
+        # pylint: disable=too-many-arguments
+        name = name or key
+        key = self.make_key(key, tags)
+        value = self.backend.get(key)
+        _record(name, value is not None)
+        if value is not None:
+            return value
+        lock_key = '%s:lock' % key
+        deadline = time.time() + settings.CACHE_LOCK_SECONDS
+        while not self.backend.add(lock_key, True, settings.CACHE_LOCK_SECONDS):
+            if time.time() >= deadline:
+                return update()
+            time.sleep(settings.CACHE_LOCK_WAIT)
+            value = self.backend.get(key)
+            if value is not None:
+                return value
+        try:
+            value = update()
+            self.backend.set(key, value, timeout)
+        finally:
+            self.backend.delete(lock_key)
+        return value
+
+    def delete(self, key, tags=()):
+        """Delete a value from the cache"""
+        self.backend.delete(self.make_key(key, tags))
+
+    def delete_fragment(self, fragment_name, vary_on=None):
+        """Delete a template fragment cached by the `cache` template tag"""
+        self.backend.delete(make_template_fragment_key(fragment_name, vary_on))
+
+
+shared_cache = SharedCache(cache)
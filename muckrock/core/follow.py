@@ -0,0 +1,69 @@
+"""
+Look up the followers of requests, questions and projects
+
+The activity stream's followers() loads every follower of an object to
+return them as a list, which is slow for popular requests with thousands of
+followers.  These check, count and page through the follows of an object
+with indexed queries instead.
+"""
+
+# Django
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import IntegerField
+from django.db.models.functions import Cast
+
+# Third Party
+from actstream.models import Follow
+
+
+def get_follows(obj):
+    """The follows of an object"""
+    return Follow.objects.filter(
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.pk,
+    )
+
+
+def is_follower(user, obj):
+    """Is the user following the object"""
+    return (
+        user.is_authenticated() and get_follows(obj).filter(user=user).exists()
+    )
+
+
+def follower_count(obj):
+    """The number of users following the object"""
+    return get_follows(obj).count()
+
+
+def get_followers(obj):
+    """The users following the object, as a queryset"""
+    return User.objects.filter(pk__in=get_follows(obj).values('user_id'))
+
+
+def iter_followers(obj, page_size=1000):
+    """Iterate over the users following the object, loading them a page at a
+    time, ordered by their primary key so each page starts where the last
+    one ended"""
+    last_pk = 0
+    while True:
+        users = list(
+            get_followers(obj).filter(pk__gt=last_pk).order_by('pk')[:page_size]
+        )
+        for user in users:
+            yield user
+        if len(users) < page_size:
+            return
+        last_pk = users[-1].pk
+
+
+def get_followed(user, model):
+    """The primary keys of the objects of the model the user follows, as a
+    subquery"""
+    follows = Follow.objects.filter(
+        user=user,
+        content_type=ContentType.objects.get_for_model(model),
+    )
+    followed_pk = Cast('object_id', IntegerField())
+    return follows.annotate(followed_pk=followed_pk).values('followed_pk')
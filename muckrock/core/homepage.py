@@ -0,0 +1,132 @@
+"""
+A snapshot of the data shown on the homepage
+
+The homepage counts every request, file and agency, and lists the latest
+articles, featured projects and completed requests.  Rather than computing
+these whenever a visitor misses the cache, a snapshot of them is kept in the
+cache without expiring, and refreshed by a periodic task and when the objects
+shown on it are saved.  A separate key marks the snapshot as fresh.  Once it
+lapses, visitors are still served the stale snapshot while a single refresh
+is queued.  A lock ensures only one refresh is ever computing the snapshot,
+including when there is no snapshot at all and visitors must wait for one.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Sum
+
+# Standard Library
+import time
+
+# MuckRock
+from muckrock.agency.models import Agency
+from muckrock.foia.models import FOIAFile, FOIARequest
+from muckrock.news.models import Article
+from muckrock.project.models import Project
+
+SNAPSHOT_KEY = 'homepage:snapshot'
+FRESH_KEY = 'homepage:fresh'
+LOCK_KEY = 'homepage:lock'
+# the template fragments rendered from the snapshot
+FRAGMENT_KEYS = ('homepage_top', 'homepage_bottom')
+
+
+def completed_requests():
+    """Get recently completed requests"""
+    return (
+        FOIARequest.objects.get_public().get_done()
+        .order_by('-datetime_done', 'pk').select_related(
+            'agency__jurisdiction__parent__parent',
+            'composer__user',
+        ).only(
+            'status',
+            'slug',
+            'title',
+            'agency__name',
+            'agency__slug',
+            'agency__jurisdiction__slug',
+            'agency__jurisdiction__level',
+            'agency__jurisdiction__name',
+            'agency__jurisdiction__parent__abbrev',
+            'agency__jurisdiction__parent__name',
+            'agency__jurisdiction__parent__slug',
+            'agency__jurisdiction__parent__parent__slug',
+            'composer__user__username',
+            'composer__user__first_name',
+            'composer__user__last_name',
+        ).get_public_file_count(limit=6)
+    )
+
+
+def build_snapshot():
+    """Compute all of the data for the homepage"""
+    return {
+        'articles':
+            list(Article.objects.get_published().prefetch_authors()[:5]),
+        'featured_projects':
+            list(
+                Project.objects.get_public().optimize()
+                .filter(featured=True)[:4]
+            ),
+        'completed_requests':
+            completed_requests(),
+        'stats': {
+            'request_count':
+                FOIARequest.objects.count(),
+            'completed_count':
+                FOIARequest.objects.get_done().count(),
+            'page_count':
+                FOIAFile.objects.aggregate(pages=Sum('pages'))['pages'],
+            'agency_count':
+                Agency.objects.get_approved().count(),
+        },
+    }
+
+
+def refresh():
+    """Compute and store a new snapshot, unless another refresh holds the
+    lock.  Returns the new snapshot, or None if it was not computed."""
+    if not cache.add(LOCK_KEY, True, settings.HOMEPAGE_LOCK_SECONDS):
+        return None
+    try:
+        snapshot = build_snapshot()
+        cache.set(SNAPSHOT_KEY, snapshot, None)
+        cache.set(FRESH_KEY, True, settings.HOMEPAGE_REFRESH_SECONDS)
+        cache.delete_many([
+            make_template_fragment_key(key) for key in FRAGMENT_KEYS
+        ])
+    finally:
+        cache.delete(LOCK_KEY)
+    return snapshot
+
+
+def expire():
+    """Mark the snapshot as stale, so the next visitor queues a refresh"""
+    cache.delete(FRESH_KEY)
+
+
+def get_snapshot():
+    """Get the snapshot for a visitor
+
+    A stale snapshot is returned as is, and the first visitor to see it stale
+    queues a refresh.  If there is no snapshot, the visitor computes it,
+    or waits for the refresh holding the lock to store it.
+    """
+    from muckrock.core.tasks import refresh_homepage
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is not None:
+        # mark the snapshot fresh until the queued refresh replaces it, so
+        # that only one refresh is queued
+        if cache.add(FRESH_KEY, True, settings.HOMEPAGE_LOCK_SECONDS):
+            refresh_homepage.delay()
+        return snapshot
+    deadline = time.time() + settings.HOMEPAGE_LOCK_SECONDS
+    while time.time() < deadline:
+        snapshot = refresh() or cache.get(SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+        time.sleep(0.1)
+    # the refresh holding the lock never finished
+    return build_snapshot()
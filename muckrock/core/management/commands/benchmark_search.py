@@ -0,0 +1,88 @@
+"""
+Benchmark searching requests with watson against the full text index
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Third Party
+from watson import search as watson
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.core.search import search
+from muckrock.foia.models import FOIARequest
+
+
+class Command(BaseCommand):
+    """Seed a set of requests with communications, then search them for a
+    phrase which only appears in some of their communications, with watson
+    and with the full text index, counting and fetching the first page of
+    results, and reporting the number of queries and wall time for each"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Create this many requests.  All seeded data is rolled back '
+            'afterwards.',
+        )
+        parser.add_argument(
+            '--communications',
+            type=int,
+            default=3,
+            help='The number of communications for each request',
+        )
+        parser.add_argument(
+            '--query',
+            default='spreadsheet',
+            help='The word to search for, which is added to the '
+            'communications of one in ten requests',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=25,
+            help='The number of results to fetch',
+        )
+
+    def handle(self, *args, **kwargs):
+        query = kwargs['query']
+        page_size = kwargs['page_size']
+        with transaction.atomic():
+            with measure('seed') as seeding:
+                self.seed(kwargs['requests'], kwargs['communications'], query)
+            self.stdout.write(unicode(seeding))
+
+            with measure('watson') as searching:
+                results = watson.filter(FOIARequest, query)
+                count = results.count()
+                list(results[:page_size])
+            self.stdout.write('%s (%d results)' % (searching, count))
+
+            with measure('full text') as searching:
+                results = search(FOIARequest.objects.get_public(), query)
+                count = results.count()
+                list(results.order_by('-rank', 'pk')[:page_size])
+            self.stdout.write('%s (%d results)' % (searching, count))
+            transaction.set_rollback(True)
+
+    def seed(self, num_requests, num_communications, query):
+        """Seed the database with public requests, each with some
+        communications, with the query in those of every tenth request"""
+        # factories are a development dependency, only import them if needed
+        from muckrock.foia.factories import (
+            FOIACommunicationFactory,
+            FOIARequestFactory,
+        )
+        for i in xrange(num_requests):
+            foia = FOIARequestFactory(status='done', embargo=False)
+            for _ in xrange(num_communications):
+                communication = 'Please find the records attached.'
+                if i % 10 == 0:
+                    communication += ' The %s is attached.' % query
+                FOIACommunicationFactory(foia=foia, communication=communication)
@@ -0,0 +1,62 @@
+"""
+Build the full text search vectors for existing objects
+"""
+
+# Django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+# MuckRock
+from muckrock.core import search
+
+
+class Command(BaseCommand):
+    """Build the search vectors for every object of each searchable model,
+    in batches by primary key, so that no single update holds its locks for
+    long"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            help='Only build the vectors for this model, such as '
+            'foia.FOIARequest',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='The number of objects to update in each query',
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['model']:
+            try:
+                models = [apps.get_model(kwargs['model'])]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(exc)
+            if models[0] not in search.get_registered():
+                raise CommandError(
+                    '%s is not registered for search' % kwargs['model']
+                )
+        else:
+            models = search.get_registered()
+        for model in models:
+            total = self.update_model(model, kwargs['batch_size'])
+            self.stdout.write('Updated %d %s' % (total, model._meta.label))
+
+    def update_model(self, model, batch_size):
+        """Update the vectors of a model a batch at a time"""
+        queryset = model._default_manager.order_by('pk')
+        total = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=last_pk)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return total
+            total += search.update_vectors(model, pks)
+            last_pk = pks[-1]
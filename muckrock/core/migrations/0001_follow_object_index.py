@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-18 09:47
+from __future__ import unicode_literals
+
+# Django
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actstream', '0002_remove_action_data'),
+    ]
+
+    operations = [
+        # find and count the followers of an object, and check if a user
+        # follows it, from the index alone
+        migrations.RunSQL(
+            'CREATE INDEX core_follow_object ON actstream_follow '
+            '(content_type_id, object_id, user_id)',
+            'DROP INDEX core_follow_object',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-25 10:12
+from __future__ import unicode_literals
+
+# Django
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_follow_object_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapPage',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                ('section', models.CharField(max_length=32)),
+                ('number', models.PositiveIntegerField()),
+                ('last_pk', models.PositiveIntegerField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('datetime_generated', models.DateTimeField()),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='sitemappage',
+            unique_together=set([('section', 'number')]),
+        ),
+    ]
@@ -3,6 +3,7 @@
 # pylint: disable=abstract-method
 
 # Django
+from django.db import models
 from django.db.models import Func, IntegerField
 
 
@@ -17,3 +18,24 @@ class ExtractDay(Func):
         super(ExtractDay, self).__init__(
             expression, output_field=output_field, **extra
         )
+
+
+class SitemapPage(models.Model):
+    """A page of a sitemap section which has been written to storage
+
+    Each page covers the items with primary keys after the previous page's
+    last primary key, up to and including its own, so that pages keep their
+    boundaries and can be regenerated on their own.
+    """
+
+    section = models.CharField(max_length=32)
+    number = models.PositiveIntegerField()
+    last_pk = models.PositiveIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+    datetime_generated = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('section', 'number')
+
+    def __unicode__(self):
+        return u'%s %d' % (self.section, self.number)
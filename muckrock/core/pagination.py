@@ -3,7 +3,7 @@ Provides a pagination class for the API
 """
 
 # Third Party
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardPagination(PageNumberPagination):
@@ -11,3 +11,47 @@ class StandardPagination(PageNumberPagination):
     page_size = 50
     max_page_size = 200
     page_size_query_param = 'page_size'
+
+
+class StandardCursorPagination(CursorPagination):
+    """Pages through the results by primary key, so that later pages are as
+    fast to fetch as the first, and the results are never counted"""
+    page_size = StandardPagination.page_size
+    max_page_size = StandardPagination.max_page_size
+    page_size_query_param = StandardPagination.page_size_query_param
+    ordering = 'pk'
+
+    def get_page_size(self, request):
+        """Allow the page size to be set, as for page number pagination"""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """Only the primary key is unique and unchanging, so the results may
+        only be ordered by it, ascending or descending"""
+        if request.query_params.get('ordering') in ('-id', '-pk'):
+            return ('-pk',)
+        return ('pk',)
+
+
+class CursorPaginationMixin(object):
+    """Allow a viewset to be paged through with cursor pagination, by passing
+    `pagination=cursor`, instead of its page number pagination"""
+    cursor_pagination_class = StandardCursorPagination
+
+    @property
+    def paginator(self):
+        """Choose the paginator for the request"""
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('pagination') == 'cursor':
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -0,0 +1,221 @@
+"""
+Full text search with PostgreSQL
+
+Each searchable model has a `search_vector` column holding the weighted
+words of its text, including the text of related objects such as a request's
+communications, with a GIN index over it.  The vectors are rebuilt in the
+database by a background task shortly after the model or its related objects
+are saved, so searches only need to consult the index, and results may be
+ranked, highlighted and counted by facet.  Each word of a query matches as a
+prefix, as it did with watson.
+"""
+
+# Django
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchQueryField,
+    SearchRank,
+    SearchVector,
+)
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Func, Subquery, TextField, Value
+from django.db.models.functions import Substr
+from django.db.models.signals import post_delete, post_save
+
+# Standard Library
+import re
+import threading
+from collections import defaultdict
+
+# the text search configuration for stemming and stop words
+CONFIG = 'english'
+# options for the highlighted snippets of matching text
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15'
+# set while an update of an object's vector is queued
+PENDING_KEY = 'search:pending:%s:%s'
+
+_registry = {}
+# the objects saved in this thread whose vectors need rebuilding
+_pending = threading.local()
+
+
+class SearchHeadline(Func):
+    """Highlight the words matching a query in some text, as django does not
+    provide this until 3.1"""
+    function = 'ts_headline'
+
+    def __init__(self, expression, query, **extra):
+        super(SearchHeadline, self).__init__(
+            Value(CONFIG),
+            expression,
+            query,
+            Value(HEADLINE_OPTIONS),
+            output_field=TextField(),
+            **extra
+        )
+
+
+class PrefixSearchQuery(Func):
+    """Match every word of a query as a prefix of a word in the text, as
+    SearchQuery only matches whole words"""
+    function = 'to_tsquery'
+
+    def __init__(self, words, **extra):
+        super(PrefixSearchQuery, self).__init__(
+            Value(CONFIG),
+            Value(' & '.join("'%s':*" % word for word in words)),
+            output_field=SearchQueryField(),
+            **extra
+        )
+
+
+def make_query(query):
+    """The search query for the words of the user's query"""
+    words = re.findall(r'\w+', query, re.UNICODE)
+    if words:
+        return PrefixSearchQuery(words)
+    else:
+        return SearchQuery(query, config=CONFIG)
+
+
+def related_text(queryset, group, field):
+    """The text of a field of related objects, joined together, for building
+    a search vector from.  The queryset must be filtered to the related
+    objects of the searchable object using OuterRef, and is grouped by
+    `group`, the related objects' foreign key to it.  The text is truncated,
+    as a tsvector may not be larger than one megabyte."""
+    return Substr(
+        Subquery(
+            queryset.order_by().values(group)
+            .annotate(text=StringAgg(field, ' ')).values('text'),
+            output_field=TextField(),
+        ),
+        1,
+        settings.SEARCH_TEXT_LIMIT,
+    )
+
+
+def register(model, weighted_fields, related=None):
+    """Register how a model's search vector is built, and keep it up to date
+
+    `weighted_fields` is a list of field names or expressions and their
+    weights, from A to D.  `related` maps other models whose text is
+    included to a function returning the primary key of the searchable object
+    for an instance of them, so that the vector is rebuilt when they change.
+    """
+    vector = None
+    for field, weight in weighted_fields:
+        field_vector = SearchVector(field, weight=weight, config=CONFIG)
+        vector = field_vector if vector is None else vector + field_vector
+    _registry[model] = vector
+
+    def update(sender, instance, **kwargs):
+        """Rebuild the vector for the saved object"""
+        # pylint: disable=unused-argument
+        if not kwargs.get('raw'):
+            queue_update(model, [instance.pk])
+
+    post_save.connect(
+        update,
+        sender=model,
+        weak=False,
+        dispatch_uid='muckrock.core.search.update.%s' % model._meta.label,
+    )
+    for related_model, get_pk in (related or {}).iteritems():
+
+        def update_related(sender, instance, get_pk=get_pk, **kwargs):
+            """Rebuild the vector for the object the related object belongs
+            to"""
+            # pylint: disable=unused-argument
+            if kwargs.get('raw'):
+                return
+            pk = get_pk(instance)
+            if pk is not None:
+                queue_update(model, [pk])
+
+        uid = 'muckrock.core.search.update.%s.%s' % (
+            model._meta.label,
+            related_model._meta.label,
+        )
+        post_save.connect(
+            update_related, sender=related_model, weak=False, dispatch_uid=uid
+        )
+        post_delete.connect(
+            update_related, sender=related_model, weak=False, dispatch_uid=uid
+        )
+
+
+def get_registered():
+    """The models which have been registered for search"""
+    return _registry.keys()
+
+
+def queue_update(model, pks):
+    """Queue the vectors for the given objects of a model to be rebuilt once
+    the current transaction commits"""
+    if not hasattr(_pending, 'pks'):
+        _pending.pks = defaultdict(set)
+    _pending.pks[model].update(pks)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    """Queue a task to rebuild the vectors of the objects saved in this
+    thread.  The task is delayed, and an object already waiting for a task
+    is not queued again, so an object saved many times in quick succession
+    is only rebuilt once."""
+    from muckrock.core.tasks import update_search_vectors
+    pending = getattr(_pending, 'pks', {})
+    _pending.pks = defaultdict(set)
+    for model, pks in pending.iteritems():
+        label = model._meta.label
+        pks = [
+            pk for pk in pks if cache.add(
+                PENDING_KEY % (label, pk),
+                True,
+                settings.SEARCH_PENDING_SECONDS,
+            )
+        ]
+        if pks:
+            update_search_vectors.apply_async(
+                args=[label, pks],
+                countdown=settings.SEARCH_UPDATE_DELAY,
+            )
+
+
+def update_vectors(model, pks=None):
+    """Rebuild the search vectors for the given objects of a model, or for
+    all of them"""
+    queryset = model._default_manager.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(search_vector=_registry[model])
+
+
+def search(queryset, query):
+    """Filter a queryset to the objects matching a query, annotated with
+    their rank"""
+    search_query = make_query(query)
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=SearchRank(F('search_vector'), search_query)
+    )
+
+
+def headline(queryset, query, field):
+    """Annotate a highlighted snippet of the field's text matching the
+    query.  The snippet is not escaped, so should be displayed with the
+    `highlight` filter."""
+    return queryset.annotate(
+        snippet=SearchHeadline(F(field), make_query(query))
+    )
+
+
+def facet_counts(queryset, fields, limit=10):
+    """Count the objects for each of the most common values of the fields"""
+    return list(
+        queryset.order_by().values(*fields).annotate(count=Count('pk'))
+        .order_by('-count')[:limit]
+    )
@@ -0,0 +1,54 @@
+"""Model signal handlers for the core application"""
+
+# Django
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.core import homepage
+from muckrock.foia.models import FOIARequest
+from muckrock.news.models import Article
+from muckrock.project.models import Project
+
+
+def expire_homepage(sender, **kwargs):
+    """Articles and projects shown on the homepage may have changed"""
+    # pylint: disable=unused-argument
+    homepage.expire()
+
+
+def foia_expire_homepage(sender, instance, **kwargs):
+    """A request which may be shown as recently completed has changed"""
+    # pylint: disable=unused-argument
+    if instance.status == 'done':
+        homepage.expire()
+
+
+post_save.connect(
+    expire_homepage,
+    sender=Article,
+    dispatch_uid='muckrock.core.signals.article_save_homepage',
+)
+
+post_delete.connect(
+    expire_homepage,
+    sender=Article,
+    dispatch_uid='muckrock.core.signals.article_delete_homepage',
+)
+
+post_save.connect(
+    expire_homepage,
+    sender=Project,
+    dispatch_uid='muckrock.core.signals.project_save_homepage',
+)
+
+post_delete.connect(
+    expire_homepage,
+    sender=Project,
+    dispatch_uid='muckrock.core.signals.project_delete_homepage',
+)
+
+post_save.connect(
+    foia_expire_homepage,
+    sender=FOIARequest,
+    dispatch_uid='muckrock.core.signals.foia_save_homepage',
+)
@@ -0,0 +1,229 @@
+"""
+Sitemaps written to storage ahead of time
+
+Django's sitemap views page through each section with OFFSET, so crawlers
+asking for the later pages of a large section cause ever slower scans.  Here
+each section is walked by primary key instead, a page at a time, and the
+gzipped pages and the index are saved to storage on a schedule.  Each page
+keeps the range of primary keys it was first written with, so a run only
+regenerates the pages whose items have changed since they were written, the
+last page, which new items are added to, and any new pages after it.
+"""
+
+# Django
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.functional import LazyObject
+from django.utils.module_loading import import_string
+
+# Standard Library
+import gzip
+import logging
+import sys
+from collections import OrderedDict
+from cStringIO import StringIO
+
+# Third Party
+from storages.backends.s3boto import S3BotoStorage
+
+# MuckRock
+from muckrock.agency.sitemap import AgencySitemap
+from muckrock.core.models import SitemapPage
+from muckrock.core.sitemap import FlatPageSitemap
+from muckrock.foia.sitemap import FoiaSitemap
+from muckrock.jurisdiction.sitemap import JurisdictionSitemap
+from muckrock.news.sitemap import ArticleSitemap
+from muckrock.project.sitemap import ProjectSitemap
+from muckrock.qanda.sitemap import QuestionSitemap
+
+logger = logging.getLogger(__name__)
+
+SITEMAPS = OrderedDict([
+    ('FOIA', FoiaSitemap),
+    ('News', ArticleSitemap),
+    ('Agency', AgencySitemap),
+    ('Jurisdiction', JurisdictionSitemap),
+    ('Question', QuestionSitemap),
+    ('Project', ProjectSitemap),
+    ('Flatpages', FlatPageSitemap),
+])
+
+INDEX_PATH = 'sitemaps/sitemap.xml'
+
+
+class SitemapStorage(LazyObject):
+    """The storage sitemaps are written to.  On S3 files are overwritten in
+    place, rather than being saved under a new name."""
+
+    def _setup(self):
+        storage_class = import_string(settings.DEFAULT_FILE_STORAGE)
+        if issubclass(storage_class, S3BotoStorage):
+            self._wrapped = storage_class(file_overwrite=True)
+        else:
+            self._wrapped = default_storage
+
+
+sitemap_storage = SitemapStorage()
+
+
+def page_name(section, number):
+    """The file name of a page of a section"""
+    return 'sitemap-{}-{}.xml.gz'.format(section, number)
+
+
+def page_path(name):
+    """The storage path of a sitemap file"""
+    return 'sitemaps/{}'.format(name)
+
+
+def _get(sitemap, name, item):
+    """Get an attribute of the sitemap for an item, which may be a value or
+    a method of the item, as django's sitemaps allow"""
+    attr = getattr(sitemap, name, None)
+    return attr(item) if callable(attr) else attr
+
+
+def _url_info(sitemap, item):
+    """The entry for an item in the sitemap template"""
+    priority = _get(sitemap, 'priority', item)
+    return {
+        'item':
+            item,
+        'location':
+            '{}://{}{}'.format(
+                settings.SITEMAP_PROTOCOL,
+                settings.MUCKROCK_URL,
+                sitemap.location(item),
+            ),
+        'lastmod':
+            _get(sitemap, 'lastmod', item),
+        'changefreq':
+            _get(sitemap, 'changefreq', item),
+        'priority':
+            str(priority if priority is not None else ''),
+    }
+
+
+def _save(path, content):
+    """Save a file to storage, overwriting any existing copy in place, so
+    that crawlers never find it missing while it is being replaced"""
+    if (
+        not getattr(sitemap_storage, 'file_overwrite', False)
+        and sitemap_storage.exists(path)
+    ):
+        # storages which cannot overwrite, such as in development, must
+        # delete the old copy first to save under the same name
+        sitemap_storage.delete(path)
+    sitemap_storage.save(path, ContentFile(content))
+
+
+def _write_page(page, sitemap, items):
+    """Render a page of a sitemap, save it to storage gzipped, and record
+    it as generated"""
+    xml = render_to_string(
+        'sitemap.xml',
+        {'urlset': [_url_info(sitemap, item) for item in items]},
+    )
+    buff = StringIO()
+    with gzip.GzipFile(fileobj=buff, mode='wb') as gz_file:
+        gz_file.write(xml.encode('utf8'))
+    _save(page_path(page_name(page.section, page.number)), buff.getvalue())
+    page.count = len(items)
+    page.datetime_generated = timezone.now()
+    page.save()
+
+
+def _is_stale(page, items, updated_field):
+    """Has the page changed since it was written?  Sections with no field
+    recording when their items are updated are always regenerated."""
+    if updated_field is None:
+        return True
+    stats = items.aggregate(count=Count('pk'), updated=Max(updated_field))
+    return stats['count'] != page.count or (
+        stats['updated'] is not None
+        and stats['updated'] > page.datetime_generated
+    )
+
+
+def generate_section(section, sitemap, full=False):
+    """Write the pages of a section which have changed, returning the number
+    of pages written"""
+    updated_field = None if full else getattr(sitemap, 'updated_field', None)
+    queryset = sitemap.items().order_by('pk')
+    pages = list(SitemapPage.objects.filter(section=section).order_by('number'))
+    written = 0
+    start = 0
+    # all but the last page keep the boundaries they were written with
+    for page in pages[:-1]:
+        items = queryset.filter(pk__gt=start, pk__lte=page.last_pk)
+        if _is_stale(page, items, updated_field):
+            _write_page(page, sitemap, list(items))
+            written += 1
+        start = page.last_pk
+    # the last page is filled up to the limit, followed by any new pages
+    page = pages[-1] if pages else SitemapPage(section=section, number=1)
+    while True:
+        # fetch one extra item to tell if another page is needed
+        items = list(queryset.filter(pk__gt=start)[:sitemap.limit + 1])
+        more = len(items) > sitemap.limit
+        items = items[:sitemap.limit]
+        if items:
+            page.last_pk = items[-1].pk
+        _write_page(page, sitemap, items)
+        written += 1
+        if not more:
+            return written
+        start = page.last_pk
+        page = SitemapPage(section=section, number=page.number + 1)
+
+
+def generate_index():
+    """Write the index of all the pages of all the sections"""
+    pages = SitemapPage.objects.filter(section__in=SITEMAPS.keys())
+    numbers = {}
+    for section, number in pages.values_list('section', 'number'):
+        numbers.setdefault(section, []).append(number)
+    locations = [
+        '{}://{}/{}'.format(
+            settings.SITEMAP_PROTOCOL,
+            settings.MUCKROCK_URL,
+            page_name(section, number),
+        )
+        for section in SITEMAPS
+        for number in sorted(numbers.get(section, []))
+    ]
+    xml = render_to_string('sitemap_index.xml', {'sitemaps': locations})
+    _save(INDEX_PATH, xml.encode('utf8'))
+
+
+def generate_sitemaps(full=False):
+    """Write all of the sitemaps which have changed, and the index.  If
+    `full` is set, every page is written again."""
+    # pylint: disable=broad-except
+    try:
+        for section, sitemap_class in SITEMAPS.iteritems():
+            try:
+                written = generate_section(section, sitemap_class(), full=full)
+            except SoftTimeLimitExceeded:
+                raise
+            except Exception as exc:
+                # an error in one section must not stop the others, or the
+                # index, from being written
+                logger.error(
+                    'Sitemaps: error writing %s: %s',
+                    section,
+                    exc,
+                    exc_info=sys.exc_info(),
+                )
+            else:
+                logger.info('Sitemaps: wrote %d pages for %s', written, section)
+    except SoftTimeLimitExceeded:
+        # the pages written so far are recorded, so the next run carries on
+        # from them, but the index must still list any new pages
+        logger.warning('Sitemaps: time limit exceeded, writing the index')
+    generate_index()
@@ -0,0 +1,54 @@
+"""Celery Tasks for the core application"""
+
+# Django
+from celery.schedules import crontab
+from celery.task import periodic_task, task
+from django.apps import apps
+from django.core.cache import cache
+
+# MuckRock
+from muckrock.core import homepage, search
+from muckrock.core.static_sitemap import generate_sitemaps
+
+
+# Sitemaps are written a page at a time, so a run stopped by its soft time
+# limit still writes the index, and the next run carries on from there
+@periodic_task(
+    run_every=crontab(hour='*/6', minute=15),
+    time_limit=30 * 60,
+    soft_time_limit=25 * 60,
+    name='muckrock.core.tasks.update_sitemaps'
+)
+def update_sitemaps():
+    """Write the sitemap pages which have changed since they were last
+    written"""
+    generate_sitemaps()
+
+
+@periodic_task(
+    run_every=crontab(day_of_week='sun', hour=3, minute=45),
+    time_limit=2 * 60 * 60,
+    soft_time_limit=110 * 60,
+    name='muckrock.core.tasks.rebuild_sitemaps'
+)
+def rebuild_sitemaps():
+    """Write all of the sitemap pages weekly, to pick up any changes which
+    did not update the items' modification times"""
+    generate_sitemaps(full=True)
+
+
+@periodic_task(
+    run_every=crontab(minute='*/5'),
+    name='muckrock.core.tasks.refresh_homepage'
+)
+def refresh_homepage():
+    """Compute a new snapshot of the homepage's data"""
+    homepage.refresh()
+
+
+@task(ignore_result=True, name='muckrock.core.tasks.update_search_vectors')
+def update_search_vectors(label, pks):
+    """Rebuild the search vectors of objects which have been saved"""
+    # objects saved from now on need another update
+    cache.delete_many([search.PENDING_KEY % (label, pk) for pk in pks])
+    search.update_vectors(apps.get_model(label), pks)
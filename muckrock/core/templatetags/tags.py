@@ -14,6 +14,7 @@ from django.template import (
     VariableDoesNotExist,
 )
 from django.template.defaultfilters import stringfilter
+from django.utils.html import escape
 from django.utils.safestring import mark_safe
 
 # Standard Library
@@ -27,6 +28,7 @@ import bleach
 import markdown
 
 # MuckRock
+from muckrock.core.caching import SharedCache
 from muckrock.core.forms import NewsletterSignupForm, TagManagerForm
 from muckrock.project.forms import ProjectManagerForm
 
@@ -58,6 +60,17 @@ def page_link(request, page_num):
     return '?' + query.urlencode()
 
 
+@register.filter
+@stringfilter
+def highlight(snippet):
+    """Escape a highlighted search snippet, keeping the marks around the
+    words which matched"""
+    return mark_safe(
+        escape(snippet).replace('&lt;mark&gt;', '<mark>')
+        .replace('&lt;/mark&gt;', '</mark>')
+    )
+
+
 @register.filter
 @stringfilter
 def company_title(companies):
@@ -376,18 +389,20 @@ class CacheNode(Node):
         if expire_time != 0:
             vary_on = [var.resolve(context) for var in self.vary_on]
             cache_key = make_template_fragment_key(self.fragment_name, vary_on)
-            value = fragment_cache.get(cache_key)
-            if value is not None and self.compress:
-                value = zlib.decompress(value).decode('utf8')
-            if value is None:
+            name = 'fragment:%s' % self.fragment_name
+
+            def render():
+                """Render the fragment, compressing it if needed"""
                 value = self.nodelist.render(context)
                 if self.compress:
-                    fragment_cache.set(
-                        cache_key, zlib.compress(value.encode('utf8')),
-                        expire_time
-                    )
-                else:
-                    fragment_cache.set(cache_key, value, expire_time)
+                    value = zlib.compress(value.encode('utf8'))
+                return value
+
+            value = SharedCache(fragment_cache).get_or_set(
+                cache_key, render, expire_time, name=name
+            )
+            if self.compress:
+                value = zlib.decompress(value).decode('utf8')
             return value
         else:
             return self.nodelist.render(context)
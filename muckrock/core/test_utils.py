@@ -36,3 +36,10 @@ def http_post_response(url, view, data, user=AnonymousUser(), **kwargs):
     request.user = user
     response = view(request, **kwargs)
     return response
+
+
+def run_on_commit(func, using=None):
+    """Run a function immediately, to patch over transaction.on_commit, as
+    the transaction of a test case is never committed"""
+    # pylint: disable=unused-argument
+    func()
@@ -3,30 +3,72 @@ Tests for site level functionality and helper functions for application tests
 """
 
 # Django
+from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.sites.models import Site
-from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.exceptions import FieldError, ValidationError
+from django.core.files.storage import default_storage
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
 
 # Standard Library
+import json
 import logging
+import re
+import zlib
 
 # Third Party
 import nose.tools
+from actstream.actions import follow
 from actstream.models import Action
+from freezegun import freeze_time
 from mock import ANY, Mock, patch
 from nose.tools import eq_, ok_
 
 # MuckRock
 from muckrock.accounts.models import Notification
-from muckrock.core.factories import AnswerFactory, UserFactory
+from muckrock.agency.sitemap import AgencySitemap
+from muckrock.core import homepage
+from muckrock.core.caching import (
+    METRICS_KEY,
+    get_metrics,
+    reset_metrics,
+    shared_cache,
+)
+from muckrock.core.factories import AnswerFactory, ArticleFactory, UserFactory
 from muckrock.core.fields import EmailsListField
+from muckrock.core.follow import (
+    follower_count,
+    get_followed,
+    get_followers,
+    is_follower,
+    iter_followers,
+)
 from muckrock.core.forms import NewsletterSignupForm, StripeForm
+from muckrock.core.models import SitemapPage
+from muckrock.core.search import facet_counts, search
+from muckrock.core.static_sitemap import (
+    INDEX_PATH,
+    generate_section,
+    generate_sitemaps,
+    page_name,
+    page_path,
+)
 from muckrock.core.templatetags import tags
-from muckrock.core.test_utils import http_get_response, http_post_response
-from muckrock.core.utils import new_action, notify
+from muckrock.core.test_utils import (
+    http_get_response,
+    http_post_response,
+    run_on_commit,
+)
+from muckrock.core.utils import LRUCache, new_action, notify
 from muckrock.core.views import DonationFormView, NewsletterSignupView
+from muckrock.foia.factories import FOIACommunicationFactory, FOIARequestFactory
+from muckrock.foia.models import FOIARequest
+from muckrock.foia.sitemap import FoiaSitemap
+from muckrock.jurisdiction.sitemap import JurisdictionSitemap
 
 # pylint: disable=too-many-public-methods
 
@@ -277,6 +319,356 @@ class TestNotify(TestCase):
             )
 
 
+class TestLRUCache(TestCase):
+    """The LRU cache holds a bounded number of keys"""
+
+    def test_eviction(self):
+        """The least recently used key is evicted first"""
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        eq_(cache.get('a'), 1)
+        cache.set('c', 3)
+        eq_(len(cache), 2)
+        eq_(cache.get('b'), None)
+        eq_(cache.get('a'), 1)
+        eq_(cache.get('c'), 3)
+        cache.delete('a')
+        eq_(cache.get('a', 'default'), 'default')
+
+    def test_timeout(self):
+        """Keys expire after the timeout"""
+        cache = LRUCache(2, timeout=60)
+        with freeze_time('2018-06-04 12:00:00'):
+            cache.set('a', 1)
+        with freeze_time('2018-06-04 12:00:59'):
+            eq_(cache.get('a'), 1)
+        with freeze_time('2018-06-04 12:01:00'):
+            eq_(cache.get('a'), None)
+            eq_(len(cache), 0)
+
+
+class TestFollow(TestCase):
+    """Followers are looked up without loading all of them"""
+
+    def setUp(self):
+        self.foia = FOIARequestFactory()
+        self.followers = UserFactory.create_batch(5)
+        for user in self.followers:
+            follow(user, self.foia, actor_only=False)
+
+    def test_is_follower(self):
+        """Check if a single user follows the request"""
+        ok_(is_follower(self.followers[0], self.foia))
+        ok_(not is_follower(UserFactory(), self.foia))
+        ok_(not is_follower(AnonymousUser(), self.foia))
+
+    def test_followers(self):
+        """Count and list the followers"""
+        eq_(follower_count(self.foia), 5)
+        eq_(set(get_followers(self.foia)), set(self.followers))
+        eq_(follower_count(FOIARequestFactory()), 0)
+
+    def test_iter_followers(self):
+        """Iterate over the followers a page at a time"""
+        with self.assertNumQueries(3):
+            users = list(iter_followers(self.foia, page_size=2))
+        eq_(users, sorted(self.followers, key=lambda u: u.pk))
+
+    def test_followed(self):
+        """Filter to the requests a user follows"""
+        FOIARequestFactory()
+        eq_(
+            list(
+                FOIARequest.objects.filter(
+                    pk__in=get_followed(self.followers[0], FOIARequest)
+                )
+            ),
+            [self.foia],
+        )
+
+
+@override_settings(SITEMAP_PROTOCOL='https', MUCKROCK_URL='www.muckrock.com')
+@patch.object(FoiaSitemap, 'limit', 2)
+class TestStaticSitemap(TestCase):
+    """Sitemaps are written to storage a page at a time"""
+
+    def setUp(self):
+        self.foias = FOIARequestFactory.create_batch(
+            3, status='done', embargo=False
+        )
+
+    def read_page(self, number):
+        """Read the locations from a page of the FOIA sitemap"""
+        path = page_path(page_name('FOIA', number))
+        xml = zlib.decompress(
+            default_storage.open(path).read(), 16 + zlib.MAX_WBITS
+        )
+        return re.findall(r'<loc>(.*)</loc>', xml)
+
+    def location(self, foia):
+        """The location of the request in the sitemap"""
+        return 'https://www.muckrock.com' + foia.get_absolute_url()
+
+    def test_pages(self):
+        """Requests are split into pages by primary key"""
+        eq_(generate_section('FOIA', FoiaSitemap()), 2)
+        eq_(self.read_page(1), [self.location(f) for f in self.foias[:2]])
+        eq_(self.read_page(2), [self.location(self.foias[2])])
+        eq_(SitemapPage.objects.get(section='FOIA', number=1).count, 2)
+
+    def test_incremental(self):
+        """Only the pages which have changed are written again"""
+        generate_section('FOIA', FoiaSitemap())
+        # only the last page is written when nothing has changed
+        eq_(generate_section('FOIA', FoiaSitemap()), 1)
+        # a new request fills up the last page
+        new_foia = FOIARequestFactory(status='done', embargo=False)
+        eq_(generate_section('FOIA', FoiaSitemap()), 1)
+        eq_(
+            self.read_page(2),
+            [self.location(f) for f in (self.foias[2], new_foia)],
+        )
+        # embargoing a request rewrites the page it was on
+        self.foias[0].embargo = True
+        self.foias[0].save()
+        eq_(generate_section('FOIA', FoiaSitemap()), 2)
+        eq_(self.read_page(1), [self.location(self.foias[1])])
+
+    def test_views(self):
+        """The index and pages are served from storage"""
+        Site.objects.create(domain='www.muckrock.com')
+        generate_sitemaps()
+        response = self.client.get('/sitemap.xml')
+        eq_(response.status_code, 200)
+        index = ''.join(response.streaming_content)
+        ok_('https://www.muckrock.com/sitemap-FOIA-2.xml.gz' in index)
+        response = self.client.get('/sitemap-FOIA-2.xml.gz')
+        eq_(response.status_code, 200)
+        eq_(response['Content-Type'], 'application/x-gzip')
+        eq_(self.client.get('/sitemap-FOIA-3.xml.gz').status_code, 404)
+
+    def test_time_limit(self):
+        """A run stopped by its time limit still indexes the pages written"""
+        generate_section('FOIA', FoiaSitemap())
+        with patch(
+            'muckrock.core.static_sitemap.generate_section',
+            side_effect=SoftTimeLimitExceeded,
+        ):
+            generate_sitemaps()
+        index = default_storage.open(INDEX_PATH).read()
+        ok_('https://www.muckrock.com/sitemap-FOIA-2.xml.gz' in index)
+
+    @patch.object(JurisdictionSitemap, 'limit', 1)
+    def test_incremental_section(self):
+        """Sections without a field recording when their items are updated
+        are written again in full on every run"""
+        jurisdictions = JurisdictionSitemap().items().count()
+        ok_(jurisdictions > 1)
+        eq_(
+            generate_section('Jurisdiction', JurisdictionSitemap()),
+            jurisdictions,
+        )
+        eq_(
+            generate_section('Jurisdiction', JurisdictionSitemap()),
+            jurisdictions,
+        )
+
+    def test_section_error(self):
+        """An error in one section does not stop the others being written"""
+        with patch.object(AgencySitemap, 'items', side_effect=FieldError):
+            generate_sitemaps()
+        index = default_storage.open(INDEX_PATH).read()
+        ok_('https://www.muckrock.com/sitemap-FOIA-2.xml.gz' in index)
+        ok_('https://www.muckrock.com/sitemap-Jurisdiction-1.xml.gz' in index)
+
+
+class TestSearch(TestCase):
+    """Requests are searched by their text, including their communications"""
+
+    def setUp(self):
+        # the vectors are rebuilt once the transaction commits, which never
+        # happens within a test case
+        on_commit = patch('django.db.transaction.on_commit', run_on_commit)
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        self.foia = FOIARequestFactory(
+            title='Police budget', status='done', embargo=False
+        )
+        self.other = FOIARequestFactory(
+            title='Fire department', status='processed', embargo=False
+        )
+
+    def test_related(self):
+        """Saving a communication adds its text to its request's vector"""
+        ok_(not search(FOIARequest.objects.all(), 'spreadsheet').exists())
+        FOIACommunicationFactory(
+            foia=self.other, communication='The spreadsheet is attached.'
+        )
+        eq_(
+            list(search(FOIARequest.objects.all(), 'spreadsheet')),
+            [self.other],
+        )
+
+    def test_rank(self):
+        """Matches in the title rank above matches in communications"""
+        FOIACommunicationFactory(
+            foia=self.other, communication='The budget is attached.'
+        )
+        eq_(
+            list(
+                search(FOIARequest.objects.all(), 'budget')
+                .order_by('-rank', 'pk')
+            ),
+            [self.foia, self.other],
+        )
+
+    def test_prefix(self):
+        """Partial words match as prefixes"""
+        eq_(
+            list(search(FOIARequest.objects.all(), 'polic budg')),
+            [self.foia],
+        )
+
+    def test_facet_counts(self):
+        """Results are counted by the values of a field"""
+        FOIARequestFactory(status='done')
+        eq_(
+            facet_counts(FOIARequest.objects.all(), ('status',)),
+            [
+                {
+                    'status': 'done',
+                    'count': 2
+                },
+                {
+                    'status': 'processed',
+                    'count': 1
+                },
+            ],
+        )
+
+    def test_list_view(self):
+        """The request list is searched and counted by status"""
+        response = self.client.get(reverse('foia-list'), {'q': 'police'})
+        eq_(list(response.context['object_list']), [self.foia])
+        eq_(
+            response.context['facets']['status'],
+            [{
+                'status': 'done',
+                'label': 'Completed',
+                'count': 1
+            }],
+        )
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'homepage',
+        }
+    }
+)
+class TestHomepage(TestCase):
+    """The homepage is served from a snapshot refreshed in the background"""
+
+    def setUp(self):
+        cache.clear()
+        FOIARequestFactory(status='done', embargo=False)
+
+    def test_snapshot(self):
+        """The snapshot is only computed once"""
+        snapshot = homepage.get_snapshot()
+        eq_(snapshot['stats']['completed_count'], 1)
+        with self.assertNumQueries(0):
+            homepage.get_snapshot()
+
+    @patch('muckrock.core.tasks.refresh_homepage.delay')
+    def test_stale(self, mock_delay):
+        """A stale snapshot is served while a single refresh is queued"""
+        homepage.refresh()
+        ArticleFactory()
+        ok_(cache.get(homepage.FRESH_KEY) is None)
+        with self.assertNumQueries(0):
+            homepage.get_snapshot()
+            homepage.get_snapshot()
+        mock_delay.assert_called_once_with()
+
+    def test_locked(self):
+        """Only one refresh may compute the snapshot at a time"""
+        cache.add(homepage.LOCK_KEY, True)
+        ok_(homepage.refresh() is None)
+        ok_(cache.get(homepage.SNAPSHOT_KEY) is None)
+        cache.delete(homepage.LOCK_KEY)
+        ok_(homepage.refresh() is not None)
+        ok_(cache.get(homepage.SNAPSHOT_KEY) is not None)
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'shared',
+        }
+    }
+)
+class TestSharedCache(TestCase):
+    """Values are cached with tags and locks"""
+
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+
+    def test_tags(self):
+        """Invalidating a tag invalidates the values tagged with it"""
+        update = Mock(return_value='value')
+        for _ in xrange(2):
+            eq_(
+                shared_cache.get_or_set('key', update, 60, tags=['a', 'b']),
+                'value',
+            )
+        eq_(update.call_count, 1)
+        shared_cache.invalidate_tags(['b'])
+        shared_cache.get_or_set('key', update, 60, tags=['a', 'b'])
+        eq_(update.call_count, 2)
+
+    @override_settings(CACHE_LOCK_SECONDS=0)
+    def test_locked(self):
+        """If another process does not store the value before its lock times
+        out, the value is computed without being stored"""
+        cache.add('key:lock', True)
+        update = Mock(return_value='value')
+        eq_(shared_cache.get_or_set('key', update, 60), 'value')
+        ok_(cache.get('key') is None)
+
+    def test_metrics(self):
+        """Hits and misses are counted by key, without the numbers in it"""
+        for pk in (1, 1, 2):
+            shared_cache.get_or_set('cf:%d:data' % pk, lambda: 'value', 60)
+        eq_(get_metrics()['cf:#:data'], {'hits': 1, 'misses': 2})
+
+    def test_shared_metrics(self):
+        """The counts of every process are added together in the cache"""
+        # counts added by another process
+        cache.set(METRICS_KEY, {'cf:#:data': {'hits': 3, 'misses': 1}}, None)
+        shared_cache.get_or_set('cf:1:data', lambda: 'value', 60)
+        eq_(get_metrics()['cf:#:data'], {'hits': 3, 'misses': 2})
+        # counts are only added once
+        eq_(get_metrics()['cf:#:data'], {'hits': 3, 'misses': 2})
+
+    def test_metrics_view(self):
+        """Staff can view the metrics"""
+        shared_cache.get_or_set('cf:1:data', lambda: 'value', 60)
+        url = reverse('cache-metrics')
+        eq_(self.client.get(url).status_code, 302)
+        UserFactory(username='staff', password='abc', is_staff=True)
+        self.client.login(username='staff', password='abc')
+        response = self.client.get(url)
+        eq_(response.status_code, 200)
+        metrics = json.loads(response.content)
+        eq_(metrics['cf:#:data']['misses'], 1)
+
+
 @patch('stripe.Charge', Mock())
 class TestDonations(TestCase):
     """Tests donation functionality"""
@@ -27,27 +27,11 @@ import muckrock.jurisdiction.viewsets
 import muckrock.news.viewsets
 import muckrock.qanda.views
 import muckrock.task.viewsets
-from muckrock.agency.sitemap import AgencySitemap
-from muckrock.core.sitemap import FlatPageSitemap
+from muckrock.core.static_sitemap import SITEMAPS
 from muckrock.core.views import handler500  # pylint: disable=unused-import
-from muckrock.foia.sitemap import FoiaSitemap
-from muckrock.jurisdiction.sitemap import JurisdictionSitemap
-from muckrock.news.sitemap import ArticleSitemap
-from muckrock.project.sitemap import ProjectSitemap
-from muckrock.qanda.sitemap import QuestionSitemap
 
 admin.site.index_template = 'admin/custom_index.html'
 
-sitemaps = {
-    'FOIA': FoiaSitemap,
-    'News': ArticleSitemap,
-    'Agency': AgencySitemap,
-    'Jurisdiction': JurisdictionSitemap,
-    'Question': QuestionSitemap,
-    'Project': ProjectSitemap,
-    'Flatpages': FlatPageSitemap,
-}
-
 router = DefaultRouter()
 router.register(
     r'jurisdiction', muckrock.jurisdiction.viewsets.JurisdictionViewSet,
@@ -100,6 +84,7 @@ router.register(
 urlpatterns = [
     url(r'^$', views.homepage, name='index'),
     url(r'^reset_cache/$', views.reset_homepage_cache, name='reset-cache'),
+    url(r'^cache_metrics/$', views.cache_metrics, name='cache-metrics'),
     url(r'^accounts/', include('muckrock.accounts.urls')),
     url(r'^foi/', include('muckrock.foia.urls')),
     url(r'^news/', include('muckrock.news.urls')),
@@ -135,14 +120,18 @@ urlpatterns = [
     ),
     url(
         r'^sitemap\.xml$',
-        django.contrib.sitemaps.views.index,
-        {'sitemaps': sitemaps},
+        views.sitemap_index,
         name='django.contrib.sitemaps.views.index',
     ),
+    url(
+        r'^(?P<name>sitemap-\w+-\d+\.xml\.gz)$',
+        views.sitemap_page,
+        name='sitemap-page',
+    ),
     url(
         r'^sitemap-(?P<section>.+)\.xml$',
         django.contrib.sitemaps.views.sitemap,
-        {'sitemaps': sitemaps},
+        {'sitemaps': SITEMAPS},
         name='django.contrib.sitemaps.views.sitemap',
     ),
     url(r'^news-sitemaps/', include('news_sitemaps.urls')),
@@ -5,7 +5,6 @@ Miscellanous utilities
 # Django
 from django.conf import settings
 from django.contrib.auth.models import Group, User
-from django.core.cache import cache
 from django.template import Context
 from django.template.loader_tags import BlockNode, ExtendsNode
 from django.utils.module_loading import import_string
@@ -16,11 +15,15 @@ import logging
 import random
 import string
 import sys
+import threading
+import time
 import uuid
+from collections import OrderedDict
 
 # Third Party
 import actstream
 import stripe
+from storages.backends.s3boto import S3BotoStorage
 
 # MuckRock
 from muckrock.core.storage import QueuedS3DietStorage
@@ -124,15 +127,6 @@ def get_stripe_token(card_number='4242424242424242'):
     return token.id
 
 
-def cache_get_or_set(key, update, timeout):
-    """Get the value from the cache if present, otherwise update it"""
-    value = cache.get(key)
-    if value is None:
-        value = update()
-        cache.set(key, value, timeout)
-    return value
-
-
 def get_image_storage():
     """Return the storage class to use for images we want optimized"""
     if settings.USE_QUEUED_STORAGE:
@@ -141,6 +135,16 @@ def get_image_storage():
         return import_string(settings.DEFAULT_FILE_STORAGE)()
 
 
+def get_private_storage():
+    """Return a storage for files which must only be served through views
+    which check the user's permissions"""
+    storage_class = import_string(settings.DEFAULT_FILE_STORAGE)
+    if issubclass(storage_class, S3BotoStorage):
+        return storage_class(default_acl='private', querystring_auth=True)
+    else:
+        return storage_class()
+
+
 def retry_on_error(error, func, *args, **kwargs):
     """Retry a function on error"""
     times = kwargs.pop('times', 0) + 1
@@ -171,3 +175,52 @@ class Echo(object):
     def write(self, value):
         """Return the value"""
         return value
+
+
+class LRUCache(object):
+    """A bounded, thread safe, in process cache which evicts the least
+    recently used keys first.  If a timeout is given, keys also expire that
+    many seconds after they are set."""
+
+    def __init__(self, size, timeout=None):
+        self.size = size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Get a value, marking it as recently used"""
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.time():
+                return default
+            self._data[key] = (expires, value)
+            return value
+
+    def set(self, key, value):
+        """Set a value, evicting the least recently used if full"""
+        if self.timeout is None:
+            expires = None
+        else:
+            expires = time.time() + self.timeout
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (expires, value)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all keys"""
+        with self._lock:
+            self._data.clear()
@@ -5,11 +5,13 @@ Views for muckrock project
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
-from django.core.cache import cache
-from django.core.cache.utils import make_template_fragment_key
+from django.contrib.sitemaps import views as sitemap_views
+from django.core.files.storage import default_storage
 from django.core.urlresolvers import reverse
-from django.db.models import F, Sum
+from django.db.models import F
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 from django.utils.html import escape
 from django.views.generic import FormView, ListView, TemplateView, View
@@ -17,10 +19,10 @@ from django.views.generic import FormView, ListView, TemplateView, View
 # Standard Library
 import logging
 import sys
+from wsgiref.util import FileWrapper
 
 # Third Party
 import stripe
-from watson import search as watson
 from watson.views import SearchMixin
 
 # MuckRock
@@ -30,13 +32,13 @@ from muckrock.accounts.utils import (
     mixpanel_event,
     stripe_get_customer,
 )
-from muckrock.agency.models import Agency
+from muckrock.core import search
+from muckrock.core.caching import get_metrics, shared_cache
 from muckrock.core.forms import NewsletterSignupForm, SearchForm, StripeForm
+from muckrock.core.homepage import get_snapshot, refresh
+from muckrock.core.static_sitemap import INDEX_PATH, SITEMAPS, page_path
 from muckrock.core.utils import stripe_retry_on_error
-from muckrock.foia.models import FOIAFile, FOIARequest
 from muckrock.jurisdiction.models import Jurisdiction
-from muckrock.news.models import Article
-from muckrock.project.models import Project
 
 logger = logging.getLogger(__name__)
 
@@ -161,9 +163,16 @@ class PaginationMixin(object):
 class ModelSearchMixin(object):
     """
     The ModelSearchMixin allows a queryset provided by a list view to be
-    searched, using the watson library.
+    searched, using the model's full text search vector.
+
+    Results are ordered by rank unless a sort is chosen.  A highlighted
+    snippet of the `search_headline` field is annotated on each result, and
+    the results are counted by each of the `search_facets`, which map a name
+    to the fields to count by.
     """
     search_form = SearchForm
+    search_headline = None
+    search_facets = {}
 
     def get_query(self):
         """Gets the query from the request, if it exists."""
@@ -177,15 +186,31 @@ class ModelSearchMixin(object):
         queryset = super(ModelSearchMixin, self).get_queryset()
         query = self.get_query()
         if query:
-            queryset = watson.filter(queryset.model, query)
+            queryset = search.search(queryset, query)
+            if self.search_headline:
+                queryset = search.headline(
+                    queryset, query, self.search_headline
+                )
+            if 'sort' not in self.request.GET:
+                queryset = queryset.order_by('-rank', 'pk')
         return queryset
 
     def get_context_data(self, **kwargs):
-        """Adds the query to the context."""
+        """Adds the query and the facet counts to the context."""
         context = super(ModelSearchMixin, self).get_context_data(**kwargs)
         query = self.get_query()
         context['query'] = query
         context['search_form'] = self.search_form(initial={'q': query})
+        if query and self.search_facets:
+            paginator = context.get('paginator')
+            if paginator is not None:
+                queryset = paginator.object_list
+            else:
+                queryset = context['object_list']
+            context['facets'] = {
+                name: search.facet_counts(queryset, fields)
+                for name, fields in self.search_facets.iteritems()
+            }
         return context
 
 
@@ -212,7 +237,7 @@ class MRFilterListView(OrderedSortMixin, ModelFilterMixin, MRListView):
 
 
 class MRSearchFilterListView(
-    OrderedSortMixin, ModelSearchMixin, ModelFilterMixin, MRListView
+    ModelSearchMixin, OrderedSortMixin, ModelFilterMixin, MRListView
 ):
     """Adds ordered sorting, searching, and filtering to a MRListView."""
     pass
@@ -300,75 +325,9 @@ class LandingView(TemplateView):
     template_name = 'flatpages/landing.html'
 
 
-class Homepage(object):
-    """Control caching for the homepage"""
-
-    def get_cached_values(self):
-        """Return all the methods used to generate the cached values"""
-        return [
-            ('articles', self.articles),
-            ('featured_projects', self.featured_projects),
-            ('completed_requests', self.completed_requests),
-            ('stats', self.stats),
-        ]
-
-    def articles(self):
-        """Get the articles for the front page"""
-        return Article.objects.get_published().prefetch_authors()[:5]
-
-    def featured_projects(self):
-        """Get the featured projects for the front page"""
-        return (
-            Project.objects.get_public().optimize().filter(featured=True)[:4]
-        )
-
-    def completed_requests(self):
-        """Get recently completed requests"""
-        return lambda: (
-            FOIARequest.objects.get_public().get_done().
-            order_by('-datetime_done', 'pk').select_related(
-                'agency__jurisdiction__parent__parent',
-                'composer__user',
-            ).only(
-                'status',
-                'slug',
-                'title',
-                'agency__name',
-                'agency__slug',
-                'agency__jurisdiction__slug',
-                'agency__jurisdiction__level',
-                'agency__jurisdiction__name',
-                'agency__jurisdiction__parent__abbrev',
-                'agency__jurisdiction__parent__name',
-                'agency__jurisdiction__parent__slug',
-                'agency__jurisdiction__parent__parent__slug',
-                'composer__user__username',
-                'composer__user__first_name',
-                'composer__user__last_name',
-            ).get_public_file_count(limit=6)
-        )
-
-    def stats(self):
-        """Get some stats to show on the front page"""
-        # pylint: disable=unnecessary-lambda
-        return {
-            'request_count':
-                lambda: FOIARequest.objects.count(),
-            'completed_count':
-                lambda: FOIARequest.objects.get_done().count(),
-            'page_count':
-                lambda: FOIAFile.objects.aggregate(pages=Sum('pages'))['pages'],
-            'agency_count':
-                lambda: Agency.objects.get_approved().count(),
-        }
-
-
 def homepage(request):
     """Get all the details needed for the homepage"""
-    context = {}
-    for name, value in Homepage().get_cached_values():
-        context[name] = value()
-    return render(request, 'homepage.html', context)
+    return render(request, 'homepage.html', get_snapshot())
 
 
 @user_passes_test(lambda u: u.is_staff)
@@ -376,17 +335,19 @@ def reset_homepage_cache(request):
     """Reset the homepage cache"""
     # pylint: disable=unused-argument
 
-    template_keys = (
-        'homepage_top',
-        'homepage_bottom',
-        'dropdown_recent_articles',
-    )
-    for key in template_keys:
-        cache.delete(make_template_fragment_key(key))
+    refresh()
+    shared_cache.delete_fragment('dropdown_recent_articles')
 
     return redirect('index')
 
 
+@user_passes_test(lambda u: u.is_staff)
+def cache_metrics(request):
+    """Show the cache hits and misses across every process"""
+    # pylint: disable=unused-argument
+    return JsonResponse(get_metrics())
+
+
 class StripeFormMixin(object):
     """Prefills the StripeForm values."""
 
@@ -552,6 +513,35 @@ def jurisdiction(request, jurisdiction=None, slug=None, idx=None, view=None):
         return redirect(jmodel.get_url(view))
 
 
+def _sitemap_response(path, content_type):
+    """Stream a sitemap from storage"""
+    response = StreamingHttpResponse(
+        FileWrapper(default_storage.open(path), 64 * 1024),
+        content_type=content_type,
+    )
+    patch_cache_control(
+        response, public=True, max_age=settings.SITEMAP_CACHE_SECONDS
+    )
+    return response
+
+
+def sitemap_index(request):
+    """Serve the sitemap index written to storage, or render it live if it
+    has not been written yet"""
+    if not default_storage.exists(INDEX_PATH):
+        return sitemap_views.index(request, sitemaps=SITEMAPS)
+    return _sitemap_response(INDEX_PATH, 'application/xml')
+
+
+def sitemap_page(request, name):
+    """Serve a gzipped page of a sitemap written to storage"""
+    # pylint: disable=unused-argument
+    path = page_path(name)
+    if not default_storage.exists(path):
+        raise Http404
+    return _sitemap_response(path, 'application/x-gzip')
+
+
 def handler500(request):
     """
     500 error handler which includes request in the context.
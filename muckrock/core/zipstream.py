@@ -0,0 +1,176 @@
+"""
+Build zip archives as a stream of bytes
+
+The standard library's ZipFile needs to seek back to fill in each file's
+size and checksum, so it must write to a seekable buffer.  Here the sizes and
+checksums are written after each file's data in a data descriptor instead, so
+an archive can be streamed out as it is built, holding only a chunk of a
+single file in memory at a time.
+"""
+
+# Standard Library
+import struct
+import zlib
+from zipfile import (
+    ZIP_DEFLATED,
+    stringCentralDir,
+    stringEndArchive,
+    stringFileHeader,
+    structCentralDir,
+    structEndArchive,
+    structFileHeader,
+)
+
+# the sizes and checksum follow the file data
+FLAG_DATA_DESCRIPTOR = 0x08
+# the file name is encoded as utf8
+FLAG_UTF8 = 0x800
+
+ZIP_VERSION = 20
+ZIP_MAX = 0xFFFFFFFF
+# files are created on unix, readable by everyone
+CREATE_SYSTEM = 3
+EXTERNAL_ATTR = 0o644 << 16
+
+structDataDescriptor = '<4sLLL'
+stringDataDescriptor = 'PK\x07\x08'
+
+
+def _dos_datetime(datetime_):
+    """Convert a datetime to the date and time format used by zip"""
+    if datetime_ is None or datetime_.year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = ((datetime_.hour << 11) | (datetime_.minute << 5) |
+                (datetime_.second // 2))
+    dos_date = (((datetime_.year - 1980) << 9) | (datetime_.month << 5)
+                | datetime_.day)
+    return dos_time, dos_date
+
+
+def _encode_name(name):
+    """Encode the file name, flagging it if it is not plain ascii"""
+    if isinstance(name, unicode):
+        try:
+            return name.encode('ascii'), 0
+        except UnicodeEncodeError:
+            return name.encode('utf8'), FLAG_UTF8
+    return name, 0
+
+
+def stream_zip(files):
+    """Generate the bytes of a deflated zip archive
+
+    `files` is an iterable of (name, datetime, chunks) triples, where chunks
+    is an iterable of the file's contents as byte strings.  Each file's
+    contents are only read as the archive is consumed.
+    """
+    # pylint: disable=too-many-locals
+    offset = 0
+    entries = []
+    for name, datetime_, chunks in files:
+        name, flags = _encode_name(name)
+        flags |= FLAG_DATA_DESCRIPTOR
+        dos_time, dos_date = _dos_datetime(datetime_)
+        header_offset = offset
+
+        header = struct.pack(
+            structFileHeader,
+            stringFileHeader,
+            ZIP_VERSION,
+            0,
+            flags,
+            ZIP_DEFLATED,
+            dos_time,
+            dos_date,
+            0,
+            0,
+            0,
+            len(name),
+            0,
+        ) + name
+        offset += len(header)
+        yield header
+
+        crc = 0
+        file_size = 0
+        compress_size = 0
+        compressor = zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15
+        )
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            data = compressor.compress(chunk)
+            if data:
+                compress_size += len(data)
+                yield data
+        data = compressor.flush()
+        compress_size += len(data)
+        offset += compress_size
+        crc &= ZIP_MAX
+        if file_size > ZIP_MAX or offset > ZIP_MAX:
+            raise ValueError('Zip archive is too large')
+        yield data
+
+        descriptor = struct.pack(
+            structDataDescriptor,
+            stringDataDescriptor,
+            crc,
+            compress_size,
+            file_size,
+        )
+        offset += len(descriptor)
+        yield descriptor
+
+        entries.append((
+            name,
+            flags,
+            dos_time,
+            dos_date,
+            crc,
+            compress_size,
+            file_size,
+            header_offset,
+        ))
+
+    central_offset = offset
+    for (
+        name, flags, dos_time, dos_date, crc, compress_size, file_size,
+        header_offset
+    ) in entries:
+        central_dir = struct.pack(
+            structCentralDir,
+            stringCentralDir,
+            ZIP_VERSION,
+            CREATE_SYSTEM,
+            ZIP_VERSION,
+            0,
+            flags,
+            ZIP_DEFLATED,
+            dos_time,
+            dos_date,
+            crc,
+            compress_size,
+            file_size,
+            len(name),
+            0,
+            0,
+            0,
+            0,
+            EXTERNAL_ATTR,
+            header_offset,
+        ) + name
+        offset += len(central_dir)
+        yield central_dir
+
+    yield struct.pack(
+        structEndArchive,
+        stringEndArchive,
+        0,
+        0,
+        len(entries),
+        len(entries),
+        offset - central_offset,
+        central_offset,
+        0,
+    )
@@ -10,7 +10,7 @@ from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 
 # MuckRock
-from muckrock.core.utils import cache_get_or_set
+from muckrock.core.caching import shared_cache
 from muckrock.crowdfund.forms import CrowdfundPaymentForm
 from muckrock.crowdfund.models import Crowdfund
 
@@ -105,12 +105,15 @@ def generate_crowdfund_context(
     logged_in, user_email = crowdfund_user(the_context)
     the_request = the_context.request
     named, contrib_count, anon_count = (
-        cache_get_or_set(
-            'cf:%s:crowdfund_widget_data' % the_crowdfund.pk, lambda: (
+        shared_cache.get_or_set(
+            'cf:%s:crowdfund_widget_data' % the_crowdfund.pk,
+            lambda: (
                 list(the_crowdfund.named_contributors()),
                 the_crowdfund.contributors_count(),
                 the_crowdfund.anonymous_contributors_count(),
-            ), settings.DEFAULT_CACHE_TIMEOUT
+            ),
+            settings.DEFAULT_CACHE_TIMEOUT,
+            tags=['crowdfund:%s' % the_crowdfund.pk],
         )
     )
     contrib_sum = contributor_summary(named, contrib_count, anon_count)
@@ -37,11 +37,11 @@ class DataSetForm(forms.ModelForm):
 class DataSetAdmin(VersionAdmin):
     """Admin for a data set"""
     prepopulated_fields = {'slug': ('name',)}
-    list_display = ('name', 'user', 'created_datetime')
+    list_display = ('name', 'user', 'created_datetime', 'status', 'row_count')
     list_filter = ('status',)
     date_hieracrhy = 'created_datetime'
     search_fields = ('name',)
-    readonly_fields = ('created_datetime', 'status')
+    readonly_fields = ('created_datetime', 'status', 'row_count')
     form = DataSetForm
     inlines = [DataFieldInline]
     save_on_top = True
@@ -10,4 +10,8 @@ from django.apps import AppConfig
 
 class DatasetConfig(AppConfig):
     """Config datasets"""
-    name = 'dataset'
+    name = 'muckrock.dataset'
+
+    def ready(self):
+        """Connect the signal handlers"""
+        import muckrock.dataset.signals  # pylint: disable=unused-import,unused-variable
@@ -37,7 +37,6 @@ class XlsCreator(object):
         self.name = name
         book = xlrd.open_workbook(file_contents=file_.read())
         self.sheet = book.sheet_by_index(0)
-        self.headers = next(self.csv_reader)
 
     def get_name(self):
         """Get the name of the dataset"""
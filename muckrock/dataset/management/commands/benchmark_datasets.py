@@ -0,0 +1,129 @@
+"""
+Benchmark paging, sorting and filtering a large data set
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+
+# Standard Library
+import random
+from datetime import date, timedelta
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.dataset import views
+from muckrock.dataset.models import DataSet
+
+NAMES = ['alice', 'bob', 'charlie', 'dave', 'eve', 'mallory', 'trent']
+CITIES = ['Boston', 'Chicago', 'Denver']
+
+
+class Command(BaseCommand):
+    """Load a generated data set, then time requests to the data view with
+    and without the field indexes.  All data is rolled back afterwards."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000000,
+            help='The number of rows in the generated data set',
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=20,
+            help='The page size to request',
+        )
+
+    def handle(self, *args, **kwargs):
+        # factories are a development dependency, only import them if needed
+        from muckrock.core.factories import UserFactory
+        with transaction.atomic():
+            with measure('load %d rows' % kwargs['rows']) as loading:
+                dataset = DataSet.objects.create_from_csv(
+                    'Benchmark',
+                    UserFactory(),
+                    self.generate(kwargs['rows']),
+                )
+            self.stdout.write(unicode(loading))
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE dataset_datarow')
+            # indexes may only be built concurrently outside a transaction
+            for field in dataset.fields.all():
+                field.create_index(concurrently=False)
+            self.benchmark(dataset, kwargs['size'], 'indexed')
+            for field in dataset.fields.all():
+                field.drop_index(concurrently=False)
+            # do not queue the fields to be indexed again
+            with override_settings(DATASET_INDEX_MIN_ROWS=kwargs['rows'] + 1):
+                self.benchmark(dataset, kwargs['size'], 'unindexed')
+            transaction.set_rollback(True)
+
+    def generate(self, num):
+        """Generate the lines of a CSV file"""
+        yield 'name,amount,city,date\n'
+        start = date(2010, 1, 1)
+        for _ in xrange(num):
+            yield '%s %d,%.2f,%s,%s\n' % (
+                random.choice(NAMES),
+                random.randint(0, 100000),
+                random.uniform(0, 10000),
+                random.choice(CITIES),
+                start + timedelta(random.randint(0, 3000)),
+            )
+
+    def benchmark(self, dataset, size, label):
+        """Time a series of tabulator requests"""
+        last_page = (dataset.row_count + size - 1) / size
+        requests = [
+            ('first page', {}),
+            ('last page', {
+                'page': last_page
+            }),
+            (
+                'sort number', {
+                    'sorters[0][field]': 'amount',
+                    'sorters[0][dir]': 'desc',
+                }
+            ),
+            (
+                'sort text', {
+                    'sorters[0][field]': 'name',
+                    'sorters[0][dir]': 'asc',
+                }
+            ),
+            (
+                'sort date', {
+                    'sorters[0][field]': 'date',
+                    'sorters[0][dir]': 'asc',
+                }
+            ),
+            (
+                'filter like', {
+                    'filters[0][field]': 'name',
+                    'filters[0][type]': 'like',
+                    'filters[0][value]': 'alice 123',
+                }
+            ),
+            (
+                'filter number', {
+                    'filters[0][field]': 'amount',
+                    'filters[0][type]': '>',
+                    'filters[0][value]': '9990',
+                    'sorters[0][field]': 'amount',
+                    'sorters[0][dir]': 'asc',
+                }
+            ),
+        ]
+        factory = RequestFactory()
+        for name, params in requests:
+            params['size'] = size
+            request = factory.get('/', params)
+            with measure('%s: %s' % (label, name)) as measurement:
+                views.data(request, dataset.slug, dataset.pk)
+            self.stdout.write(unicode(measurement))
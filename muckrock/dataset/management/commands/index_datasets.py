@@ -0,0 +1,23 @@
+"""
+Index the field values of existing data sets
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# MuckRock
+from muckrock.dataset.models import DataSet
+
+
+class Command(BaseCommand):
+    """Rebuild the sorting and filtering indexes of the indexed fields of
+    every ready data set"""
+
+    help = __doc__
+
+    def handle(self, *args, **kwargs):
+        for dataset in DataSet.objects.filter(
+            status='ready', fields__indexed=True
+        ).distinct():
+            dataset.create_indexes()
+            self.stdout.write('Indexed %s' % dataset)
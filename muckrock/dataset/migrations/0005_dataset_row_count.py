@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-05 10:42
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataset', '0004_datafield_hidden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='row_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models import Count
+
+
+def set_row_count(apps, schema_editor):
+    """Set the row count for existing data sets"""
+    DataSet = apps.get_model('dataset', 'DataSet')
+    for dataset in DataSet.objects.annotate(count=Count('rows')):
+        DataSet.objects.filter(pk=dataset.pk).update(row_count=dataset.count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataset', '0005_dataset_row_count'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(set_row_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataset', '0006_trigram_row_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datafield',
+            name='indexed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
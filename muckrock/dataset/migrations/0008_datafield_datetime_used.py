@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dataset', '0007_datafield_indexed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datafield',
+            name='datetime_used',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -4,18 +4,22 @@ Models for the data set application
 """
 
 # Django
+from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.contrib.postgres.fields.jsonb import KeyTransform
 from django.core.urlresolvers import reverse
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models.expressions import OrderBy, RawSQL
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 
 # Standard Library
 import logging
 import sys
 from collections import defaultdict
-from itertools import izip_longest
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice, izip_longest
 
 # MuckRock
 from muckrock.dataset.creators import CrowdsourceCreator, CsvCreator, XlsCreator
@@ -23,6 +27,41 @@ from muckrock.dataset.fields import FIELD_DICT, FIELDS
 
 logger = logging.getLogger(__name__)
 
+# number of rows to insert per query when creating a data set
+BATCH_SIZE = 1000
+
+# SQL expressions for a field's value cast to its sort type, keyed by sort type
+# text is truncated so that long values still fit in a btree index, and
+# decimals are only cast if they look like numbers, so that a stray value
+# past the rows used to detect the field's type does not raise an error
+TYPED_VALUES = {
+    'text': ('left(data->>%s, 255)', models.TextField),
+    'decimal': (
+        "CASE WHEN data->>%s ~ '^-?[0-9]+(?:[.][0-9]+)?$' "
+        'THEN (data->>%s)::decimal END',
+        models.DecimalField,
+    ),
+    'date': ("NULLIF(data->>%s, '')::date", models.DateField),
+}
+# casting text to a date depends on the DateStyle setting, so postgres
+# will not allow it in an index
+INDEXED_SORT_TYPES = ('text', 'decimal')
+
+
+def drop_indexes(index_name, concurrently=True):
+    """Drop the indexes of a field, by the prefix of their names.  Dropping
+    them concurrently does not block the data sets being read, but may not be
+    done within a transaction."""
+    with connection.cursor() as cursor:
+        for suffix in ('sort', 'search'):
+            cursor.execute(
+                'DROP INDEX {}IF EXISTS {}_{}'.format(
+                    'CONCURRENTLY ' if concurrently else '',
+                    index_name,
+                    suffix,
+                )
+            )
+
 
 class DataSetQuerySet(models.QuerySet):
     """Customer manager for DataSets"""
@@ -66,21 +105,36 @@ class DataSetQuerySet(models.QuerySet):
         try:
             headers = creator.get_headers()
             slug_headers = self._unique_slugify(headers)
-            for i, (name, slug) in enumerate(zip(headers, slug_headers)):
-                dataset.fields.create(
+            DataField.objects.bulk_create([
+                DataField(
+                    dataset=dataset,
                     name=name,
                     slug=slug,
                     field_number=i,
-                )
-            for i, row in enumerate(creator.get_rows()):
-                dataset.rows.create(
+                ) for i,
+                (name, slug) in enumerate(zip(headers, slug_headers))
+            ])
+            # rows are generated lazily from the source, and inserted in
+            # batches, so memory use does not depend on the size of the source
+            rows = (
+                DataRow(
+                    dataset=dataset,
                     data=dict(izip_longest(
                         slug_headers,
                         row,
                         fillvalue='',
                     )),
                     row_number=i,
-                )
+                ) for i, row in enumerate(creator.get_rows())
+            )
+            batch = list(islice(rows, BATCH_SIZE))
+            while batch:
+                DataRow.objects.bulk_create(batch)
+                dataset.row_count += len(batch)
+                # report progress while processing
+                DataSet.objects.filter(pk=dataset.pk
+                                       ).update(row_count=dataset.row_count)
+                batch = list(islice(rows, BATCH_SIZE))
 
             dataset.detect_field_types()
         except Exception as exc:
@@ -120,6 +174,7 @@ class DataSet(models.Model):
         ),
         default='ready',
     )
+    row_count = models.PositiveIntegerField(default=0)
 
     objects = DataSetQuerySet.as_manager()
 
@@ -158,6 +213,11 @@ class DataSet(models.Model):
                     field.save()
                     break
 
+    def create_indexes(self, concurrently=True):
+        """Rebuild the indexes of each of this data set's indexed fields"""
+        for field in self.fields.filter(indexed=True):
+            field.create_index(concurrently)
+
     def save(self, *args, **kwargs):
         """Save the slug"""
         self.slug = slugify(self.name)
@@ -191,6 +251,10 @@ class DataField(models.Model):
         default='text',
     )
     hidden = models.BooleanField(default=False)
+    # fields are indexed once they are sorted or filtered on
+    indexed = models.BooleanField(default=False)
+    # when an indexed field was last sorted or filtered on, to a day
+    datetime_used = models.DateTimeField(blank=True, null=True)
 
     objects = DataFieldQuerySet.as_manager()
 
@@ -198,10 +262,20 @@ class DataField(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        """Save the slug"""
+        """Save the slug, and re-index the values if the type changed"""
+        from muckrock.dataset.tasks import index_datafield
         if not self.slug:
             self.slug = slugify(self.name)
+        reindex = self.pk is not None and self.indexed
+        if reindex:
+            old_type = (
+                DataField.objects.filter(pk=self.pk)
+                .values_list('type', flat=True).first()
+            )
+            reindex = old_type != self.type
         super(DataField, self).save(*args, **kwargs)
+        if reindex:
+            transaction.on_commit(lambda: index_datafield.delay(self.pk))
 
     def formatter(self):
         """The tabulator formatter for this field"""
@@ -224,6 +298,106 @@ class DataField(models.Model):
         """Get the field object for this field type"""
         return FIELD_DICT[self.type]
 
+    def text_value(self):
+        """An SQL expression for this field's value as text"""
+        return RawSQL(
+            'data->>%s', (self.slug,), output_field=models.TextField()
+        )
+
+    def typed_value(self):
+        """An SQL expression for this field's value cast to its sort type"""
+        sql, output_field = TYPED_VALUES[self.field.sort_type]
+        return RawSQL(
+            sql,
+            (self.slug,) * sql.count('%s'),
+            output_field=output_field(),
+        )
+
+    @property
+    def index_name(self):
+        """The prefix for the names of this field's indexes"""
+        return 'dataset_datarow_field_{}'.format(self.pk)
+
+    def create_index(self, concurrently=True):
+        """Index this field's values, so that sorting and filtering a large
+        data set does not need to scan all of its rows
+
+        The indexes are partial, covering only this data set's rows, and their
+        expressions must match those used in `DataRowQuerySet.sort` and
+        `DataRowQuerySet.tabulator_filter` for postgres to use them.  They are
+        built concurrently unless told otherwise, so that the data set may
+        still be written to, which may not be done within a transaction.
+
+        No more than DATASET_MAX_INDEXED_FIELDS fields are indexed, as every
+        index slows down writing to the data row table, and the indexes of
+        fields which stop being used are dropped to make room for others.
+        Returns whether the field was indexed.
+        """
+        if not self.indexed and (
+            DataField.objects.filter(indexed=True).count() >=
+            settings.DATASET_MAX_INDEXED_FIELDS
+        ):
+            logger.warning(
+                'DataSet index: not indexing field %d, the limit of %d '
+                'indexed fields has been reached',
+                self.pk,
+                settings.DATASET_MAX_INDEXED_FIELDS,
+            )
+            return False
+        # an index left invalid by an interrupted build must be dropped
+        self.drop_index(concurrently)
+        create = 'CREATE INDEX {}{}'.format(
+            'CONCURRENTLY ' if concurrently else '',
+            self.index_name,
+        )
+        with connection.cursor() as cursor:
+            if self.field.sort_type in INDEXED_SORT_TYPES:
+                sql, _ = TYPED_VALUES[self.field.sort_type]
+                cursor.execute(
+                    create + '_sort ON dataset_datarow '
+                    '(({}), row_number) WHERE dataset_id = %s'.format(sql),
+                    (self.slug,) * sql.count('%s') + (self.dataset_id,),
+                )
+            # trigram index for case insensitive substring searches
+            cursor.execute(
+                create + '_search ON dataset_datarow USING gin '
+                '((UPPER((data->>%s)::text)) gin_trgm_ops) '
+                'WHERE dataset_id = %s',
+                (self.slug, self.dataset_id),
+            )
+        now = timezone.now()
+        DataField.objects.filter(pk=self.pk).update(
+            indexed=True, datetime_used=now
+        )
+        self.indexed = True
+        self.datetime_used = now
+        return True
+
+    def drop_index(self, concurrently=True):
+        """Drop this field's indexes"""
+        drop_indexes(self.index_name, concurrently)
+        DataField.objects.filter(pk=self.pk).update(indexed=False)
+        self.indexed = False
+
+    def mark_used(self):
+        """Record that an indexed field is being sorted or filtered on, at
+        most once a day, so that its index is kept"""
+        now = timezone.now()
+        if self.indexed and (
+            self.datetime_used is None
+            or self.datetime_used < now - timedelta(1)
+        ):
+            DataField.objects.filter(pk=self.pk).update(datetime_used=now)
+            self.datetime_used = now
+
+    def needs_index(self):
+        """Should this field be indexed, as it is being sorted or filtered
+        on?  Small data sets are quick enough to scan."""
+        return (
+            not self.indexed
+            and self.dataset.row_count >= settings.DATASET_INDEX_MIN_ROWS
+        )
+
     class Meta:
         ordering = ('field_number',)
         unique_together = [
@@ -232,6 +406,8 @@ class DataField(models.Model):
         ]
 
 
+# filter types which compare values by their sort type
+TYPED_FILTER_TYPES = ('=', '<', '<=', '>', '>=', '!=')
 FILTER_TYPES = {
     'like': 'icontains',
     '=': 'iexact',
@@ -248,19 +424,24 @@ class DataRowQuerySet(models.QuerySet):
 
     def sort(self, fields, sorters):
         """Sort the data given tabulator style sorter params"""
-        queryset = self.all()
+        ordering = []
         for sorter in sorters:
             if sorter['field'] not in fields:
                 continue
-            descending = sorter['dir'] == 'desc'
-            type_ = fields[sorter['field']].field.sort_type
-            queryset = queryset.order_by(
+            ordering.append(
                 OrderBy(
-                    RawSQL('(data->>%s)::{}'.format(type_), (sorter['field'],)),
-                    descending=descending,
+                    fields[sorter['field']].typed_value(),
+                    descending=sorter['dir'] == 'desc',
                 )
             )
-        return queryset
+        if not ordering:
+            return self.all()
+        # break ties by row number, in the same direction as the first sort,
+        # so that the field's index can be used to return the sorted rows
+        ordering.append(
+            OrderBy(models.F('row_number'), descending=ordering[0].descending)
+        )
+        return self.order_by(*ordering)
 
     def tabulator_filter(self, fields, filters):
         """Filter data given tabulator style filter params"""
@@ -268,12 +449,26 @@ class DataRowQuerySet(models.QuerySet):
         for filter_ in filters:
             if filter_['field'] not in fields:
                 continue
-            kwargs = {
-                'data__{}__{}'.format(
-                    filter_['field'], FILTER_TYPES[filter_['type']]
-                ):
-                    filter_['value']
-            }
+            field = fields[filter_['field']]
+            value = filter_['value']
+            lookup = FILTER_TYPES[filter_['type']]
+            if (
+                filter_['type'] in TYPED_FILTER_TYPES
+                and field.field.sort_type == 'decimal'
+            ):
+                try:
+                    value = Decimal(value)
+                except InvalidOperation:
+                    return queryset.none()
+                lookup = lookup.lstrip('i')
+                expression = field.typed_value()
+            else:
+                expression = field.text_value()
+            # annotations are aliased by field pk, as slugs may not be valid
+            # lookup names
+            alias = 'value_{}'.format(field.pk)
+            queryset = queryset.annotate(**{alias: expression})
+            kwargs = {'{}__{}'.format(alias, lookup): value}
             if filter_['type'] == '!=':
                 queryset = queryset.exclude(**kwargs)
             else:
@@ -0,0 +1,24 @@
+"""Model signal handlers for the DataSet application"""
+
+# Django
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+# MuckRock
+from muckrock.dataset.models import DataField
+from muckrock.dataset.tasks import drop_datafield_indexes
+
+# pylint: disable=unused-argument
+
+
+def datafield_drop_index(sender, instance, **kwargs):
+    """Drop a field's indexes when it is deleted"""
+    index_name = instance.index_name
+    transaction.on_commit(lambda: drop_datafield_indexes.delay(index_name))
+
+
+post_delete.connect(
+    datafield_drop_index,
+    sender=DataField,
+    dispatch_uid='muckrock.dataset.signals.datafield_drop_index',
+)
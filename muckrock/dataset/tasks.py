@@ -3,22 +3,29 @@ Celery tasks for the dataset application
 """
 
 # Django
-from celery.task import task
+from celery.schedules import crontab
+from celery.task import periodic_task, task
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
 
 # Standard Library
 import os.path
+from datetime import timedelta
 
 # Third Party
 from boto.s3.connection import S3Connection
 from smart_open import smart_open
 
 # MuckRock
-from muckrock.dataset.models import DataSet
+from muckrock.dataset.models import DataField, DataSet, drop_indexes
 
 CSV_FILES = ('.csv',)
 EXCEL_FILES = ('.xls', '.xlsx')
+# set while a field is queued to be indexed
+INDEX_LOCK_KEY = 'dataset:index:%d'
 
 
 @task(name='muckrock.dataset.tasks.process_dataset_file')
@@ -41,3 +48,51 @@ def process_dataset_file(file_key, user_pk):
             DataSet.objects.create_from_csv(title, user, data_file)
         elif ext in EXCEL_FILES:
             DataSet.objects.create_from_xls(title, user, data_file)
+
+
+@task(
+    ignore_result=True,
+    time_limit=60 * 60,
+    name='muckrock.dataset.tasks.index_datafield',
+)
+def index_datafield(field_pk):
+    """Index a field's values"""
+    try:
+        field = DataField.objects.filter(pk=field_pk).first()
+        if field is not None:
+            field.create_index()
+    finally:
+        cache.delete(INDEX_LOCK_KEY % field_pk)
+
+
+def queue_index(field):
+    """Queue a field to be indexed, unless it already is queued"""
+    if cache.add(INDEX_LOCK_KEY % field.pk, True, 60 * 60):
+        index_datafield.delay(field.pk)
+
+
+@task(
+    ignore_result=True,
+    name='muckrock.dataset.tasks.drop_datafield_indexes',
+)
+def drop_datafield_indexes(index_name):
+    """Drop the indexes of a field which has been deleted"""
+    drop_indexes(index_name)
+
+
+@periodic_task(
+    run_every=crontab(hour=4, minute=15),
+    time_limit=60 * 60,
+    name='muckrock.dataset.tasks.drop_unused_indexes',
+)
+def drop_unused_indexes():
+    """Drop the indexes of fields which have not been sorted or filtered on
+    recently, so they do not slow down writes, and make room for the indexes
+    of fields which are being used"""
+    cutoff = timezone.now() - timedelta(settings.DATASET_INDEX_UNUSED_DAYS)
+    fields = DataField.objects.filter(
+        Q(datetime_used=None) | Q(datetime_used__lt=cutoff),
+        indexed=True,
+    )
+    for field in fields:
+        field.drop_index()
@@ -7,20 +7,25 @@ Tests for data sets
 
 # Django
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 
 # Standard Library
 import random
 from cStringIO import StringIO
 
 # Third Party
-from nose.tools import assert_false, assert_true, eq_
+from freezegun import freeze_time
+from mock import patch
+from nose.tools import assert_false, assert_true, eq_, ok_
 
 # MuckRock
 from muckrock.core.factories import UserFactory
-from muckrock.core.test_utils import mock_middleware
+from muckrock.core.test_utils import mock_middleware, run_on_commit
 from muckrock.dataset import fields, views
-from muckrock.dataset.models import DataField, DataRow, DataSet
+from muckrock.dataset.models import BATCH_SIZE, DataField, DataRow, DataSet
+from muckrock.dataset.tasks import drop_unused_indexes
 
 
 class TestDataSetModels(TestCase):
@@ -96,6 +101,25 @@ class TestDataSetModels(TestCase):
             csv,
         )
 
+    def test_create_from_csv_bulk(self):
+        """Rows should be inserted in batches"""
+        num_rows = 2 * BATCH_SIZE + 1
+        csv = StringIO(
+            'name,num\n' +
+            ''.join('row {0},{0}\n'.format(i) for i in xrange(num_rows))
+        )
+        with CaptureQueriesContext(connection) as queries:
+            dataset = DataSet.objects.create_from_csv(
+                'Name',
+                self.user,
+                csv,
+            )
+        ok_(len(queries) < 30, 'Creation took %d queries' % len(queries))
+        eq_(dataset.status, 'ready')
+        eq_(dataset.row_count, num_rows)
+        eq_(dataset.rows.count(), num_rows)
+        eq_(dataset.rows.last().data, {'name': 'row 2000', 'num': '2000'})
+
     def test_detect_field_types(self):
         """Test detecting the field types"""
         self.dataset.detect_field_types()
@@ -160,6 +184,114 @@ class TestDataSetModels(TestCase):
         )
         eq_(len(rows), 1)
 
+    def test_row_sort_number(self):
+        """Number fields should sort numerically"""
+        field = self.dataset.fields.get(slug='b')
+        field.type = 'number'
+        field.save()
+        DataRow.objects.create(
+            dataset=self.dataset,
+            row_number=3,
+            data={
+                'a': 'dave',
+                'b': '95',
+                'c': ''
+            },
+        )
+        field_names = {f.slug: f for f in self.dataset.fields.all()}
+        rows = self.dataset.rows.sort(
+            field_names,
+            [{
+                'field': 'b',
+                'dir': 'asc'
+            }],
+        )
+        eq_([r.data['b'] for r in rows], ['95', '102', '201', '901'])
+
+    def test_row_tabulator_filter_number(self):
+        """Number fields should filter numerically"""
+        field = self.dataset.fields.get(slug='b')
+        field.type = 'number'
+        field.save()
+        field_names = {f.slug: f for f in self.dataset.fields.all()}
+        rows = self.dataset.rows.tabulator_filter(
+            field_names,
+            [{
+                'field': 'b',
+                'type': '>',
+                'value': '150'
+            }],
+        )
+        eq_(set(r.data['b'] for r in rows), set(['201', '901']))
+        rows = self.dataset.rows.tabulator_filter(
+            field_names,
+            [{
+                'field': 'b',
+                'type': '<',
+                'value': 'foo'
+            }],
+        )
+        eq_(len(rows), 0)
+
+    def test_indexes(self):
+        """Test creating and dropping the field indexes"""
+
+        def index_names():
+            """Get the names of the indexes on the data row table"""
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT indexname FROM pg_indexes '
+                    "WHERE tablename = 'dataset_datarow'"
+                )
+                return set(row[0] for row in cursor.fetchall())
+
+        # indexes may not be built concurrently within the test's transaction
+        field = self.dataset.fields.get(slug='a')
+        index_name = field.index_name
+        ok_(field.create_index(concurrently=False))
+        ok_(index_name + '_sort' in index_names())
+        ok_(index_name + '_search' in index_names())
+        ok_(DataField.objects.get(pk=field.pk).indexed)
+        field.type = 'date'
+        with patch('django.db.transaction.on_commit', run_on_commit):
+            with patch(
+                'muckrock.dataset.tasks.index_datafield.delay'
+            ) as mock_index:
+                field.save()
+        mock_index.assert_called_once_with(field.pk)
+        field.create_index(concurrently=False)
+        ok_(index_name + '_sort' not in index_names())
+        ok_(index_name + '_search' in index_names())
+        with patch('django.db.transaction.on_commit', run_on_commit):
+            with patch(
+                'muckrock.dataset.tasks.drop_datafield_indexes.delay'
+            ) as mock_drop:
+                field.delete()
+        mock_drop.assert_called_once_with(index_name)
+
+    @override_settings(DATASET_MAX_INDEXED_FIELDS=1)
+    def test_index_limit(self):
+        """No more fields are indexed once the limit is reached"""
+        fields = list(self.dataset.fields.all())
+        ok_(fields[0].create_index(concurrently=False))
+        assert_false(fields[1].create_index(concurrently=False))
+        assert_false(DataField.objects.get(pk=fields[1].pk).indexed)
+
+    def test_drop_unused_indexes(self):
+        """Indexes which have not been used recently are dropped"""
+        used, unused = self.dataset.fields.all()[:2]
+        with freeze_time('2018-01-01'):
+            unused.create_index(concurrently=False)
+        with freeze_time('2018-01-20'):
+            used.create_index(concurrently=False)
+        with freeze_time('2018-02-15'):
+            used.mark_used()
+            with patch('muckrock.dataset.models.drop_indexes') as mock_drop:
+                drop_unused_indexes()
+        mock_drop.assert_called_once_with(unused.index_name, True)
+        ok_(DataField.objects.get(pk=used.pk).indexed)
+        assert_false(DataField.objects.get(pk=unused.pk).indexed)
+
 
 class TestDataSetFields(TestCase):
     """Test the data set fields"""
@@ -315,6 +447,37 @@ class TestDataSetViews(TestCase):
         )
         eq_(response.status_code, 200)
 
+    @override_settings(DATASET_INDEX_MIN_ROWS=3)
+    def test_data_index(self):
+        """Sorting a large data set should queue its field to be indexed"""
+        request = self.request_factory.get(
+            reverse(
+                'dataset-data',
+                kwargs={
+                    'slug': self.dataset.slug,
+                    'idx': self.dataset.pk
+                }
+            ),
+            {
+                'sorters[0][field]': 'age',
+                'sorters[0][dir]': 'asc',
+            },
+        )
+        request = mock_middleware(request)
+        request.user = self.user
+        with patch(
+            'muckrock.dataset.tasks.index_datafield.delay'
+        ) as mock_index:
+            response = views.data(
+                request,
+                self.dataset.slug,
+                self.dataset.pk,
+            )
+        eq_(response.status_code, 200)
+        mock_index.assert_called_once_with(
+            self.dataset.fields.get(slug='age').pk
+        )
+
     def test_parse_params(self):
         """Test the tabulator parameter parsing function"""
         # pylint: disable=protected-access
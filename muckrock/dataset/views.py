@@ -18,6 +18,7 @@ from djangosecure.decorators import frame_deny_exempt
 
 # MuckRock
 from muckrock.dataset.models import DataSet
+from muckrock.dataset.tasks import queue_index
 
 
 def detail(request, slug, idx):
@@ -95,12 +96,24 @@ def data(request, slug, idx):
     offset = (page - 1) * size
     fields = {f.slug: f for f in dataset.fields.all()}
 
-    json_data = dataset.rows.values_list('data', flat=True)
-    json_data = json_data.sort(fields, sorters)
-    json_data = json_data.tabulator_filter(fields, filters)
-
-    total_rows = json_data.count()
-    json_data = list(json_data[offset:offset + size])
+    rows = dataset.rows.sort(fields, sorters)
+    rows = rows.tabulator_filter(fields, filters)
+
+    # index the fields of large data sets once they are sorted or filtered on
+    for param in sorters + filters:
+        field = fields.get(param['field'])
+        if field is None:
+            continue
+        if field.needs_index():
+            queue_index(field)
+        field.mark_used()
+
+    # the row count is stored on the data set, only count if filtering
+    if filters:
+        total_rows = rows.count()
+    else:
+        total_rows = dataset.row_count
+    json_data = list(rows.values_list('data', flat=True)[offset:offset + size])
     last_page = (total_rows + size - 1) / size
     return JsonResponse({
         'data': json_data,
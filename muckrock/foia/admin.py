@@ -32,19 +32,22 @@ from muckrock.communication.admin import (
 from muckrock.communication.models import Address, EmailAddress, PhoneNumber
 from muckrock.crowdfund.models import Crowdfund
 from muckrock.foia.models import (
+    AutoImportRun,
+    AutoImportScan,
     CommunicationMoveLog,
     FOIACommunication,
     FOIAComposer,
     FOIAFile,
     FOIANote,
     FOIARequest,
+    FollowupRun,
     OutboundComposerAttachment,
     OutboundRequestAttachment,
     TrackingNumber,
 )
 from muckrock.foia.tasks import (
     autoimport,
-    set_document_cloud_pages,
+    set_document_cloud_pages_batch,
     upload_document_cloud,
 )
 from muckrock.portal.models import Portal
@@ -517,16 +520,17 @@ class FOIARequestAdmin(VersionAdmin):
     def retry_pages(self, request, idx):
         """Retry getting the page count"""
 
-        docs = FOIAFile.objects.filter(foia=idx, pages=0)
-        for doc in docs:
-            if doc.is_doccloud():
-                set_document_cloud_pages.apply_async(args=[doc.pk])
+        doc_pks = list(
+            FOIAFile.objects.filter(comm__foia=idx, doccloud=True, pages=0)
+            .values_list('pk', flat=True)
+        )
+        set_document_cloud_pages_batch.delay(doc_pks)
 
         messages.info(
             request,
             'Attempting to set the page count for %d documents... Please '
             'wait while the Document Cloud servers are being accessed' %
-            docs.count()
+            len(doc_pks)
         )
         return HttpResponseRedirect(
             reverse('admin:foia_foiarequest_change', args=[idx])
@@ -646,8 +650,68 @@ class OutboundComposerAttachmentAdmin(VersionAdmin):
     form = OutboundComposerAttachmentAdminForm
 
 
+class FollowupRunAdmin(admin.ModelAdmin):
+    """Follow up run admin options"""
+    list_display = (
+        'date',
+        'datetime_started',
+        'datetime_done',
+        'total',
+        'sent',
+        'failed',
+        'skipped',
+        'throughput',
+    )
+    date_hierarchy = 'date'
+    exclude = ('request_pks', 'dispatched_pks')
+    readonly_fields = (
+        'date',
+        'datetime_started',
+        'datetime_done',
+        'total',
+        'sent',
+        'failed',
+        'skipped',
+        'throughput',
+    )
+
+    def throughput(self, obj):
+        """Requests processed per second"""
+        return '%.2f' % obj.throughput
+
+
+class AutoImportScanInline(admin.TabularInline):
+    """Autoimport scan inline options"""
+    model = AutoImportScan
+    fields = ('name', 'status', 'log', 'datetime_updated')
+    readonly_fields = ('name', 'status', 'log', 'datetime_updated')
+    extra = 0
+    can_delete = False
+
+
+class AutoImportRunAdmin(admin.ModelAdmin):
+    """Autoimport run admin options"""
+    list_display = (
+        'datetime_started',
+        'datetime_done',
+        'total',
+        'processed',
+    )
+    date_hierarchy = 'datetime_started'
+    readonly_fields = (
+        'datetime_started',
+        'datetime_done',
+        'total',
+        'processed',
+        'log',
+    )
+    inlines = [AutoImportScanInline]
+
+
 admin.site.register(FOIARequest, FOIARequestAdmin)
 admin.site.register(FOIACommunication, FOIACommunicationAdmin)
 admin.site.register(FOIAComposer, FOIAComposerAdmin)
 admin.site.register(OutboundRequestAttachment, OutboundRequestAttachmentAdmin)
 admin.site.register(OutboundComposerAttachment, OutboundComposerAttachmentAdmin)
+admin.site.register(FollowupRun, FollowupRunAdmin)
+admin.site.register(AutoImportRun, AutoImportRunAdmin)
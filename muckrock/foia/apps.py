@@ -15,17 +15,62 @@ class FOIAConfig(AppConfig):
         # pylint: disable=invalid-name
         from actstream import registry as action
         from autocomplete_light import shortcuts as autocomplete_light
+        from django.db.models import OuterRef, Subquery, TextField, Value
+        from django.db.models.functions import Concat
         from watson import search
         import django.utils.html
         import re
+        from muckrock.core.search import register, related_text
         import muckrock.foia.signals  # pylint: disable=unused-import,unused-variable
         FOIARequest = self.get_model('FOIARequest')
         FOIACommunication = self.get_model('FOIACommunication')
+        FOIAComposer = self.get_model('FOIAComposer')
+        FOIAFile = self.get_model('FOIAFile')
         FOIANote = self.get_model('FOIANote')
         action.register(FOIARequest)
         action.register(FOIACommunication)
         action.register(FOIANote)
         search.register(FOIARequest.objects.get_public())
+        register(
+            FOIARequest,
+            [
+                ('title', 'A'),
+                (
+                    Subquery(
+                        FOIAComposer.objects.filter(pk=OuterRef('composer_id'))
+                        .values('requested_docs')
+                    ),
+                    'B',
+                ),
+                (
+                    related_text(
+                        FOIACommunication.objects.filter(foia=OuterRef('pk')),
+                        'foia',
+                        'communication',
+                    ),
+                    'C',
+                ),
+                (
+                    related_text(
+                        FOIAFile.objects.filter(comm__foia=OuterRef('pk')),
+                        'comm__foia',
+                        Concat(
+                            'title',
+                            Value(' '),
+                            'description',
+                            output_field=TextField(),
+                        ),
+                    ),
+                    'D',
+                ),
+            ],
+            related={
+                FOIACommunication:
+                    lambda comm: comm.foia_id,
+                FOIAFile:
+                    lambda file_: file_.comm.foia_id if file_.comm_id else None,
+            },
+        )
         autocomplete_light.autodiscover()
         # monkey patch the word_split regex so urlize works better
         django.utils.html.word_split_re = re.compile(r'([\s<>\(\)\[\]"\']+)')
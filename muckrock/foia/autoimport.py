@@ -0,0 +1,384 @@
+"""
+Automatically import scanned documents from S3
+
+Staff upload scanned responses to the scans folder of the autoimport bucket,
+named after the date, the requests they are for and a status code.  Each
+run lists the bucket once, recording a manifest of the scans and their files,
+and each scan is then imported separately.  The progress for each scan is
+saved as it is made, so that a scan interrupted by a time limit is resumed by
+the next run without duplicating any communications or files.
+"""
+
+# Django
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+# Standard Library
+import logging
+import os.path
+import re
+import sys
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from urlparse import urlparse
+
+# Third Party
+from boto.s3.connection import OrdinaryCallingFormat, S3Connection
+
+# MuckRock
+from muckrock.communication.models import MailCommunication
+from muckrock.core.utils import generate_status_action
+from muckrock.foia.codes import CODES
+from muckrock.foia.exceptions import SizeError
+from muckrock.foia.models import (
+    AutoImportRun,
+    AutoImportScan,
+    FOIACommunication,
+    FOIAFile,
+    FOIARequest,
+)
+
+logger = logging.getLogger(__name__)
+
+SCANS = 'scans/'
+REVIEW = 'review/'
+
+p_name = re.compile(
+    r'(?P<month>\d\d?)-(?P<day>\d\d?)-(?P<year>\d\d) '
+    r'(?P<docs>(?:mr\d+ )+)(?P<code>[a-z-]+)(?:\$(?P<arg>\S+))?'
+    r'(?: ID#(?P<id>\S+))?'
+    r'(?: EST(?P<estm>\d\d?)-(?P<estd>\d\d?)-(?P<esty>\d\d))?', re.I
+)
+
+
+def connect():
+    """Connect to S3, or to the S3 compatible service at
+    AWS_AUTOIMPORT_ENDPOINT, such as a local minio server"""
+    if settings.AWS_AUTOIMPORT_ENDPOINT:
+        endpoint = urlparse(settings.AWS_AUTOIMPORT_ENDPOINT)
+        return S3Connection(
+            settings.AWS_ACCESS_KEY_ID,
+            settings.AWS_SECRET_ACCESS_KEY,
+            host=endpoint.hostname,
+            port=endpoint.port,
+            is_secure=endpoint.scheme == 'https',
+            calling_format=OrdinaryCallingFormat(),
+        )
+    return S3Connection(
+        settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY
+    )
+
+
+def get_buckets(conn):
+    """The autoimport bucket and the file storage bucket"""
+    return (
+        conn.get_bucket(settings.AWS_AUTOIMPORT_BUCKET_NAME),
+        conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME),
+    )
+
+
+def parse_name(name):
+    """Parse a file name"""
+    # strip off trailing / and file extension
+    name = os.path.normpath(name)
+    name = os.path.splitext(name)[0]
+
+    m_name = p_name.match(name)
+    if not m_name:
+        raise ValueError('ERROR: %s does not match the file name format' % name)
+    code = m_name.group('code').upper()
+    if code not in CODES:
+        raise ValueError('ERROR: %s uses an unknown code' % name)
+    foia_pks = [pk[2:] for pk in m_name.group('docs').split()]
+    file_datetime = datetime.combine(
+        datetime(
+            int(m_name.group('year')) + 2000,
+            int(m_name.group('month')),
+            int(m_name.group('day')),
+        ),
+        time(tzinfo=timezone.get_current_timezone()),
+    )
+    title, status, body = CODES[code]
+    arg = m_name.group('arg')
+    id_ = m_name.group('id')
+    if m_name.group('esty'):
+        est_date = date(
+            int(m_name.group('esty')) + 2000, int(m_name.group('estm')),
+            int(m_name.group('estd'))
+        )
+    else:
+        est_date = None
+
+    return (
+        foia_pks, file_datetime, code, title, status, body, arg, id_, est_date
+    )
+
+
+def list_scans(bucket):
+    """List the bucket once, grouping the files by the scan they belong to
+
+    Returns an ordered dict of scan names to lists of (key name, size) pairs
+    of the files to import, and a list of errors.
+    """
+    scans = OrderedDict()
+    errors = []
+    nested = set()
+    for key in bucket.list(prefix=SCANS):
+        name = key.name[len(SCANS):]
+        if not name:
+            continue
+        scan, sep, file_name = name.partition('/')
+        if not sep:
+            scans[scan] = [(key.name, key.size)]
+            continue
+        files = scans.setdefault(scan + '/', [])
+        if '/' in file_name:
+            directory = SCANS + name.rsplit('/', 1)[0] + '/'
+            if directory not in nested:
+                nested.add(directory)
+                errors.append(
+                    'ERROR: nested directories not allowed: %s in %s' %
+                    (directory, SCANS + scan + '/')
+                )
+        elif file_name:
+            files.append((key.name, key.size))
+    return scans, errors
+
+
+def copy_to_review(bucket, scan_name):
+    """Copy a scan to the review folder"""
+    for key in bucket.list(prefix=SCANS + scan_name):
+        key.copy(bucket.name, REVIEW + key.name[len(SCANS):])
+
+
+def delete_scan(bucket, scan_name):
+    """Delete a scan, and everything in it if it is a folder"""
+    bucket.delete_keys([k.name for k in bucket.list(prefix=SCANS + scan_name)])
+
+
+def start_run(bucket):
+    """List the bucket and record the manifest of scans to import
+
+    Scans with names that do not parse are moved to the review folder
+    immediately.  Scans which were not finished by a previous run are
+    resumed, unless they are still being imported by another worker.  Returns
+    the run and the pks of the scans to import.
+    """
+    scans, log = list_scans(bucket)
+    run = AutoImportRun.objects.create()
+    stale_age = timedelta(minutes=settings.AUTOIMPORT_STALE_MINUTES)
+    stale = timezone.now() - stale_age
+    scan_pks = []
+    for name, files in scans.iteritems():
+        try:
+            parse_name(name)
+        except ValueError as exc:
+            copy_to_review(bucket, name)
+            delete_scan(bucket, name)
+            log.append(unicode(exc))
+            continue
+        scan, created = AutoImportScan.objects.get_or_create(
+            name=name,
+            defaults={
+                'run': run,
+                'files': files
+            },
+        )
+        if not created:
+            if scan.status == 'processing' and scan.datetime_updated > stale:
+                # progress is saved as it is made, so a scan still being
+                # imported has been updated within the time limit
+                log.append('%s is still being imported, skipping' % name)
+                continue
+            if scan.status == 'done':
+                # done scans are deleted, so this is a new upload which
+                # has been given the same name
+                scan.progress = {}
+                scan.log = []
+            scan.run = run
+            scan.files = files
+            scan.status = 'pending'
+            scan.save()
+        scan_pks.append(scan.pk)
+    run.log = log
+    run.total = len(scan_pks)
+    if not scan_pks:
+        run.datetime_done = timezone.now()
+    run.save()
+    return run, scan_pks
+
+
+def import_scan(scan, bucket, storage_bucket):
+    """Import a scan into each of the requests it is for"""
+    # pylint: disable=broad-except
+    (foia_pks, file_datetime, code, title, status, body, arg, id_,
+     est_date) = parse_name(scan.name)
+    for foia_pk in foia_pks:
+        progress = scan.progress.setdefault(
+            foia_pk,
+            {
+                'comm': None,
+                'files': [],
+                'done': False,
+            },
+        )
+        if progress['done']:
+            continue
+        try:
+            _import_request(
+                scan,
+                progress,
+                foia_pk,
+                bucket,
+                storage_bucket,
+                file_datetime=file_datetime,
+                code=code,
+                title=None if scan.name.endswith('/') else title,
+                status=status,
+                body=body,
+                arg=arg,
+                id_=id_,
+                est_date=est_date,
+            )
+        except FOIARequest.DoesNotExist:
+            copy_to_review(bucket, scan.name)
+            scan.log.append(
+                'ERROR: %s references FOIA Request %s, but it does not exist' %
+                (scan.name, foia_pk)
+            )
+        except SoftTimeLimitExceeded:
+            # if we reach the soft time limit, re-raise so the scan is left
+            # to be resumed by the next run
+            raise
+        except Exception as exc:
+            copy_to_review(bucket, scan.name)
+            scan.log.append(
+                'ERROR: %s has caused an unknown error. %s' % (scan.name, exc)
+            )
+            logger.error('Autoimport error: %s', exc, exc_info=sys.exc_info())
+        # errors are sent to review, so are not retried
+        progress['done'] = True
+        scan.save()
+    # delete the scan after processing all requests for it
+    delete_scan(bucket, scan.name)
+    scan.status = 'done'
+    scan.save()
+
+
+def _import_request(scan, progress, foia_pk, bucket, storage_bucket, **parsed):
+    """Import a scan into a single request"""
+    foia = FOIARequest.objects.get(pk=foia_pk)
+    if progress['comm'] is None:
+        with transaction.atomic():
+            comm = FOIACommunication.objects.create(
+                foia=foia,
+                from_user=foia.agency.get_user() if foia.agency else None,
+                to_user=foia.user,
+                response=True,
+                datetime=parsed['file_datetime'],
+                communication=parsed['body'],
+                status=parsed['status'],
+            )
+            MailCommunication.objects.create(
+                communication=comm,
+                sent_datetime=parsed['file_datetime'],
+            )
+            progress['comm'] = comm.pk
+            scan.save()
+    else:
+        comm = FOIACommunication.objects.get(pk=progress['comm'])
+
+    size_error = False
+    for key_name, size in scan.files:
+        if key_name in progress['files']:
+            continue
+        try:
+            _import_file(
+                key_name,
+                size,
+                storage_bucket,
+                comm,
+                scan,
+                progress,
+                parsed['title'],
+            )
+        except SizeError as exc:
+            size_error = True
+            bucket.get_key(key_name).copy(
+                bucket.name, REVIEW + key_name[len(SCANS):]
+            )
+            exc.args[2].delete()  # delete the foia file
+            scan.log.append(
+                'ERROR: %s was %s bytes and after uploaded was %s bytes - retry'
+                % (key_name[len(SCANS):], exc.args[0], exc.args[1])
+            )
+    if size_error:
+        # the communication will be imported again once the files which
+        # failed are retried
+        comm.delete()
+        return
+
+    with transaction.atomic():
+        foia = FOIARequest.objects.select_for_update().get(pk=foia_pk)
+        foia.status = parsed['status'] or foia.status
+        if foia.status in ['partial', 'done', 'rejected', 'no_docs']:
+            foia.datetime_done = parsed['file_datetime']
+        if parsed['code'] == 'FEE' and parsed['arg']:
+            foia.price = Decimal(parsed['arg'])
+        if parsed['id_']:
+            foia.add_tracking_id(parsed['id_'])
+        if parsed['est_date']:
+            foia.date_estimate = parsed['est_date']
+        if parsed['code'] == 'REJ-P':
+            foia.proxy_reject()
+        foia.save(comment='updated from autoimport files')
+    action = generate_status_action(foia)
+    foia.notify(action)
+    foia.update(comm.anchor())
+
+
+def _import_file(key_name, size, storage_bucket, comm, scan, progress, title):
+    """Copy a file into file storage and attach it to the communication"""
+    from muckrock.foia.tasks import upload_document_cloud
+    foia = comm.foia
+    file_name = os.path.split(key_name)[1]
+
+    foia_file = FOIAFile(
+        comm=comm,
+        title=title or file_name,
+        datetime=comm.datetime,
+        source=comm.get_source(),
+        access='private' if foia.embargo else 'public',
+    )
+    full_file_name = foia_file.ffile.field.generate_filename(
+        foia_file.ffile.instance,
+        file_name,
+    )
+    full_file_name = default_storage.get_available_name(full_file_name)
+    new_key = storage_bucket.copy_key(
+        full_file_name,
+        settings.AWS_AUTOIMPORT_BUCKET_NAME,
+        key_name,
+    )
+    new_key.set_acl('public-read')
+
+    # record the file as imported in the same transaction it is created in,
+    # so it is never imported twice
+    with transaction.atomic():
+        foia_file.ffile.name = full_file_name
+        foia_file.save()
+        progress['files'].append(key_name)
+        scan.save()
+    copied_size = storage_bucket.get_key(full_file_name).size
+    if size != copied_size:
+        raise SizeError(size, copied_size, foia_file)
+
+    scan.log.append(
+        'SUCCESS: %s uploaded to FOIA Request %s with a status of %s' %
+        (file_name, foia.pk, comm.status or foia.status)
+    )
+    upload_document_cloud.apply_async(args=[foia_file.pk, False], countdown=3)
@@ -0,0 +1,211 @@
+"""
+Predict the status of incoming communications with a machine learning
+classifier
+
+The pickled vectorizer, selector and classifier are loaded once per process,
+and the OCR text of files is cached on local disk, so classifying a
+communication only costs the prediction itself.  The disk cache is swept
+every so often, removing the least recently used files once they are too old
+or too large in total.
+"""
+
+# Django
+from django.conf import settings
+
+# Standard Library
+import hashlib
+import logging
+import os
+import os.path
+import threading
+import time
+from urllib import quote_plus
+
+# Third Party
+import dill as pickle
+import numpy as np
+import requests
+from scipy.sparse import hstack
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_PATH = os.path.join(os.path.dirname(__file__), 'classifier.pkl')
+DOC_CLOUD_URL = u'http://www.documentcloud.org/api/documents/%s.json'
+
+_sweep_lock = threading.Lock()
+_swept_at = time.time()
+
+
+class NotReady(Exception):
+    """The communication's files are still being processed by DocumentCloud"""
+
+
+class StatusClassifier(object):
+    """The vectorizer, feature selector and classifier used to predict
+    statuses, loaded the first time they are needed"""
+
+    def __init__(self, path=CLASSIFIER_PATH):
+        self.path = path
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The (vectorizer, selector, classifier) triple"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with open(self.path, 'rb') as pkl_fp:
+                        self._model = pickle.load(pkl_fp)
+        return self._model
+
+    def predict(self, documents):
+        """Predict the status for each of a list of (text, pages) pairs.
+        Returns a list of (status, probability) pairs."""
+        if not documents:
+            return []
+        vectorizer, selector, estimator = self.model
+        texts, pages = zip(*documents)
+        input_vect = vectorizer.transform(texts)
+        pages_vect = np.array([pages], dtype=np.float).transpose()
+        input_vect = selector.transform(hstack([input_vect, pages_vect]))
+        predictions = []
+        for probs in estimator.predict_proba(input_vect):
+            index = probs.argmax()
+            predictions.append((estimator.classes_[index], probs[index]))
+        return predictions
+
+
+classifier = StatusClassifier()
+
+
+def _ocr_cache_path(doc_id):
+    """The local file the OCR text for a document is cached in"""
+    name = hashlib.sha1(doc_id.encode('utf-8')).hexdigest()
+    return os.path.join(settings.OCR_CACHE_DIR, name[:2], name + '.txt')
+
+
+def fetch_text_ocr(doc_id):
+    """Get the text OCR from document cloud.  Returns None on error."""
+    resp = requests.get(DOC_CLOUD_URL % quote_plus(doc_id.encode('utf-8')))
+    try:
+        doc_cloud_json = resp.json()
+    except ValueError:
+        logger.warn(u'Doc Cloud error for %s: %s', doc_id, resp.content)
+        return None
+    if 'error' in doc_cloud_json:
+        logger.warn(
+            u'Doc Cloud error for %s: %s', doc_id, doc_cloud_json['error']
+        )
+        return None
+    text_url = doc_cloud_json['document']['resources']['text']
+    resp = requests.get(text_url)
+    return resp.content.decode('utf-8')
+
+
+def sweep_ocr_cache():
+    """Remove the cached OCR text which has not been used for OCR_CACHE_DAYS,
+    then the least recently used text until the cache fits in
+    OCR_CACHE_MAX_BYTES.  Files are removed from under concurrent readers and
+    sweepers, so any which have already gone are skipped."""
+    cutoff = time.time() - settings.OCR_CACHE_DAYS * 24 * 60 * 60
+    files = []
+    for directory, _, names in os.walk(settings.OCR_CACHE_DIR):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime < cutoff:
+                    os.remove(path)
+                else:
+                    files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                pass
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= settings.OCR_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def _maybe_sweep():
+    """Sweep the OCR cache if this process has not for a while"""
+    # pylint: disable=global-statement
+    global _swept_at
+    with _sweep_lock:
+        sweep = time.time() - _swept_at >= settings.OCR_CACHE_SWEEP_SECONDS
+        if sweep:
+            _swept_at = time.time()
+    if sweep:
+        sweep_ocr_cache()
+
+
+def get_text_ocr(doc_id):
+    """Get the text OCR for a document, from the local cache if possible"""
+    path = _ocr_cache_path(doc_id)
+    try:
+        with open(path, 'rb') as text_fp:
+            text = text_fp.read().decode('utf-8')
+        # the modification time records when the text was last used
+        os.utime(path, None)
+        return text
+    except (IOError, OSError):
+        pass
+    text = fetch_text_ocr(doc_id)
+    if text is None:
+        # do not cache errors, so they will be retried
+        return ''
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # write to a temporary file and rename it, so that concurrent
+        # readers never see a partially written file
+        tmp_path = '%s.%d.%d' % (
+            path, os.getpid(), threading.current_thread().ident
+        )
+        with open(tmp_path, 'wb') as text_fp:
+            text_fp.write(text.encode('utf-8'))
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as exc:
+        logger.warn(u'Could not cache OCR text for %s: %s', doc_id, exc)
+    _maybe_sweep()
+    return text
+
+
+def get_document(communication):
+    """Get the text and total page count for a communication and its files.
+    Raises NotReady if DocumentCloud has not finished with its files."""
+    file_text = []
+    total_pages = 0
+    for file_ in communication.files.all():
+        total_pages += file_.pages
+        if file_.is_doccloud() and file_.doc_id:
+            file_text.append(get_text_ocr(file_.doc_id))
+        elif file_.is_doccloud() and not file_.doc_id:
+            raise NotReady
+    return communication.communication + (' '.join(file_text)), total_pages
+
+
+def classify_response_tasks(resp_tasks):
+    """Predict the status of many response tasks at once
+
+    Sets the predicted status and probability on each task whose
+    communication is ready, without saving, and returns those tasks.
+    """
+    ready = []
+    documents = []
+    for resp_task in resp_tasks:
+        try:
+            documents.append(get_document(resp_task.communication))
+        except NotReady:
+            continue
+        ready.append(resp_task)
+    for resp_task, (status, prob) in zip(ready, classifier.predict(documents)):
+        resp_task.predicted_status = status
+        resp_task.status_probability = int(100 * prob)
+    return ready
@@ -0,0 +1,136 @@
+"""
+Sync the page counts of many files from DocumentCloud at once
+
+DocumentCloud's API only returns the metadata for one document per call, so
+a batch of documents is fetched concurrently, with a bounded number of
+threads, backing off and retrying when DocumentCloud is unavailable.  The
+page counts are then saved for the whole batch in a single query.
+"""
+
+# Django
+from django.conf import settings
+from django.db.models import Case, PositiveIntegerField, Value, When
+
+# Standard Library
+import base64
+import json
+import logging
+import time
+import urllib2
+from multiprocessing.pool import ThreadPool
+from urllib import quote_plus
+
+# MuckRock
+from muckrock.foia.models import FOIAFile
+
+logger = logging.getLogger(__name__)
+
+DOC_CLOUD_API = u'https://www.documentcloud.org/api/documents/%s.json'
+# status codes which mean DocumentCloud may succeed if we try again later
+RETRY_CODES = (429, 500, 502, 503, 504)
+
+
+class NotFound(Exception):
+    """The document is not on DocumentCloud"""
+
+
+def authenticate_documentcloud(request):
+    """This is just standard username/password encoding"""
+    username = settings.DOCUMENTCLOUD_USERNAME
+    password = settings.DOCUMENTCLOUD_PASSWORD
+    auth = base64.encodestring('%s:%s' % (username, password))[:-1]
+    request.add_header('Authorization', 'Basic %s' % auth)
+    return request
+
+
+def fetch_pages(doc_id):
+    """Get the page count for a document from DocumentCloud, retrying with
+    exponential backoff if it is unavailable.  Raises NotFound if the
+    document is not on DocumentCloud."""
+    request = authenticate_documentcloud(
+        urllib2.Request(DOC_CLOUD_API % quote_plus(doc_id.encode('utf-8')))
+    )
+    for attempt in xrange(settings.DOCUMENTCLOUD_RETRIES + 1):
+        if attempt:
+            time.sleep(settings.DOCUMENTCLOUD_BACKOFF * 2 ** (attempt - 1))
+        try:
+            info = json.loads(urllib2.urlopen(request, timeout=30).read())
+            return info['document']['pages']
+        except urllib2.HTTPError as exc:
+            if exc.code == 404:
+                raise NotFound(doc_id)
+            if exc.code not in RETRY_CODES or attempt == (
+                settings.DOCUMENTCLOUD_RETRIES
+            ):
+                raise
+        except urllib2.URLError:
+            if attempt == settings.DOCUMENTCLOUD_RETRIES:
+                raise
+
+
+def _fetch(pk_doc_id):
+    """Fetch the page count for a file, returning the file's pk, the page
+    count, and whether it was found"""
+    # pylint: disable=broad-except
+    pk, doc_id = pk_doc_id
+    try:
+        return pk, fetch_pages(doc_id), True
+    except NotFound:
+        return pk, None, False
+    except Exception as exc:
+        logger.warn(
+            'Setting document cloud pages: error for file %d: %s', pk, exc
+        )
+        return pk, None, True
+
+
+def sync_pages(doc_pks):
+    """Set the page counts for the given files from DocumentCloud
+
+    Files which are not on DocumentCloud have their doc id cleared, so that
+    they will be uploaded again.  Files which could not be fetched are left
+    as they are, to be tried again later.  Returns the number of files
+    updated and cleared.
+    """
+    files = list(
+        FOIAFile.objects.filter(pk__in=doc_pks, doccloud=True, pages=0)
+        .exclude(doc_id='').values_list('pk', 'doc_id')
+    )
+    if not files:
+        return 0, 0
+    pool = ThreadPool(min(settings.DOCUMENTCLOUD_CONCURRENCY, len(files)))
+    try:
+        results = pool.map(_fetch, files)
+    finally:
+        pool.close()
+        pool.join()
+
+    pages = {pk: count for pk, count, _ in results if count}
+    missing = [pk for pk, _, found in results if not found]
+    if pages:
+        FOIAFile.objects.filter(pk__in=pages.keys()).update(
+            pages=Case(
+                *[
+                    When(pk=pk, then=Value(count))
+                    for pk, count in pages.iteritems()
+                ],
+                output_field=PositiveIntegerField()
+            )
+        )
+        _update_stats(pages.keys())
+    if missing:
+        FOIAFile.objects.filter(pk__in=missing).update(doc_id='')
+    return len(pages), len(missing)
+
+
+def _update_stats(doc_pks):
+    """Update the request stats for the agencies of the files, as the
+    bulk update does not send the signals which normally do this"""
+    from muckrock.jurisdiction.tasks import update_request_stats
+    agency_pks = list(
+        FOIAFile.objects.filter(
+            pk__in=doc_pks, comm__foia__agency__isnull=False
+        ).values_list('comm__foia__agency', flat=True).distinct()
+    )
+    if agency_pks:
+        update_request_stats.delay(agency_pks)
@@ -0,0 +1,114 @@
+"""
+Benchmark paging through the requests in the API
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Standard Library
+from urlparse import parse_qs, urlparse
+
+# Third Party
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.foia.viewsets import FOIARequestViewSet
+
+
+class Command(BaseCommand):
+    """Seed a large set of requests with communications, then fetch pages of
+    them from the API at increasing depths, with page number and cursor
+    pagination, and with and without their communications, reporting the
+    number of queries and wall time for each page"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Create this many requests.  All seeded data is rolled back '
+            'afterwards.',
+        )
+        parser.add_argument(
+            '--communications',
+            type=int,
+            default=3,
+            help='The number of communications for each request',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=50,
+            help='The number of requests on each page',
+        )
+
+    def handle(self, *args, **kwargs):
+        page_size = kwargs['page_size']
+        with transaction.atomic():
+            with measure('seed') as seeding:
+                user = self.seed(kwargs['requests'], kwargs['communications'])
+            self.stdout.write(unicode(seeding))
+            num_pages = max(kwargs['requests'] // page_size, 1)
+            depths = sorted(set([1, num_pages // 2 or 1, num_pages]))
+            for label, params in (
+                ('expanded', {
+                    'expand': 'communications'
+                }),
+                ('list', {}),
+                ('sparse', {
+                    'fields': 'id,title,status'
+                }),
+            ):
+                self.page_numbers(user, label, params, page_size, depths)
+                self.cursors(user, label, params, page_size, depths)
+            transaction.set_rollback(True)
+
+    def fetch(self, user, params):
+        """Fetch a page of requests from the API"""
+        view = FOIARequestViewSet.as_view({'get': 'list'})
+        request = APIRequestFactory().get('/api_v1/foia/', params)
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+        return response.data
+
+    def page_numbers(self, user, label, params, page_size, depths):
+        """Fetch the pages at each depth by page number"""
+        for depth in depths:
+            page_params = dict(params, page=depth, page_size=page_size)
+            with measure('%s page %d' % (label, depth)) as fetching:
+                self.fetch(user, page_params)
+            self.stdout.write(unicode(fetching))
+
+    def cursors(self, user, label, params, page_size, depths):
+        """Follow the cursors through the pages, timing the fetch of the pages
+        at each depth"""
+        cursor_params = dict(params, pagination='cursor', page_size=page_size)
+        for depth in xrange(1, depths[-1] + 1):
+            with measure('%s cursor %d' % (label, depth)) as fetching:
+                data = self.fetch(user, cursor_params)
+            if depth in depths:
+                self.stdout.write(unicode(fetching))
+            if not data['next']:
+                break
+            query = parse_qs(urlparse(data['next']).query)
+            cursor_params['cursor'] = query['cursor'][0]
+
+    def seed(self, num_requests, num_communications):
+        """Seed the database with public requests, each with some
+        communications, returning a user to fetch them as"""
+        # factories are a development dependency, only import them if needed
+        from muckrock.core.factories import UserFactory
+        from muckrock.foia.factories import (
+            FOIACommunicationFactory,
+            FOIARequestFactory,
+        )
+        for _ in xrange(num_requests):
+            foia = FOIARequestFactory(status='done', embargo=False)
+            for _ in xrange(num_communications):
+                FOIACommunicationFactory(foia=foia)
+        return UserFactory()
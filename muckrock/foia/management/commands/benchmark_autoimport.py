@@ -0,0 +1,95 @@
+"""
+Benchmark the queries and time used to autoimport scans
+"""
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.foia.autoimport import (
+    connect,
+    get_buckets,
+    import_scan,
+    start_run,
+)
+from muckrock.foia.models import AutoImportScan
+
+
+class Command(BaseCommand):
+    """Upload scans to a local S3 compatible server, such as minio, then list
+    them and import them one at a time, reporting the number of queries and
+    wall time spent on each step"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scans',
+            type=int,
+            default=50,
+            help='Upload this many scans, each for a new request.  All seeded '
+            'data is rolled back afterwards.',
+        )
+        parser.add_argument(
+            '--files',
+            type=int,
+            default=1,
+            help='The number of files in each scan.  Scans with more than one '
+            'file are uploaded as folders.',
+        )
+
+    def handle(self, *args, **kwargs):
+        if not settings.AWS_AUTOIMPORT_ENDPOINT:
+            raise CommandError(
+                'Set AWS_AUTOIMPORT_ENDPOINT to a local S3 compatible server, '
+                'so that no scans are uploaded to S3'
+            )
+        # mock is a development dependency, only import it if needed
+        from mock import patch
+        conn = connect()
+        for name in (
+            settings.AWS_AUTOIMPORT_BUCKET_NAME,
+            settings.AWS_STORAGE_BUCKET_NAME,
+        ):
+            if conn.lookup(name) is None:
+                conn.create_bucket(name)
+        bucket, storage_bucket = get_buckets(conn)
+        # do not upload the seeded files to DocumentCloud
+        upload = patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+        with transaction.atomic(), upload:
+            with measure('seed') as seeding:
+                self.seed(bucket, kwargs['scans'], kwargs['files'])
+            self.stdout.write(unicode(seeding))
+            with measure('list and record manifest') as listing:
+                _, scan_pks = start_run(bucket)
+            self.stdout.write(unicode(listing))
+            with measure('import') as importing:
+                for scan in AutoImportScan.objects.filter(pk__in=scan_pks):
+                    import_scan(scan, bucket, storage_bucket)
+            self.stdout.write(
+                '%s: %.1f queries, %.2fms per scan' % (
+                    importing.label,
+                    float(importing.queries) / len(scan_pks),
+                    1000 * importing.seconds / len(scan_pks),
+                ) if scan_pks else 'There are no scans to import'
+            )
+            transaction.set_rollback(True)
+
+    def seed(self, bucket, num_scans, num_files):
+        """Seed the database with requests and the bucket with their scans"""
+        # factories are a development dependency, only import them if needed
+        from muckrock.foia.factories import FOIARequestFactory
+        for _ in xrange(num_scans):
+            foia = FOIARequestFactory(status='ack')
+            name = 'scans/01-02-17 mr%d RES' % foia.pk
+            if num_files == 1:
+                names = [name + '.pdf']
+            else:
+                names = ['%s/%d.pdf' % (name, i) for i in xrange(num_files)]
+            for key_name in names:
+                bucket.new_key(key_name).set_contents_from_string(
+                    'scanned document %s' % key_name
+                )
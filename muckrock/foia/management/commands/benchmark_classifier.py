@@ -0,0 +1,103 @@
+"""
+Benchmark the latency and throughput of the status classifier
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.foia.classifier import (
+    NotReady,
+    StatusClassifier,
+    classifier,
+    classify_response_tasks,
+    get_document,
+)
+from muckrock.task.models import ResponseTask
+
+
+class Command(BaseCommand):
+    """Classify response tasks one at a time, loading the classifier for each
+    task as was done before it was cached, then one at a time with the cached
+    classifier, and then all at once as a batch"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=100,
+            help='Classify this many of the most recent response tasks',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Create this many response tasks before benchmarking.  '
+            'All seeded data is rolled back afterwards.',
+        )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            if kwargs['seed']:
+                with measure('seed') as seeding:
+                    self.seed(kwargs['seed'])
+                self.stdout.write(unicode(seeding))
+            resp_tasks = list(
+                ResponseTask.objects.select_related('communication')
+                .prefetch_related('communication__files')
+                .order_by('-date_created')[:kwargs['tasks']]
+            )
+            self.benchmark(resp_tasks)
+            transaction.set_rollback(True)
+
+    def seed(self, num):
+        """Seed the database with test data"""
+        # factories are a development dependency, only import them if needed
+        from muckrock.task.factories import ResponseTaskFactory
+        for i in xrange(num):
+            ResponseTaskFactory(
+                communication__communication=
+                'Here are your responsive documents, %d of them' % i
+            )
+
+    def benchmark(self, resp_tasks):
+        """Time each way of classifying the tasks"""
+        if not resp_tasks:
+            self.stdout.write('There are no response tasks to classify')
+            return
+        documents = []
+        with measure('fetch text') as fetching:
+            for resp_task in resp_tasks:
+                try:
+                    documents.append(get_document(resp_task.communication))
+                except NotReady:
+                    pass
+        self.stdout.write(unicode(fetching))
+        if not documents:
+            self.stdout.write('None of the response tasks are ready')
+            return
+
+        with measure('per task, uncached') as uncached:
+            for document in documents:
+                StatusClassifier().predict([document])
+        # load the shared classifier before timing it
+        classifier.predict(documents[:1])
+        with measure('per task, cached') as cached:
+            for document in documents:
+                classifier.predict([document])
+        with measure('batch') as batch:
+            classify_response_tasks(resp_tasks)
+
+        for measurement in (uncached, cached, batch):
+            self.stdout.write(
+                '%s: %.2fms per task, %.1f tasks per second' % (
+                    measurement.label,
+                    1000 * measurement.seconds / len(documents),
+                    len(documents) / measurement.seconds
+                    if measurement.seconds else 0,
+                )
+            )
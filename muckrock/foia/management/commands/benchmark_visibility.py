@@ -0,0 +1,99 @@
+"""
+Benchmark finding the requests a user may view
+"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.foia.models import FOIARequest
+
+
+def get_viewable_joins(user):
+    """The requests a user may view, found by joining to the collaborators,
+    owner and profile tables, as was done before the visibility was
+    precomputed"""
+    query = (
+        Q(composer__user=user) | Q(edit_collaborators=user)
+        | Q(read_collaborators=user) | ~Q(embargo=True)
+    )
+    if user.profile.acct_type == 'agency':
+        query = query | Q(agency=user.profile.agency)
+    if user.profile.organization is not None:
+        query = query | Q(
+            composer__user__profile__org_share=True,
+            composer__user__profile__organization=user.profile.organization,
+        )
+    return FOIARequest.objects.filter(query)
+
+
+class Command(BaseCommand):
+    """Seed a large set of requests, then count and page through the requests
+    a user may view by joining to each table which grants access and by the
+    precomputed visibility, reporting the number of queries and wall time
+    for each"""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Create this many requests, a quarter of them embargoed.  '
+            'All seeded data is rolled back afterwards.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='The number of times to run each query',
+        )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            with measure('seed') as seeding:
+                user = self.seed(kwargs['requests'])
+            self.stdout.write(unicode(seeding))
+            for label, queryset in (
+                ('joins', get_viewable_joins(user)),
+                ('visibility', FOIARequest.objects.get_viewable(user)),
+            ):
+                with measure('%s count' % label) as counting:
+                    for _ in xrange(kwargs['repeat']):
+                        count = queryset.count()
+                self.stdout.write('%s: %d requests' % (counting, count))
+                with measure('%s page' % label) as paging:
+                    for _ in xrange(kwargs['repeat']):
+                        list(queryset.order_by('-datetime_updated')[:25])
+                self.stdout.write(unicode(paging))
+            transaction.set_rollback(True)
+
+    def seed(self, num):
+        """Seed the database with requests from the members of an
+        organization, some shared with each other and some with collaborators,
+        returning a member to view them as"""
+        # factories are a development dependency, only import them if needed
+        from muckrock.core.factories import OrganizationFactory, UserFactory
+        from muckrock.foia.factories import FOIARequestFactory
+        organization = OrganizationFactory()
+        members = [
+            UserFactory(
+                profile__organization=organization,
+                profile__org_share=i % 2 == 0,
+            ) for i in xrange(10)
+        ]
+        collaborators = [UserFactory() for _ in xrange(5)]
+        for i in xrange(num):
+            foia = FOIARequestFactory(
+                composer__user=members[i % len(members)],
+                embargo=i % 4 == 0,
+            )
+            if i % 3 == 0:
+                foia.add_viewer(collaborators[i % len(collaborators)])
+            if i % 5 == 0:
+                foia.add_editor(collaborators[i % len(collaborators)])
+        return members[1]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-04 14:21
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0059_auto_20180426_1112'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowupRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('datetime_started', models.DateTimeField(default=django.utils.timezone.now)),
+                ('datetime_done', models.DateTimeField(blank=True, null=True)),
+                ('request_pks', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-datetime_started'],
+            },
+        ),
+    ]
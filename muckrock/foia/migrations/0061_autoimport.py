@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-11 10:02
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0060_followuprun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutoImportRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('datetime_started', models.DateTimeField(default=django.utils.timezone.now)),
+                ('datetime_done', models.DateTimeField(blank=True, null=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('log', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None)),
+            ],
+            options={
+                'ordering': ['-datetime_started'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AutoImportScan',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=1024, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done')], db_index=True, default='pending', max_length=10)),
+                ('files', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('progress', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('log', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None)),
+                ('datetime_updated', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scans', to='foia.AutoImportRun')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
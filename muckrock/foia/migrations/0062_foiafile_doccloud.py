@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-12 15:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def set_doccloud(apps, schema_editor):
+    """Flag the existing files doc cloud supports"""
+    FOIAFile = apps.get_model('foia', 'FOIAFile')
+    FOIAFile.objects.filter(ffile__iregex=r'\.(pdf|doc|docx)$').update(
+        doccloud=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0061_autoimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foiafile',
+            name='doccloud',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(set_doccloud, migrations.RunPython.noop),
+        # the nightly tasks look for the few doc cloud files missing their
+        # pages or doc ids, so only those files need to be indexed
+        migrations.RunSQL(
+            'CREATE INDEX foia_foiafile_doccloud_no_pages ON foia_foiafile '
+            "(id) WHERE doccloud AND pages = 0 AND doc_id != ''",
+            'DROP INDEX foia_foiafile_doccloud_no_pages',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX foia_foiafile_doccloud_no_doc_id ON foia_foiafile '
+            "(id) WHERE doccloud AND doc_id = ''",
+            'DROP INDEX foia_foiafile_doccloud_no_doc_id',
+        ),
+    ]
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-15 11:03
+from __future__ import unicode_literals
+
+# Django
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0040_auto_20180518_1255'),
+        ('foia', '0062_foiafile_doccloud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestVisibility',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                ('principal', models.CharField(max_length=32)),
+                (
+                    'foia',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='visibility',
+                        to='foia.FOIARequest'
+                    )
+                ),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='requestvisibility',
+            unique_together=set([('principal', 'foia')]),
+        ),
+        # compute the visibility of the existing requests in one statement,
+        # as it would take too long to save each one
+        migrations.RunSQL(
+            """
+            INSERT INTO foia_requestvisibility (foia_id, principal)
+            SELECT id, 'public' FROM foia_foiarequest WHERE NOT embargo
+            UNION
+            SELECT foia.id, 'user:' || composer.user_id
+            FROM foia_foiarequest foia
+            JOIN foia_foiacomposer composer ON composer.id = foia.composer_id
+            UNION
+            SELECT id, 'agency:' || agency_id FROM foia_foiarequest
+            UNION
+            SELECT foia.id, 'org:' || profile.organization_id
+            FROM foia_foiarequest foia
+            JOIN foia_foiacomposer composer ON composer.id = foia.composer_id
+            JOIN accounts_profile profile ON profile.user_id = composer.user_id
+            WHERE profile.org_share AND profile.organization_id IS NOT NULL
+            UNION
+            SELECT foiarequest_id, 'user:' || user_id
+            FROM foia_foiarequest_read_collaborators
+            UNION
+            SELECT foiarequest_id, 'user:' || user_id
+            FROM foia_foiarequest_edit_collaborators
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
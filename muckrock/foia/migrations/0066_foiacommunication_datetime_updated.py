@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foia', '0065_followuprun_dispatched_pks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foiacommunication',
+            name='datetime_updated',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
@@ -4,9 +4,12 @@ Models for the FOIA application
 
 # MuckRock
 from muckrock.foia.models.attachment import *
+from muckrock.foia.models.autoimport import *
 from muckrock.foia.models.communication import *
 from muckrock.foia.models.composer import *
 from muckrock.foia.models.file import *
+from muckrock.foia.models.followup import *
 from muckrock.foia.models.multirequest import *
 from muckrock.foia.models.request import *
 from muckrock.foia.models.search import *
+from muckrock.foia.models.visibility import *
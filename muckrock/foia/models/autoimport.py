@@ -0,0 +1,86 @@
+"""
+Models for tracking the automatic import of scanned documents from S3
+"""
+
+# Django
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class AutoImportRun(models.Model):
+    """A run of the autoimport, importing every scan in the bucket"""
+
+    datetime_started = models.DateTimeField(default=timezone.now)
+    datetime_done = models.DateTimeField(blank=True, null=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    # errors found while listing the bucket, before any scans are imported
+    log = ArrayField(models.TextField(), default=list)
+
+    def __unicode__(self):
+        return u'Autoimport started at %s' % self.datetime_started
+
+    def record(self):
+        """Atomically record that a scan from this run has been processed.
+        Returns True if this finished the run."""
+        AutoImportRun.objects.filter(pk=self.pk
+                                     ).update(processed=F('processed') + 1)
+        # mark the run done once every scan has been processed
+        finished = AutoImportRun.objects.filter(
+            pk=self.pk,
+            datetime_done=None,
+            total__lte=F('processed'),
+        ).update(datetime_done=timezone.now())
+        self.refresh_from_db()
+        return bool(finished)
+
+    def get_log(self):
+        """The log for the run and all of its scans"""
+        log = ['Start Time: %s' % self.datetime_started]
+        log.extend(self.log)
+        for scan in self.scans.order_by('name'):
+            log.extend(scan.log)
+        log.append('End Time: %s' % (self.datetime_done or timezone.now()))
+        return log
+
+    class Meta:
+        ordering = ['-datetime_started']
+
+
+class AutoImportScan(models.Model):
+    """A scanned file, or folder of files, in the autoimport bucket, and the
+    progress made importing it
+
+    This lets an interrupted run be resumed by the next run without
+    creating any communications or files twice.
+    """
+
+    run = models.ForeignKey(AutoImportRun, related_name='scans')
+    # the key name of the file or folder, within the scans folder
+    name = models.CharField(max_length=1024, unique=True)
+    status = models.CharField(
+        max_length=10,
+        choices=(
+            ('pending', 'Pending'),
+            ('processing', 'Processing'),
+            ('done', 'Done'),
+        ),
+        default='pending',
+        db_index=True,
+    )
+    # the key names and sizes of the files to import, from the run's listing
+    files = JSONField(default=list)
+    # the progress for each request, keyed by the request's pk, as a dict
+    # with the communication's pk, the key names of the files imported so
+    # far, and whether the request is done
+    progress = JSONField(default=dict)
+    log = ArrayField(models.TextField(), default=list)
+    datetime_updated = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
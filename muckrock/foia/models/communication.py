@@ -62,6 +62,8 @@ class FOIACommunication(models.Model):
 
     subject = models.CharField(max_length=255, blank=True)
     datetime = models.DateTimeField(db_index=True)
+    # null for communications which have not been saved since this was added
+    datetime_updated = models.DateTimeField(auto_now=True, null=True)
 
     response = models.BooleanField(
         default=False, help_text='Is this a response (or a request)?'
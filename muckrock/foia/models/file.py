@@ -14,6 +14,9 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# the file types doc cloud supports
+DOCCLOUD_EXTENSIONS = ('.pdf', '.doc', '.docx')
+
 
 class FOIAFile(models.Model):
     """An arbitrary file attached to a FOIA request"""
@@ -43,10 +46,19 @@ class FOIAFile(models.Model):
     )
     doc_id = models.SlugField(max_length=80, blank=True, editable=False)
     pages = models.PositiveIntegerField(default=0, editable=False)
+    # denormalized from the file's extension, so the files doc cloud supports
+    # can be found without loading every file
+    doccloud = models.BooleanField(default=False, editable=False)
 
     def __unicode__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Keep the doc cloud flag in sync with the file name"""
+        # pylint: disable=arguments-differ
+        self.doccloud = self.is_doccloud()
+        super(FOIAFile, self).save(*args, **kwargs)
+
     def name(self):
         """Return the basename of the file"""
         return os.path.basename(self.ffile.name)
@@ -55,7 +67,7 @@ class FOIAFile(models.Model):
         """Is this a file doc cloud can support"""
 
         _, ext = os.path.splitext(self.ffile.name)
-        return ext.lower() in ['.pdf', '.doc', '.docx']
+        return ext.lower() in DOCCLOUD_EXTENSIONS
 
     def get_thumbnail(self):
         """Get the url to the thumbnail image. If document is not public, use a generic fallback."""
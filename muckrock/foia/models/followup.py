@@ -0,0 +1,58 @@
+"""
+Models for tracking runs of the automated follow up pipeline
+"""
+
+# Django
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class FollowupRun(models.Model):
+    """A run of the automated follow ups for a single day"""
+
+    date = models.DateField(db_index=True)
+    datetime_started = models.DateTimeField(default=timezone.now)
+    datetime_done = models.DateTimeField(blank=True, null=True)
+    # snapshot of the requests due for a follow up when the run started
+    request_pks = ArrayField(models.IntegerField(), default=list)
+    # the requests from the snapshot which have been sent to a chunk
+    dispatched_pks = ArrayField(models.IntegerField(), default=list)
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+
+    def __unicode__(self):
+        return u'Follow ups for %s' % self.date
+
+    @property
+    def processed(self):
+        """The number of requests processed so far"""
+        return self.sent + self.failed + self.skipped
+
+    @property
+    def throughput(self):
+        """Requests processed per second"""
+        end = self.datetime_done or timezone.now()
+        seconds = (end - self.datetime_started).total_seconds()
+        return self.processed / seconds if seconds > 0 else 0.0
+
+    def record(self, sent=0, failed=0, skipped=0):
+        """Atomically record the progress of a chunk of this run"""
+        FollowupRun.objects.filter(pk=self.pk).update(
+            sent=F('sent') + sent,
+            failed=F('failed') + failed,
+            skipped=F('skipped') + skipped,
+        )
+        # mark the run done once every request has been processed
+        FollowupRun.objects.filter(
+            pk=self.pk,
+            datetime_done=None,
+            total__lte=F('sent') + F('failed') + F('skipped'),
+        ).update(datetime_done=timezone.now())
+        self.refresh_from_db()
+
+    class Meta:
+        ordering = ['-datetime_started']
@@ -8,6 +8,8 @@ Models for the FOIA application
 # Django
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.mail import EmailMultiAlternatives
 from django.core.urlresolvers import reverse
 from django.db import connection, models
@@ -24,7 +26,6 @@ from datetime import date, timedelta
 from hashlib import md5
 
 # Third Party
-from actstream.models import followers
 from reversion import revisions as reversion
 from taggit.managers import TaggableManager
 
@@ -38,6 +39,7 @@ from muckrock.communication.models import (
     PhoneNumber,
 )
 from muckrock.core import utils
+from muckrock.core.follow import is_follower, iter_followers
 from muckrock.foia.querysets import FOIARequestQuerySet
 from muckrock.tags.models import Tag, TaggedItemBase, parse_tags
 
@@ -163,6 +165,7 @@ class FOIARequest(models.Model):
         related_name='edit_access',
         blank=True,
     )
+    search_vector = SearchVectorField(null=True, editable=False)
     access_key = models.CharField(blank=True, max_length=255)
 
     objects = FOIARequestQuerySet.as_manager()
@@ -389,7 +392,7 @@ class FOIARequest(models.Model):
             notification.mark_read()
         utils.notify(self.composer.user, action)
         if self.is_public():
-            utils.notify(followers(self), action)
+            utils.notify(iter_followers(self), action)
 
     def submit(self, appeal=False, **kwargs):
         """
@@ -965,7 +968,7 @@ class FOIARequest(models.Model):
         can_follow = (
             user.is_authenticated() and not is_owner and not is_agency_user
         )
-        is_following = user.is_authenticated() and user in followers(self)
+        is_following = is_follower(user, self)
         is_admin = user.is_staff
         kwargs = {
             'jurisdiction': self.jurisdiction.slug,
@@ -1196,6 +1199,7 @@ class FOIARequest(models.Model):
         ordering = ['title']
         verbose_name = 'FOIA Request'
         app_label = 'foia'
+        indexes = [GinIndex(fields=['search_vector'])]
         permissions = (
             ('view_foiarequest', 'Can view this request'),
             ('embargo_foiarequest', 'Can embargo request to make it private'),
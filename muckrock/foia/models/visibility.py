@@ -0,0 +1,65 @@
+"""
+Models for the precomputed visibility of requests
+"""
+
+# Django
+from django.db import models
+
+# MuckRock
+from muckrock.foia.querysets import RequestVisibilityQuerySet
+
+PUBLIC = 'public'
+
+
+def user_principal(user_id):
+    """The principal for a single user"""
+    return 'user:%d' % user_id
+
+
+def organization_principal(organization_id):
+    """The principal for the members of an organization"""
+    return 'org:%d' % organization_id
+
+
+def agency_principal(agency_id):
+    """The principal for the users of an agency"""
+    return 'agency:%d' % agency_id
+
+
+def get_principals(user):
+    """All of the principals an authenticated user acts as"""
+    principals = [PUBLIC, user_principal(user.pk)]
+    profile = user.profile
+    if profile.acct_type == 'agency' and profile.agency_id is not None:
+        principals.append(agency_principal(profile.agency_id))
+    if profile.organization_id is not None:
+        principals.append(organization_principal(profile.organization_id))
+    return principals
+
+
+class RequestVisibility(models.Model):
+    """A principal which may view a request
+
+    Principals are everyone, for requests which are not embargoed, a user,
+    for owners and collaborators, the users of an agency, for the agency the
+    request was sent to, or the members of an organization, for requests
+    shared with the owner's organization.  These are recomputed whenever a
+    request's embargo, agency, owner or collaborators change, or its owner's
+    organization or sharing preference change, so that the requests a user
+    may view can be found with a single index lookup.
+    """
+
+    foia = models.ForeignKey(
+        'foia.FOIARequest',
+        related_name='visibility',
+        on_delete=models.CASCADE,
+    )
+    principal = models.CharField(max_length=32)
+
+    objects = RequestVisibilityQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('principal', 'foia')
+
+    def __unicode__(self):
+        return u'%s may view %s' % (self.principal, self.foia_id)
@@ -4,7 +4,7 @@ QuerySets for the FOIA application
 
 # Django
 from django.contrib.auth.models import AnonymousUser
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
 from django.utils.text import slugify
@@ -36,22 +36,13 @@ class FOIARequestQuerySet(models.QuerySet):
 
         if user.is_authenticated():
             # Requests are visible if you own them, have view or edit permissions,
-            # or if they are not embargoed
-            query = (
-                Q(composer__user=user) | Q(edit_collaborators=user)
-                | Q(read_collaborators=user) | ~Q(embargo=True)
+            # if they are not embargoed, if they were sent to your agency or
+            # if they are shared with your organization
+            from muckrock.foia.models import RequestVisibility
+            return self.filter(
+                pk__in=RequestVisibility.objects.get_viewable(user)
+                .values('foia_id')
             )
-            # agency users may also view requests for their agency
-            if user.profile.acct_type == 'agency':
-                query = query | Q(agency=user.profile.agency)
-            # organizational users may also view requests from their org that are shared
-            if user.profile.organization is not None:
-                query = query | Q(
-                    composer__user__profile__org_share=True,
-                    composer__user__profile__organization=user.profile.
-                    organization,
-                )
-            return self.filter(query)
         else:
             # anonymous user, filter out embargoes
             return self.exclude(embargo=True)
@@ -220,6 +211,14 @@ class FOIAComposerQuerySet(models.QuerySet):
         if user.is_staff:
             return self.all()
 
+        from muckrock.foia.models import PUBLIC, RequestVisibility
+        # drafts are only visible to their owner and their organization
+        public = (
+            ~Q(status='started') & Q(
+                pk__in=RequestVisibility.objects.filter(principal=PUBLIC)
+                .values('foia__composer_id')
+            )
+        )
         if user.is_authenticated():
             # you can view if
             # * you are the owner
@@ -228,9 +227,10 @@ class FOIAComposerQuerySet(models.QuerySet):
             #   * not a draft
             #   * at leats one foia request is not embargoed
             query = (
-                Q(user=user) | Q(foias__read_collaborators=user)
-                | Q(foias__edit_collaborators=user) |
-                (~Q(status='started') & Q(foias__embargo=False))
+                Q(user=user) | public | Q(
+                    pk__in=RequestVisibility.objects.get_collaborating(user)
+                    .values('foia__composer_id')
+                )
             )
             # organizational users may also view requests from their org
             # that are shared
@@ -242,7 +242,7 @@ class FOIAComposerQuerySet(models.QuerySet):
             return self.filter(query)
         else:
             # anonymous user, filter out drafts and embargoes
-            return self.exclude(status='started').filter(foias__embargo=False)
+            return self.filter(public)
 
     def get_or_create_draft(self, user):
         """Return an existing blank draft or create one"""
@@ -269,3 +269,65 @@ class FOIAComposerQuerySet(models.QuerySet):
             return draft
         else:
             return self.create(user=user)
+
+
+class RequestVisibilityQuerySet(models.QuerySet):
+    """Object manager for the precomputed visibility of requests"""
+
+    def get_viewable(self, user):
+        """The visibility of all requests an authenticated user may view"""
+        from muckrock.foia.models import get_principals
+        return self.filter(principal__in=get_principals(user))
+
+    def get_collaborating(self, user):
+        """The visibility of the requests a user owns or collaborates on"""
+        from muckrock.foia.models import user_principal
+        return self.filter(principal=user_principal(user.pk))
+
+    def refresh(self, foia_pks):
+        """Recompute the principals which may view the given requests"""
+        from muckrock.foia.models import (
+            PUBLIC,
+            FOIARequest,
+            agency_principal,
+            organization_principal,
+            user_principal,
+        )
+        foia_pks = list(foia_pks)
+        if not foia_pks:
+            return
+        with transaction.atomic(using=self.db):
+            # lock the requests so concurrent refreshes do not conflict
+            foia_pks = list(
+                FOIARequest.objects.select_for_update().filter(pk__in=foia_pks)
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            visibility = set()
+            foias = FOIARequest.objects.filter(pk__in=foia_pks).values_list(
+                'pk',
+                'embargo',
+                'agency_id',
+                'composer__user_id',
+                'composer__user__profile__org_share',
+                'composer__user__profile__organization_id',
+            )
+            for pk, embargo, agency_id, user_id, org_share, org_id in foias:
+                if not embargo:
+                    visibility.add((pk, PUBLIC))
+                visibility.add((pk, user_principal(user_id)))
+                visibility.add((pk, agency_principal(agency_id)))
+                if org_share and org_id is not None:
+                    visibility.add((pk, organization_principal(org_id)))
+            for field in (
+                FOIARequest.read_collaborators, FOIARequest.edit_collaborators
+            ):
+                collaborators = field.through.objects.filter(
+                    foiarequest_id__in=foia_pks
+                ).values_list('foiarequest_id', 'user_id')
+                for pk, user_id in collaborators:
+                    visibility.add((pk, user_principal(user_id)))
+            self.filter(foia_id__in=foia_pks).delete()
+            self.bulk_create([
+                self.model(foia_id=pk, principal=principal)
+                for pk, principal in visibility
+            ])
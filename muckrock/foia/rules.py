@@ -6,8 +6,12 @@
 # needed for rules
 from __future__ import absolute_import
 
+# Django
+from django.db.models import Exists, OuterRef
+
 # Standard Library
 import inspect
+from collections import namedtuple
 from datetime import date
 from functools import wraps
 
@@ -50,6 +54,58 @@ def user_authenticated(func):
     return inner
 
 
+# a user's relationship to a request
+PermissionContext = namedtuple(
+    'PermissionContext', ['is_editor', 'is_viewer', 'has_thanks']
+)
+
+
+def load_context(user, foia):
+    """Load everything about a user's relationship to a request which the
+    predicates need in a single query"""
+    from muckrock.foia.models import FOIACommunication, FOIARequest
+    user_pk = user.pk if user.is_authenticated() else None
+    return PermissionContext(
+        *FOIARequest.objects.filter(pk=foia.pk).annotate(
+            is_editor=Exists(
+                FOIARequest.edit_collaborators.through.objects.filter(
+                    foiarequest=OuterRef('pk'),
+                    user=user_pk,
+                )
+            ),
+            is_viewer=Exists(
+                FOIARequest.read_collaborators.through.objects.filter(
+                    foiarequest=OuterRef('pk'),
+                    user=user_pk,
+                )
+            ),
+            has_thanks=Exists(
+                FOIACommunication.objects.filter(
+                    foia=OuterRef('pk'),
+                    thanks=True,
+                )
+            ),
+        ).values_list('is_editor', 'is_viewer', 'has_thanks').get()
+    )
+
+
+def get_context(user, foia):
+    """Get a user's relationship to a request, loading it the first time it
+    is needed and reusing it for every other permission checked on the same
+    request object"""
+    # pylint: disable=protected-access
+    if not hasattr(foia, '_permission_contexts'):
+        foia._permission_contexts = {}
+    if user.pk not in foia._permission_contexts:
+        foia._permission_contexts[user.pk] = load_context(user, foia)
+    return foia._permission_contexts[user.pk]
+
+
+def clear_context(foia):
+    """Forget the relationships loaded for a request after they change"""
+    foia.__dict__.pop('_permission_contexts', None)
+
+
 def has_status(*statuses):
     @predicate('has_status:%s' % ','.join(statuses))
     @skip_if_not_foia
@@ -73,28 +129,23 @@ def no_foia(user, foia):
 @predicate
 @skip_if_not_foia
 def is_editor(user, foia):
-    return (
-        user.is_authenticated()
-        and foia.edit_collaborators.filter(pk=user.pk).exists()
-    )
+    return user.is_authenticated() and get_context(user, foia).is_editor
 
 
 @predicate
 @skip_if_not_foia
 def is_read_collaborator(user, foia):
-    return (
-        user.is_authenticated()
-        and foia.read_collaborators.filter(pk=user.pk).exists()
-    )
+    return user.is_authenticated() and get_context(user, foia).is_viewer
 
 
 @predicate
 @skip_if_not_foia
 @user_authenticated
 def is_org_shared(user, foia):
+    # check the user's own organization first, as the owner's profile may
+    # not be loaded
     return (
-        foia.user.is_authenticated() and foia.user.profile.org_share
-        and foia.user.profile.organization is not None
+        user.profile.organization_id is not None and foia.user.profile.org_share
         and foia.user.profile.organization == user.profile.organization
     )
 
@@ -114,7 +165,7 @@ is_private = is_embargoed
 @predicate
 @skip_if_not_foia
 def has_thanks(user, foia):
-    return foia.communications.filter(thanks=True).exists()
+    return get_context(user, foia).has_thanks
 
 
 is_thankable = ~has_thanks & has_status(*END_STATUS)
@@ -141,13 +192,13 @@ is_appealable = has_appealable_jurisdiction & (
 @predicate
 @skip_if_not_foia
 def has_crowdfund(user, foia):
-    return bool(foia.crowdfund)
+    return foia.crowdfund_id is not None
 
 
 @predicate
 @skip_if_not_foia
 def has_open_crowdfund(user, foia):
-    return bool(foia.crowdfund) and not foia.crowdfund.expired()
+    return foia.crowdfund_id is not None and not foia.crowdfund.expired()
 
 
 is_payable = has_status('payment') & ~has_open_crowdfund
@@ -157,7 +208,10 @@ is_payable = has_status('payment') & ~has_open_crowdfund
 @skip_if_not_foia
 @user_authenticated
 def match_agency(user, foia):
-    return bool(user.profile.agency and user.profile.agency == foia.agency)
+    return bool(
+        user.profile.agency_id is not None
+        and user.profile.agency_id == foia.agency_id
+    )
 
 
 # User predicates
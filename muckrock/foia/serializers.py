@@ -18,6 +18,15 @@ from muckrock.foia.models import (
 )
 
 
+def split_param(request, name):
+    """The set of comma separated values passed for a query parameter"""
+    return set(
+        value.strip()
+        for value in request.query_params.get(name, '').split(',')
+        if value.strip()
+    )
+
+
 class FOIAPermissions(permissions.DjangoModelPermissionsOrAnonReadOnly):
     """
     Object-level permission to allow owners of an object partially update it
@@ -158,22 +167,34 @@ class FOIARequestSerializer(serializers.ModelSerializer):
 
         request = self.context.get('request', None)
         if request is None:
-            self.fields.pop('mail_id')
+            self.fields.pop('mail_id', None)
             self.fields.pop('email', None)
-            self.fields.pop('notes')
+            self.fields.pop('notes', None)
             return
         if not request.user.is_staff:
-            self.fields.pop('mail_id')
+            self.fields.pop('mail_id', None)
             self.fields.pop('email', None)
             if not foia:
-                self.fields.pop('notes')
+                self.fields.pop('notes', None)
             else:
                 has_change = foia.has_perm(request.user, 'change')
                 if not has_change:
-                    self.fields.pop('notes')
+                    self.fields.pop('notes', None)
                 if request.method == 'PATCH':
                     self._set_patch_fields(request.user, foia)
 
+    def get_field_names(self, declared_fields, info):
+        """Only include the fields asked for with the `fields` parameter"""
+        parent = super(FOIARequestSerializer, self)
+        field_names = parent.get_field_names(declared_fields, info)
+        request = self.context.get('request', None)
+        if request is None or request.method != 'GET':
+            return field_names
+        requested = split_param(request, 'fields')
+        if not requested:
+            return field_names
+        return [f for f in field_names if f in requested]
+
     def _set_patch_fields(self, user, foia):
         """Set which fields the user may PATCH"""
         has_change = foia.has_perm(user, 'change')
@@ -221,3 +242,14 @@ class FOIARequestSerializer(serializers.ModelSerializer):
             # computed fields
             'absolute_url',
         )
+
+
+class FOIARequestListSerializer(FOIARequestSerializer):
+    """Serializer for lists of FOIA Requests, which leaves out the
+    communications unless they are expanded"""
+
+    class Meta(FOIARequestSerializer.Meta):
+        fields = tuple(
+            f for f in FOIARequestSerializer.Meta.fields
+            if f != 'communications'
+        )
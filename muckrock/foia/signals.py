@@ -2,18 +2,27 @@
 
 # Django
 from django.conf import settings
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
 
 # Third Party
 import boto
 from boto.s3.connection import S3Connection
 
 # MuckRock
+from muckrock.accounts.models import Profile
 from muckrock.foia.models import (
+    FOIAComposer,
     FOIAFile,
     FOIARequest,
     OutboundRequestAttachment,
+    RequestVisibility,
 )
+from muckrock.foia.rules import clear_context
 from muckrock.foia.tasks import upload_document_cloud
 
 
@@ -34,6 +43,73 @@ def foia_update_embargo(sender, **kwargs):
                 )
 
 
+# the fields which change who may view the requests for each model
+VISIBILITY_FIELDS = {
+    FOIARequest: ('embargo', 'agency_id', 'composer_id'),
+    FOIAComposer: ('user_id',),
+    Profile: ('org_share', 'organization_id'),
+}
+
+
+def visibility_requests(instance):
+    """The requests whose visibility depends on the instance"""
+    if isinstance(instance, FOIARequest):
+        return [instance.pk]
+    elif isinstance(instance, FOIAComposer):
+        return instance.foias.values_list('pk', flat=True)
+    else:
+        foias = FOIARequest.objects.filter(composer__user_id=instance.user_id)
+        return foias.values_list('pk', flat=True)
+
+
+def visibility_check(sender, instance, raw=False, **kwargs):
+    """Check if a change to the instance changes who may view requests"""
+    # pylint: disable=unused-argument
+    # pylint: disable=protected-access
+    if raw:
+        instance._visibility_changed = False
+        return
+    if instance._state.adding:
+        # new composers and profiles do not have any requests yet
+        instance._visibility_changed = sender is FOIARequest
+        return
+    fields = VISIBILITY_FIELDS[sender]
+    saved = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._visibility_changed = (
+        saved != tuple(getattr(instance, f) for f in fields)
+    )
+
+
+def visibility_update(sender, instance, **kwargs):
+    """Recompute who may view the requests after a change"""
+    # pylint: disable=unused-argument
+    # pylint: disable=protected-access
+    if getattr(instance, '_visibility_changed', False):
+        RequestVisibility.objects.refresh(visibility_requests(instance))
+        instance._visibility_changed = False
+
+
+def collaborators_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recompute who may view the requests when collaborators are added or
+    removed"""
+    # pylint: disable=unused-argument
+    # pylint: disable=protected-access
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            RequestVisibility.objects.refresh([instance.pk])
+            clear_context(instance)
+    elif action == 'pre_clear':
+        # the requests are not known after they have been cleared
+        instance._collaborating = list(
+            sender.objects.filter(user=instance)
+            .values_list('foiarequest_id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        RequestVisibility.objects.refresh(pk_set)
+    elif action == 'post_clear':
+        RequestVisibility.objects.refresh(instance._collaborating)
+
+
 def foia_file_delete_s3(sender, **kwargs):
     """Delete file from S3 after the model is deleted"""
     # pylint: disable=unused-argument
@@ -104,3 +180,29 @@ post_delete.connect(
     sender=OutboundRequestAttachment,
     dispatch_uid='muckrock.foia.signals.attachment_delete_s3',
 )
+
+# pylint: disable=protected-access
+for model in VISIBILITY_FIELDS:
+    pre_save.connect(
+        visibility_check,
+        sender=model,
+        dispatch_uid='muckrock.foia.signals.visibility_check.%s' %
+        model._meta.model_name,
+    )
+    post_save.connect(
+        visibility_update,
+        sender=model,
+        dispatch_uid='muckrock.foia.signals.visibility_update.%s' %
+        model._meta.model_name,
+    )
+
+for through in (
+    FOIARequest.read_collaborators.through,
+    FOIARequest.edit_collaborators.through,
+):
+    m2m_changed.connect(
+        collaborators_changed,
+        sender=through,
+        dispatch_uid='muckrock.foia.signals.collaborators_changed.%s' %
+        through._meta.model_name,
+    )
@@ -15,6 +15,8 @@ class FoiaSitemap(Sitemap):
     priority = 0.7
     changefreq = 'weekly'
     limit = 500
+    # static sitemap pages are written again when this field changes
+    updated_field = 'datetime_updated'
 
     def items(self):
         """Return all public FOIA requests"""
@@ -6,54 +6,50 @@ from celery.schedules import crontab
 from celery.task import periodic_task, task
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.storage import default_storage
+from django.core.cache import cache
 from django.core.mail import send_mail
 from django.core.urlresolvers import reverse
 from django.template.loader import render_to_string
 from django.utils import timezone
 
 # Standard Library
-import base64
 import json
 import logging
 import os
-import os.path
-import re
 import sys
 import urllib2
-from datetime import date, datetime, time
-from decimal import Decimal
+from collections import Counter, defaultdict
+from datetime import date, timedelta
 from random import randint
 from urllib import quote_plus
 
 # Third Party
-import dill as pickle
-import numpy as np
-import requests
-from boto.s3.connection import S3Connection
 from constance import config
-from django_mailgun import MailgunAPIError
 from phaxio import PhaxioApi
 from phaxio.exceptions import PhaxioError
 from raven import Client
 from raven.contrib.celery import register_logger_signal, register_signal
-from scipy.sparse import hstack
 
 # MuckRock
-from muckrock.communication.models import (
-    FaxCommunication,
-    FaxError,
-    MailCommunication,
+from muckrock.communication.models import FaxCommunication, FaxError
+from muckrock.foia import classifier
+from muckrock.foia.autoimport import (
+    connect,
+    get_buckets,
+    import_scan,
+    start_run,
 )
-from muckrock.core.utils import generate_status_action
-from muckrock.foia.codes import CODES
-from muckrock.foia.exceptions import SizeError
+from muckrock.foia.documentcloud import authenticate_documentcloud, sync_pages
 from muckrock.foia.models import (
+    AutoImportRun,
+    AutoImportScan,
     FOIACommunication,
     FOIAComposer,
     FOIAFile,
     FOIARequest,
+    FollowupRun,
 )
+from muckrock.foia.zip_download import BUILD_LOCK_KEY, build_cached
 from muckrock.task.models import ResponseTask, ReviewAgencyTask
 from muckrock.vendor import MultipartPostHandler
 
@@ -66,15 +62,6 @@ register_logger_signal(client)
 register_signal(client)
 
 
-def authenticate_documentcloud(request):
-    """This is just standard username/password encoding"""
-    username = settings.DOCUMENTCLOUD_USERNAME
-    password = settings.DOCUMENTCLOUD_PASSWORD
-    auth = base64.encodestring('%s:%s' % (username, password))[:-1]
-    request.add_header('Authorization', 'Basic %s' % auth)
-    return request
-
-
 @task(
     ignore_result=True,
     max_retries=10,
@@ -222,42 +209,6 @@ def submit_composer(composer_pk, approve, contact_info, **kwargs):
 def classify_status(task_pk, **kwargs):
     """Use a machine learning classifier to predict the communications status"""
 
-    # pylint: disable=too-many-locals
-
-    def get_text_ocr(doc_id):
-        """Get the text OCR from document cloud"""
-        doc_cloud_url = u'http://www.documentcloud.org/api/documents/%s.json'
-        resp = requests.get(doc_cloud_url % quote_plus(doc_id.encode('utf-8')))
-        try:
-            doc_cloud_json = resp.json()
-        except ValueError:
-            logger.warn(u'Doc Cloud error for %s: %s', doc_id, resp.content)
-            return ''
-        if 'error' in doc_cloud_json:
-            logger.warn(
-                u'Doc Cloud error for %s: %s', doc_id, doc_cloud_json['error']
-            )
-            return ''
-        text_url = doc_cloud_json['document']['resources']['text']
-        resp = requests.get(text_url)
-        return resp.content.decode('utf-8')
-
-    def get_classifier():
-        """Load the pickled classifier"""
-        with open('muckrock/foia/classifier.pkl', 'rb') as pkl_fp:
-            return pickle.load(pkl_fp)
-
-    def predict_status(vectorizer, selector, classifier, text, pages):
-        """Run the prediction"""
-        input_vect = vectorizer.transform([text])
-        pages_vect = np.array([pages], dtype=np.float).transpose()
-        input_vect = hstack([input_vect, pages_vect])
-        input_vect = selector.transform(input_vect)
-        probs = classifier.predict_proba(input_vect)[0]
-        max_prob = max(probs)
-        status = classifier.classes_[list(probs).index(max_prob)]
-        return status, max_prob
-
     def resolve_if_possible(resp_task):
         """Resolve this response task if possible based off of ML setttings"""
         if (
@@ -281,33 +232,32 @@ def classify_status(task_pk, **kwargs):
             countdown=60 * 30, args=[task_pk], kwargs=kwargs, exc=exc
         )
 
-    file_text = []
-    total_pages = 0
-    for file_ in resp_task.communication.files.all():
-        total_pages += file_.pages
-        if file_.is_doccloud() and file_.doc_id:
-            file_text.append(get_text_ocr(file_.doc_id))
-        elif file_.is_doccloud() and not file_.doc_id:
-            # wait longer for document cloud
-            classify_status.retry(
-                countdown=60 * 30, args=[task_pk], kwargs=kwargs
-            )
-
-    full_text = resp_task.communication.communication + (' '.join(file_text))
-    vectorizer, selector, classifier = get_classifier()
-
-    status, prob = predict_status(
-        vectorizer, selector, classifier, full_text, total_pages
-    )
-
-    resp_task.predicted_status = status
-    resp_task.status_probability = int(100 * prob)
+    if not classifier.classify_response_tasks([resp_task]):
+        # wait longer for document cloud
+        classify_status.retry(countdown=60 * 30, args=[task_pk], kwargs=kwargs)
 
     resolve_if_possible(resp_task)
 
     resp_task.save()
 
 
+@task(
+    ignore_result=True,
+    time_limit=30 * 60,
+    soft_time_limit=29 * 60,
+    name='muckrock.foia.tasks.build_zip_download',
+)
+def build_zip_download(foia_pk):
+    """Build the zip download for a request and cache it in storage"""
+    foia = FOIARequest.objects.get(pk=foia_pk)
+    try:
+        build_cached(foia)
+    except SoftTimeLimitExceeded:
+        logger.warn('Building the zip download for %d took too long', foia_pk)
+    finally:
+        cache.delete(BUILD_LOCK_KEY % foia_pk)
+
+
 @task(
     ignore_result=True,
     max_retries=5,
@@ -396,44 +346,199 @@ def send_fax(comm_id, subject, body, error_count, **kwargs):
             )
 
 
+def followup_channel(portal_status, email_status, fax_status):
+    """Which channel a follow up will be sent through,
+    mirroring the preferred order in FOIARequest._send_msg"""
+    if portal_status == 'good':
+        return 'portal'
+    elif email_status == 'good':
+        return 'email'
+    elif fax_status == 'good':
+        return 'fax'
+    else:
+        return 'mail'
+
+
 @periodic_task(
     run_every=crontab(hour=5, minute=0),
-    time_limit=10 * 60,
-    soft_time_limit=570,
     name='muckrock.foia.tasks.followup_requests'
 )
 def followup_requests():
-    """Follow up on any requests that need following up on"""
-    log = []
+    """Follow up on any requests that need following up on
+
+    Snapshots the requests which are due, and fans them out in chunks to
+    be sent in parallel, rate limited per channel.  If a run did not finish
+    dispatching its requests, running this again will resume it, even on a
+    later day, only dispatching the requests from its snapshot which were
+    not dispatched before.
+    """
     # weekday returns 5 for sat and 6 for sun
     is_weekday = date.today().weekday() < 5
-    if (
-        config.ENABLE_FOLLOWUP
-        and (config.ENABLE_WEEKEND_FOLLOWUP or is_weekday)
+    if not (
+        config.ENABLE_FOLLOWUP and
+        (config.ENABLE_WEEKEND_FOLLOWUP or is_weekday)
     ):
-        try:
-            num_requests = FOIARequest.objects.get_followup().count()
-            for foia in FOIARequest.objects.get_followup():
-                try:
-                    foia.followup()
-                    log.append(
-                        '%s - %d - %s' % (foia.status, foia.pk, foia.title)
-                    )
-                except MailgunAPIError as exc:
-                    logger.error(
-                        'Mailgun error during followups: %s',
-                        exc,
-                        exc_info=sys.exc_info()
-                    )
-        except SoftTimeLimitExceeded:
+        return
+
+    for run in FollowupRun.objects.filter(
+        date__lt=date.today(), datetime_done=None
+    ).order_by('pk'):
+        if _dispatch_followups(run) == 0:
+            # every request was dispatched, but the chunks for some of them
+            # were lost, so the run will never finish on its own
             logger.warn(
-                'Follow ups did not complete in time. '
-                'Completed %d out of %d',
-                num_requests - FOIARequest.objects.get_followup().count(),
-                num_requests,
+                'Follow ups: closing run %d, %d of %d requests processed',
+                run.pk,
+                run.processed,
+                run.total,
+            )
+            run.datetime_done = timezone.now()
+            run.save(update_fields=['datetime_done'])
+
+    run = FollowupRun.objects.filter(date=date.today()).order_by('pk').last()
+    if run is None or run.datetime_done is not None:
+        foias = FOIARequest.objects.get_followup()
+        pks = list(foias.order_by('pk').values_list('pk', flat=True))
+        run = FollowupRun.objects.create(
+            date=date.today(),
+            request_pks=pks,
+            total=len(pks),
+        )
+        logger.info(
+            'Follow ups: starting run %d, %d requests', run.pk, run.total
+        )
+    else:
+        logger.info(
+            'Follow ups: resuming run %d, %d of %d requests processed',
+            run.pk,
+            run.processed,
+            run.total,
+        )
+    _dispatch_followups(run)
+
+
+def _dispatch_followups(run):
+    """Send the requests from a run's snapshot which have not been dispatched
+    yet to chunks, returning how many were dispatched, or None if another
+    process is dispatching them"""
+    lock_key = 'followup:dispatch:%d' % run.pk
+    if not cache.add(lock_key, True, 60 * 60):
+        return None
+    try:
+        run.refresh_from_db()
+        dispatched = set(run.dispatched_pks)
+        pending = [pk for pk in run.request_pks if pk not in dispatched]
+        if not pending:
+            if run.total == 0:
+                run.record()
+            return 0
+
+        channels = defaultdict(list)
+        for pk, portal_status, email_status, fax_status in (
+            FOIARequest.objects.filter(pk__in=pending).order_by('pk')
+            .values_list(
+                'pk', 'portal__status', 'email__status', 'fax__status'
+            )
+        ):
+            channels[followup_channel(portal_status, email_status,
+                                      fax_status)].append(pk)
+        # requests deleted since the snapshot was taken
+        deleted = set(pending).difference(*channels.values())
+        if deleted:
+            run.dispatched_pks.extend(deleted)
+            run.save(update_fields=['dispatched_pks'])
+            run.record(skipped=len(deleted))
+
+        size = settings.FOLLOWUP_CHUNK_SIZE
+        for channel, pks in channels.iteritems():
+            # space out the chunks for each channel to respect its rate limit
+            seconds_per_chunk = (
+                60.0 * size / settings.FOLLOWUP_RATE_LIMITS[channel]
             )
+            for i, start in enumerate(xrange(0, len(pks), size)):
+                chunk = pks[start:start + size]
+                # mark the chunk dispatched first, so that if this is
+                # interrupted it is never dispatched twice
+                run.dispatched_pks.extend(chunk)
+                run.save(update_fields=['dispatched_pks'])
+                followup_requests_chunk.apply_async(
+                    args=[run.pk, chunk],
+                    countdown=int(i * seconds_per_chunk),
+                )
+        return len(pending)
+    finally:
+        cache.delete(lock_key)
 
-        logger.info('Follow Ups:\n%s', '\n'.join(log))
+
+@task(
+    ignore_result=True,
+    time_limit=10 * 60,
+    soft_time_limit=570,
+    name='muckrock.foia.tasks.followup_requests_chunk',
+)
+def followup_requests_chunk(run_pk, foia_pks):
+    """Send follow ups for a chunk of requests from a follow up run"""
+    run = FollowupRun.objects.get(pk=run_pk)
+    counts = Counter()
+    try:
+        for foia_pk in foia_pks:
+            counts[_followup_request(foia_pk)] += 1
+    except SoftTimeLimitExceeded:
+        processed = sum(counts.values())
+        logger.warn(
+            'Follow ups: chunk for run %d did not complete in time. '
+            'Completed %d out of %d',
+            run.pk,
+            processed,
+            len(foia_pks),
+        )
+        # the remaining requests are already marked as dispatched, so
+        # queue them again here
+        followup_requests_chunk.delay(run.pk, foia_pks[processed:])
+    finally:
+        run.record(**counts)
+    if run.datetime_done is not None:
+        logger.info(
+            'Follow ups: run %d done. %d sent, %d failed, %d skipped, '
+            '%.2f requests per second',
+            run.pk,
+            run.sent,
+            run.failed,
+            run.skipped,
+            run.throughput,
+        )
+
+
+def _followup_request(foia_pk):
+    """Send a follow up for a single request if it is still due,
+    returns the outcome"""
+    try:
+        if not FOIARequest.objects.get_followup().filter(pk=foia_pk).exists():
+            return 'skipped'
+        # claim the request by moving its follow up date on, so concurrent or
+        # resumed runs cannot send duplicate follow ups.  This is committed
+        # before sending, so that no lock is held while the follow up goes
+        # out, and a request whose follow up fails is tried again tomorrow.
+        claimed = FOIARequest.objects.filter(
+            pk=foia_pk,
+            date_followup__lte=date.today(),
+        ).update(date_followup=date.today() + timedelta(1))
+        if not claimed:
+            return 'skipped'
+        foia = FOIARequest.objects.get(pk=foia_pk)
+        foia.followup()
+        logger.info('Follow up: %s - %d - %s', foia.status, foia.pk, foia.title)
+        return 'sent'
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.error(
+            'Error during follow up for request %d: %s',
+            foia_pk,
+            exc,
+            exc_info=sys.exc_info(),
+        )
+        return 'failed'
 
 
 @periodic_task(
@@ -479,20 +584,41 @@ def embargo_expire():
         )
 
 
+@task(
+    ignore_result=True,
+    time_limit=10 * 60,
+    soft_time_limit=570,
+    name='muckrock.foia.tasks.set_document_cloud_pages_batch',
+)
+def set_document_cloud_pages_batch(doc_pks):
+    """Set the page counts for a batch of files from document cloud"""
+    updated, missing = sync_pages(doc_pks)
+    logger.info(
+        'Setting document cloud pages: %d of %d documents updated, '
+        '%d not found',
+        updated,
+        len(doc_pks),
+        missing,
+    )
+
+
 @periodic_task(
     run_every=crontab(hour=0, minute=0),
     name='muckrock.foia.tasks.set_all_document_cloud_pages'
 )
 def set_all_document_cloud_pages():
     """Try and set all document cloud documents that have no page count set"""
-    docs = [
-        doc for doc in FOIAFile.objects.filter(pages=0) if doc.is_doccloud()
-    ]
+    doc_pks = list(
+        FOIAFile.objects.filter(doccloud=True, pages=0).exclude(doc_id='')
+        .order_by('pk').values_list('pk', flat=True)
+    )
     logger.info(
-        'Setting document cloud pages, %d documents with 0 pages', len(docs)
+        'Setting document cloud pages, %d documents with 0 pages',
+        len(doc_pks),
     )
-    for doc in docs:
-        set_document_cloud_pages.apply_async(args=[doc.pk])
+    size = settings.DOCUMENTCLOUD_BATCH_SIZE
+    for start in xrange(0, len(doc_pks), size):
+        set_document_cloud_pages_batch.delay(doc_pks[start:start + size])
 
 
 @periodic_task(
@@ -501,267 +627,77 @@ def set_all_document_cloud_pages():
 )
 def retry_stuck_documents():
     """Reupload all document cloud documents which are stuck"""
-    docs = [
-        doc for doc in FOIAFile.objects.filter(doc_id='')
-        if doc.is_doccloud() and doc.get_foia()
-    ]
-    logger.info('Reupload documents, %d documents are stuck', len(docs))
-    for doc in docs:
-        upload_document_cloud.apply_async(args=[doc.pk, False])
+    doc_pks = list(
+        FOIAFile.objects.filter(
+            doccloud=True,
+            doc_id='',
+            comm__foia__isnull=False,
+        ).values_list('pk', flat=True)
+    )
+    logger.info('Reupload documents, %d documents are stuck', len(doc_pks))
+    for doc_pk in doc_pks:
+        upload_document_cloud.apply_async(args=[doc_pk, False])
 
 
-# Increase the time limit for autoimport to 1 hour, and a soft time limit to
-# 5 minutes before that
 @periodic_task(
     run_every=crontab(hour=2, minute=0),
     name='muckrock.foia.tasks.autoimport',
-    time_limit=3600,
-    soft_time_limit=3300
 )
 def autoimport():
-    """Auto import documents from S3"""
-    # pylint: disable=broad-except
-    # pylint: disable=too-many-locals
-    # pylint: disable=too-many-branches
-    # pylint: disable=too-many-statements
-    p_name = re.compile(
-        r'(?P<month>\d\d?)-(?P<day>\d\d?)-(?P<year>\d\d) '
-        r'(?P<docs>(?:mr\d+ )+)(?P<code>[a-z-]+)(?:\$(?P<arg>\S+))?'
-        r'(?: ID#(?P<id>\S+))?'
-        r'(?: EST(?P<estm>\d\d?)-(?P<estd>\d\d?)-(?P<esty>\d\d))?', re.I
-    )
-
-    def s3_copy(bucket, key_or_pre, dest_name):
-        """Copy an s3 key or prefix"""
-
-        if key_or_pre.name.endswith('/'):
-            for key in bucket.list(prefix=key_or_pre.name, delimiter='/'):
-                if key.name == key_or_pre.name:
-                    key.copy(bucket, dest_name)
-                    continue
-                s3_copy(
-                    bucket, key, '%s/%s' %
-                    (dest_name, os.path.basename(os.path.normpath(key.name)))
-                )
-        else:
-            key_or_pre.copy(bucket, dest_name)
-
-    def s3_delete(bucket, key_or_pre):
-        """Delete an s3 key or prefix"""
-
-        if key_or_pre.name.endswith('/'):
-            for key in bucket.list(prefix=key_or_pre.name, delimiter='/'):
-                if key.name == key_or_pre.name:
-                    key.delete()
-                    continue
-                s3_delete(bucket, key)
-        else:
-            key_or_pre.delete()
-
-    def parse_name(name):
-        """Parse a file name"""
-        # strip off trailing / and file extension
-        name = os.path.normpath(name)
-        name = os.path.splitext(name)[0]
-
-        m_name = p_name.match(name)
-        if not m_name:
-            raise ValueError(
-                'ERROR: %s does not match the file name format' % name
-            )
-        code = m_name.group('code').upper()
-        if code not in CODES:
-            raise ValueError('ERROR: %s uses an unknown code' % name)
-        foia_pks = [pk[2:] for pk in m_name.group('docs').split()]
-        file_datetime = datetime.combine(
-            datetime(
-                int(m_name.group('year')) + 2000,
-                int(m_name.group('month')),
-                int(m_name.group('day')),
-            ),
-            time(tzinfo=timezone.get_current_timezone()),
-        )
-        title, status, body = CODES[code]
-        arg = m_name.group('arg')
-        id_ = m_name.group('id')
-        if m_name.group('esty'):
-            est_date = date(
-                int(m_name.group('esty')) + 2000, int(m_name.group('estm')),
-                int(m_name.group('estd'))
-            )
-        else:
-            est_date = None
-
-        return (
-            foia_pks, file_datetime, code, title, status, body, arg, id_,
-            est_date
-        )
-
-    def import_key(key, storage_bucket, comm, log, title=None):
-        """Import a key"""
-
-        foia = comm.foia
-        file_name = os.path.split(key.name)[1]
-
-        title = title or file_name
-        access = 'private' if foia.embargo else 'public'
-
-        foia_file = FOIAFile(
-            comm=comm,
-            title=title,
-            datetime=comm.datetime,
-            source=comm.get_source(),
-            access=access,
-        )
-        full_file_name = foia_file.ffile.field.generate_filename(
-            foia_file.ffile.instance,
-            file_name,
-        )
-        full_file_name = default_storage.get_available_name(full_file_name)
-        new_key = key.copy(storage_bucket, full_file_name)
-        new_key.set_acl('public-read')
-
-        foia_file.ffile.name = full_file_name
-        foia_file.save()
-        if key.size != foia_file.ffile.size:
-            raise SizeError(key.size, foia_file.ffile.size, foia_file)
-
-        log.append(
-            'SUCCESS: %s uploaded to FOIA Request %s with a status of %s' %
-            (file_name, foia.pk, foia.status)
-        )
-
-        upload_document_cloud.apply_async(
-            args=[foia_file.pk, False], countdown=3
-        )
-
-    def import_prefix(prefix, bucket, storage_bucket, comm, log):
-        """Import a prefix (folder) full of documents"""
-
-        for key in bucket.list(prefix=prefix.name, delimiter='/'):
-            if key.name == prefix.name:
-                continue
-            if key.name.endswith('/'):
-                log.append(
-                    'ERROR: nested directories not allowed: %s in %s' %
-                    (key.name, prefix.name)
-                )
-                continue
+    """Auto import documents from S3
+
+    Lists the bucket once, recording a manifest of the scans to import, and
+    fans the scans out to be imported in parallel.
+    """
+    bucket, _ = get_buckets(connect())
+    run, scan_pks = start_run(bucket)
+    logger.info('Autoimport: starting run %d, %d scans', run.pk, run.total)
+    if run.datetime_done is not None:
+        _send_autoimport_log(run)
+    for scan_pk in scan_pks:
+        autoimport_scan.delay(run.pk, scan_pk)
+
+
+# Increase the time limit for importing a scan to 1 hour, and a soft time
+# limit to 5 minutes before that
+@task(
+    ignore_result=True,
+    time_limit=3600,
+    soft_time_limit=3300,
+    name='muckrock.foia.tasks.autoimport_scan',
+)
+def autoimport_scan(run_pk, scan_pk):
+    """Import a single scan from an autoimport run"""
+    run = AutoImportRun.objects.get(pk=run_pk)
+    try:
+        # claim the scan, so it is only imported once
+        claimed = AutoImportScan.objects.filter(
+            pk=scan_pk,
+            run=run,
+            status='pending',
+        ).update(status='processing', datetime_updated=timezone.now())
+        if claimed:
+            scan = AutoImportScan.objects.get(pk=scan_pk)
             try:
-                import_key(key, storage_bucket, comm, log)
-            except SizeError as exc:
-                s3_copy(bucket, key, 'review/%s' % key.name[6:])
-                exc.args[2].delete()  # delete the foia file
-                comm.delete()
-                log.append(
-                    'ERROR: %s was %s bytes and after uploaded was %s bytes - retry'
-                    % (key.name[6:], exc.args[0], exc.args[1])
+                import_scan(scan, *get_buckets(connect()))
+            except SoftTimeLimitExceeded:
+                scan.log.append(
+                    'ERROR: Time limit exceeded importing %s, it will be '
+                    'resumed by the next run.  How big of a file did you put '
+                    'in there?' % scan.name
                 )
+                scan.status = 'pending'
+                scan.save()
+    finally:
+        if run.record():
+            _send_autoimport_log(run)
 
-    def process(log):
-        """Process the files"""
-        log.append('Start Time: %s' % timezone.now())
-        conn = S3Connection(
-            settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY
-        )
-        bucket = conn.get_bucket(settings.AWS_AUTOIMPORT_BUCKET_NAME)
-        storage_bucket = conn.get_bucket(settings.AWS_STORAGE_BUCKET_NAME)
-        for key in bucket.list(prefix='scans/', delimiter='/'):
-            if key.name == 'scans/':
-                continue
-            # strip off 'scans/'
-            file_name = key.name[6:]
-
-            try:
-                (
-                    foia_pks, file_datetime, code, title, status, body, arg,
-                    id_, est_date
-                ) = parse_name(file_name)
-            except ValueError as exc:
-                s3_copy(bucket, key, 'review/%s' % file_name)
-                s3_delete(bucket, key)
-                log.append(unicode(exc))
-                continue
-
-            for foia_pk in foia_pks:
-                try:
-                    foia = FOIARequest.objects.get(pk=foia_pk)
-                    from_user = foia.agency.get_user() if foia.agency else None
-
-                    comm = FOIACommunication.objects.create(
-                        foia=foia,
-                        from_user=from_user,
-                        to_user=foia.user,
-                        response=True,
-                        datetime=file_datetime,
-                        communication=body,
-                        status=status,
-                    )
-                    MailCommunication.objects.create(
-                        communication=comm,
-                        sent_datetime=file_datetime,
-                    )
-
-                    foia.status = status or foia.status
-                    if foia.status in [
-                        'partial', 'done', 'rejected', 'no_docs'
-                    ]:
-                        foia.datetime_done = file_datetime
-                    if code == 'FEE' and arg:
-                        foia.price = Decimal(arg)
-                    if id_:
-                        foia.add_tracking_id(id_)
-                    if est_date:
-                        foia.date_estimate = est_date
-                    if code == 'REJ-P':
-                        foia.proxy_reject()
-
-                    if key.name.endswith('/'):
-                        import_prefix(key, bucket, storage_bucket, comm, log)
-                    else:
-                        import_key(key, storage_bucket, comm, log, title=title)
-
-                    foia.save(comment='updated from autoimport files')
-                    action = generate_status_action(foia)
-                    foia.notify(action)
-                    foia.update(comm.anchor())
-
-                except FOIARequest.DoesNotExist:
-                    s3_copy(bucket, key, 'review/%s' % file_name)
-                    log.append(
-                        'ERROR: %s references FOIA Request %s, but it does not exist'
-                        % (file_name, foia_pk)
-                    )
-                except SoftTimeLimitExceeded:
-                    # if we reach the soft time limit,
-                    # re-raise so we can catch and clean up
-                    raise
-                except Exception as exc:
-                    s3_copy(bucket, key, 'review/%s' % file_name)
-                    log.append(
-                        'ERROR: %s has caused an unknown error. %s' %
-                        (file_name, exc)
-                    )
-                    logger.error(
-                        'Autoimport error: %s', exc, exc_info=sys.exc_info()
-                    )
-            # delete key after processing all requests for it
-            s3_delete(bucket, key)
-        log.append('End Time: %s' % timezone.now())
 
-    try:
-        log = []
-        process(log)
-    except SoftTimeLimitExceeded:
-        log.append(
-            'ERROR: Time limit exceeded, please check folder for '
-            'undeleted uploads.  How big of a file did you put in there?'
-        )
-        log.append('End Time: %s' % timezone.now())
-    finally:
-        send_mail(
-            '[AUTOIMPORT] %s Logs' % timezone.now(),
-            '\n'.join(log),
-            'info@muckrock.com', ['info@muckrock.com'],
-            fail_silently=False
-        )
+def _send_autoimport_log(run):
+    """Email the log for a finished autoimport run"""
+    send_mail(
+        '[AUTOIMPORT] %s Logs' % run.datetime_done,
+        '\n'.join(run.get_log()),
+        'info@muckrock.com', ['info@muckrock.com'],
+        fail_silently=False
+    )
@@ -16,6 +16,7 @@ from nose.tools import assert_false, assert_true, eq_, ok_
 
 # MuckRock
 from muckrock.core.factories import AgencyFactory, UserFactory
+from muckrock.foia.factories import FOIACommunicationFactory, FOIARequestFactory
 from muckrock.foia.models import FOIAComposer
 
 
@@ -303,3 +304,49 @@ class TestFOIAViewsetCreate(TestCase):
             code=402,
             status='Out of requests.  FOI Request has been saved.',
         )
+
+
+class TestFOIAViewsetList(TestCase):
+    """Unit Tests for listing requests with the FOIA API Viewset"""
+
+    def setUp(self):
+        self.foias = FOIARequestFactory.create_batch(
+            3, status='done', embargo=False
+        )
+        for foia in self.foias:
+            FOIACommunicationFactory(foia=foia)
+
+    def test_list(self):
+        """Lists leave out the communications unless they are expanded"""
+        response = self.client.get(reverse('api-foia-list'))
+        eq_(response.status_code, 200)
+        eq_(response.json()['count'], 3)
+        ok_('communications' not in response.json()['results'][0])
+        response = self.client.get(
+            reverse('api-foia-list'), {'expand': 'communications'}
+        )
+        eq_(len(response.json()['results'][0]['communications']), 1)
+
+    def test_fields(self):
+        """Only the fields asked for are included"""
+        response = self.client.get(
+            reverse('api-foia-list'), {'fields': 'id,title'}
+        )
+        eq_(set(response.json()['results'][0]), {'id', 'title'})
+        response = self.client.get(
+            reverse('api-foia-detail', kwargs={'pk': self.foias[0].pk}),
+            {'fields': 'id,communications'},
+        )
+        eq_(set(response.json()), {'id', 'communications'})
+
+    def test_cursor(self):
+        """Page through the requests by id"""
+        params = {'pagination': 'cursor', 'page_size': 2}
+        response = self.client.get(reverse('api-foia-list'), params)
+        data = response.json()
+        ok_('count' not in data)
+        eq_([f['id'] for f in data['results']], [f.pk for f in self.foias[:2]])
+        response = self.client.get(data['next'])
+        data = response.json()
+        eq_([f['id'] for f in data['results']], [self.foias[2].pk])
+        eq_(data['next'], None)
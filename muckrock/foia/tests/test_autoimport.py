@@ -0,0 +1,137 @@
+"""
+Tests for automatically importing scanned documents from S3
+"""
+
+# Django
+from django.conf import settings
+from django.core import mail
+from django.test import TestCase
+from django.test.utils import override_settings
+
+# Third Party
+from boto.s3.connection import S3Connection
+from mock import patch
+from moto import mock_s3_deprecated
+from nose.tools import eq_, ok_
+
+# MuckRock
+from muckrock.foia.autoimport import list_scans
+from muckrock.foia.factories import FOIACommunicationFactory, FOIARequestFactory
+from muckrock.foia.models import AutoImportRun, AutoImportScan, FOIAFile
+from muckrock.foia.tasks import autoimport
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID='key',
+    AWS_SECRET_ACCESS_KEY='secret',
+    AWS_AUTOIMPORT_ENDPOINT=None,
+)
+@patch('muckrock.foia.tasks.upload_document_cloud.apply_async')
+class TestAutoimport(TestCase):
+    """Test importing scans from a mock S3 bucket"""
+
+    def setUp(self):
+        mock_s3 = mock_s3_deprecated()
+        mock_s3.start()
+        self.addCleanup(mock_s3.stop)
+        conn = S3Connection('key', 'secret')
+        self.bucket = conn.create_bucket(settings.AWS_AUTOIMPORT_BUCKET_NAME)
+        conn.create_bucket(settings.AWS_STORAGE_BUCKET_NAME)
+        self.foia = FOIARequestFactory(status='ack')
+
+    def upload(self, name, content='scanned'):
+        """Upload a scan to the bucket"""
+        self.bucket.new_key('scans/' + name).set_contents_from_string(content)
+
+    def key_names(self):
+        """The names of all the keys in the bucket"""
+        return sorted(k.name for k in self.bucket.list())
+
+    def test_list_scans(self, mock_upload):
+        """The files are grouped by scan"""
+        # pylint: disable=unused-argument
+        self.upload('01-02-17 mr1 ACK.pdf')
+        self.upload('01-02-17 mr2 RES/a.pdf')
+        self.upload('01-02-17 mr2 RES/b.pdf')
+        self.upload('01-02-17 mr2 RES/nested/c.pdf')
+        scans, errors = list_scans(self.bucket)
+        eq_(
+            scans.keys(),
+            ['01-02-17 mr1 ACK.pdf', '01-02-17 mr2 RES/'],
+        )
+        eq_(
+            [name for name, _ in scans['01-02-17 mr2 RES/']],
+            ['scans/01-02-17 mr2 RES/a.pdf', 'scans/01-02-17 mr2 RES/b.pdf'],
+        )
+        eq_(len(errors), 1)
+
+    def test_autoimport(self, mock_upload):
+        """A scan is imported into its request and deleted"""
+        self.upload('01-02-17 mr%d ACK.pdf' % self.foia.pk)
+        autoimport()
+        self.foia.refresh_from_db()
+        eq_(self.foia.status, 'processed')
+        foia_file = FOIAFile.objects.get(comm__foia=self.foia)
+        eq_(foia_file.title, 'Acknowledgement Letter')
+        eq_(foia_file.comm.status, 'processed')
+        eq_(self.key_names(), [])
+        ok_(mock_upload.called)
+        run = AutoImportRun.objects.get()
+        ok_(run.datetime_done)
+        eq_(run.processed, 1)
+        eq_(AutoImportScan.objects.get().status, 'done')
+        eq_(len(mail.outbox), 1)
+
+    def test_bad_name(self, mock_upload):
+        """A scan with a bad name is moved to review"""
+        # pylint: disable=unused-argument
+        self.upload('bad name.pdf')
+        autoimport()
+        eq_(self.key_names(), ['review/bad name.pdf'])
+        ok_(not AutoImportScan.objects.exists())
+        ok_('bad name' in mail.outbox[0].body)
+
+    def test_resume(self, mock_upload):
+        """An interrupted scan is resumed without duplicating the
+        communications or files already imported"""
+        # pylint: disable=unused-argument
+        name = '01-02-17 mr%d RES/' % self.foia.pk
+        self.upload(name + 'a.pdf')
+        self.upload(name + 'b.pdf')
+        comm = FOIACommunicationFactory(foia=self.foia)
+        FOIAFile.objects.create(comm=comm, title='a.pdf')
+        AutoImportScan.objects.create(
+            run=AutoImportRun.objects.create(),
+            name=name,
+            status='processing',
+            progress={
+                str(self.foia.pk): {
+                    'comm': comm.pk,
+                    'files': ['scans/%sa.pdf' % name],
+                    'done': False,
+                }
+            },
+        )
+        communications = self.foia.communications.count()
+        autoimport()
+        eq_(self.foia.communications.count(), communications)
+        eq_(
+            sorted(comm.files.values_list('title', flat=True)),
+            ['a.pdf', 'b.pdf'],
+        )
+        self.foia.refresh_from_db()
+        eq_(self.foia.status, 'done')
+        eq_(self.key_names(), [])
+
+    def test_processing(self, mock_upload):
+        """A scan still being imported by another worker is not reclaimed"""
+        # pylint: disable=unused-argument
+        name = '01-02-17 mr%d ACK.pdf' % self.foia.pk
+        self.upload(name)
+        run = AutoImportRun.objects.create()
+        AutoImportScan.objects.create(run=run, name=name, status='processing')
+        autoimport()
+        scan = AutoImportScan.objects.get()
+        eq_(scan.run, run)
+        eq_(scan.status, 'processing')
+        eq_(self.key_names(), ['scans/' + name])
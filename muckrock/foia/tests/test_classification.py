@@ -4,12 +4,21 @@ Tests using nose for the classifing of new communications
 
 # Django
 from django.test import TestCase
+from django.test.utils import override_settings
+
+# Standard Library
+import os
+import shutil
+import tempfile
+import time
 
 # Third Party
 import nose.tools
+from mock import patch
 
 # MuckRock
-from muckrock.foia.factories import FOIACommunicationFactory
+from muckrock.foia import classifier
+from muckrock.foia.factories import FOIACommunicationFactory, FOIAFileFactory
 from muckrock.foia.tasks import classify_status
 from muckrock.task.factories import ResponseTaskFactory
 
@@ -27,3 +36,81 @@ class TestFOIAClassify(TestCase):
         task.refresh_from_db()
         nose.tools.ok_(task.predicted_status)
         nose.tools.ok_(task.status_probability)
+
+    def test_classify_batch(self):
+        """Classifying a batch should only predict for tasks which are
+        ready"""
+        ready_task = ResponseTaskFactory(
+            communication__communication='Here are your responsive documents'
+        )
+        waiting_task = ResponseTaskFactory()
+        FOIAFileFactory(
+            comm=waiting_task.communication,
+            ffile__filename='waiting.pdf',
+            doc_id='',
+        )
+        nose.tools.eq_(
+            classifier.classify_response_tasks([ready_task, waiting_task]),
+            [ready_task],
+        )
+        nose.tools.ok_(ready_task.predicted_status)
+        nose.tools.ok_(ready_task.status_probability)
+        nose.tools.eq_(waiting_task.predicted_status, None)
+
+
+class TestOCRCache(TestCase):
+    """Test the local caching of OCR text"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cache(self):
+        """OCR text should only be fetched once"""
+        with override_settings(OCR_CACHE_DIR=self.cache_dir), patch(
+            'muckrock.foia.classifier.fetch_text_ocr',
+            return_value=u'Document text',
+        ) as mock_fetch:
+            nose.tools.eq_(classifier.get_text_ocr(u'1-doc'), u'Document text')
+            nose.tools.eq_(classifier.get_text_ocr(u'1-doc'), u'Document text')
+        mock_fetch.assert_called_once_with(u'1-doc')
+
+    def test_errors_not_cached(self):
+        """OCR errors should be retried"""
+        with override_settings(OCR_CACHE_DIR=self.cache_dir), patch(
+            'muckrock.foia.classifier.fetch_text_ocr',
+            return_value=None,
+        ) as mock_fetch:
+            nose.tools.eq_(classifier.get_text_ocr(u'1-doc'), u'')
+            nose.tools.eq_(classifier.get_text_ocr(u'1-doc'), u'')
+        nose.tools.eq_(mock_fetch.call_count, 2)
+
+    def test_sweep(self):
+        """Old text should be removed, then the least recently used text
+        until the cache fits"""
+        with override_settings(OCR_CACHE_DIR=self.cache_dir), patch(
+            'muckrock.foia.classifier.fetch_text_ocr',
+            side_effect=lambda doc_id: u'x' * 10,
+        ):
+            for doc_id in (u'1-old', u'2-used', u'3-new'):
+                classifier.get_text_ocr(doc_id)
+        now = time.time()
+        ages = {u'1-old': 40, u'2-used': 2, u'3-new': 1}
+        for doc_id, days in ages.iteritems():
+            with override_settings(OCR_CACHE_DIR=self.cache_dir):
+                path = classifier._ocr_cache_path(doc_id)
+            mtime = now - days * 24 * 60 * 60
+            os.utime(path, (mtime, mtime))
+        with override_settings(
+            OCR_CACHE_DIR=self.cache_dir,
+            OCR_CACHE_DAYS=30,
+            OCR_CACHE_MAX_BYTES=15,
+        ):
+            classifier.sweep_ocr_cache()
+            remaining = [
+                os.path.exists(classifier._ocr_cache_path(d))
+                for d in (u'1-old', u'2-used', u'3-new')
+            ]
+        nose.tools.eq_(remaining, [False, False, True])
@@ -7,12 +7,17 @@ from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.test import TestCase
 
+# Standard Library
+from urllib2 import URLError
+
 # Third Party
+from mock import patch
 from nose.tools import eq_, ok_, raises
 
 # MuckRock
 from muckrock.core.factories import UserFactory
 from muckrock.core.test_utils import http_get_response
+from muckrock.foia.documentcloud import NotFound, sync_pages
 from muckrock.foia.factories import FOIAFileFactory
 from muckrock.foia.views import FOIAFileListView
 
@@ -51,3 +56,44 @@ class TestRequestFilesView(TestCase):
         user = UserFactory()
         ok_(not self.foia.has_perm(user, 'view'))
         http_get_response(self.url, self.view, user, **self.kwargs)
+
+
+class TestDocumentCloudPages(TestCase):
+    """Page counts are set for batches of files from document cloud"""
+
+    def test_doccloud_flag(self):
+        """Files are flagged if doc cloud supports them"""
+        ok_(FOIAFileFactory(ffile__filename='doc.PDF').doccloud)
+        ok_(not FOIAFileFactory(ffile__filename='image.png').doccloud)
+
+    @patch('muckrock.jurisdiction.tasks.update_request_stats.delay')
+    def test_sync_pages(self, mock_update_stats):
+        """Pages are set in bulk, and missing documents are cleared"""
+        found = FOIAFileFactory(ffile__filename='found.pdf', doc_id='1-found')
+        missing = FOIAFileFactory(
+            ffile__filename='missing.pdf', doc_id='2-missing'
+        )
+        error = FOIAFileFactory(ffile__filename='error.pdf', doc_id='3-error')
+        image = FOIAFileFactory(ffile__filename='image.png', doc_id='4-image')
+
+        def fetch_pages(doc_id):
+            """Mock document cloud responses"""
+            if doc_id == '1-found':
+                return 12
+            elif doc_id == '2-missing':
+                raise NotFound(doc_id)
+            raise URLError('Service unavailable')
+
+        doc_pks = [found.pk, missing.pk, error.pk, image.pk]
+        with patch('muckrock.foia.documentcloud.fetch_pages', fetch_pages):
+            with self.assertNumQueries(4):
+                # select the files, update the pages, select the agencies
+                # to update the stats for, clear the missing doc ids
+                eq_(sync_pages(doc_pks), (1, 1))
+        for file_ in (found, missing, error, image):
+            file_.refresh_from_db()
+        eq_(found.pages, 12)
+        eq_(missing.doc_id, '')
+        eq_((error.pages, error.doc_id), (0, '3-error'))
+        eq_(image.pages, 0)
+        mock_update_stats.assert_called_once_with([found.comm.foia.agency_id])
@@ -18,6 +18,7 @@ import nose.tools
 import pytz
 from actstream.actions import follow
 from freezegun import freeze_time
+from mock import patch
 from nose.tools import eq_, ok_
 
 # MuckRock
@@ -33,7 +34,8 @@ from muckrock.foia.factories import (
     FOIAComposerFactory,
     FOIARequestFactory,
 )
-from muckrock.foia.models import FOIACommunication, FOIARequest
+from muckrock.foia.models import FOIACommunication, FOIARequest, FollowupRun
+from muckrock.foia.tasks import followup_requests
 from muckrock.task.models import SnailMailTask
 
 # allow methods that could be functions and too many public methods in tests
@@ -579,6 +581,52 @@ class TestRequestSharing(TestCase):
         nose.tools.assert_true(self.foia.has_perm(self.creator, 'view'))
 
 
+class TestRequestVisibility(TestCase):
+    """The precomputed visibility is kept up to date as requests change"""
+
+    def setUp(self):
+        self.foia = FOIARequestFactory(embargo=True)
+        self.user = UserFactory()
+
+    def viewable(self, user):
+        """Is the request viewable by the user"""
+        return FOIARequest.objects.get_viewable(user).filter(pk=self.foia.pk
+                                                             ).exists()
+
+    def test_embargo(self):
+        """Requests are public once their embargo is lifted"""
+        nose.tools.assert_false(self.viewable(self.user))
+        self.foia.embargo = False
+        self.foia.save()
+        nose.tools.assert_true(self.viewable(self.user))
+
+    def test_collaborators(self):
+        """Collaborators may view the request until they are removed"""
+        self.foia.add_viewer(self.user)
+        nose.tools.assert_true(self.viewable(self.user))
+        self.foia.promote_viewer(self.user)
+        nose.tools.assert_true(self.viewable(self.user))
+        self.user.edit_access.clear()
+        nose.tools.assert_false(self.viewable(self.user))
+
+    def test_agency(self):
+        """Agency users may view the requests sent to their agency"""
+        user = UserFactory(
+            profile__acct_type='agency',
+            profile__agency=self.foia.agency,
+        )
+        nose.tools.assert_true(self.viewable(user))
+        nose.tools.assert_false(self.viewable(self.user))
+
+    def test_owner(self):
+        """Requests are viewable by their new owner when they change hands"""
+        nose.tools.assert_true(self.viewable(self.foia.user))
+        composer = self.foia.composer
+        composer.user = self.user
+        composer.save()
+        nose.tools.assert_true(self.viewable(self.user))
+
+
 class TestFOIANotification(TestCase):
     """The request should always notify its owner,
     but only notify followers if its not embargoed."""
@@ -688,3 +736,105 @@ class TestFOIANotification(TestCase):
             self.owner.notifications.get_unread().count(), unread_count + 2,
             'The user should have two unread notifications.'
         )
+
+
+class TestFollowupRequests(TestCase):
+    """Test the automated follow up pipeline"""
+
+    def setUp(self):
+        """Set up tests"""
+        UserFactory(username='MuckrockStaff')
+
+    @freeze_time('2018-06-04')
+    def test_followup_run(self):
+        """Due requests should be followed up on once"""
+        due = [
+            FOIARequestFactory(
+                status='processed', date_followup=date(2018, 6, 1)
+            ) for _ in range(3)
+        ]
+        FOIARequestFactory(status='processed', date_followup=date(2018, 7, 1))
+        followup_requests()
+        run = FollowupRun.objects.get()
+        eq_(run.total, 3)
+        eq_(run.sent, 3)
+        eq_(run.failed, 0)
+        ok_(run.datetime_done)
+        eq_(set(run.request_pks), {f.pk for f in due})
+        for foia in due:
+            eq_(foia.communications.count(), 1)
+
+        # running again should not send any more follow ups
+        followup_requests()
+        eq_(FollowupRun.objects.count(), 2)
+        eq_(FollowupRun.objects.exclude(pk=run.pk).get().total, 0)
+        for foia in due:
+            eq_(foia.communications.count(), 1)
+
+    @freeze_time('2018-06-04')
+    def test_followup_resume(self):
+        """An unfinished run should be resumed"""
+        foias = [
+            FOIARequestFactory(
+                status='processed', date_followup=date(2018, 6, 1)
+            ) for _ in range(2)
+        ]
+        run = FollowupRun.objects.create(
+            date=date(2018, 6, 4),
+            request_pks=[f.pk for f in foias],
+            dispatched_pks=[foias[0].pk],
+            total=2,
+        )
+        # the first request was followed up on before the run stopped
+        foias[0].followup()
+        run.record(sent=1)
+        followup_requests()
+        run.refresh_from_db()
+        eq_(run.sent, 2)
+        eq_(run.skipped, 0)
+        ok_(run.datetime_done)
+        eq_(FollowupRun.objects.count(), 1)
+        eq_(foias[0].communications.count(), 1)
+        eq_(foias[1].communications.count(), 1)
+
+    @freeze_time('2018-06-04')
+    def test_followup_claimed(self):
+        """A request is claimed before its follow up is sent, so a failed
+        follow up is tried again the next day rather than by another run"""
+        foia = FOIARequestFactory(
+            status='processed', date_followup=date(2018, 6, 1)
+        )
+        with patch.object(FOIARequest, 'followup', side_effect=ValueError):
+            followup_requests()
+        run = FollowupRun.objects.get()
+        eq_(run.failed, 1)
+        foia.refresh_from_db()
+        eq_(foia.date_followup, date(2018, 6, 5))
+        eq_(foia.communications.count(), 0)
+
+    @freeze_time('2018-06-05')
+    def test_followup_resume_previous_day(self):
+        """An unfinished run from a previous day should be resumed, or closed
+        if all of its requests were dispatched"""
+        foia = FOIARequestFactory(
+            status='processed', date_followup=date(2018, 6, 1)
+        )
+        unfinished = FollowupRun.objects.create(
+            date=date(2018, 6, 4),
+            request_pks=[foia.pk],
+            total=1,
+        )
+        lost = FollowupRun.objects.create(
+            date=date(2018, 6, 4),
+            request_pks=[foia.pk],
+            dispatched_pks=[foia.pk],
+            total=1,
+        )
+        followup_requests()
+        unfinished.refresh_from_db()
+        eq_(unfinished.sent, 1)
+        ok_(unfinished.datetime_done)
+        lost.refresh_from_db()
+        eq_(lost.processed, 0)
+        ok_(lost.datetime_done)
+        eq_(foia.communications.count(), 1)
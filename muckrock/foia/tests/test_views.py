@@ -11,12 +11,15 @@ from django.utils import timezone
 
 # Standard Library
 import datetime
+from cStringIO import StringIO
 from datetime import date, timedelta
 from operator import attrgetter
+from zipfile import ZipFile
 
 # Third Party
 import nose.tools
 from actstream.actions import follow, is_following, unfollow
+from mock import patch
 from nose.tools import (
     assert_false,
     assert_in,
@@ -35,15 +38,21 @@ from muckrock.core.factories import (
     ProjectFactory,
     UserFactory,
 )
-from muckrock.core.test_utils import http_post_response, mock_middleware
+from muckrock.core.test_utils import (
+    http_get_response,
+    http_post_response,
+    mock_middleware,
+)
 from muckrock.core.tests import get_404, get_allowed
 from muckrock.crowdfund.models import Crowdfund
 from muckrock.foia.factories import (
     FOIACommunicationFactory,
     FOIAComposerFactory,
+    FOIAFileFactory,
     FOIARequestFactory,
 )
 from muckrock.foia.models import FOIAComposer, FOIARequest
+from muckrock.foia.rules import load_context
 from muckrock.foia.views import (
     ComposerDetail,
     CreateComposer,
@@ -56,6 +65,7 @@ from muckrock.foia.views import (
     crowdfund_request,
     raw,
 )
+from muckrock.foia.zip_download import cache_path
 from muckrock.jurisdiction.factories import ExampleAppealFactory
 from muckrock.jurisdiction.models import Appeal
 from muckrock.project.forms import ProjectManagerForm
@@ -277,6 +287,91 @@ class TestRequestDetailView(TestCase):
             'The appeal should reference the communication that was created.'
         )
 
+    def test_zip_download(self):
+        """The zip download should stream all of the communications and files
+        for the request"""
+        comm = FOIACommunicationFactory(
+            foia=self.foia, communication=u'Here are the documents'
+        )
+        foia_file = FOIAFileFactory(
+            comm=comm,
+            ffile__filename='documents.pdf',
+            ffile__data='document contents',
+        )
+        response = http_get_response(
+            self.url + '?zip_download=1',
+            self.view,
+            self.foia.user,
+            **self.kwargs
+        )
+        eq_(response.status_code, 200)
+        ok_(response.streaming)
+        zip_file = ZipFile(StringIO(''.join(response.streaming_content)))
+        eq_(zip_file.testzip(), None)
+        names = zip_file.namelist()
+        eq_(len(names), self.foia.communications.count() + 1)
+        ok_(foia_file.name() in names)
+        eq_(zip_file.read(foia_file.name()), 'document contents')
+
+    def test_zip_download_cache_path(self):
+        """The cached zip download should be replaced when a communication is
+        edited or a file is removed"""
+        comm = FOIACommunicationFactory(
+            foia=self.foia, communication=u'Here are the documents'
+        )
+        foia_file = FOIAFileFactory(comm=comm)
+        paths = [cache_path(self.foia)]
+        comm.communication = u'Here are the redacted documents'
+        comm.save()
+        paths.append(cache_path(self.foia))
+        foia_file.delete()
+        paths.append(cache_path(self.foia))
+        eq_(len(set(paths)), 3)
+
+    def test_permissions_loaded_once(self):
+        """The user's relationship to the request is loaded once for all of
+        the permissions checked while rendering the detail page"""
+        FOIACommunicationFactory(foia=self.foia, thanks=True)
+        self.foia.add_viewer(UserFactory())
+        self.foia.add_editor(UserFactory())
+        with patch(
+            'muckrock.foia.rules.load_context', wraps=load_context
+        ) as mock_load:
+            response = http_get_response(
+                self.url, self.view, self.foia.user, **self.kwargs
+            )
+            response.render()
+        eq_(response.status_code, 200)
+        eq_(mock_load.call_count, 1)
+
+    def test_permission_queries(self):
+        """Checking every permission for a request takes a single query"""
+        foia = FOIARequest.objects.select_related(
+            'agency__jurisdiction',
+            'crowdfund',
+            'composer__user__profile',
+        ).get(pk=self.foia.pk)
+        editor = UserFactory()
+        foia.add_editor(editor)
+        # load the editor's profile, as the detail page's user already is
+        editor.profile  # pylint: disable=pointless-statement
+        perms = [
+            'view',
+            'change',
+            'embargo',
+            'pay',
+            'zip_download',
+            'flag',
+            'thank',
+            'followup',
+            'agency_reply',
+            'upload_attachment',
+        ]
+        for user in (foia.user, editor):
+            with self.assertNumQueries(1):
+                for perm in perms:
+                    foia.has_perm(user, perm)
+
     def test_appeal_example(self):
         """If an example appeal is used to base the appeal off of,
         then the examples should be recorded to the appeal object as well."""
@@ -20,6 +20,7 @@ import stripe
 
 # MuckRock
 from muckrock.accounts.utils import validate_stripe_email
+from muckrock.core.follow import is_follower
 from muckrock.core.utils import new_action
 from muckrock.crowdfund.forms import CrowdfundForm
 from muckrock.foia.forms import FOIAEmbargoForm
@@ -158,7 +159,7 @@ def follow(request, jurisdiction, jidx, slug, idx):
         slug=slug,
         pk=idx,
     )
-    if actstream.actions.is_following(request.user, foia):
+    if is_follower(request.user, foia):
         actstream.actions.unfollow(request.user, foia)
         messages.success(request, 'You are no longer following this request.')
     else:
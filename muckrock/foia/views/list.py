@@ -21,11 +21,11 @@ from itertools import chain
 # Third Party
 import actstream
 import unicodecsv as csv
-from actstream.models import following
 from furl import furl
 
 # MuckRock
 from muckrock.agency.models import Agency
+from muckrock.core.follow import get_followed
 from muckrock.core.forms import TagManagerForm
 from muckrock.core.models import ExtractDay
 from muckrock.core.utils import Echo
@@ -48,9 +48,11 @@ from muckrock.foia.forms import (
 )
 from muckrock.foia.models import (
     END_STATUS,
+    STATUS,
     FOIAComposer,
     FOIARequest,
     FOIASavedSearch,
+    RequestVisibility,
 )
 from muckrock.foia.rules import can_embargo, can_embargo_permananently
 from muckrock.news.models import Article
@@ -132,6 +134,14 @@ class RequestList(MRSearchFilterListView):
         'date_submitted': 'composer__datetime_submitted',
         'date_done': 'datetime_done',
     }
+    search_headline = 'composer__requested_docs'
+    search_facets = {
+        'status': ('status',),
+        'jurisdiction': (
+            'agency__jurisdiction__pk',
+            'agency__jurisdiction__name',
+        ),
+    }
 
     def get_queryset(self):
         """Limits requests to those visible by current user"""
@@ -142,6 +152,9 @@ class RequestList(MRSearchFilterListView):
     def get_context_data(self):
         """Add download link for downloading csv"""
         context = super(RequestList, self).get_context_data()
+        statuses = dict(STATUS)
+        for facet in context.get('facets', {}).get('status', []):
+            facet['label'] = statuses.get(facet['status'], facet['status'])
         url = furl(self.request.get_full_path())
         url.args['content_type'] = 'csv'
         context['csv_link'] = url.url
@@ -431,6 +444,7 @@ class MyRequestList(RequestList):
         end_date = date.today() + timedelta(30)
         foias = [f.pk for f in foias if f.has_perm(user, 'embargo')]
         FOIARequest.objects.filter(pk__in=foias).update(embargo=True)
+        RequestVisibility.objects.refresh(foias)
         # only set date if in end state
         FOIARequest.objects.filter(
             pk__in=foias,
@@ -442,12 +456,14 @@ class MyRequestList(RequestList):
         """Remove the embargo on the selected requests"""
         foias = [f.pk for f in foias if f.has_perm(user, 'embargo')]
         FOIARequest.objects.filter(pk__in=foias).update(embargo=False)
+        RequestVisibility.objects.refresh(foias)
         return 'Embargoes removed'
 
     def _perm_embargo(self, foias, user, _post):
         """Permanently embargo the selected requests"""
         foias = [f.pk for f in foias if f.has_perm(user, 'embargo_perm')]
         FOIARequest.objects.filter(pk__in=foias).update(embargo=True)
+        RequestVisibility.objects.refresh(foias)
         # only set permanent
         FOIARequest.objects.filter(
             pk__in=foias,
@@ -567,12 +583,9 @@ class FollowingRequestList(RequestList):
     def get_queryset(self):
         """Limits FOIAs to those followed by the current user"""
         queryset = super(FollowingRequestList, self).get_queryset()
-        followed = [
-            f.pk
-            for f in following(self.request.user, FOIARequest)
-            if f is not None
-        ]
-        return queryset.filter(pk__in=followed)
+        return queryset.filter(
+            pk__in=get_followed(self.request.user, FOIARequest)
+        )
 
 
 class ProcessingRequestList(RequestList):
@@ -24,23 +24,34 @@ from rest_framework.response import Response
 
 # MuckRock
 from muckrock.agency.models import Agency
+from muckrock.core import search
+from muckrock.core.pagination import CursorPaginationMixin
 from muckrock.foia.exceptions import InsufficientRequestsError
 from muckrock.foia.models import FOIACommunication, FOIAComposer, FOIARequest
 from muckrock.foia.serializers import (
     FOIACommunicationSerializer,
     FOIAPermissions,
+    FOIARequestListSerializer,
     FOIARequestSerializer,
     IsOwner,
+    split_param,
 )
 from muckrock.task.models import ResponseTask
 
 logger = logging.getLogger(__name__)
 
 
-class FOIARequestViewSet(viewsets.ModelViewSet):
+class FOIARequestViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """
     API views for FOIARequest
 
+    Lists leave out the communications unless `expand=communications` is
+    passed.  Pass `fields` as a comma separated list to only include those
+    fields, and `pagination=cursor` to page through the requests by id,
+    which stays fast for later pages.  Pass `q` to search the requests'
+    text, including their communications, ordered by relevance unless an
+    ordering is given.
+
     Filter fields:
     * title
     * embargo
@@ -75,29 +86,61 @@ class FOIARequestViewSet(viewsets.ModelViewSet):
 
     filter_class = Filter
 
+    def _expanded(self):
+        """Are the communications included?  They are left out of lists
+        unless they are expanded, or asked for as one of the fields."""
+        if self.action != 'list':
+            return True
+        requested = (
+            split_param(self.request, 'expand')
+            | split_param(self.request, 'fields')
+        )
+        return 'communications' in requested
+
+    def get_serializer_class(self):
+        if self._expanded():
+            return FOIARequestSerializer
+        else:
+            return FOIARequestListSerializer
+
     def get_queryset(self):
-        return (
-            FOIARequest.objects.get_viewable(self.request.user).select_related(
-                'composer__user',
-                'agency__jurisdiction',
-            ).prefetch_related(
+        if self.request.method == 'GET':
+            fields = split_param(self.request, 'fields')
+        else:
+            fields = set()
+        # only prefetch the relations for the fields which will be output
+        prefetches = [
+            relation for field, relation in (
+                ('notes', 'notes'),
+                ('tags', 'tags'),
+                ('tracking_id', 'tracking_ids'),
+            ) if not fields or field in fields
+        ]
+        if self.action != 'list':
+            prefetches.extend(['edit_collaborators', 'read_collaborators'])
+        if self._expanded() and (not fields or 'communications' in fields):
+            prefetches.extend([
                 'communications__files',
                 'communications__emails',
                 'communications__faxes',
                 'communications__mails',
                 'communications__web_comms',
                 'communications__portals',
-                'notes',
-                'tags',
-                'edit_collaborators',
-                'read_collaborators',
-                'tracking_ids',
                 Prefetch(
                     'communications__responsetask_set',
                     queryset=ResponseTask.objects.select_related('resolved_by'),
                 ),
-            )
+            ])
+        queryset = (
+            FOIARequest.objects.get_viewable(self.request.user).select_related(
+                'composer__user',
+                'agency__jurisdiction',
+            ).prefetch_related(*prefetches)
         )
+        query = self.request.query_params.get('q')
+        if query:
+            queryset = search.search(queryset, query).order_by('-rank', 'pk')
+        return queryset
 
     def _validate_create(self, user, data):
         """Do all of the data validation for request creation"""
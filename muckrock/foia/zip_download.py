@@ -0,0 +1,148 @@
+"""
+Zip downloads of all of the communications and files for a request
+
+Archives are streamed to the user as they are built, reading each file from
+storage a chunk at a time.  If ZIP_DOWNLOAD_CACHE is set, a copy of the
+archive is also built in the background and saved to private storage, named
+after a signature of what it contains, and once the view has checked the
+user's permissions later downloads are redirected to an expiring link to
+that copy, until the contents change.
+"""
+
+# Django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+
+# Standard Library
+import hashlib
+import tempfile
+from wsgiref.util import FileWrapper
+
+# Third Party
+from storages.backends.s3boto import S3BotoStorage
+
+# MuckRock
+from muckrock.core.utils import get_private_storage
+from muckrock.core.zipstream import stream_zip
+from muckrock.foia.models import FOIACommunication, FOIAFile
+
+CHUNK_SIZE = 64 * 1024
+# set while a copy of the request's archive is being built
+BUILD_LOCK_KEY = 'zip_download:build:%d'
+
+
+def _file_chunks(ffile):
+    """Read a file from storage a chunk at a time.  Files on S3 are read from
+    their key as they are sent, as opening them downloads the whole file into
+    memory first."""
+    storage_file = ffile.storage.open(ffile.name, 'rb')
+    key = getattr(storage_file, 'key', None)
+    try:
+        if key is not None:
+            key.BufferSize = CHUNK_SIZE
+            for chunk in key:
+                yield chunk
+        else:
+            for chunk in storage_file.chunks(CHUNK_SIZE):
+                yield chunk
+    finally:
+        storage_file.close()
+
+
+def zip_files(foia):
+    """The files to include in the zip download for a request"""
+    communications = foia.communications.prefetch_related('files')
+    for i, comm in enumerate(communications):
+        file_name = '{:03d}_{}_comm.txt'.format(i, comm.datetime)
+        yield file_name, comm.datetime, [comm.communication.encode('utf8')]
+        for ffile in comm.files.all():
+            yield ffile.name(), ffile.datetime, _file_chunks(ffile.ffile)
+
+
+def cache_path(foia):
+    """The path the zip download for the request is cached at.  It is named
+    after a hash of the number of communications and files, their latest pks
+    and when the communications were last updated, so it changes whenever a
+    communication or file is added, edited or removed."""
+    communications = FOIACommunication.objects.filter(foia=foia).aggregate(
+        count=Count('pk'),
+        last=Max('pk'),
+        updated=Max('datetime_updated'),
+    )
+    files = FOIAFile.objects.filter(comm__foia=foia).aggregate(
+        count=Count('pk'),
+        last=Max('pk'),
+    )
+    signature = repr((sorted(communications.items()), sorted(files.items())))
+    digest = hashlib.sha1(signature).hexdigest()
+    return 'zip_downloads/{}/{}.zip'.format(foia.pk, digest)
+
+
+def build_cached(foia):
+    """Build the zip download for the request and save it to private
+    storage, removing any out of date copies"""
+    storage = get_private_storage()
+    path = cache_path(foia)
+    if storage.exists(path):
+        return path
+    # spool the archive to disk, as it may be too large to hold in memory
+    with tempfile.TemporaryFile() as zip_file:
+        for data in stream_zip(zip_files(foia)):
+            zip_file.write(data)
+        zip_file.seek(0)
+        saved_path = storage.save(path, File(zip_file))
+    directory = 'zip_downloads/{}'.format(foia.pk)
+    _, names = storage.listdir(directory)
+    for name in names:
+        old_path = '{}/{}'.format(directory, name)
+        if old_path != saved_path:
+            storage.delete(old_path)
+    return saved_path
+
+
+def _cached_response(foia, storage, path):
+    """Send the cached zip download for the request.  On S3 the user is
+    redirected to an expiring link to it, rather than it being read through
+    the server."""
+    if isinstance(storage, S3BotoStorage):
+        disposition = u'attachment; filename="{}.zip"'.format(foia.title)
+        return redirect(
+            storage.url(
+                path,
+                response_headers={
+                    'response-content-disposition': disposition.encode('utf8')
+                },
+            )
+        )
+    return _zip_response(foia, FileWrapper(storage.open(path), CHUNK_SIZE))
+
+
+def _zip_response(foia, content):
+    """Stream a zip download for the request"""
+    response = StreamingHttpResponse(
+        content, content_type='application/x-zip-compressed'
+    )
+    response['Content-Disposition'
+             ] = (u'attachment; filename="{}.zip"'.format(foia.title))
+    return response
+
+
+def zip_download_response(foia):
+    """Send the zip download for the request.  The caller must check the
+    user's permission to download it."""
+    from muckrock.foia.tasks import build_zip_download
+    if settings.ZIP_DOWNLOAD_CACHE:
+        storage = get_private_storage()
+        path = cache_path(foia)
+        if storage.exists(path):
+            return _cached_response(foia, storage, path)
+        # only queue one build of the archive at a time
+        if cache.add(
+            BUILD_LOCK_KEY % foia.pk, True, settings.ZIP_DOWNLOAD_LOCK
+        ):
+            build_zip_download.delay(foia.pk)
+    return _zip_response(foia, stream_zip(zip_files(foia)))
@@ -14,5 +14,8 @@ class JurisdictionConfig(AppConfig):
         """Registers exemptions with watson"""
         # pylint: disable=invalid-name
         from watson import search
+        from muckrock.core.search import register
+        import muckrock.jurisdiction.signals  # pylint: disable=unused-import,unused-variable
         Exemption = self.get_model('Exemption')
         search.register(Exemption)
+        register(Exemption, [('name', 'A'), ('aliases', 'B'), ('basis', 'C')])
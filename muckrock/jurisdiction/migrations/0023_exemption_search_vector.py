@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-28 14:05
+from __future__ import unicode_literals
+
+# Django
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jurisdiction', '0022_jurisdictionstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exemption',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='exemption',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector'], name='jurisdictio_search__d90cf7_gin'
+            ),
+        ),
+    ]
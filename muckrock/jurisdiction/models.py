@@ -3,11 +3,19 @@ Models for the Jurisdiction application
 """
 # Django
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models import Count, Q
 from django.template.defaultfilters import slugify
 
+# Standard Library
+from datetime import timedelta
+from decimal import Decimal
+
 # Third Party
 from easy_thumbnails.fields import ThumbnailerImageField
 from taggit.managers import TaggableManager
@@ -19,52 +27,77 @@ from muckrock.tags.models import TaggedItemBase
 
 
 class RequestHelper(object):
-    """Helper methods for classes that have a get_requests() method"""
+    """Helper methods for classes that have get_requests() and
+    compute_stats() methods"""
+
+    def get_stats(self):
+        """Get the stats for this object's requests.  Stats which have not
+        been stored yet are computed without saving them, as they are stored
+        by the nightly rebuild."""
+        try:
+            return self.stats
+        except (ObjectDoesNotExist, AttributeError):
+            # Jurisdiction's __getattr__ turns the missing relation into a
+            # plain AttributeError.  Creating the unsaved stats caches them
+            # as this object's stats.
+            return self.compute_stats()
 
     def average_response_time(self):
         """Get the average response time from a submitted to completed request"""
-        requests = self.get_requests()
-        avg = (
-            requests.aggregate(
-                avg=Avg(F('datetime_done') - F('composer__datetime_submitted'))
-            )['avg']
-        )
-        return int(avg.days) if avg is not None else 0
+        stats = self.get_stats()
+        if not stats.response_time_count:
+            return 0
+        return (stats.response_time_total / stats.response_time_count).days
 
     def average_fee(self):
         """Get the average fees required on requests that have a price."""
-        requests = self.get_requests()
-        avg = requests.filter(price__gt=0).aggregate(price=Avg('price')
-                                                     )['price']
-        return avg if avg else 0
+        stats = self.get_stats()
+        if not stats.fees_count:
+            return 0
+        return stats.fees_total / stats.fees_count
 
     def fee_rate(self):
         """Get the percentage of requests that have a fee."""
-        requests = self.get_requests()
-        filed = float(requests.count())
-        fee = float(requests.filter(price__gt=0).count())
+        stats = self.get_stats()
         rate = 0
-        if filed > 0:
-            rate = fee / filed * 100
+        if stats.requests > 0:
+            rate = float(stats.fees_count) / stats.requests * 100
         return rate
 
     def success_rate(self):
         """Get the percentage of requests that are successful."""
-        requests = self.get_requests()
-        filed = float(requests.count())
-        completed = float(requests.get_done().count())
+        stats = self.get_stats()
         rate = 0
-        if filed > 0:
-            rate = completed / filed * 100
+        if stats.requests > 0:
+            rate = float(stats.done) / stats.requests * 100
         return rate
 
     def total_pages(self):
         """Total pages released"""
-        requests = self.get_requests()
-        pages = requests.aggregate(
-            pages=Sum('communications__files__pages'),
-        )['pages']
-        return pages if pages else 0
+        return self.get_stats().pages
+
+
+class RequestStats(models.Model):
+    """Statistics for the requests filed with an agency or jurisdiction
+
+    These are kept up to date as requests change, so that they do not need to
+    be computed over all of the requests every time they are displayed
+    """
+    requests = models.PositiveIntegerField(default=0)
+    status_counts = JSONField(default=dict)
+    done = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    response_time_total = models.DurationField(default=timedelta)
+    response_time_count = models.PositiveIntegerField(default=0)
+    fees_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal(0)
+    )
+    fees_count = models.PositiveIntegerField(default=0)
+    pages = models.PositiveIntegerField(default=0)
+    datetime_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
 
 
 class Jurisdiction(models.Model, RequestHelper):
@@ -184,7 +217,9 @@ class Jurisdiction(models.Model, RequestHelper):
         """Get a calendar of business days for the jurisdiction"""
         if self.legal.law.use_business_days:
             return HolidayCalendar(
-                self.legal.holidays.all(), self.legal.observe_sat
+                self.legal.holidays.all(),
+                self.legal.observe_sat,
+                cache_key='jurisdiction:%d' % self.legal.pk,
             )
         else:
             return Calendar()
@@ -212,11 +247,33 @@ class Jurisdiction(models.Model, RequestHelper):
             requests = FOIARequest.objects.filter(agency__jurisdiction=self)
         return requests
 
+    def compute_stats(self):
+        """Compute the stats for this jurisdiction's requests"""
+        from muckrock.jurisdiction.stats import compute_stats
+        return JurisdictionStats(
+            jurisdiction=self, **compute_stats(self.get_requests())
+        )
+
     class Meta:
         ordering = ['name']
         unique_together = ('slug', 'parent')
 
 
+class JurisdictionStats(RequestStats):
+    """Statistics for the requests filed within a jurisdiction"""
+    jurisdiction = models.OneToOneField(
+        Jurisdiction,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+
+    def __unicode__(self):
+        return u'Stats for %s' % self.jurisdiction
+
+    class Meta:
+        verbose_name_plural = 'jurisdiction stats'
+
+
 class Law(models.Model):
     """A law that allows for requests for public records from a jurisdiction."""
     jurisdiction = models.OneToOneField(Jurisdiction, on_delete=models.CASCADE)
@@ -306,6 +363,7 @@ class Exemption(models.Model):
     basis = models.TextField(
         help_text='The legal or contextual basis for the exemption.'
     )
+    search_vector = SearchVectorField(null=True, editable=False)
     # Optional fields
     tags = TaggableManager(through=TaggedItemBase, blank=True)
     requests = models.ManyToManyField(
@@ -351,6 +409,9 @@ class Exemption(models.Model):
         kwargs['pk'] = self.pk
         return reverse('exemption-detail', kwargs=kwargs)
 
+    class Meta:
+        indexes = [GinIndex(fields=['search_vector'])]
+
 
 class InvokedExemption(models.Model):
     """An invoked exemption tracks the use of an exemption in the course of fulfilling
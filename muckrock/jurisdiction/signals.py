@@ -0,0 +1,238 @@
+"""Model signal handlers for the Jurisdiction application"""
+
+# Django
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+)
+
+# Standard Library
+from decimal import Decimal
+
+# MuckRock
+from muckrock.business_days.models import index_cache
+from muckrock.foia.models import (
+    FOIACommunication,
+    FOIAComposer,
+    FOIAFile,
+    FOIARequest,
+)
+from muckrock.jurisdiction.models import Jurisdiction
+from muckrock.jurisdiction.stats import add_stats, empty_stats, request_stats
+from muckrock.jurisdiction.tasks import (
+    change_request_stats,
+    change_stats,
+    update_request_stats,
+)
+
+# the fields of a request which its stats are computed from
+STATS_FIELDS = ('agency_id', 'status', 'price', 'datetime_done', 'date_due')
+CENTS = Decimal('0.01')
+
+# pylint: disable=unused-argument
+
+
+def jurisdiction_loaded(sender, instance, **kwargs):
+    """Remember whether a jurisdiction observed Saturdays when it was loaded,
+    unless the field was deferred"""
+    instance.loaded_observe_sat = instance.__dict__.get('observe_sat')
+
+
+def jurisdiction_observe_sat(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """Invalidate business day indexes if observing Saturdays changes"""
+    if 'observe_sat' not in instance.__dict__ or (
+        update_fields is not None and 'observe_sat' not in update_fields
+    ):
+        return
+    if not created and not raw and (
+        instance.loaded_observe_sat != instance.observe_sat
+    ):
+        transaction.on_commit(index_cache.invalidate)
+    instance.loaded_observe_sat = instance.observe_sat
+
+
+def jurisdiction_holidays(sender, action, **kwargs):
+    """Invalidate business day indexes if a jurisdiction's holidays change"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(index_cache.invalidate)
+
+
+def update_stats(agency_pks):
+    """Recompute the stats for the given agencies once the change is
+    committed"""
+    agency_pks = [pk for pk in agency_pks if pk is not None]
+    if agency_pks:
+        transaction.on_commit(lambda: update_request_stats.delay(agency_pks))
+
+
+def change_stats_on_commit(changes):
+    """Add changes to the stats of the given agencies once they are
+    committed"""
+    changes = {pk: c for pk, c in changes.iteritems() if pk is not None}
+    if changes:
+        transaction.on_commit(lambda: change_stats.delay(changes))
+
+
+def foia_stats_values(instance):
+    """The values of the fields a request's stats are computed from, leaving
+    out any which are deferred"""
+    values = {
+        field: instance.__dict__[field]
+        for field in STATS_FIELDS
+        if field in instance.__dict__
+    }
+    if 'price' in values:
+        values['price'] = Decimal(values['price']).quantize(CENTS)
+    return values
+
+
+def foia_loaded(sender, instance, **kwargs):
+    """Remember the fields a request's stats are computed from when it is
+    loaded, so that saving it can tell how they changed without a query"""
+    instance.loaded_stats = foia_stats_values(instance)
+
+
+def foia_update_stats(sender, instance, created, raw=False, **kwargs):
+    """Update the stats for a request which was changed"""
+    if raw:
+        return
+    old = None if created else instance.loaded_stats
+    new = foia_stats_values(instance)
+    instance.loaded_stats = new
+    if old == new:
+        return
+    if old is not None and len(old) != len(STATS_FIELDS):
+        # a field was deferred when the request was loaded, so how it changed
+        # is not known
+        update_stats([instance.agency_id])
+    else:
+        foia_pk = instance.pk
+        transaction.on_commit(
+            lambda: change_request_stats.delay(foia_pk, old, new)
+        )
+
+
+def foia_delete_stats(sender, instance, **kwargs):
+    """Remove a deleted request from its agency's stats.  The pages of its
+    files are removed as the files are deleted."""
+    values = foia_stats_values(instance)
+    if len(values) != len(STATS_FIELDS):
+        update_stats([instance.agency_id])
+        return
+    submitted = None
+    if values['datetime_done'] is not None:
+        submitted = (
+            FOIAComposer.objects.filter(pk=instance.composer_id)
+            .values_list('datetime_submitted', flat=True).first()
+        )
+    stats = empty_stats()
+    add_stats(stats, request_stats(values, submitted, 0), sign=-1)
+    change_stats_on_commit({instance.agency_id: stats})
+
+
+def file_loaded(sender, instance, **kwargs):
+    """Remember a file's page count when it is loaded, unless it was
+    deferred"""
+    instance.loaded_pages = instance.__dict__.get('pages')
+
+
+def file_update_stats(sender, instance, created, raw=False, **kwargs):
+    """Update the stats for the request a file's pages were changed on"""
+    if raw:
+        return
+    pages = instance.__dict__.get('pages')
+    old_pages = 0 if created else instance.loaded_pages
+    instance.loaded_pages = pages
+    if pages is None or pages == old_pages:
+        # the pages were not loaded, so they were not saved
+        return
+    if old_pages is None:
+        update_stats(_file_agencies(instance))
+    else:
+        _change_file_pages(instance, pages - old_pages)
+
+
+def file_delete_stats(sender, instance, **kwargs):
+    """Update the stats for the request a file's pages were deleted from"""
+    pages = instance.__dict__.get('pages')
+    if pages is None:
+        update_stats(_file_agencies(instance))
+    elif pages:
+        _change_file_pages(instance, -pages)
+
+
+def _file_agencies(file_):
+    """The agency of the request a file is on"""
+    return (
+        FOIACommunication.objects.filter(pk=file_.comm_id)
+        .values_list('foia__agency', flat=True)
+    )
+
+
+def _change_file_pages(file_, pages):
+    """Add a change in a file's pages to the stats of its request's agency"""
+    changes = {}
+    for agency_pk in _file_agencies(file_):
+        changes[agency_pk] = empty_stats()
+        changes[agency_pk]['pages'] = pages
+    change_stats_on_commit(changes)
+
+
+post_init.connect(
+    jurisdiction_loaded,
+    sender=Jurisdiction,
+    dispatch_uid='muckrock.jurisdiction.signals.loaded',
+)
+
+post_init.connect(
+    foia_loaded,
+    sender=FOIARequest,
+    dispatch_uid='muckrock.jurisdiction.signals.foia_loaded',
+)
+
+post_init.connect(
+    file_loaded,
+    sender=FOIAFile,
+    dispatch_uid='muckrock.jurisdiction.signals.file_loaded',
+)
+
+post_save.connect(
+    jurisdiction_observe_sat,
+    sender=Jurisdiction,
+    dispatch_uid='muckrock.jurisdiction.signals.observe_sat',
+)
+
+m2m_changed.connect(
+    jurisdiction_holidays,
+    sender=Jurisdiction.holidays.through,
+    dispatch_uid='muckrock.jurisdiction.signals.holidays',
+)
+
+post_save.connect(
+    foia_update_stats,
+    sender=FOIARequest,
+    dispatch_uid='muckrock.jurisdiction.signals.foia_update_stats',
+)
+
+post_delete.connect(
+    foia_delete_stats,
+    sender=FOIARequest,
+    dispatch_uid='muckrock.jurisdiction.signals.foia_delete_stats',
+)
+
+post_save.connect(
+    file_update_stats,
+    sender=FOIAFile,
+    dispatch_uid='muckrock.jurisdiction.signals.file_save_stats',
+)
+
+post_delete.connect(
+    file_delete_stats,
+    sender=FOIAFile,
+    dispatch_uid='muckrock.jurisdiction.signals.file_delete_stats',
+)
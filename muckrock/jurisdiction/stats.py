@@ -0,0 +1,341 @@
+"""
+Maintain the request statistics for agencies and jurisdictions
+
+Agency stats are computed from the agency's requests.  Jurisdiction stats are
+summed from the stats of the agencies within them, so that states do not need
+to aggregate over all of their localities' requests.
+
+When a request or file changes, the difference it makes to the stats is added
+to the stored rows of its agencies and their jurisdictions, rather than
+recomputing them.  A nightly rebuild recomputes every row in place, to correct
+for any changes which were missed and to roll over the overdue counts.
+"""
+
+# Django
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+
+# Standard Library
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+# MuckRock
+from muckrock.agency.models import Agency, AgencyStats
+from muckrock.foia.models import FOIARequest
+from muckrock.jurisdiction.models import Jurisdiction, JurisdictionStats
+
+# the stats which are added together to combine agencies into jurisdictions
+SUMMED_FIELDS = (
+    'requests',
+    'done',
+    'overdue',
+    'response_time_total',
+    'response_time_count',
+    'fees_total',
+    'fees_count',
+    'pages',
+)
+
+
+def empty_stats():
+    """The stats for no requests"""
+    return {
+        'requests': 0,
+        'status_counts': {},
+        'done': 0,
+        'overdue': 0,
+        'response_time_total': timedelta(),
+        'response_time_count': 0,
+        'fees_total': Decimal(0),
+        'fees_count': 0,
+        'pages': 0,
+    }
+
+
+def add_stats(total, stats, sign=1):
+    """Add stats into a running total, or subtract them if sign is -1"""
+    for field in SUMMED_FIELDS:
+        total[field] += stats[field] * sign
+    status_counts = total['status_counts']
+    for status, count in stats['status_counts'].iteritems():
+        status_counts[status] = status_counts.get(status, 0) + count * sign
+        if not status_counts[status]:
+            del status_counts[status]
+
+
+def request_stats(values, submitted, pages):
+    """The stats contributed by a single request, given the values of the
+    fields they are computed from, when its composer was submitted and the
+    pages of its files"""
+    stats = empty_stats()
+    status = values['status']
+    stats['requests'] = 1
+    stats['status_counts'][status] = 1
+    if status in ('partial', 'done') and values['datetime_done'] is not None:
+        stats['done'] = 1
+    if (
+        status in ('ack', 'processed') and values['date_due'] is not None
+        and values['date_due'] < date.today()
+    ):
+        stats['overdue'] = 1
+    if values['datetime_done'] is not None and submitted is not None:
+        stats['response_time_total'] = values['datetime_done'] - submitted
+        stats['response_time_count'] = 1
+    if values['price'] > 0:
+        stats['fees_total'] = values['price']
+        stats['fees_count'] = 1
+    stats['pages'] = pages
+    return stats
+
+
+def _count_if(condition):
+    """Count the rows matching a condition"""
+    return Count(Case(When(condition, then=F('pk'))))
+
+
+def compute_agency_stats(requests):
+    """Compute the stats for the given requests, grouped by agency"""
+    requests = requests.order_by()
+    stats = defaultdict(empty_stats)
+
+    status_counts = (
+        requests.values_list('agency', 'status').annotate(count=Count('pk'))
+    )
+    for agency_pk, status, count in status_counts:
+        stats[agency_pk]['status_counts'][status] = count
+        stats[agency_pk]['requests'] += count
+
+    aggregates = requests.values('agency').annotate(
+        done=_count_if(
+            Q(status__in=['partial', 'done'], datetime_done__isnull=False)
+        ),
+        overdue=_count_if(
+            Q(status__in=['ack', 'processed'], date_due__lt=date.today())
+        ),
+        response_time_total=Sum(
+            F('datetime_done') - F('composer__datetime_submitted')
+        ),
+        response_time_count=_count_if(
+            Q(
+                datetime_done__isnull=False,
+                composer__datetime_submitted__isnull=False,
+            )
+        ),
+        fees_total=Sum(
+            Case(
+                When(price__gt=0, then=F('price')),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
+        ),
+        fees_count=_count_if(Q(price__gt=0)),
+    )
+    for values in aggregates:
+        agency_pk = values.pop('agency')
+        stats[agency_pk].update((k, v)
+                                for k, v in values.iteritems()
+                                if v is not None)
+
+    # pages are summed separately, as joining in the files would multiply the
+    # other aggregates
+    pages = (
+        requests.values_list('agency')
+        .annotate(pages=Sum('communications__files__pages'))
+    )
+    for agency_pk, agency_pages in pages:
+        stats[agency_pk]['pages'] = agency_pages or 0
+
+    return stats
+
+
+def compute_stats(requests):
+    """Compute the combined stats for the given requests"""
+    total = empty_stats()
+    for stats in compute_agency_stats(requests).itervalues():
+        add_stats(total, stats)
+    return total
+
+
+def sum_jurisdiction_stats(jurisdiction_pks=None):
+    """Sum the agency stats into stats for the given jurisdictions, or for
+    all jurisdictions if none are given.  States include their localities."""
+    agency_stats = AgencyStats.objects.values(
+        'agency__jurisdiction', 'agency__jurisdiction__level',
+        'agency__jurisdiction__parent', 'status_counts', *SUMMED_FIELDS
+    )
+    if jurisdiction_pks is None:
+        jurisdiction_pks = Jurisdiction.objects.values_list('pk', flat=True)
+    else:
+        agency_stats = agency_stats.filter(
+            Q(agency__jurisdiction__in=jurisdiction_pks) | Q(
+                agency__jurisdiction__parent__in=jurisdiction_pks,
+                agency__jurisdiction__level='l',
+            )
+        )
+    totals = {pk: empty_stats() for pk in jurisdiction_pks}
+    for stats in agency_stats:
+        jurisdictions = [stats['agency__jurisdiction']]
+        if stats['agency__jurisdiction__level'] == 'l':
+            jurisdictions.append(stats['agency__jurisdiction__parent'])
+        for jurisdiction_pk in jurisdictions:
+            if jurisdiction_pk in totals:
+                add_stats(totals[jurisdiction_pk], stats)
+    return totals
+
+
+def update_agency_stats(agency_pks, update_jurisdictions=True):
+    """Recompute the stats for the given agencies, and the jurisdictions they
+    are in.  Returns the agencies' stats keyed by agency pk."""
+    agencies = list(
+        Agency.objects.filter(pk__in=agency_pks).values_list(
+            'pk',
+            'jurisdiction',
+            'jurisdiction__level',
+            'jurisdiction__parent',
+        )
+    )
+    stats = compute_agency_stats(
+        FOIARequest.objects.filter(agency__in=[a[0] for a in agencies])
+    )
+    agency_stats = {}
+    with transaction.atomic():
+        for agency_pk, _, _, _ in agencies:
+            agency_stats[agency_pk], _ = AgencyStats.objects.update_or_create(
+                agency_id=agency_pk,
+                defaults=stats[agency_pk],
+            )
+    if update_jurisdictions:
+        jurisdiction_pks = set()
+        for _, jurisdiction_pk, level, parent_pk in agencies:
+            jurisdiction_pks.add(jurisdiction_pk)
+            if level == 'l':
+                jurisdiction_pks.add(parent_pk)
+        update_jurisdiction_stats(jurisdiction_pks)
+    return agency_stats
+
+
+def update_jurisdiction_stats(jurisdiction_pks):
+    """Recompute the stats for the given jurisdictions from their agencies'
+    stats.  Returns the jurisdictions' stats keyed by jurisdiction pk."""
+    jurisdiction_pks = list(
+        Jurisdiction.objects.filter(pk__in=jurisdiction_pks)
+        .values_list('pk', flat=True)
+    )
+    # make sure every agency within these jurisdictions has stats to sum
+    missing = list(
+        Agency.objects.filter(
+            Q(jurisdiction__in=jurisdiction_pks) | Q(
+                jurisdiction__parent__in=jurisdiction_pks,
+                jurisdiction__level='l',
+            ),
+            stats__isnull=True,
+        ).values_list('pk', flat=True)
+    )
+    if missing:
+        update_agency_stats(missing, update_jurisdictions=False)
+    totals = sum_jurisdiction_stats(jurisdiction_pks)
+    jurisdiction_stats = {}
+    with transaction.atomic():
+        for jurisdiction_pk, stats in totals.iteritems():
+            jurisdiction_stats[jurisdiction_pk], _ = (
+                JurisdictionStats.objects.update_or_create(
+                    jurisdiction_id=jurisdiction_pk,
+                    defaults=stats,
+                )
+            )
+    return jurisdiction_stats
+
+
+def request_changes(foia_pk, old, new):
+    """The changes to agencies' stats made by a request changing from the old
+    values of the fields the stats are computed from to the new ones.  The
+    old values are None for a new request.  Returns the changes keyed by
+    agency pk."""
+    changes = defaultdict(empty_stats)
+    foias = FOIARequest.objects.filter(pk=foia_pk)
+    foia = (
+        foias.values('composer__datetime_submitted')
+        .annotate(pages=Sum('communications__files__pages')).first()
+    )
+    if foia is None:
+        # the request has since been deleted, and its deletion removes its
+        # latest values from the stats, so the change must still be made
+        foia = {'composer__datetime_submitted': None, 'pages': None}
+    submitted = foia['composer__datetime_submitted']
+    # pages are changed by their files, unless the request changed agencies
+    if old is not None and old['agency_id'] != new['agency_id']:
+        pages = foia['pages'] or 0
+    else:
+        pages = 0
+    if old is not None and old['agency_id'] is not None:
+        add_stats(
+            changes[old['agency_id']],
+            request_stats(old, submitted, pages),
+            sign=-1,
+        )
+    if new['agency_id'] is not None:
+        add_stats(
+            changes[new['agency_id']],
+            request_stats(new, submitted, pages),
+        )
+    return changes
+
+
+def apply_stats_changes(changes):
+    """Add changes to the stored stats of the agencies, keyed by agency pk,
+    and of the jurisdictions they are in"""
+    agencies = Agency.objects.filter(pk__in=changes.keys()).values_list(
+        'pk',
+        'jurisdiction',
+        'jurisdiction__level',
+        'jurisdiction__parent',
+    )
+    jurisdiction_changes = defaultdict(empty_stats)
+    for agency_pk, jurisdiction_pk, level, parent_pk in agencies:
+        add_stats(jurisdiction_changes[jurisdiction_pk], changes[agency_pk])
+        if level == 'l':
+            add_stats(jurisdiction_changes[parent_pk], changes[agency_pk])
+    with transaction.atomic():
+        _add_to_rows(AgencyStats, 'agency', changes)
+        _add_to_rows(JurisdictionStats, 'jurisdiction', jurisdiction_changes)
+
+
+def _add_to_rows(model, field, changes):
+    """Add changes to the stored stats rows, locking them so that concurrent
+    changes are not lost.  Rows which have not been stored yet are left to be
+    created by the next rebuild."""
+    lookup = {field + '__in': changes.keys()}
+    rows = model.objects.select_for_update().filter(**lookup).order_by('pk')
+    for row in rows:
+        total = {f: getattr(row, f) for f in SUMMED_FIELDS}
+        total['status_counts'] = row.status_counts
+        add_stats(total, changes[getattr(row, field + '_id')])
+        for name, value in total.iteritems():
+            setattr(row, name, value)
+        row.save()
+
+
+def _upsert_rows(model, field, stats):
+    """Update stats rows in place, keyed by the pk of the object they are for,
+    creating those which are missing"""
+    for pk, row_stats in stats.iteritems():
+        updated = model.objects.filter(**{field: pk}).update(**row_stats)
+        if not updated:
+            model.objects.update_or_create(defaults=row_stats, **{field: pk})
+
+
+def rebuild_stats():
+    """Recompute the stats for every agency and jurisdiction from scratch
+
+    The rows are updated in place, rather than being deleted and recreated,
+    so that they are never missing for the changes being added to them
+    concurrently.
+    """
+    stats = compute_agency_stats(FOIARequest.objects.all())
+    _upsert_rows(
+        AgencyStats,
+        'agency_id',
+        {pk: stats[pk]
+         for pk in Agency.objects.values_list('pk', flat=True)},
+    )
+    _upsert_rows(JurisdictionStats, 'jurisdiction_id', sum_jurisdiction_stats())
@@ -0,0 +1,50 @@
+"""Celery Tasks for the jurisdiction application"""
+
+# Django
+from celery.schedules import crontab
+from celery.task import periodic_task, task
+
+# MuckRock
+from muckrock.jurisdiction.stats import (
+    apply_stats_changes,
+    rebuild_stats,
+    request_changes,
+    update_agency_stats,
+)
+
+
+@task(
+    ignore_result=True,
+    name='muckrock.jurisdiction.tasks.update_request_stats',
+)
+def update_request_stats(agency_pks):
+    """Update the stats for the given agencies and their jurisdictions"""
+    update_agency_stats(agency_pks)
+
+
+@task(
+    ignore_result=True,
+    name='muckrock.jurisdiction.tasks.change_request_stats',
+)
+def change_request_stats(foia_pk, old, new):
+    """Add the change made by a request to the stats of its agencies"""
+    apply_stats_changes(request_changes(foia_pk, old, new))
+
+
+@task(
+    ignore_result=True,
+    name='muckrock.jurisdiction.tasks.change_stats',
+)
+def change_stats(changes):
+    """Add changes to the stats of the given agencies"""
+    apply_stats_changes(changes)
+
+
+@periodic_task(
+    run_every=crontab(hour=1, minute=0),
+    name='muckrock.jurisdiction.tasks.rebuild_request_stats'
+)
+def rebuild_request_stats():
+    """Rebuild all of the request stats nightly, to correct for any changes
+    that were missed, and to update the overdue counts for the new day"""
+    rebuild_stats()
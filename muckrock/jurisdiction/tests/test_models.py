@@ -11,16 +11,21 @@ from django.utils import timezone
 from datetime import timedelta
 
 # Third Party
-from nose.tools import eq_
+from mock import patch
+from nose.tools import eq_, ok_
 
 # MuckRock
-from muckrock.core.factories import UserFactory
+from muckrock.agency.models import AgencyStats
+from muckrock.core.factories import AgencyFactory, UserFactory
+from muckrock.core.test_utils import run_on_commit
 from muckrock.foia.factories import (
     FOIACommunicationFactory,
     FOIAFileFactory,
     FOIARequestFactory,
 )
 from muckrock.jurisdiction import factories
+from muckrock.jurisdiction.models import Jurisdiction, JurisdictionStats
+from muckrock.jurisdiction.stats import rebuild_stats, update_agency_stats
 
 
 class TestJurisdictionUnit(TestCase):
@@ -172,6 +177,81 @@ class TestJurisdictionUnit(TestCase):
         eq_(self.local.total_pages(), page_count)
         eq_(self.state.total_pages(), 2 * page_count)
 
+    def test_update_stats(self):
+        """Stats should be stored, and updated when their agency's are"""
+        foia = FOIARequestFactory(agency__jurisdiction=self.local, status='ack')
+        eq_(self.state.success_rate(), 0.0)
+        foia.status = 'done'
+        foia.datetime_done = timezone.now()
+        foia.save()
+        # the stored stats are used until they are updated
+        state = Jurisdiction.objects.get(pk=self.state.pk)
+        eq_(state.success_rate(), 0.0)
+        update_agency_stats([foia.agency.pk])
+        state = Jurisdiction.objects.get(pk=self.state.pk)
+        eq_(state.success_rate(), 100.0)
+        eq_(state.stats.status_counts, {'done': 1})
+        eq_(foia.agency.success_rate(), 100.0)
+
+    def test_rebuild_stats(self):
+        """Rebuilding the stats should include localities in their state"""
+        FOIARequestFactory(
+            agency__jurisdiction=self.state, status='ack', price=2
+        )
+        FOIARequestFactory(
+            agency__jurisdiction=self.local, status='ack', price=4
+        )
+        FOIARequestFactory(agency__jurisdiction=self.federal, status='fix')
+        rebuild_stats()
+        stats = JurisdictionStats.objects.get(jurisdiction=self.state)
+        eq_(stats.requests, 2)
+        eq_(stats.status_counts, {'ack': 2})
+        eq_(stats.fees_total, 6)
+        eq_(stats.fees_count, 2)
+        stats = JurisdictionStats.objects.get(jurisdiction=self.federal)
+        eq_(stats.requests, 1)
+        eq_(stats.status_counts, {'fix': 1})
+
+    @patch('django.db.transaction.on_commit', run_on_commit)
+    def test_change_stats(self):
+        """Changing a request or a file should change the stored stats of
+        its agencies without recomputing them"""
+        foia = FOIARequestFactory(
+            agency__jurisdiction=self.local, status='ack', price=2
+        )
+        rebuild_stats()
+        foia.status = 'done'
+        foia.datetime_done = timezone.now()
+        foia.save()
+        FOIAFileFactory(comm__foia=foia, pages=5)
+        stats = JurisdictionStats.objects.get(jurisdiction=self.state)
+        eq_(stats.status_counts, {'done': 1})
+        eq_(stats.done, 1)
+        eq_(stats.pages, 5)
+        eq_(stats.fees_total, 2)
+        old_agency = foia.agency
+        foia.agency = AgencyFactory(jurisdiction=self.state)
+        rebuild_stats()
+        foia.save()
+        eq_(AgencyStats.objects.get(agency=old_agency).requests, 0)
+        eq_(AgencyStats.objects.get(agency=old_agency).pages, 0)
+        eq_(AgencyStats.objects.get(agency=foia.agency).pages, 5)
+        eq_(JurisdictionStats.objects.get(jurisdiction=self.state).requests, 1)
+        eq_(JurisdictionStats.objects.get(jurisdiction=self.local).requests, 0)
+        foia.delete()
+        stats = JurisdictionStats.objects.get(jurisdiction=self.state)
+        eq_(stats.requests, 0)
+        eq_(stats.status_counts, {})
+        eq_(stats.pages, 0)
+        eq_(stats.fees_total, 0)
+
+    def test_get_stats_read_only(self):
+        """Stats which have not been stored are computed without saving"""
+        FOIARequestFactory(agency__jurisdiction=self.local, status='ack')
+        eq_(self.state.get_stats().requests, 1)
+        ok_(not JurisdictionStats.objects.exists())
+        ok_(not AgencyStats.objects.exists())
+
     def test_get_proxy(self):
         """Test getting the proxy user for a state"""
         eq_(self.state.get_proxy(), None)
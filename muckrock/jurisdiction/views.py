@@ -117,14 +117,14 @@ def collect_stats(obj, context):
     statuses = (
         'rejected', 'ack', 'processed', 'fix', 'no_docs', 'done', 'appealing'
     )
-    requests = obj.get_requests()
-    status_counts = (
-        requests.filter(status__in=statuses).order_by('status')
-        .values_list('status').annotate(Count('status'))
-    )
-    context.update({'num_%s' % s: c for s, c in status_counts})
-    context['num_overdue'] = requests.get_overdue().count()
-    context['num_submitted'] = requests.count()
+    stats = obj.get_stats()
+    context.update({
+        'num_%s' % s: c
+        for s, c in stats.status_counts.iteritems()
+        if s in statuses
+    })
+    context['num_overdue'] = stats.overdue
+    context['num_submitted'] = stats.requests
 
 
 def detail(request, fed_slug, state_slug, local_slug):
@@ -30,7 +30,8 @@ class JurisdictionViewSet(ModelViewSet):
     """API views for Jurisdiction"""
     # pylint: disable=too-many-public-methods
     queryset = (
-        Jurisdiction.objects.order_by('id').select_related('parent__parent')
+        Jurisdiction.objects.order_by('id')
+        .select_related('parent__parent', 'stats')
     )
     serializer_class = JurisdictionSerializer
     # don't allow ordering by computed fields
@@ -6,6 +6,44 @@ Admin registration for Tasks
 from django.contrib import admin
 
 # MuckRock
-from muckrock.mailgun.models import WhitelistDomain
+from muckrock.mailgun.models import InboundMessage, WhitelistDomain
+from muckrock.mailgun.tasks import process_inbound_message
+
+
+class InboundMessageAdmin(admin.ModelAdmin):
+    """Inbound message admin options"""
+    list_display = (
+        'message_id',
+        'status',
+        'attempts',
+        'datetime_received',
+        'datetime_processed',
+    )
+    list_filter = ('status',)
+    search_fields = ('message_id',)
+    date_hierarchy = 'datetime_received'
+    readonly_fields = (
+        'message_id',
+        'post',
+        'attachments',
+        'routed',
+        'status',
+        'attempts',
+        'datetime_received',
+        'datetime_processed',
+        'datetime_updated',
+        'error',
+    )
+    actions = ['retry']
+
+    def retry(self, request, queryset):
+        """Queue failed messages to be processed again"""
+        # pylint: disable=no-self-use
+        for message in queryset.filter(status='failed'):
+            process_inbound_message.delay(message.pk)
+
+    retry.short_description = 'Retry failed messages'
+
 
 admin.site.register(WhitelistDomain)
+admin.site.register(InboundMessage, InboundMessageAdmin)
@@ -0,0 +1,15 @@
+"""
+App config for mailgun
+"""
+
+# Django
+from django.apps import AppConfig
+
+
+class MailgunConfig(AppConfig):
+    """Configures the mailgun application"""
+    name = 'muckrock.mailgun'
+
+    def ready(self):
+        """Connect the signal handlers"""
+        import muckrock.mailgun.signals  # pylint: disable=unused-import,unused-variable
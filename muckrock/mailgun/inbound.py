@@ -0,0 +1,359 @@
+"""
+Process incoming mail from mailgun
+
+Incoming mail is spooled by the route webhook and processed here, in the
+background, so that slow attachment uploads do not hold up the webhook.
+"""
+
+# Django
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+# Standard Library
+import logging
+import re
+import sys
+from email.utils import getaddresses
+
+# MuckRock
+from muckrock.agency.models import AgencyEmail
+from muckrock.communication.models import EmailAddress, EmailCommunication
+from muckrock.foia.models import FOIACommunication, FOIARequest, RawEmail
+from muckrock.foia.tasks import classify_status
+from muckrock.task.models import FlaggedTask, OrphanTask
+
+logger = logging.getLogger(__name__)
+
+
+def route_message(post, files, routed=None):
+    """Route an incoming message to the requests it was sent to
+
+    Addresses are added to the `routed` set as they are handled, and any
+    addresses already in it are skipped, so a message which failed part way
+    through may be retried without duplicating communications.
+    """
+    if routed is None:
+        routed = set()
+    p_request_email = re.compile(
+        r'(\d+-\d{3,10})@%s' % settings.MAILGUN_SERVER_NAME
+    )
+    tos = post.get('To', '') or post.get('to', '')
+    ccs = post.get('Cc', '') or post.get('cc', '')
+    name_emails = getaddresses([tos.lower(), ccs.lower()])
+    logger.info('Incoming email: %s - %s', name_emails, post.get('Subject', ''))
+    for _, email in name_emails:
+        if email in routed:
+            continue
+        m_request_email = p_request_email.match(email)
+        if m_request_email:
+            _handle_request(post, files, m_request_email.group(1))
+        elif email.endswith('@%s' % settings.MAILGUN_SERVER_NAME):
+            _catch_all(post, files, email)
+        routed.add(email)
+
+
+def _make_orphan_comm(
+    from_email, to_emails, cc_emails, subject, post, files, foia
+):
+    """Make an orphan communication"""
+    # pylint: disable=too-many-arguments
+    if from_email:
+        agencies = from_email.agencies.all()
+    else:
+        agencies = []
+    if len(agencies) == 1:
+        from_user = agencies[0].get_user()
+    else:
+        from_user = None
+    comm = FOIACommunication.objects.create(
+        from_user=from_user,
+        response=True,
+        subject=subject[:255],
+        datetime=timezone.now(),
+        communication=_get_mail_body(post),
+        likely_foia=foia,
+    )
+    email_comm = EmailCommunication.objects.create(
+        communication=comm,
+        sent_datetime=timezone.now(),
+        from_email=from_email,
+    )
+    email_comm.to_emails.set(to_emails)
+    email_comm.cc_emails.set(cc_emails)
+    RawEmail.objects.create(
+        email=email_comm,
+        raw_email='%s\n%s' %
+        (post.get('message-headers', ''), post.get('body-plain', '')),
+    )
+    comm.process_attachments(files)
+
+    return comm
+
+
+def _get_mail_body(post, foia=None):
+    """Try to get the stripped-text unless it looks like that parsing failed,
+    then get the full plain body"""
+    stripped_text = post.get('stripped-text', '')
+    bad_text = [
+        # if stripped-text is blank or not present
+        '',
+        '\n',
+        # the following are form Seattle's automated system
+        # they seem to confuse mailgun's parser
+        '--- Please respond above this line ---',
+        '--- Please respond above this line ---\n',
+    ]
+    if stripped_text in bad_text:
+        return post.get('body-plain')
+    elif foia and foia.portal and foia.portal.type == 'nextrequest':
+        # mailgun seems to improperly strip nextrequest messages
+        return post.get('body-plain')
+    else:
+        return '%s\n%s' % (
+            post.get('stripped-text', ''), post.get('stripped-signature', '')
+        )
+
+
+def _parse_email_headers(post):
+    """Parse email headers and return email address models"""
+    from_ = post.get('From', '')
+    to_ = post.get('To') or post.get('to', '')
+    cc_ = post.get('Cc') or post.get('cc', '')
+    from_email = EmailAddress.objects.fetch(from_)
+    to_emails = EmailAddress.objects.fetch_many(to_)
+    cc_emails = EmailAddress.objects.fetch_many(cc_)
+    return from_email, to_emails, cc_emails
+
+
+def _handle_request(post, files, mail_id):
+    """Handle incoming mailgun FOI request messages"""
+    # this function needs to be refactored
+    # pylint: disable=broad-except
+    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-branches
+    # pylint: disable=too-many-statements
+    from_email, to_emails, cc_emails = _parse_email_headers(post)
+    subject = post.get('Subject') or post.get('subject', '')
+
+    try:
+        foia = FOIARequest.objects.get(mail_id=mail_id)
+
+        # extra logging for next request portals for now
+        if foia.portal and foia.portal.type == 'nextrequest':
+            _log_mail(post)
+
+        if from_email is not None:
+            allowed_reason = from_email.allowed_reason(foia)
+        else:
+            allowed_reason = None
+        email_allowed = allowed_reason is not None
+        if email_allowed:
+            logger.info('Allowed sender (%s): %s', allowed_reason, from_email)
+        else:
+            msg, reason = ('Bad Sender', 'bs')
+        if foia.block_incoming:
+            msg, reason = ('Incoming Blocked', 'ib')
+        if not email_allowed or foia.block_incoming:
+            logger.warning('%s: %s', msg, from_email)
+            comm = _make_orphan_comm(
+                from_email,
+                to_emails,
+                cc_emails,
+                subject,
+                post,
+                files,
+                foia,
+            )
+            OrphanTask.objects.create(
+                reason=reason, communication=comm, address=mail_id
+            )
+            return
+
+        # if this isn't a known email for this agency, add it
+        if (
+            allowed_reason != 'agency'
+            and not from_email.agencies.filter(pk=foia.agency.pk).exists()
+        ):
+            AgencyEmail.objects.create(
+                agency=foia.agency,
+                email=from_email,
+            )
+        # if agency isn't currently using an outgoing email or a portal, flag it
+        if (
+            not foia.agency.get_emails().exists() and not foia.agency.portal
+            and not FlaggedTask.objects.
+            filter(agency=foia.agency, category='agency new email').exists()
+        ):
+            FlaggedTask.objects.create(
+                agency=foia.agency,
+                category='agency new email',
+                text='We received an email from {} for a request to this'
+                'agency, but this agency does not currently have a primary '
+                'email address set'.format(from_email),
+            )
+
+        # if this request is using a portal, hide the incoming messages
+        hidden = foia.portal is not None
+
+        comm = FOIACommunication.objects.create(
+            foia=foia,
+            from_user=foia.agency.get_user(),
+            to_user=foia.user,
+            subject=subject[:255],
+            response=True,
+            datetime=timezone.now(),
+            communication=_get_mail_body(post, foia),
+            hidden=hidden,
+        )
+        email_comm = EmailCommunication.objects.create(
+            communication=comm,
+            sent_datetime=timezone.now(),
+            from_email=from_email,
+        )
+        email_comm.to_emails.set(to_emails)
+        email_comm.cc_emails.set(cc_emails)
+        RawEmail.objects.create(
+            email=email_comm,
+            raw_email='%s\n%s' %
+            (post.get('message-headers', ''), post.get('body-plain', ''))
+        )
+        comm.process_attachments(files)
+
+        comm.extract_tracking_id()
+
+        if foia.portal:
+            foia.portal.receive_msg(comm)
+        else:
+            task = comm.responsetask_set.create()
+            classify_status.apply_async(args=(task.pk,), countdown=30 * 60)
+            comm.create_agency_notifications()
+
+        muckrock_domains = (settings.MAILGUN_SERVER_NAME, 'muckrock.com')
+        new_cc_emails = [
+            e for e in (to_emails + cc_emails)
+            if e.domain not in muckrock_domains
+        ]
+        if from_email.domain not in muckrock_domains:
+            foia.email = from_email
+        foia.cc_emails.set(new_cc_emails)
+
+        if foia.status == 'ack':
+            foia.status = 'processed'
+        foia.save(comment='incoming mail')
+
+    except FOIARequest.DoesNotExist:
+        logger.warning('Invalid Address: %s', mail_id)
+        try:
+            # try to get the foia by the PK before the dash
+            foia = FOIARequest.objects.get(pk=mail_id.split('-')[0])
+        except FOIARequest.DoesNotExist:
+            foia = None
+        comm = _make_orphan_comm(
+            from_email,
+            to_emails,
+            cc_emails,
+            subject,
+            post,
+            files,
+            foia,
+        )
+        OrphanTask.objects.create(
+            reason='ia', communication=comm, address=mail_id
+        )
+        return
+    except Exception as exc:
+        # If anything I haven't accounted for happens, at the very least forward
+        # the email to requests so it isn't lost
+        logger.error(
+            'Uncaught Mailgun Exception - %s: %s',
+            mail_id,
+            exc,
+            exc_info=sys.exc_info(),
+        )
+        _forward(post, files, 'Uncaught Mailgun Exception', info=True)
+
+
+def _catch_all(post, files, address):
+    """Handle emails sent to other addresses"""
+
+    from_email, to_emails, cc_emails = _parse_email_headers(post)
+    subject = post.get('Subject') or post.get('subject', '')
+
+    if any(to_email.email.startswith('bounce+') for to_email in to_emails):
+        foia = _find_likely_bounce(subject)
+    else:
+        foia = None
+
+    allowed_reason = from_email.allowed_reason()
+    if allowed_reason is not None:
+        logger.info('Allowed sender (%s): %s', allowed_reason, from_email)
+        comm = _make_orphan_comm(
+            from_email,
+            to_emails,
+            cc_emails,
+            subject,
+            post,
+            files,
+            foia,
+        )
+        OrphanTask.objects.create(
+            reason='ia', communication=comm, address=address
+        )
+
+
+def _find_likely_bounce(subject):
+    """Find likely foia for out of office bounces"""
+    if 'RE:' in subject:
+        reply = 'RE:'
+    elif 'Re:' in subject:
+        reply = 'Re:'
+    else:
+        return None
+    # remove RE: and trailing space
+    subject = subject[subject.find(reply) + 4:]
+    comm = FOIACommunication.objects.filter(subject__contains=subject).last()
+    if comm:
+        return comm.foia
+    else:
+        return None
+
+
+def _forward(post, files, title='', extra_content='', info=False):
+    """Forward an email from mailgun to admin"""
+    if title:
+        subject = '%s: %s' % (title, post.get('subject', ''))
+    else:
+        subject = post.get('subject', '')
+    subject = subject.replace('\r', '').replace('\n', '')
+
+    if extra_content:
+        body = '%s\n\n%s' % (extra_content, post.get('body-plain'))
+    else:
+        body = post.get('body-plain')
+    if not body:
+        body = 'This email intentionally left blank'
+
+    to_addresses = ['requests@muckrock.com']
+    if info:
+        to_addresses.append('info@muckrock.com')
+    email = EmailMessage(subject, body, post.get('From'), to_addresses)
+    for file_ in files.itervalues():
+        email.attach(file_.name, file_.read(), file_.content_type)
+
+    email.send(fail_silently=False)
+
+
+def _log_mail(post):
+    """Log a request"""
+    body = []
+    for key, value in post.iteritems():
+        body.append('\n{}:'.format(key))
+        body.append(unicode(value))
+    email = EmailMessage(
+        '[NEXTREQUEST LOG]',
+        '\n'.join(body),
+        'info@muckrock.com',
+        ['mitch@muckrock.com'],
+    )
+    email.send(fail_silently=False)
@@ -0,0 +1,114 @@
+"""
+Replay saved mailgun payloads through the inbound mail pipeline
+"""
+
+# Django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+
+# Standard Library
+import json
+import os.path
+import uuid
+
+# MuckRock
+from muckrock.core.benchmark import measure
+from muckrock.mailgun.models import InboundMessage
+from muckrock.mailgun.tasks import process_inbound_message
+
+
+class Command(BaseCommand):
+    """Spool saved mailgun payloads as if they had been received by the
+    route webhook, and process them, for local load testing.
+
+    Each payload is a JSON file of the form
+    {"post": {<POST data>}, "attachments": [{"key": "attachment-1",
+    "name": "file.pdf", "content_type": "application/pdf",
+    "path": "file.pdf"}]}, with attachment paths relative to the payload.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Payload files')
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Replay each payload this many times',
+        )
+        parser.add_argument(
+            '--keep-ids',
+            action='store_true',
+            help='Keep the payloads\' message IDs, instead of giving each '
+            'replay a new one, to test that duplicates are dropped',
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Process the messages in this process, instead of queueing '
+            'them for the celery workers',
+        )
+
+    def handle(self, *args, **kwargs):
+        payloads = [self.load(path) for path in kwargs['paths']]
+        messages = []
+        with measure('spool') as spooling:
+            for i in xrange(kwargs['repeat']):
+                for post, attachments in payloads:
+                    post = dict(post)
+                    if not kwargs['keep_ids']:
+                        post['Message-ID'] = '<replay-{}-{}@muckrock>'.format(
+                            uuid.uuid4().hex, i
+                        )
+                    message = InboundMessage.objects.spool(
+                        post, self.get_files(attachments)
+                    )
+                    if message is not None:
+                        messages.append(message)
+        self.stdout.write(unicode(spooling))
+        self.stdout.write(
+            '%d messages spooled, %d duplicates dropped' % (
+                len(messages),
+                kwargs['repeat'] * len(payloads) - len(messages),
+            )
+        )
+        with measure('process') as processing:
+            for message in messages:
+                if kwargs['sync']:
+                    process_inbound_message.apply(args=(message.pk,))
+                else:
+                    process_inbound_message.delay(message.pk)
+        self.stdout.write(unicode(processing))
+        if kwargs['sync'] and processing.seconds:
+            self.stdout.write(
+                '%.2f messages per second' %
+                (len(messages) / processing.seconds)
+            )
+
+    def load(self, path):
+        """Load a payload, reading its attachments into memory"""
+        try:
+            with open(path) as payload_file:
+                payload = json.load(payload_file)
+        except (IOError, ValueError) as exc:
+            raise CommandError('Could not load %s: %s' % (path, exc))
+        directory = os.path.dirname(path)
+        attachments = []
+        for attachment in payload.get('attachments', []):
+            with open(os.path.join(directory, attachment['path']),
+                      'rb') as attachment_file:
+                attachments.append((
+                    attachment['key'],
+                    attachment['name'],
+                    attachment.get('content_type', ''),
+                    attachment_file.read(),
+                ))
+        return payload['post'], attachments
+
+    def get_files(self, attachments):
+        """Build fresh uploaded files for a payload's attachments"""
+        return {
+            key: SimpleUploadedFile(name, content, content_type)
+            for key, name, content_type, content in attachments
+        }
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailgun', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboundMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(max_length=255, unique=True)),
+                ('post', django.contrib.postgres.fields.jsonb.JSONField(default=dict)),
+                ('attachments', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('routed', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('status', models.CharField(choices=[('receiving', 'Receiving'), ('queued', 'Queued'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='receiving', max_length=9)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('datetime_received', models.DateTimeField(default=django.utils.timezone.now)),
+                ('datetime_processed', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-datetime_received'],
+            },
+        ),
+    ]
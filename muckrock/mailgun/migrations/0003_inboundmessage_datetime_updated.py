@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mailgun', '0002_inboundmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboundmessage',
+            name='datetime_updated',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
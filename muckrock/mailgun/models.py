@@ -3,12 +3,146 @@ Models for the mailgun app
 """
 
 # Django
+from django.contrib.postgres.fields import JSONField
+from django.core.files.uploadedfile import UploadedFile
 from django.db import models
+from django.utils import timezone
+
+# Standard Library
+import hashlib
+
+# MuckRock
+from muckrock.core.caching import shared_cache
+from muckrock.core.utils import get_private_storage
+
+WHITELIST_CACHE_KEY = 'mailgun:whitelist_domains'
+
+
+class WhitelistDomainQuerySet(models.QuerySet):
+    """Object manager for whitelisted domains"""
+
+    def domains(self):
+        """The set of whitelisted domains, in lower case.  This is cached
+        until a domain is added, changed or removed."""
+        return shared_cache.get_or_set(
+            WHITELIST_CACHE_KEY,
+            lambda:
+            frozenset(d.lower() for d in self.values_list('domain', flat=True)),
+            60 * 60 * 24,
+        )
 
 
 class WhitelistDomain(models.Model):
     """A domain to be whitelisted and always accept emails from them"""
     domain = models.CharField(max_length=255)
 
+    objects = WhitelistDomainQuerySet.as_manager()
+
     def __unicode__(self):
         return self.domain
+
+
+class InboundMessageQuerySet(models.QuerySet):
+    """Object manager for inbound messages"""
+
+    def spool(self, post, files):
+        """Save an incoming message and its attachments to be processed.
+        Returns the message to be queued, or None if it is a duplicate.  A
+        message which is received again while still queued is returned to be
+        queued again, in case queueing it failed the first time."""
+        message, created = self.get_or_create(
+            message_id=InboundMessage.get_message_id(post),
+            defaults={'post': post},
+        )
+        if not created and message.status == 'queued':
+            return message
+        # a message left receiving was interrupted while being spooled
+        if not created and message.status != 'receiving':
+            return None
+        storage = get_private_storage()
+        message.post = post
+        message.attachments = []
+        for key, file_ in files.iteritems():
+            path = 'mailgun_spool/{}/{}/{}'.format(message.pk, key, file_.name)
+            message.attachments.append({
+                'key': key,
+                'name': file_.name,
+                'content_type': file_.content_type,
+                'path': storage.save(path, file_),
+            })
+        message.status = 'queued'
+        message.datetime_updated = timezone.now()
+        message.save()
+        return message
+
+
+class InboundMessage(models.Model):
+    """An incoming email, spooled from the route webhook to be processed in
+    the background"""
+    message_id = models.CharField(max_length=255, unique=True)
+    post = JSONField(default=dict)
+    attachments = JSONField(default=list)
+    # the addresses this message has been routed to so far
+    routed = JSONField(default=list)
+    status = models.CharField(
+        max_length=9,
+        choices=(
+            ('receiving', 'Receiving'),
+            ('queued', 'Queued'),
+            ('processing', 'Processing'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ),
+        default='receiving',
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    datetime_received = models.DateTimeField(default=timezone.now)
+    datetime_processed = models.DateTimeField(blank=True, null=True)
+    # when the status last changed
+    datetime_updated = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+
+    objects = InboundMessageQuerySet.as_manager()
+
+    def __unicode__(self):
+        return u'%s: %s' % (self.message_id, self.post.get('subject', ''))
+
+    @staticmethod
+    def get_message_id(post):
+        """The message ID is used to only process each message once.  Fall
+        back to a hash of the message if it does not have one."""
+        message_id = (
+            post.get('Message-ID') or post.get('Message-Id')
+            or post.get('message-id')
+        )
+        if message_id:
+            return message_id[:255]
+        content = u'\n'.join(
+            post.get(key, u'') for key in
+            ('From', 'To', 'Cc', 'subject', 'message-headers', 'body-plain')
+        )
+        return 'sha1:' + hashlib.sha1(content.encode('utf8')).hexdigest()
+
+    def get_files(self):
+        """Open the spooled attachments as uploaded files"""
+        storage = get_private_storage()
+        files = {}
+        for attachment in self.attachments:
+            file_ = storage.open(attachment['path'])
+            files[attachment['key']] = UploadedFile(
+                file=file_,
+                name=attachment['name'],
+                content_type=attachment['content_type'],
+                size=file_.size,
+            )
+        return files
+
+    def delete_files(self):
+        """Remove the spooled attachments from storage"""
+        storage = get_private_storage()
+        for attachment in self.attachments:
+            storage.delete(attachment['path'])
+
+    class Meta:
+        ordering = ['-datetime_received']
@@ -0,0 +1,27 @@
+"""Model signal handlers for the mailgun application"""
+
+# Django
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+# MuckRock
+from muckrock.mailgun.models import WHITELIST_CACHE_KEY, WhitelistDomain
+
+# pylint: disable=unused-argument
+
+
+def clear_whitelist_cache(sender, instance, **kwargs):
+    """Clear the cached whitelisted domains when they change"""
+    cache.delete(WHITELIST_CACHE_KEY)
+
+
+post_save.connect(
+    clear_whitelist_cache,
+    sender=WhitelistDomain,
+    dispatch_uid='muckrock.mailgun.signals.clear_whitelist_cache_save',
+)
+post_delete.connect(
+    clear_whitelist_cache,
+    sender=WhitelistDomain,
+    dispatch_uid='muckrock.mailgun.signals.clear_whitelist_cache_delete',
+)
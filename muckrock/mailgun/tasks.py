@@ -0,0 +1,114 @@
+"""Celery Tasks for the mailgun application"""
+
+# Django
+from celery.schedules import crontab
+from celery.task import periodic_task, task
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+# Standard Library
+import logging
+import sys
+from datetime import timedelta
+
+# MuckRock
+from muckrock.mailgun.inbound import route_message
+from muckrock.mailgun.models import InboundMessage
+
+logger = logging.getLogger(__name__)
+
+
+@task(
+    ignore_result=True,
+    max_retries=5,
+    name='muckrock.mailgun.tasks.process_inbound_message',
+)
+def process_inbound_message(message_pk, **kwargs):
+    """Process a message spooled by the route webhook"""
+    # pylint: disable=broad-except
+    # claim the message, so that it is only processed once even if it is
+    # queued more than once
+    claimed = InboundMessage.objects.filter(
+        pk=message_pk,
+        status__in=('queued', 'failed'),
+    ).update(
+        status='processing',
+        attempts=F('attempts') + 1,
+        datetime_updated=timezone.now(),
+    )
+    if not claimed:
+        return
+    message = InboundMessage.objects.get(pk=message_pk)
+    routed = set(message.routed)
+    files = {}
+    try:
+        files = message.get_files()
+        route_message(message.post, files, routed)
+    except Exception as exc:
+        logger.error(
+            'Error processing inbound message %s: %s',
+            message.message_id,
+            exc,
+            exc_info=sys.exc_info(),
+        )
+        message.status = 'failed'
+        message.routed = sorted(routed)
+        message.error = unicode(exc)
+        message.datetime_updated = timezone.now()
+        message.save()
+        process_inbound_message.retry(
+            countdown=(2 ** process_inbound_message.request.retries) * 60,
+            args=[message_pk],
+            kwargs=kwargs,
+            exc=exc,
+        )
+    else:
+        message.status = 'done'
+        message.routed = sorted(routed)
+        message.error = ''
+        message.datetime_processed = timezone.now()
+        message.datetime_updated = message.datetime_processed
+        message.save()
+        message.delete_files()
+    finally:
+        for file_ in files.itervalues():
+            file_.close()
+
+
+@periodic_task(
+    run_every=crontab(minute='*/10'),
+    name='muckrock.mailgun.tasks.sweep_inbound_messages',
+)
+def sweep_inbound_messages():
+    """Queue messages which were never queued, or whose processing was
+    interrupted, again, and remove the attachments of messages which have
+    failed for good"""
+    now = timezone.now()
+    stale = now - timedelta(minutes=settings.INBOUND_STALE_MINUTES)
+    # a worker killed while processing a message leaves it processing
+    interrupted = InboundMessage.objects.filter(
+        status='processing',
+        datetime_updated__lt=stale,
+    )
+    interrupted.filter(attempts__gt=process_inbound_message.max_retries).update(
+        status='failed',
+        error='Processing was interrupted',
+        datetime_updated=now,
+    )
+    interrupted.update(status='queued')
+    # the broker may have been down when a message was queued
+    queued = InboundMessage.objects.filter(
+        status='queued',
+        datetime_updated__lt=stale,
+    )
+    for message_pk in queued.values_list('pk', flat=True):
+        process_inbound_message.delay(message_pk)
+    expired = InboundMessage.objects.filter(
+        status='failed',
+        datetime_updated__lt=now - timedelta(days=settings.INBOUND_SPOOL_DAYS),
+    ).exclude(attachments=[])
+    for message in expired:
+        message.delete_files()
+        message.attachments = []
+        message.save()
@@ -6,24 +6,32 @@ Tests for mailgun
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.test import RequestFactory, TestCase
+from django.utils import timezone
 
 # Standard Library
 import hashlib
 import hmac
 import os
 import time
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from StringIO import StringIO
 
 # Third Party
 import nose.tools
 import pytz
 from freezegun import freeze_time
+from mock import patch
 
 # MuckRock
 from muckrock.communication.models import EmailAddress, EmailError, EmailOpen
 from muckrock.foia.factories import FOIACommunicationFactory, FOIARequestFactory
 from muckrock.foia.models import FOIACommunication
+from muckrock.mailgun.models import (
+    WHITELIST_CACHE_KEY,
+    InboundMessage,
+    WhitelistDomain,
+)
+from muckrock.mailgun.tasks import sweep_inbound_messages
 from muckrock.mailgun.views import bounces, delivered, opened, route_mailgun
 from muckrock.task.models import OrphanTask
 
@@ -54,6 +62,7 @@ class TestMailgunViews(TestCase):
         body=None,
         attachments=None,
         sign=True,
+        message_id=None,
     ):
         """Helper function for testing the mailgun route"""
         # pylint: disable=too-many-arguments
@@ -67,6 +76,8 @@ class TestMailgunViews(TestCase):
             'stripped-signature': signature,
             'body-plain': body or '%s\n%s' % (text, signature),
         }
+        if message_id:
+            data['Message-ID'] = message_id
         for i, attachment in enumerate(attachments):
             data['attachment-%d' % (i + 1)] = attachment
         if sign:
@@ -201,6 +212,72 @@ class TestMailgunViewHandleRequest(TestMailgunViews):
         last_comm = foia.communications.last()
         nose.tools.eq_(last_comm.communication, body)
 
+    def test_duplicate(self):
+        """A message should only be processed once, even if it is received
+        more than once"""
+        foia = FOIARequestFactory()
+        to_ = foia.get_request_email()
+        comm_count = foia.communications.count()
+        self.mailgun_route(to_=to_, message_id='<duplicate@agency.gov>')
+        self.mailgun_route(to_=to_, message_id='<duplicate@agency.gov>')
+        nose.tools.eq_(foia.communications.count(), comm_count + 1)
+        message = InboundMessage.objects.get(
+            message_id='<duplicate@agency.gov>'
+        )
+        nose.tools.eq_(message.status, 'done')
+        nose.tools.eq_(message.attempts, 1)
+
+    def test_retry(self):
+        """A failed message should be retried, without routing it to any
+        address twice"""
+        foia = FOIARequestFactory()
+        to_ = '%s, foobar@requests.muckrock.com' % foia.get_request_email()
+        with patch(
+            'muckrock.mailgun.inbound._catch_all',
+            side_effect=[ValueError('error'), None],
+        ):
+            self.mailgun_route(to_=to_)
+        message = InboundMessage.objects.get()
+        nose.tools.eq_(message.status, 'done')
+        nose.tools.eq_(message.attempts, 2)
+        nose.tools.eq_(foia.communications.filter(response=True).count(), 1)
+
+    def test_requeue(self):
+        """A message left queued should be queued again when it is received
+        again, or when the queue is swept"""
+        foia = FOIARequestFactory()
+        to_ = foia.get_request_email()
+        with patch('muckrock.mailgun.views.process_inbound_message.delay'):
+            self.mailgun_route(to_=to_, message_id='<queued@agency.gov>')
+        message = InboundMessage.objects.get()
+        nose.tools.eq_(message.status, 'queued')
+        with patch(
+            'muckrock.mailgun.views.process_inbound_message.delay'
+        ) as mock_delay:
+            self.mailgun_route(to_=to_, message_id='<queued@agency.gov>')
+        mock_delay.assert_called_once_with(message.pk)
+        with freeze_time(timezone.now() + timedelta(hours=1)):
+            sweep_inbound_messages()
+        message.refresh_from_db()
+        nose.tools.eq_(message.status, 'done')
+        nose.tools.eq_(message.attempts, 1)
+
+    def test_sweep_interrupted(self):
+        """A message left processing should be processed again once it is
+        stale"""
+        foia = FOIARequestFactory()
+        to_ = foia.get_request_email()
+        with patch('muckrock.mailgun.views.process_inbound_message.delay'):
+            self.mailgun_route(to_=to_)
+        InboundMessage.objects.update(status='processing', attempts=1)
+        sweep_inbound_messages()
+        nose.tools.eq_(InboundMessage.objects.get().status, 'processing')
+        with freeze_time(timezone.now() + timedelta(hours=1)):
+            sweep_inbound_messages()
+        message = InboundMessage.objects.get()
+        nose.tools.eq_(message.status, 'done')
+        nose.tools.eq_(message.attempts, 2)
+
     def test_bad_verify(self):
         """Test an improperly signed message"""
 
@@ -361,3 +438,21 @@ class TestMailgunViewWebHooks(TestMailgunViews):
             comm.emails.first().confirmed_datetime,
             datetime(2017, 1, 2, 17, tzinfo=pytz.utc),
         )
+
+
+class TestWhitelistDomain(TestCase):
+    """Test the whitelisted domains"""
+
+    def test_domains(self):
+        """The domains are lower cased"""
+        WhitelistDomain.objects.create(domain='WhiteHat.edu')
+        nose.tools.eq_(WhitelistDomain.objects.domains(), {'whitehat.edu'})
+
+    def test_cache_cleared(self):
+        """The cached domains are cleared when they change"""
+        with patch('muckrock.mailgun.signals.cache') as mock_cache:
+            domain = WhitelistDomain.objects.create(domain='whitehat.edu')
+            mock_cache.delete.assert_called_once_with(WHITELIST_CACHE_KEY)
+            mock_cache.reset_mock()
+            domain.delete()
+            mock_cache.delete.assert_called_once_with(WHITELIST_CACHE_KEY)
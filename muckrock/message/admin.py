@@ -0,0 +1,44 @@
+"""
+Admin registration for the messages application
+"""
+
+# Django
+from django.contrib import admin
+
+# MuckRock
+from muckrock.message.models import DigestRun
+
+
+class DigestRunAdmin(admin.ModelAdmin):
+    """Digest run admin options"""
+    list_display = (
+        'preference',
+        'datetime_started',
+        'datetime_done',
+        'total',
+        'sent',
+        'failed',
+        'skipped',
+        'throughput',
+    )
+    list_filter = ('preference',)
+    date_hierarchy = 'datetime_started'
+    readonly_fields = (
+        'preference',
+        'datetime_started',
+        'datetime_done',
+        'total',
+        'sent',
+        'failed',
+        'skipped',
+        'render_seconds',
+        'send_seconds',
+        'throughput',
+    )
+
+    def throughput(self, obj):
+        """Users processed per second"""
+        return '%.2f' % obj.throughput
+
+
+admin.site.register(DigestRun, DigestRunAdmin)
@@ -4,16 +4,28 @@ Digest objects for the messages app
 
 # Django
 from django.contrib.auth.models import User
-from django.db.models import DurationField, F, Q
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import (
+    BooleanField,
+    Case,
+    CharField,
+    DurationField,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    Value,
+    When,
+    prefetch_related_objects,
+)
 from django.db.models.functions import Cast, Now
 from django.utils import timezone
 
 # Standard Library
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict, namedtuple
 from datetime import date, timedelta
 
 # Third Party
-from actstream.models import Action
 from dateutil.relativedelta import relativedelta
 
 # MuckRock
@@ -29,6 +41,167 @@ from muckrock.foia.models import FOIACommunication, FOIARequest
 from muckrock.message.email import TemplateEmail
 from muckrock.qanda.models import Question
 
+# request notifications are classified by a key and a verb phrase to filter by
+# e.g. ('no_documents', 'no responsive documents')
+REQUEST_CLASSIFIERS = [
+    ('completed', 'completed'),
+    ('rejected', 'rejected'),
+    ('no_documents', 'no responsive documents'),
+    ('require_payment', 'payment'),
+    ('require_fix', 'require_fix'),
+    ('interim_response', 'processing'),
+    ('acknowledged', 'acknowledged'),
+    ('received', 'sent a communication'),
+]
+
+# the models included in activity digests, and the field for their owner
+OWNER_FIELDS = OrderedDict([
+    (FOIARequest, 'composer__user'),
+    (Question, 'user'),
+])
+
+# the generic foreign keys on an action
+ACTION_KEYS = ('actor', 'target', 'action_object')
+
+# Activity is stored in immutable tuples, so that a digest's activity may be
+# shared between threads and can never leak into another user's digest
+Activity = namedtuple('Activity', ['count', 'requests', 'questions'])
+SplitActivity = namedtuple('SplitActivity', ['count', 'mine', 'following'])
+RequestActivity = namedtuple(
+    'RequestActivity',
+    [key for key, _ in REQUEST_CLASSIFIERS] + ['count'],
+)
+
+
+def annotate_activity(notifications):
+    """Annotate each notification with whether it is about each of the digest
+    models, whether it is about an object the notified user owns, and which
+    bucket its verb classifies it into"""
+    # later annotations refer to earlier ones, so they must be added in order
+    annotations = OrderedDict()
+    for model, owner_field in OWNER_FIELDS.iteritems():
+        name = model._meta.model_name
+        content_type = ContentType.objects.get_for_model(model)
+        related = Q()
+        mine = Q()
+        for key in ACTION_KEYS:
+            is_type = Q(**{'action__%s_content_type' % key: content_type})
+            owned = '%s_%s_owned' % (name, key)
+            # object ids are stored as strings on the action
+            objects = model.objects.annotate(
+                object_key=Cast('pk', CharField(max_length=255))
+            )
+            annotations[owned] = Exists(
+                objects.filter(
+                    object_key=OuterRef('action__%s_object_id' % key),
+                    **{owner_field: OuterRef('user')}
+                )
+            )
+            related |= is_type
+            mine |= is_type & Q(**{owned: True})
+        annotations['%s_related' % name] = Case(
+            When(related, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+        annotations['%s_mine' % name] = Case(
+            When(Q(action__public=True) & mine, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    annotations['bucket'] = Case(
+        *[
+            When(action__verb__icontains=phrase, then=Value(key))
+            for key, phrase in REQUEST_CLASSIFIERS
+        ],
+        default=Value(''),
+        output_field=CharField()
+    )
+    for name, annotation in annotations.iteritems():
+        notifications = notifications.annotate(**{name: annotation})
+    return notifications
+
+
+def load_activity(users, since):
+    """Load the activity for a batch of users' digests
+
+    The unread notifications since the given time are loaded and classified
+    for all of the users with a single annotated query, followed by a fixed
+    number of queries to prefetch the objects they refer to.  Returns the
+    activity by user pk.
+    """
+    user_pks = [user.pk for user in users]
+    notifications = list(
+        annotate_activity(
+            Notification.objects.filter(
+                user__in=user_pks,
+                read=False,
+                datetime__gte=since,
+            )
+        ).select_related('action').prefetch_related(
+            'action__actor',
+            'action__target',
+            'action__action_object',
+        ).order_by('datetime')
+    )
+    # the request's agency is displayed in the digest
+    prefetch_related_objects(
+        [
+            n.action.target
+            for n in notifications
+            if isinstance(n.action.target, FOIARequest)
+        ],
+        'agency',
+    )
+
+    # user pk -> model name -> mine -> notifications
+    by_user = defaultdict(lambda: defaultdict(lambda: ([], [])))
+    for notification in notifications:
+        for model in OWNER_FIELDS:
+            name = model._meta.model_name
+            if getattr(notification, '%s_related' % name):
+                mine, following = by_user[notification.user_id][name]
+                if getattr(notification, '%s_mine' % name):
+                    mine.append(notification)
+                else:
+                    following.append(notification)
+
+    activity = {}
+    for user_pk in user_pks:
+        mine, following = by_user[user_pk]['foiarequest']
+        mine = classify_request_notifications(mine)
+        following = classify_request_notifications(following)
+        requests = SplitActivity(
+            count=mine.count + following.count,
+            mine=mine,
+            following=following,
+        )
+        mine, following = by_user[user_pk]['question']
+        questions = SplitActivity(
+            count=len(mine) + len(following),
+            mine=tuple(mine),
+            following=tuple(following),
+        )
+        activity[user_pk] = Activity(
+            count=requests.count + questions.count,
+            requests=requests,
+            questions=questions,
+        )
+    return activity
+
+
+def classify_request_notifications(notifications):
+    """Break a single list of annotated request notifications into their
+    buckets"""
+    classified = {key: [] for key, _ in REQUEST_CLASSIFIERS}
+    count = 0
+    for notification in notifications:
+        if notification.bucket:
+            classified[notification.bucket].append(notification)
+            count += 1
+    classified = {key: tuple(n) for key, n in classified.iteritems()}
+    return RequestActivity(count=count, **classified)
+
 
 def get_salutation():
     """Returns a time-appropriate salutation"""
@@ -103,30 +276,11 @@ class ActivityDigest(Digest):
     text_template = 'message/digest/digest.txt'
     html_template = 'message/digest/digest.html'
 
-    # Here we scaffold out the activity dictionary.
-    # It is scaffolded to prevent key errors when counting
-    # activity, as well as to provide some guidance for
-    # which activities to filter from the global stream.
-
     # Activity is independent from template context because
     # we use activity counts to influence other parts of the
     # email, like the subject line and whether or not to
     # even send the email at all.
 
-    activity = {
-        'count': 0,
-        'requests': {
-            'count': 0,
-            'mine': None,
-            'following': None
-        },
-        'questions': {
-            'count': 0,
-            'mine': None,
-            'following': None
-        }
-    }
-
     # Most of the work re: composing the email takes place
     # at init. This is by design, since digests should require
     # a minimum of configuration outside of their own configuration,
@@ -138,8 +292,10 @@ class ActivityDigest(Digest):
     # less flexible. On the other, this flexibility might not be required
     # beyond specifically-defined subclasses.
 
-    def __init__(self, **kwargs):
-        """Initialize the digest with a dynamic subject."""
+    def __init__(self, activity=None, **kwargs):
+        """Initialize the digest with a dynamic subject.
+        The activity may be given if it was loaded for a batch of digests."""
+        self.activity = activity
         super(ActivityDigest, self).__init__(**kwargs)
         self.subject = self.get_subject()
 
@@ -150,93 +306,16 @@ class ActivityDigest(Digest):
         context['subject'] = self.get_subject()
         return context
 
-    def notifications_for_model(self, notifications, model):
-        """Filter a list of notifications for a specific model,
-        split between objects owned by the user and objects followed by the user."""
-        user = self.get_user()
-        model_notifications = notifications.for_model(model)
-        own_model_actions = Action.objects.owned_by(user, model)
-        own_model_notifications = model_notifications.filter(
-            action__in=own_model_actions
-        )
-        following_model_notifications = model_notifications.exclude(
-            action__in=own_model_actions
-        )
-        return {
-            'count': model_notifications.count(),
-            'mine': own_model_notifications,
-            'following': following_model_notifications
-        }
-
     def get_activity(self):
         """Returns a list of activities to be sent in the email"""
-        duration = self.get_duration()
-        user = self.get_user()
-        # get unread notifications for the user that are new since the last email
-        notifications = (
-            Notification.objects.for_user(user).get_unread()
-            .filter(datetime__gte=duration)
-        )
-        self.activity['requests'] = self.foia_notifications(notifications)
-        self.activity['questions'] = self.notifications_for_model(
-            notifications, Question
-        )
-        self.activity['count'] = (
-            self.activity['requests']['count'] +
-            self.activity['questions']['count']
-        )
+        if self.activity is None:
+            user = self.get_user()
+            self.activity = load_activity([user], self.get_duration())[user.pk]
         return self.activity
 
-    def foia_notifications(self, notifications):
-        """Do some heavy filtering and classifying of foia notifications."""
-        filtered_notifications = self.notifications_for_model(
-            notifications, FOIARequest
-        )
-        filtered_notifications['mine'] = self.classify_request_notifications(
-            filtered_notifications['mine'],
-            [('completed', 'completed'), ('rejected', 'rejected'),
-             ('no_documents', 'no responsive documents'),
-             ('require_payment', 'payment'), ('require_fix', 'require_fix'),
-             ('interim_response', 'processing'),
-             ('acknowledged', 'acknowledged'),
-             ('received', 'sent a communication')]
-        )
-        filtered_notifications['following'
-                               ] = self.classify_request_notifications(
-                                   filtered_notifications['following'],
-                                   [('completed', 'completed'),
-                                    ('rejected', 'rejected'),
-                                    ('no_documents', 'no responsive documents'),
-                                    ('require_payment', 'payment'),
-                                    ('require_fix', 'require_fix'),
-                                    ('interim_response', 'processing'),
-                                    ('acknowledged', 'acknowledged'),
-                                    ('received', 'sent a communication')]
-                               )
-        filtered_notifications['count'] = (
-            filtered_notifications['mine']['count'] +
-            filtered_notifications['following']['count']
-        )
-        return filtered_notifications
-
-    def classify_request_notifications(self, notifications, classifiers):
-        """Break a single list of notifications into a classified dictionary."""
-        classified = {}
-        # a classifier should be a tuple of a key and a verb phrase to filter by
-        # e.g. ('no_documents', 'no responsive documents')
-        for classifier in classifiers:
-            classified[classifier[0]] = notifications.filter(
-                action__verb__icontains=classifier[1]
-            )
-        activity_count = 0
-        for _, classified_stream in classified.iteritems():
-            activity_count += len(classified_stream)
-        classified['count'] = activity_count
-        return classified
-
     def get_subject(self):
         """Summarizes the activities in the notification."""
-        count = self.activity['count']
+        count = self.activity.count
         subject = str(count) + ' Update'
         if count > 1:
             subject += 's'
@@ -244,7 +323,7 @@ class ActivityDigest(Digest):
 
     def send(self, *args):
         """Don't send the email if there's no activity."""
-        if self.activity['count'] < 1:
+        if self.activity.count < 1:
             return 0
         return super(ActivityDigest, self).send(*args)
 
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-07 09:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                ('preference', models.CharField(max_length=10)),
+                (
+                    'datetime_started',
+                    models.DateTimeField(default=django.utils.timezone.now)
+                ),
+                ('datetime_done', models.DateTimeField(blank=True, null=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('render_seconds', models.FloatField(default=0)),
+                ('send_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-datetime_started'],
+            },
+        ),
+    ]
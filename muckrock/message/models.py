@@ -0,0 +1,63 @@
+"""
+Models for the messages application
+"""
+
+# Django
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class DigestRun(models.Model):
+    """A run of the activity digests for a single email preference"""
+
+    preference = models.CharField(max_length=10)
+    datetime_started = models.DateTimeField(default=timezone.now)
+    datetime_done = models.DateTimeField(blank=True, null=True)
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    # total time spent across all chunks building and sending the digests
+    render_seconds = models.FloatField(default=0)
+    send_seconds = models.FloatField(default=0)
+
+    def __unicode__(self):
+        return u'%s digests started %s' % (
+            self.preference.capitalize(),
+            self.datetime_started,
+        )
+
+    @property
+    def processed(self):
+        """The number of users processed so far"""
+        return self.sent + self.failed + self.skipped
+
+    @property
+    def throughput(self):
+        """Users processed per second"""
+        end = self.datetime_done or timezone.now()
+        seconds = (end - self.datetime_started).total_seconds()
+        return self.processed / seconds if seconds > 0 else 0.0
+
+    def record(
+        self, sent=0, failed=0, skipped=0, render_seconds=0, send_seconds=0
+    ):
+        """Atomically record the progress of a chunk of this run"""
+        DigestRun.objects.filter(pk=self.pk).update(
+            sent=F('sent') + sent,
+            failed=F('failed') + failed,
+            skipped=F('skipped') + skipped,
+            render_seconds=F('render_seconds') + render_seconds,
+            send_seconds=F('send_seconds') + send_seconds,
+        )
+        # mark the run done once every user has been processed
+        DigestRun.objects.filter(
+            pk=self.pk,
+            datetime_done=None,
+            total__lte=F('sent') + F('failed') + F('skipped'),
+        ).update(datetime_done=timezone.now())
+        self.refresh_from_db()
+
+    class Meta:
+        ordering = ['-datetime_started']
@@ -6,11 +6,17 @@ Tasks for the messages application.
 from celery.exceptions import SoftTimeLimitExceeded
 from celery.schedules import crontab
 from celery.task import periodic_task, task
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.mail import get_connection
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.utils import timezone
 
 # Standard Library
 import logging
+import time
+from multiprocessing.pool import ThreadPool
 
 # Third Party
 import stripe
@@ -22,6 +28,7 @@ from muckrock.core.utils import stripe_retry_on_error
 from muckrock.crowdfund.models import RecurringCrowdfundPayment
 from muckrock.message import digests, receipts
 from muckrock.message.email import TemplateEmail
+from muckrock.message.models import DigestRun
 from muckrock.message.notifications import SlackNotification
 from muckrock.organization.models import Organization
 
@@ -49,16 +56,125 @@ def send_activity_digest(user, subject, interval):
         )
 
 
+@task(
+    ignore_result=True,
+    time_limit=600,
+    soft_time_limit=570,
+    name='muckrock.message.tasks.send_activity_digests',
+)
+def send_activity_digests(run_pk, user_pks, subject, interval):
+    """Build the activity digests for a chunk of users from a digest run,
+    and send them over a single mail connection"""
+    # pylint: disable=broad-except
+    run = DigestRun.objects.get(pk=run_pk)
+    users = list(User.objects.filter(pk__in=user_pks).select_related('profile'))
+    sent = failed = 0
+    render_start = time.time()
+    try:
+        activity = digests.load_activity(users, timezone.now() - interval)
+        # digests without any activity are not sent, so are not built
+        users = [u for u in users if activity[u.pk].count > 0]
+        threads = settings.DIGEST_THREADS
+
+        def build(user):
+            """Build a single user's digest"""
+            try:
+                return digests.ActivityDigest(
+                    user=user,
+                    subject=subject,
+                    interval=interval,
+                    activity=activity[user.pk],
+                )
+            except Exception as exc:
+                logger.error(
+                    'Digests: error building digest for %s: %s',
+                    user,
+                    exc,
+                    exc_info=True,
+                )
+                return None
+            finally:
+                # connections are per thread, do not leave them open
+                if threads > 1:
+                    connection.close()
+
+        if threads > 1:
+            pool = ThreadPool(threads)
+            try:
+                emails = pool.map(build, users)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            emails = [build(u) for u in users]
+        failed += sum(1 for e in emails if e is None)
+        emails = [e for e in emails if e is not None]
+        render_seconds = time.time() - render_start
+        send_start = time.time()
+        try:
+            sent = get_connection().send_messages(emails) or 0
+        except Exception as exc:
+            logger.error(
+                'Digests: error sending chunk for run %d: %s',
+                run.pk,
+                exc,
+                exc_info=True,
+            )
+        failed += len(emails) - sent
+        send_seconds = time.time() - send_start
+    except SoftTimeLimitExceeded:
+        logger.error(
+            'Digests: chunk for run %d did not complete in time', run.pk
+        )
+        failed = len(users) - sent
+        render_seconds = send_seconds = 0
+    run.record(
+        sent=sent,
+        failed=failed,
+        skipped=len(user_pks) - sent - failed,
+        render_seconds=render_seconds,
+        send_seconds=send_seconds,
+    )
+    if run.datetime_done is not None:
+        logger.info(
+            'Digests: %s run %d done. %d sent, %d failed, %d skipped, '
+            '%.2f users per second, %.1fs rendering, %.1fs sending',
+            run.preference,
+            run.pk,
+            run.sent,
+            run.failed,
+            run.skipped,
+            run.throughput,
+            run.render_seconds,
+            run.send_seconds,
+        )
+
+
 def send_digests(preference, subject, interval):
-    """Helper to send out timed digests"""
-    users = (
+    """Helper to send out timed digests
+
+    The users with unread notifications are sharded into chunks, which are
+    built and sent in parallel.
+    """
+    user_pks = list(
         User.objects.filter(
             profile__email_pref=preference,
             notifications__read=False,
-        ).distinct()
+        ).order_by('pk').distinct().values_list('pk', flat=True)
     )
-    for user in users:
-        send_activity_digest.delay(user, subject, interval)
+    run = DigestRun.objects.create(
+        preference=preference,
+        total=len(user_pks),
+        datetime_done=None if user_pks else timezone.now(),
+    )
+    size = settings.DIGEST_CHUNK_SIZE
+    for start in xrange(0, len(user_pks), size):
+        send_activity_digests.delay(
+            run.pk,
+            user_pks[start:start + size],
+            subject,
+            interval,
+        )
 
 
 # every hour
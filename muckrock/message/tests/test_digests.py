@@ -5,7 +5,10 @@ correctly grabbing site activity.
 """
 
 # Django
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 # Standard Library
 from datetime import date
@@ -52,7 +55,7 @@ class TestDailyDigest(TestCase):
     def test_send_no_notifications(self):
         """The email shouldn't send if there's no notifications."""
         email = self.digest(user=self.user, interval=self.interval)
-        eq_(email.activity['count'], 0, 'There should be no activity.')
+        eq_(email.activity.count, 0, 'There should be no activity.')
         eq_(email.send(), 0, 'The email should not send.')
 
     def test_send_notification(self):
@@ -64,7 +67,7 @@ class TestDailyDigest(TestCase):
         notify(self.user, action)
         # generate the email, which should contain the generated action
         email = self.digest(user=self.user, interval=self.interval)
-        eq_(email.activity['count'], 1, 'There should be activity.')
+        eq_(email.activity.count, 1, 'There should be activity.')
         eq_(email.send(), 1, 'The email should send.')
 
     def test_digest_follow_requests(self):
@@ -77,7 +80,7 @@ class TestDailyDigest(TestCase):
         notify(self.user, action)
         # generate the email, which should contain the generated action
         email = self.digest(user=self.user, interval=self.interval)
-        eq_(email.activity['count'], 1, 'There should be activity.')
+        eq_(email.activity.count, 1, 'There should be activity.')
         eq_(email.send(), 1, 'The email should send.')
 
     def test_digest_user_questions(self):
@@ -90,13 +93,11 @@ class TestDailyDigest(TestCase):
         # so let's generate the email and see what happened
         email = self.digest(user=self.user, interval=self.interval)
         eq_(
-            email.activity['count'], 1,
+            email.activity.count, 1,
             'There should be activity that is not user initiated.'
         )
-        eq_(
-            email.activity['questions']['mine'].first().action.actor, other_user
-        )
-        eq_(email.activity['questions']['mine'].first().action.verb, 'answered')
+        eq_(email.activity.questions.mine[0].action.actor, other_user)
+        eq_(email.activity.questions.mine[0].action.verb, 'answered')
         eq_(email.send(), 1, 'The email should send.')
 
     def test_digest_follow_questions(self):
@@ -107,20 +108,59 @@ class TestDailyDigest(TestCase):
         other_user = UserFactory()
         answer = AnswerFactory(user=other_user, question=question)
         email = self.digest(user=self.user, interval=self.interval)
-        eq_(email.activity['count'], 1, 'There should be activity.')
-        eq_(
-            email.activity['questions']['following'].first().action.actor,
-            other_user
-        )
-        eq_(
-            email.activity['questions']['following'].first()
-            .action.action_object, answer
+        eq_(email.activity.count, 1, 'There should be activity.')
+        eq_(email.activity.questions.following[0].action.actor, other_user)
+        eq_(email.activity.questions.following[0].action.action_object, answer)
+        eq_(email.activity.questions.following[0].action.target, question)
+        eq_(email.send(), 1, 'The email should send.')
+
+    def test_load_activity_classification(self):
+        """Request activity should be split by ownership and classified by
+        verb"""
+        other_user = UserFactory()
+        agency = AgencyFactory()
+        my_foia = FOIARequestFactory(composer__user=self.user, agency=agency)
+        other_foia = FOIARequestFactory(
+            composer__user=other_user, agency=agency
         )
-        eq_(
-            email.activity['questions']['following'].first().action.target,
-            question
+        notify(self.user, new_action(agency, 'completed', target=my_foia))
+        notify(self.user, new_action(agency, 'rejected', target=other_foia))
+        notify(other_user, new_action(agency, 'rejected', target=other_foia))
+        activity = digests.load_activity(
+            [self.user, other_user],
+            timezone.now() - relativedelta(days=1),
         )
-        eq_(email.send(), 1, 'The email should send.')
+        mine = activity[self.user.pk].requests.mine
+        following = activity[self.user.pk].requests.following
+        eq_(activity[self.user.pk].count, 2)
+        eq_([n.action.target for n in mine.completed], [my_foia])
+        eq_(mine.rejected, ())
+        eq_([n.action.target for n in following.rejected], [other_foia])
+        eq_(activity[other_user.pk].requests.mine.count, 1)
+        eq_(activity[other_user.pk].requests.following.count, 0)
+
+    def test_load_activity_queries(self):
+        """Loading activity should take a fixed number of queries,
+        regardless of the number of users and notifications"""
+        agency = AgencyFactory()
+
+        def create_activity(users):
+            """Notify each user of activity on their own request"""
+            for user in users:
+                foia = FOIARequestFactory(composer__user=user, agency=agency)
+                notify(user, new_action(agency, 'completed', target=foia))
+            return users
+
+        since = timezone.now() - relativedelta(days=1)
+        # warm the content type cache
+        digests.load_activity([], since)
+        users = create_activity([UserFactory()])
+        with CaptureQueriesContext(connection) as queries:
+            digests.load_activity(users, since)
+        num_queries = len(queries)
+        users = create_activity(UserFactory.create_batch(5))
+        with self.assertNumQueries(num_queries):
+            digests.load_activity(users, since)
 
 
 class TestStaffDigest(TestCase):
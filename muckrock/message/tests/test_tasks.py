@@ -24,6 +24,7 @@ from muckrock.core.factories import (
 )
 from muckrock.foia.factories import FOIARequestFactory
 from muckrock.message import tasks
+from muckrock.message.models import DigestRun
 from muckrock.task.factories import FlaggedTaskFactory
 
 ok_ = nose.tools.ok_
@@ -80,20 +81,41 @@ class TestDailyTask(TestCase):
     def setUp(self):
         self.user = UserFactory()
 
-    @mock.patch('muckrock.message.tasks.send_activity_digest.delay')
+    @mock.patch('muckrock.message.tasks.send_activity_digests.delay')
     def test_when_unread(self, mock_send):
         """The send method should be called when a user has unread notifications."""
         NotificationFactory(user=self.user)
         tasks.daily_digest()
+        run = DigestRun.objects.get()
+        eq_(run.total, 1)
         mock_send.assert_called_with(
-            self.user, u'Daily Digest', relativedelta(days=1)
+            run.pk, [self.user.pk], u'Daily Digest', relativedelta(days=1)
         )
 
-    @mock.patch('muckrock.message.tasks.send_activity_digest.delay')
+    @mock.patch('muckrock.message.tasks.send_activity_digests.delay')
     def test_when_no_unread(self, mock_send):
         """The send method should not be called when a user does not have unread notifications."""
         tasks.daily_digest()
         mock_send.assert_not_called()
+        ok_(DigestRun.objects.get().datetime_done)
+
+    def test_send_chunk(self):
+        """A chunk should send the digests with activity and record the
+        results on the run"""
+        idle_user = UserFactory()
+        NotificationFactory(user=self.user)
+        run = DigestRun.objects.create(preference='daily', total=2)
+        tasks.send_activity_digests(
+            run.pk,
+            [self.user.pk, idle_user.pk],
+            u'Daily Digest',
+            relativedelta(days=1),
+        )
+        run.refresh_from_db()
+        eq_(run.processed, 2)
+        eq_(run.failed, 0)
+        eq_(run.sent, len(mail.outbox))
+        ok_(run.datetime_done)
 
 
 class TestStaffTask(TestCase):
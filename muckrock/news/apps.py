@@ -15,6 +15,8 @@ class NewsConfig(AppConfig):
         # pylint: disable=invalid-name
         from actstream import registry as action
         from watson import search
+        from muckrock.core.search import register
         Article = self.get_model('Article')
         action.register(Article)
         search.register(Article.objects.get_published())
+        register(Article, [('title', 'A'), ('summary', 'B'), ('body', 'C')])
@@ -4,8 +4,8 @@ Models for the News application
 
 # Django
 from django.contrib.auth.models import User
-from django.core.cache import cache
-from django.core.cache.utils import make_template_fragment_key
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.urlresolvers import reverse
 from django.db import models
 from django.db.models import Prefetch
@@ -16,6 +16,7 @@ from easy_thumbnails.fields import ThumbnailerImageField
 from taggit.managers import TaggableManager
 
 # MuckRock
+from muckrock.core.caching import shared_cache
 from muckrock.core.utils import get_image_storage
 from muckrock.foia.models import FOIARequest
 from muckrock.tags.models import TaggedItemBase
@@ -87,6 +88,7 @@ class Article(models.Model):
                        'crop': 'smart'},
         storage=get_image_storage(),
     )
+    search_vector = SearchVectorField(null=True, editable=False)
     objects = ArticleQuerySet.as_manager()
     tags = TaggableManager(through=TaggedItemBase, blank=True)
 
@@ -109,10 +111,7 @@ class Article(models.Model):
         self.body = self.body.replace(u'\xa0', ' ')
         # invalidate the template cache for the page on a save
         if self.pk:
-            cache.delete(
-                make_template_fragment_key('article_detail_1',
-                                           [self.pk])
-            )
+            shared_cache.delete_fragment('article_detail_1', [self.pk])
         super(Article, self).save(*args, **kwargs)
 
     def get_authors_names(self):
@@ -132,6 +131,7 @@ class Article(models.Model):
     class Meta:
         ordering = ['-pub_date']
         get_latest_by = 'pub_date'
+        indexes = [GinIndex(fields=['search_vector'])]
 
 
 class Photo(models.Model):
@@ -18,7 +18,7 @@ from django.views.generic.dates import (
 )
 
 # MuckRock
-from muckrock.core.utils import cache_get_or_set
+from muckrock.core.caching import shared_cache
 from muckrock.core.views import MRSearchFilterListView, PaginationMixin
 from muckrock.news.filters import (
     ArticleAuthorFilterSet,
@@ -109,7 +109,7 @@ class NewsExploreView(TemplateView):
     def get_context_data(self, **kwargs):
         """Adds interesting articles to the explore page."""
         context = super(NewsExploreView, self).get_context_data(**kwargs)
-        recent_articles = cache_get_or_set(
+        recent_articles = shared_cache.get_or_set(
             'hp:articles', lambda: (
                 Article.objects.get_published().prefetch_related(
                     'authors',
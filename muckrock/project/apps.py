@@ -15,6 +15,11 @@ class ProjectConfig(AppConfig):
         # pylint: disable=invalid-name
         from actstream import registry as action
         from watson import search
+        from muckrock.core.search import register
         Project = self.get_model('Project')
         action.register(Project)
         search.register(Project.objects.get_public())
+        register(
+            Project,
+            [('title', 'A'), ('summary', 'B'), ('description', 'C')],
+        )
@@ -3,6 +3,8 @@ Models for the project application.
 """
 
 # Django
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.urlresolvers import reverse
 from django.db import models
 from django.utils.text import slugify
@@ -158,6 +160,7 @@ class Project(models.Model):
         default=date.today,
     )
     date_approved = models.DateField(blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __unicode__(self):
         return unicode(self.title)
@@ -225,6 +228,9 @@ class Project(models.Model):
         self.make_public()
         return ProjectReviewTask.objects.create(project=self, notes=notes)
 
+    class Meta:
+        indexes = [GinIndex(fields=['search_vector'])]
+
 
 class ProjectCrowdfunds(models.Model):
     """Project to Crowdfund through model"""
@@ -6,8 +6,6 @@ Views for the project application
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.cache import cache
-from django.core.cache.utils import make_template_fragment_key
 from django.core.urlresolvers import reverse
 from django.db.models import Prefetch
 from django.http import Http404
@@ -24,10 +22,9 @@ from django.views.generic import (
 # Standard Library
 from datetime import date, timedelta
 
-# Third Party
-from actstream.models import followers
-
 # MuckRock
+from muckrock.core.caching import shared_cache
+from muckrock.core.follow import get_followers
 from muckrock.core.utils import new_action
 from muckrock.core.views import MRSearchFilterListView
 from muckrock.crowdfund.forms import CrowdfundForm
@@ -158,7 +155,7 @@ class ProjectDetailView(DetailView):
                 'composer__user__profile',
             ).get_public_file_count()
         )
-        context['followers'] = followers(project)
+        context['followers'] = get_followers(project)
         context['articles'] = (
             project.articles.get_published().prefetch_related(
                 Prefetch(
@@ -223,11 +220,7 @@ class ProjectEditView(ProjectPermissionsMixin, UpdateView):
         self.notify_new_contributors(existing_contributors, new_contributors)
         messages.success(self.request, 'Your edits were saved.')
         # clear the template cache for the project after its been edited
-        key = make_template_fragment_key(
-            'project_detail_objects',
-            [self.object.pk],
-        )
-        cache.delete(key)
+        shared_cache.delete_fragment('project_detail_objects', [self.object.pk])
         return super(ProjectEditView, self).form_valid(form)
 
     def notify_new_contributors(self, existing, new):
@@ -14,9 +14,27 @@ class QuestionConfig(AppConfig):
         """Registers the application with the activity streams plugin"""
         # pylint: disable=invalid-name
         from actstream import registry
+        from django.db.models import OuterRef
         from watson import search
+        from muckrock.core.search import register, related_text
         Question = self.get_model('Question')
         Answer = self.get_model('Answer')
         registry.register(Question)
         registry.register(Answer)
         search.register(Question)
+        register(
+            Question,
+            [
+                ('title', 'A'),
+                ('question', 'B'),
+                (
+                    related_text(
+                        Answer.objects.filter(question=OuterRef('pk')),
+                        'question',
+                        'answer',
+                    ),
+                    'C',
+                ),
+            ],
+            related={Answer: lambda answer: answer.question_id},
+        )
@@ -4,15 +4,17 @@ Models for the Q&A application
 
 # Django
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.urlresolvers import reverse
 from django.db import models
 
 # Third Party
-from actstream.models import followers
 from taggit.managers import TaggableManager
 
 # MuckRock
 from muckrock.accounts.models import Profile
+from muckrock.core.follow import iter_followers
 from muckrock.core.utils import new_action, notify
 from muckrock.foia.models import FOIARequest
 from muckrock.tags.models import TaggedItemBase
@@ -31,6 +33,7 @@ class Question(models.Model):
     # to increase performance when displaying questions in a list
     # and using the most recent response as a sortable field.
     answer_date = models.DateTimeField(blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
     tags = TaggableManager(through=TaggedItemBase, blank=True)
 
     def __unicode__(self):
@@ -71,6 +74,7 @@ class Question(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [GinIndex(fields=['search_vector'])]
         permissions = (
             ('post', 'Can post questions and answers'),
             ('block', 'Can block other users'),
@@ -106,7 +110,7 @@ class Answer(models.Model):
             )
             # Notify the question's owner and its followers about the new answer
             notify(self.question.user, action)
-            notify(followers(self.question), action)
+            notify(iter_followers(self.question), action)
 
     class Meta:
         ordering = ['date']
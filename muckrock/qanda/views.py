@@ -26,6 +26,7 @@ from rest_framework.response import Response
 
 # MuckRock
 from muckrock.accounts.models import Notification
+from muckrock.core.follow import is_follower
 from muckrock.core.views import MRSearchFilterListView
 from muckrock.qanda.filters import QuestionFilterSet
 from muckrock.qanda.forms import AnswerForm, QuestionForm
@@ -201,7 +202,7 @@ def create_question(request):
 def follow(request, slug, idx):
     """Follow or unfollow a question"""
     question = get_object_or_404(Question, slug=slug, id=idx)
-    if actstream.actions.is_following(request.user, question):
+    if is_follower(request.user, question):
         actstream.actions.unfollow(request.user, question)
         messages.success(request, 'You are no longer following this question.')
     else:
@@ -7,6 +7,7 @@ from django.core.urlresolvers import reverse
 
 # Standard Library
 import os
+import tempfile
 import urlparse
 from collections import OrderedDict
 from datetime import date
@@ -287,6 +288,9 @@ CELERY_IMPORTS = (
     'muckrock.portal.tasks',
     'muckrock.dataset.tasks',
     'muckrock.crowdsource.tasks',
+    'muckrock.jurisdiction.tasks',
+    'muckrock.mailgun.tasks',
+    'muckrock.core.tasks',
 )
 CELERYD_MAX_TASKS_PER_CHILD = os.environ.get('CELERYD_MAX_TASKS_PER_CHILD', 100)
 CELERYD_TASK_TIME_LIMIT = os.environ.get('CELERYD_TASK_TIME_LIMIT', 5 * 60)
@@ -294,7 +298,96 @@ CELERY_ROUTES = {
     'muckrock.foia.tasks.send_fax': {
         'queue': 'phaxio'
     },
+    'muckrock.mailgun.tasks.process_inbound_message': {
+        'queue': 'mailgun'
+    },
+}
+
+# number of requests per follow up sub-task
+FOLLOWUP_CHUNK_SIZE = int(os.environ.get('FOLLOWUP_CHUNK_SIZE', 25))
+# maximum number of follow ups sent per minute for each channel
+FOLLOWUP_RATE_LIMITS = {
+    'portal': int(os.environ.get('FOLLOWUP_RATE_LIMIT_PORTAL', 60)),
+    'email': int(os.environ.get('FOLLOWUP_RATE_LIMIT_EMAIL', 120)),
+    'fax': int(os.environ.get('FOLLOWUP_RATE_LIMIT_FAX', 15)),
+    'mail': int(os.environ.get('FOLLOWUP_RATE_LIMIT_MAIL', 120)),
 }
+# number of users per activity digest sub-task
+DIGEST_CHUNK_SIZE = int(os.environ.get('DIGEST_CHUNK_SIZE', 200))
+# number of threads used to render each chunk of activity digests
+DIGEST_THREADS = int(os.environ.get('DIGEST_THREADS', 1))
+# local directory to cache the OCR text of documents for the status classifier
+OCR_CACHE_DIR = os.environ.get(
+    'OCR_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'muckrock-ocr')
+)
+# the most bytes of OCR text cached, and the days text is cached for after it
+# was last used, enforced by a sweep each process runs every so many seconds
+OCR_CACHE_MAX_BYTES = int(
+    os.environ.get('OCR_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+)
+OCR_CACHE_DAYS = int(os.environ.get('OCR_CACHE_DAYS', 30))
+OCR_CACHE_SWEEP_SECONDS = int(
+    os.environ.get('OCR_CACHE_SWEEP_SECONDS', 60 * 60)
+)
+# save a copy of each request's zip download to storage to serve again
+ZIP_DOWNLOAD_CACHE = boolcheck(os.environ.get('ZIP_DOWNLOAD_CACHE', False))
+# seconds a queued build of a zip download stops others being queued for,
+# matching the build task's time limit
+ZIP_DOWNLOAD_LOCK = int(os.environ.get('ZIP_DOWNLOAD_LOCK', 30 * 60))
+# minutes before an inbound message left queued or processing is queued again
+INBOUND_STALE_MINUTES = int(os.environ.get('INBOUND_STALE_MINUTES', 30))
+# days the attachments of inbound messages which failed to process are kept
+INBOUND_SPOOL_DAYS = int(os.environ.get('INBOUND_SPOOL_DAYS', 30))
+# minutes before an autoimport scan left processing is reclaimed by the next
+# run, longer than the time limit of the task importing it
+AUTOIMPORT_STALE_MINUTES = int(os.environ.get('AUTOIMPORT_STALE_MINUTES', 70))
+# number of email addresses each process remembers the database rows for
+EMAIL_ADDRESS_CACHE_SIZE = int(
+    os.environ.get('EMAIL_ADDRESS_CACHE_SIZE', 10000)
+)
+# seconds each process remembers an email address's row for
+EMAIL_ADDRESS_CACHE_SECONDS = int(
+    os.environ.get('EMAIL_ADDRESS_CACHE_SECONDS', 60)
+)
+# data sets with fewer rows than this are not indexed, as they are quick to
+# scan, the most fields with indexes on the data row table at once, as every
+# write to it maintains each of them, and the days after which the indexes of
+# fields which have not been sorted or filtered on are dropped
+DATASET_INDEX_MIN_ROWS = int(os.environ.get('DATASET_INDEX_MIN_ROWS', 10000))
+DATASET_MAX_INDEXED_FIELDS = int(
+    os.environ.get('DATASET_MAX_INDEXED_FIELDS', 20)
+)
+DATASET_INDEX_UNUSED_DAYS = int(
+    os.environ.get('DATASET_INDEX_UNUSED_DAYS', 30)
+)
+# protocol used for the links in the sitemaps written to storage
+SITEMAP_PROTOCOL = os.environ.get('SITEMAP_PROTOCOL', 'https')
+# seconds the sitemaps written to storage may be cached for
+SITEMAP_CACHE_SECONDS = int(os.environ.get('SITEMAP_CACHE_SECONDS', 3600))
+# number of characters of related text, such as a request's communications,
+# included in each search vector
+SEARCH_TEXT_LIMIT = int(os.environ.get('SEARCH_TEXT_LIMIT', 200000))
+# seconds to wait before rebuilding the search vectors of saved objects, so
+# that objects saved repeatedly are only rebuilt once
+SEARCH_UPDATE_DELAY = int(os.environ.get('SEARCH_UPDATE_DELAY', 10))
+# seconds an object waiting for its vector to be rebuilt is not queued again
+SEARCH_PENDING_SECONDS = int(os.environ.get('SEARCH_PENDING_SECONDS', 5 * 60))
+# seconds the homepage snapshot is fresh for after it is refreshed, longer
+# than the period of the refresh task
+HOMEPAGE_REFRESH_SECONDS = int(
+    os.environ.get('HOMEPAGE_REFRESH_SECONDS', 10 * 60)
+)
+# seconds a refresh of the homepage snapshot may hold its lock for
+HOMEPAGE_LOCK_SECONDS = int(os.environ.get('HOMEPAGE_LOCK_SECONDS', 60))
+# seconds each user's sidebar is cached for, it is also invalidated whenever
+# it changes
+SIDEBAR_CACHE_SECONDS = int(os.environ.get('SIDEBAR_CACHE_SECONDS', 60 * 60))
+# seconds a process may hold the lock for computing a missing cached value
+CACHE_LOCK_SECONDS = int(os.environ.get('CACHE_LOCK_SECONDS', 30))
+# seconds to wait between checks for a value being computed by another process
+CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', 0.05))
+# seconds between each process adding its cache hits and misses to the totals
+CACHE_METRICS_SECONDS = int(os.environ.get('CACHE_METRICS_SECONDS', 60))
 
 AUTHENTICATION_BACKENDS = (
     'rules.permissions.ObjectPermissionBackend',
@@ -421,6 +514,9 @@ AWS_STORAGE_BUCKET_NAME = os.environ.get(
 AWS_AUTOIMPORT_BUCKET_NAME = os.environ.get(
     'AWS_AUTOIMPORT_BUCKET_NAME', 'muckrock-autoimprot-devel'
 )
+# an S3 compatible service to autoimport from instead of S3, such as a local
+# minio server for development, ie http://localhost:9000
+AWS_AUTOIMPORT_ENDPOINT = os.environ.get('AWS_AUTOIMPORT_ENDPOINT')
 
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
 STRIPE_PUB_KEY = os.environ.get('STRIPE_PUB_KEY')
@@ -438,6 +534,14 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 DOCUMENTCLOUD_USERNAME = os.environ.get('DOCUMENTCLOUD_USERNAME')
 DOCUMENTCLOUD_PASSWORD = os.environ.get('DOCUMENTCLOUD_PASSWORD')
+# number of documents to set the page counts for per sub-task
+DOCUMENTCLOUD_BATCH_SIZE = int(os.environ.get('DOCUMENTCLOUD_BATCH_SIZE', 100))
+# number of concurrent requests made to document cloud by each sub-task
+DOCUMENTCLOUD_CONCURRENCY = int(os.environ.get('DOCUMENTCLOUD_CONCURRENCY', 8))
+# times to retry a request to document cloud while it is unavailable, and
+# the seconds to wait before the first retry, doubling for each retry
+DOCUMENTCLOUD_RETRIES = int(os.environ.get('DOCUMENTCLOUD_RETRIES', 3))
+DOCUMENTCLOUD_BACKOFF = float(os.environ.get('DOCUMENTCLOUD_BACKOFF', 2))
 
 PHAXIO_KEY = os.environ.get('PHAXIO_KEY')
 PHAXIO_SECRET = os.environ.get('PHAXIO_SECRET')
@@ -471,7 +575,13 @@ DATABASES = {
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'REDIS_CACHE_URL', 'redis://localhost:6379/1'
+        ),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        },
     }
 }
 DEFAULT_CACHE_TIMEOUT = 15 * 60
@@ -0,0 +1,15 @@
+"""
+App config for sidebar
+"""
+
+# Django
+from django.apps import AppConfig
+
+
+class SidebarConfig(AppConfig):
+    """Configures the sidebar application to keep cached sidebars current"""
+    name = 'muckrock.sidebar'
+
+    def ready(self):
+        """Connects the signal handlers"""
+        import muckrock.sidebar.signals  # pylint: disable=unused-import,unused-variable
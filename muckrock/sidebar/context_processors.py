@@ -1,8 +1,16 @@
-"""Context processors to ensure data is displayed in sidebar for all views"""
+"""Context processors to ensure data is displayed in sidebar for all views
+
+The parts of the sidebar for a logged in user are cached for each user,
+tagged with the user's sidebar.  The tag is invalidated by signal handlers
+when the requests, drafts, notifications, projects, profile or organization
+shown in the sidebar change, so a page view usually needs no queries for the
+sidebar.
+"""
 
 # Django
 from django.conf import settings
 from django.contrib.auth.forms import AuthenticationForm
+from django.db.models import Case, Count, When
 from django.utils import timezone
 
 # Standard Library
@@ -10,7 +18,7 @@ from datetime import timedelta
 
 # MuckRock
 from muckrock.accounts.models import Profile
-from muckrock.core.utils import cache_get_or_set
+from muckrock.core.caching import shared_cache
 from muckrock.foia.models import FOIAComposer, FOIARequest
 from muckrock.news.models import Article
 from muckrock.project.models import Project
@@ -24,36 +32,71 @@ def get_recent_articles():
 
 def get_actionable_requests(user):
     """Gets requests that require action or attention"""
-    requests = FOIARequest.objects.filter(composer__user=user)
     started = FOIAComposer.objects.filter(user=user, status='started').count()
-    payment = requests.filter(status='payment').count()
-    fix = requests.filter(status='fix').count()
+    counts = FOIARequest.objects.filter(composer__user=user).aggregate(
+        payment=Count(Case(When(status='payment', then=1))),
+        fix=Count(Case(When(status='fix', then=1))),
+    )
     return {
         'started': started,
-        'payment': payment,
-        'fix': fix,
+        'payment': counts['payment'],
+        'fix': counts['fix'],
     }
 
 
-def get_unread_notifications(user):
-    """Gets unread notifiations for user, if they're logged in."""
-    if user.is_authenticated():
-        return user.notifications.get_unread()
-    else:
-        return None
+def sidebar_tag(user_pk):
+    """The tag for the cached sidebar of a user"""
+    return 'sidebar:%d' % user_pk
 
 
-def get_organization(user):
-    """Gets organization, if it exists"""
+def invalidate_sidebar(user_pks):
+    """The sidebars of these users have changed"""
+    shared_cache.invalidate_tags(sidebar_tag(pk) for pk in user_pks)
 
-    return cache_get_or_set(
-        'sb:%s:user_org' % user.username, user.profile.get_org,
-        settings.DEFAULT_CACHE_TIMEOUT
+
+def get_user_sidebar(user):
+    """Get the sidebar context for a logged in user, which is cached until
+    the user's sidebar is invalidated"""
+
+    def load():
+        """Load the sidebar context from the database"""
+        profile = user.profile
+        return {
+            'unread_notifications_count':
+                user.notifications.get_unread().count(),
+            'actionable_requests':
+                get_actionable_requests(user),
+            'organization':
+                profile.get_org(),
+            'my_projects':
+                list(Project.objects.get_for_contributor(user).optimize()[:4]),
+            'payment_failed':
+                profile.payment_failed,
+            'acct_type':
+                profile.acct_type,
+        }
+
+    return shared_cache.get_or_set(
+        'sb:%d:user' % user.pk,
+        load,
+        settings.SIDEBAR_CACHE_SECONDS,
+        tags=[sidebar_tag(user.pk)],
     )
 
 
 def sidebar_broadcast(user):
     """Displays a broadcast to a given usertype"""
+    try:
+        user_class = (
+            user.profile.acct_type if user.is_authenticated() else 'anonymous'
+        )
+    except Profile.DoesNotExist:
+        user_class = 'anonymous'
+    return get_broadcast(user_class)
+
+
+def get_broadcast(user_class):
+    """Displays a broadcast to a given class of user"""
 
     def load_broadcast(user_class):
         """Return a function to load the correct broadcast"""
@@ -72,13 +115,7 @@ def sidebar_broadcast(user):
 
         return inner
 
-    try:
-        user_class = (
-            user.profile.acct_type if user.is_authenticated() else 'anonymous'
-        )
-    except Profile.DoesNotExist:
-        user_class = 'anonymous'
-    return cache_get_or_set(
+    return shared_cache.get_or_set(
         'sb:%s:broadcast' % user_class, load_broadcast(user_class),
         settings.DEFAULT_CACHE_TIMEOUT
     )
@@ -91,25 +128,16 @@ def sidebar_info(request):
         ('/admin/', '/sitemap', '/news-sitemaps', '/api_v1/')
     ):
         return {}
-    sidebar_info_dict = {
-        'dropdown_recent_articles': get_recent_articles(),
-        'broadcast': sidebar_broadcast(request.user),
-        'login_form': AuthenticationForm()
-    }
     if request.user.is_authenticated():
         # content for logged in users
-        sidebar_info_dict.update({
-            'unread_notifications':
-                get_unread_notifications(request.user),
-            'actionable_requests':
-                get_actionable_requests(request.user),
-            'organization':
-                get_organization(request.user),
-            'my_projects':
-                Project.objects.get_for_contributor(request.user).optimize()
-                [:4],
-            'payment_failed':
-                request.user.profile.payment_failed
-        })
-
+        sidebar_info_dict = dict(get_user_sidebar(request.user))
+        user_class = sidebar_info_dict.pop('acct_type')
+    else:
+        sidebar_info_dict = {}
+        user_class = 'anonymous'
+    sidebar_info_dict.update({
+        'dropdown_recent_articles': get_recent_articles(),
+        'broadcast': get_broadcast(user_class),
+        'login_form': AuthenticationForm()
+    })
     return sidebar_info_dict
@@ -0,0 +1,101 @@
+"""Model signal handlers for the sidebar application"""
+
+# Django
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+
+# MuckRock
+from muckrock.accounts.models import Notification, Profile
+from muckrock.foia.models import FOIAComposer, FOIARequest
+from muckrock.organization.models import Organization
+from muckrock.project.models import Project
+from muckrock.sidebar.context_processors import invalidate_sidebar
+
+
+def foia_sidebar(sender, instance, **kwargs):
+    """A request's status may have changed"""
+    # pylint: disable=unused-argument
+    invalidate_sidebar([instance.composer.user_id])
+
+
+def user_sidebar(sender, instance, **kwargs):
+    """A draft, notification or profile belonging to a user has changed"""
+    # pylint: disable=unused-argument
+    invalidate_sidebar([instance.user_id])
+
+
+def project_sidebar(sender, instance, **kwargs):
+    """A project shown to its contributors has changed"""
+    # pylint: disable=unused-argument
+    invalidate_sidebar(instance.contributors.values_list('pk', flat=True))
+
+
+def project_contributors_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Contributors have been added to or removed from a project"""
+    # pylint: disable=unused-argument
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # the projects of a user have changed
+        invalidate_sidebar([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_sidebar(instance.contributors.values_list('pk', flat=True))
+    else:
+        invalidate_sidebar(pk_set)
+
+
+def organization_sidebar(sender, instance, **kwargs):
+    """An organization shown to its owner and members has changed"""
+    # pylint: disable=unused-argument
+    member_pks = Profile.objects.filter(organization=instance).values_list(
+        'user_id', flat=True
+    )
+    invalidate_sidebar([instance.owner_id] + list(member_pks))
+
+
+for signal in (post_save, post_delete):
+    signal.connect(
+        foia_sidebar,
+        sender=FOIARequest,
+        dispatch_uid='muckrock.sidebar.signals.foia_sidebar.%s' %
+        ('save' if signal is post_save else 'delete'),
+    )
+    for model in (FOIAComposer, Notification, Profile):
+        signal.connect(
+            user_sidebar,
+            sender=model,
+            dispatch_uid='muckrock.sidebar.signals.user_sidebar.%s.%s' % (
+                'save' if signal is post_save else 'delete',
+                model._meta.model_name,
+            ),
+        )
+
+post_save.connect(
+    project_sidebar,
+    sender=Project,
+    dispatch_uid='muckrock.sidebar.signals.project_sidebar.save',
+)
+
+pre_delete.connect(
+    project_sidebar,
+    sender=Project,
+    dispatch_uid='muckrock.sidebar.signals.project_sidebar.delete',
+)
+
+m2m_changed.connect(
+    project_contributors_changed,
+    sender=Project.contributors.through,
+    dispatch_uid='muckrock.sidebar.signals.project_contributors_changed',
+)
+
+post_save.connect(
+    organization_sidebar,
+    sender=Organization,
+    dispatch_uid='muckrock.sidebar.signals.organization_sidebar',
+)
@@ -3,7 +3,9 @@ Tests for the sidebar application
 """
 
 # Django
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
 
 # Standard Library
 from datetime import timedelta
@@ -13,8 +15,13 @@ from mock import patch
 from nose.tools import eq_
 
 # MuckRock
-from muckrock.core.factories import UserFactory
-from muckrock.sidebar.context_processors import sidebar_broadcast
+from muckrock.core.factories import (
+    NotificationFactory,
+    ProjectFactory,
+    UserFactory,
+)
+from muckrock.foia.factories import FOIARequestFactory
+from muckrock.sidebar.context_processors import sidebar_broadcast, sidebar_info
 from muckrock.sidebar.models import Broadcast
 
 
@@ -42,3 +49,58 @@ class TestBroadcasts(TestCase):
             self.broadcast.save()
         broadcast = sidebar_broadcast(self.user)
         eq_(broadcast, '')
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sidebar',
+        }
+    }
+)
+class TestSidebarCache(TestCase):
+    """Each user's sidebar is cached until it changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+
+    def get_sidebar(self):
+        """Get the sidebar context for the user"""
+        request = RequestFactory().get('/')
+        request.user = self.user
+        return sidebar_info(request)
+
+    def test_cached(self):
+        """The sidebar is only loaded once"""
+        self.get_sidebar()
+        with self.assertNumQueries(0):
+            self.get_sidebar()
+
+    def test_requests(self):
+        """The sidebar is reloaded when a request's status changes"""
+        foia = FOIARequestFactory(composer__user=self.user, status='payment')
+        eq_(self.get_sidebar()['actionable_requests']['payment'], 1)
+        foia.status = 'fix'
+        foia.save()
+        actionable_requests = self.get_sidebar()['actionable_requests']
+        eq_(actionable_requests['payment'], 0)
+        eq_(actionable_requests['fix'], 1)
+
+    def test_notifications(self):
+        """The sidebar is reloaded when the user is notified"""
+        eq_(self.get_sidebar()['unread_notifications_count'], 0)
+        notification = NotificationFactory(user=self.user)
+        eq_(self.get_sidebar()['unread_notifications_count'], 1)
+        notification.mark_read()
+        eq_(self.get_sidebar()['unread_notifications_count'], 0)
+
+    def test_projects(self):
+        """The sidebar is reloaded when the user joins a project"""
+        project = ProjectFactory()
+        eq_(self.get_sidebar()['my_projects'], [])
+        project.contributors.add(self.user)
+        eq_(self.get_sidebar()['my_projects'], [project])
+        self.user.projects.clear()
+        eq_(self.get_sidebar()['my_projects'], [])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2018-06-14 10:22
+from __future__ import unicode_literals
+
+# Django
+from django.db import migrations, models
+from django.db.models import Count
+
+# Standard Library
+from datetime import date
+
+KINDS = [
+    'orphantask',
+    'snailmailtask',
+    'reviewagencytask',
+    'flaggedtask',
+    'projectreviewtask',
+    'newagencytask',
+    'responsetask',
+    'statuschangetask',
+    'crowdfundtask',
+    'multirequesttask',
+    'portaltask',
+    'generictask',
+    'failedfaxtask',
+    'rejectedemailtask',
+    'staleagencytask',
+    'newexemptiontask',
+]
+
+
+def set_kinds(apps, schema_editor):
+    """Record the kind of each existing task"""
+    Task = apps.get_model('task', 'Task')
+    for kind in KINDS:
+        model = apps.get_model('task', kind)
+        Task.objects.filter(pk__in=model.objects.values('task_ptr')
+                            ).update(kind=kind)
+    Task.objects.filter(kind='').update(kind='task')
+
+
+def count_tasks(apps, schema_editor):
+    """Count the existing unresolved tasks"""
+    Task = apps.get_model('task', 'Task')
+    TaskCount = apps.get_model('task', 'TaskCount')
+    counts = {}
+    unresolved = (
+        Task.objects.filter(resolved=False).order_by()
+        .values_list('kind', 'date_deferred').annotate(Count('pk'))
+    )
+    for kind, date_deferred, count in unresolved:
+        key = (kind, date_deferred or date.min)
+        counts[key] = counts.get(key, 0) + count
+    TaskCount.objects.bulk_create([
+        TaskCount(kind=kind, date_deferred=date_deferred, count=count)
+        for (kind, date_deferred), count in counts.iteritems()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0031_auto_20180529_1210'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='kind',
+            field=models.CharField(default='', editable=False, max_length=32),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='TaskCount',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID'
+                    )
+                ),
+                ('kind', models.CharField(max_length=32)),
+                ('date_deferred', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskcount',
+            unique_together=set([('kind', 'date_deferred')]),
+        ),
+        migrations.RunPython(set_kinds, migrations.RunPython.noop),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
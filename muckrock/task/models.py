@@ -44,6 +44,7 @@ from muckrock.task.querysets import (
     ReviewAgencyTaskQuerySet,
     SnailMailTaskQuerySet,
     StatusChangeTaskQuerySet,
+    TaskCountQuerySet,
     TaskQuerySet,
 )
 
@@ -126,6 +127,9 @@ class Task(models.Model):
         User, blank=True, null=True, related_name="resolved_tasks"
     )
     form_data = JSONField(blank=True, null=True)
+    # the model name of the subclass, so the task can be counted by kind
+    # without joining to the subclass tables
+    kind = models.CharField(max_length=32, editable=False)
 
     objects = TaskQuerySet.as_manager()
 
@@ -135,6 +139,41 @@ class Task(models.Model):
     def __unicode__(self):
         return u'Task'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember which counter the task was loaded under"""
+        instance = super(Task, cls).from_db(db, field_names, values)
+        if not {'resolved', 'date_deferred'} & instance.get_deferred_fields():
+            instance._counted = instance.count_bucket()
+        return instance
+
+    def count_bucket(self):
+        """The deferral date this task is counted under, or None if it is
+        resolved and not counted"""
+        if self.resolved:
+            return None
+        return self.date_deferred or date.min
+
+    def save(self, *args, **kwargs):
+        """Move the task between the unresolved task counters in the same
+        transaction it is saved in"""
+        # pylint: disable=access-member-before-definition
+        # pylint: disable=attribute-defined-outside-init
+        if not self.kind:
+            self.kind = self._meta.model_name
+        if self._state.adding:
+            counted = None
+        elif hasattr(self, '_counted'):
+            counted = self._counted
+        else:
+            # the counted fields were deferred when the task was loaded
+            loaded = Task.objects.filter(pk=self.pk).first()
+            counted = loaded.count_bucket() if loaded else None
+        with transaction.atomic():
+            super(Task, self).save(*args, **kwargs)
+            TaskCount.objects.move(self.kind, counted, self.count_bucket())
+        self._counted = self.count_bucket()
+
     def resolve(self, user=None, form_data=None):
         """Resolve the task"""
         self.resolved = True
@@ -956,6 +995,24 @@ class NewExemptionTask(Task):
 
 
 # Not a task, but used by tasks
+class TaskCount(models.Model):
+    """The number of unresolved tasks of a kind deferred until a date,
+    kept up to date as tasks are saved so the task counts do not need to be
+    aggregated over every task table.  Tasks which have never been deferred
+    are counted under the earliest possible date."""
+    kind = models.CharField(max_length=32)
+    date_deferred = models.DateField()
+    count = models.IntegerField(default=0)
+
+    objects = TaskCountQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('kind', 'date_deferred')
+
+    def __unicode__(self):
+        return u'%s: %d' % (self.kind, self.count)
+
+
 class BlacklistDomain(models.Model):
     """A domain to be blacklisted from sending us emails"""
     domain = models.CharField(max_length=255)
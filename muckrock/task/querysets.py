@@ -3,11 +3,13 @@ Custom QuerySets for the Task application
 """
 
 # Django
-from django.db import models
-from django.db.models import F, Prefetch, Q, Sum
+from django.db import connections, models, transaction
+from django.db.models import Count, F, Prefetch, Q, Sum
 from django.db.models.functions import Cast, Now
 
 # Standard Library
+import logging
+from collections import Counter
 from datetime import date
 
 # MuckRock
@@ -16,6 +18,8 @@ from muckrock.communication.models import EmailCommunication
 from muckrock.core.models import ExtractDay
 from muckrock.foia.models import FOIACommunication, FOIAFile, FOIARequest
 
+logger = logging.getLogger(__name__)
+
 
 class TaskQuerySet(models.QuerySet):
     """Object manager for all tasks"""
@@ -461,3 +465,76 @@ class PortalTaskQuerySet(TaskQuerySet):
                 'communication__foia__tracking_ids',
             )
         )
+
+
+class TaskCountQuerySet(models.QuerySet):
+    """Object manager for the unresolved task counters"""
+
+    def add(self, kind, date_deferred, count):
+        """Add to the count of unresolved tasks of a kind deferred until a
+        date, creating the counter if it does not exist yet"""
+        sql = (
+            'INSERT INTO {table} (kind, date_deferred, count) '
+            'VALUES (%s, %s, %s) '
+            'ON CONFLICT (kind, date_deferred) '
+            'DO UPDATE SET count = {table}.count + EXCLUDED.count'.format(
+                table=self.model._meta.db_table,
+            )
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, [kind, date_deferred, count])
+
+    def move(self, kind, old, new):
+        """Move a task of a kind from one counter to another.  Either may
+        be None, for tasks which are not counted, as they are resolved or
+        have not been saved."""
+        if old == new:
+            return
+        if old is not None:
+            self.add(kind, old, -1)
+        if new is not None:
+            self.add(kind, new, 1)
+
+    def get_undeferred(self):
+        """The number of unresolved tasks which are not deferred, by kind"""
+        return Counter(
+            dict(
+                self.filter(date_deferred__lte=date.today()).order_by()
+                .values_list('kind').annotate(Sum('count'))
+            )
+        )
+
+    def reconcile(self):
+        """Recount the unresolved tasks, replacing the counters.  The
+        counters are locked while they are recounted, so no task changes are
+        lost.  Returns the number of counters which had drifted."""
+        # pylint: disable=protected-access
+        counts = Counter()
+        with transaction.atomic(using=self.db):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    'LOCK TABLE {} IN EXCLUSIVE MODE'.format(
+                        self.model._meta.db_table
+                    )
+                )
+            unresolved = (
+                task.models.Task.objects.using(self.db).get_unresolved()
+                .order_by().values_list('kind', 'date_deferred')
+            )
+            for kind, date_deferred, count in unresolved.annotate(Count('pk')):
+                counts[kind, date_deferred or date.min] += count
+            current = self.values_list('kind', 'date_deferred', 'count')
+            current = {(kind, date_deferred): count
+                       for kind, date_deferred, count in current}
+            drifted = sum(
+                1 for key in set(counts) | set(current)
+                if counts[key] != current.get(key, 0)
+            )
+            if drifted:
+                logger.warning('Reconciled %d task counters', drifted)
+            self.all().delete()
+            self.bulk_create([
+                self.model(kind=kind, date_deferred=date_deferred, count=count)
+                for (kind, date_deferred), count in counts.iteritems()
+            ])
+        return drifted
@@ -1,7 +1,7 @@
 """Signals for the task application"""
 # Django
 from django.core.urlresolvers import reverse
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
 # Standard Library
 import logging
@@ -13,6 +13,8 @@ from muckrock.task.models import (
     FlaggedTask,
     OrphanTask,
     ProjectReviewTask,
+    Task,
+    TaskCount,
 )
 
 logger = logging.getLogger(__name__)
@@ -35,6 +37,12 @@ def domain_blacklist(sender, instance, created, **kwargs):
     return
 
 
+def uncount_task(sender, instance, **kwargs):
+    """Remove a deleted task from the unresolved task counters.  This is sent
+    for the base task of every subclass deleted, in the same transaction."""
+    TaskCount.objects.move(instance.kind, instance.count_bucket(), None)
+
+
 def format_user(user):
     """Format a user for inclusion in a Slack notification"""
     base_url = 'https://www.muckrock.com'
@@ -168,3 +176,8 @@ post_save.connect(
     sender=ProjectReviewTask,
     dispatch_uid='muckrock.task.signals.notify_project'
 )
+post_delete.connect(
+    uncount_task,
+    sender=Task,
+    dispatch_uid='muckrock.task.signals.uncount_task'
+)
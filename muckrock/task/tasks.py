@@ -3,7 +3,8 @@ Celery tasks for the task application
 """
 
 # Django
-from celery.task import task
+from celery.schedules import crontab
+from celery.task import periodic_task, task
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
@@ -23,7 +24,7 @@ from PyPDF2.utils import PdfReadError
 from muckrock.communication.models import MailCommunication
 from muckrock.foia.models import FOIACommunication, FOIARequest
 from muckrock.task.filters import SnailMailTaskFilterSet
-from muckrock.task.models import SnailMailTask
+from muckrock.task.models import SnailMailTask, TaskCount
 from muckrock.task.pdf import CoverPDF, SnailMailPDF
 
 
@@ -132,3 +133,13 @@ def snail_mail_bulk_pdf_task(pdf_name, get, **kwargs):
     key.key = pdf_name
     key.set_contents_from_file(bulk_pdf)
     key.set_canned_acl('public-read')
+
+
+@periodic_task(
+    run_every=crontab(hour=1, minute=0),
+    name='muckrock.task.tasks.reconcile_task_counts'
+)
+def reconcile_task_counts():
+    """Recount the unresolved tasks, correcting the counters for any tasks
+    changed in bulk without being saved"""
+    TaskCount.objects.reconcile()
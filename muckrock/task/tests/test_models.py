@@ -9,6 +9,7 @@ from django.utils import timezone
 
 # Standard Library
 import logging
+from datetime import date, timedelta
 
 # Third Party
 import mock
@@ -39,8 +40,10 @@ from muckrock.task.models import (
     SnailMailTask,
     StatusChangeTask,
     Task,
+    TaskCount,
 )
 from muckrock.task.signals import domain_blacklist
+from muckrock.task.views import count_tasks
 
 mock_send = mock.Mock()
 
@@ -599,3 +602,44 @@ class TestTaskManager(TestCase):
             returned_tasks, self.tasks,
             'The manager should return all the tasks that incorporate this FOIA.'
         )
+
+
+@mock.patch('muckrock.message.notifications.SlackNotification.send', mock_send)
+class TestTaskCount(TestCase):
+    """Tests for the unresolved task counters"""
+
+    def setUp(self):
+        self.task = FlaggedTaskFactory()
+
+    def test_count(self):
+        """Tasks are counted by kind until they are resolved"""
+        eq_(self.task.kind, 'flaggedtask')
+        eq_(count_tasks()['flagged'], 1)
+        eq_(count_tasks()['all'], 1)
+        Task.objects.get(pk=self.task.pk).resolve()
+        eq_(count_tasks()['flagged'], 0)
+        eq_(count_tasks()['all'], 0)
+
+    def test_defer(self):
+        """Deferred tasks are counted again once their deferral passes"""
+        self.task.defer(date.today() + timedelta(1))
+        eq_(count_tasks()['flagged'], 0)
+        eq_(
+            TaskCount.objects.get(kind='flaggedtask', count=1).date_deferred,
+            date.today() + timedelta(1),
+        )
+        self.task.defer(date.today())
+        eq_(count_tasks()['flagged'], 1)
+
+    def test_delete(self):
+        """Deleted tasks are no longer counted"""
+        self.task.delete()
+        eq_(count_tasks()['flagged'], 0)
+
+    def test_reconcile(self):
+        """Tasks changed in bulk are counted after reconciling"""
+        FlaggedTask.objects.update(resolved=True)
+        eq_(count_tasks()['flagged'], 1)
+        eq_(TaskCount.objects.reconcile(), 1)
+        eq_(count_tasks()['flagged'], 0)
+        eq_(TaskCount.objects.reconcile(), 0)
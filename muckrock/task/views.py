@@ -10,7 +10,6 @@ from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
 from django.core.urlresolvers import resolve
 from django.db import transaction
-from django.db.models import Count
 from django.http import (
     Http404,
     HttpResponse,
@@ -69,29 +68,33 @@ from muckrock.task.models import (
     SnailMailTask,
     StatusChangeTask,
     Task,
+    TaskCount,
 )
 from muckrock.task.pdf import SnailMailPDF
 from muckrock.task.tasks import snail_mail_bulk_pdf_task, submit_review_update
 
+# the counter names used in the navigation for each kind of task
+COUNTERS = [
+    ('orphan', OrphanTask),
+    ('snail_mail', SnailMailTask),
+    ('review_agency', ReviewAgencyTask),
+    ('flagged', FlaggedTask),
+    ('projectreview', ProjectReviewTask),
+    ('new_agency', NewAgencyTask),
+    ('response', ResponseTask),
+    ('status_change', StatusChangeTask),
+    ('crowdfund', CrowdfundTask),
+    ('multirequest', MultiRequestTask),
+    ('portal', PortalTask),
+]
+
 
 def count_tasks():
     """Counts all unresolved tasks and adds them to a dictionary"""
-    count = (
-        Task.objects.get_unresolved().get_undeferred().aggregate(
-            all=Count('id'),
-            orphan=Count('orphantask'),
-            snail_mail=Count('snailmailtask'),
-            review_agency=Count('reviewagencytask'),
-            flagged=Count('flaggedtask'),
-            projectreview=Count('projectreviewtask'),
-            new_agency=Count('newagencytask'),
-            response=Count('responsetask'),
-            status_change=Count('statuschangetask'),
-            crowdfund=Count('crowdfundtask'),
-            multirequest=Count('multirequesttask'),
-            portal=Count('portaltask'),
-        )
-    )
+    # pylint: disable=protected-access
+    counts = TaskCount.objects.get_undeferred()
+    count = {name: counts[model._meta.model_name] for name, model in COUNTERS}
+    count['all'] = sum(counts.values())
     return count
 
 